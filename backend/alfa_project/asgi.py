@@ -3,6 +3,9 @@ ASGI config for alfa_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Além da API, serve o stream de tempo real (/api/tempo-real/, Server-Sent Events).
+Execute com um servidor ASGI, por exemplo: uvicorn alfa_project.asgi:application
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
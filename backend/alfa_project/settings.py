@@ -45,6 +45,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    # Consultas SQL e tempos por requisição (Server-Timing + log app_alfa.instrumentacao)
+    'app_alfa.instrumentacao.InstrumentacaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +90,16 @@ DATABASES = {
     }
 }
 
+# Cache compartilhado por todos os processos (workers): guarda a versão dos dados
+# financeiros (app_alfa/tendencias.py) que invalida séries, categorias e o razão
+# colunar de todos eles. Criar a tabela com: python manage.py createcachetable
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'alfa_cache',
+    }
+}
+
 
 # Validação de senha
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -195,4 +207,62 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'content-range',
+    'x-chunk-sha256',
 ]
+
+# Tempo real (SSE servido pela aplicação ASGI)
+# Broker em memória do processo; troque por uma implementação externa ao usar vários workers
+ALFA_TEMPO_REAL_BROKER = 'app_alfa.tempo_real.BrokerMemoria'
+
+# Threads que geram as miniaturas (WebP/JPEG) das fotos enviadas
+ALFA_IMAGENS_WORKERS = 2
+
+# Upload em partes: arquivos temporários das sessões e tamanho máximo aceito
+ALFA_UPLOADS_DIR = BASE_DIR / 'tmp_uploads'
+ALFA_UPLOAD_TAMANHO_MAXIMO = 200 * 1024 * 1024
+# Horas sem partes novas até a sessão expirar (removida por limpar_uploads_expirados)
+ALFA_UPLOADS_VALIDADE_HORAS = 24
+
+# Downloads protegidos (app_alfa/downloads.py): 'direto' usa FileResponse (sendfile do servidor WSGI);
+# atrás de um proxy use 'x-accel' (nginx, location internal em ALFA_DOWNLOADS_PREFIXO_INTERNO) ou 'x-sendfile'
+ALFA_DOWNLOADS_MODO = 'direto'
+ALFA_DOWNLOADS_PREFIXO_INTERNO = '/protegido/'
+
+# Processos do pool de cartões de membro (endpoint /api/membros/cartoes-lote/); criados por spawn
+# na primeira geração e mantidos enquanto o processo web viver
+ALFA_CARTOES_WORKERS = 2
+
+# Processos que renderizam os PDFs do pacote mensal de relatórios (endpoint /api/relatorios/pacote-mensal/);
+# criados por spawn no primeiro pedido e mantidos enquanto o processo web viver
+ALFA_RELATORIOS_WORKERS = 2
+
+# Gráficos dos relatórios PDF já desenhados, reaproveitados entre relatórios com os mesmos dados
+ALFA_PDF_GRAFICOS_CACHE = 128
+
+# Tempo de cache das séries de tendência financeira (invalidadas a cada transação alterada)
+ALFA_TENDENCIAS_CACHE_SEGUNDOS = 60 * 60
+
+# Memória máxima (bytes) do razão colunar de cada processo; acima disso os anos menos usados são descartados
+ALFA_RAZAO_COLUNAR_MEMORIA = 256 * 1024 * 1024
+
+# Linhas por row group (Parquet) / record batch (Arrow) nas exportações colunares
+ALFA_EXPORTACAO_LINHAS_POR_LOTE = 50_000
+
+# Bytes das planilhas XLSX mantidos em memória; acima disso o arquivo temporário vai para o disco
+ALFA_PLANILHAS_MEMORIA = 8 * 1024 * 1024
+
+# Execuções do mesmo SQL em uma requisição a partir das quais o log aponta um possível N+1
+ALFA_INSTRUMENTACAO_REPETICOES = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Uma linha JSON por requisição (consultas, tempos) e avisos de N+1
+        'app_alfa.instrumentacao': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -27,13 +27,15 @@ from app_alfa.viewsets import (
     TransacaoViewSet, OfertaViewSet, CargoViewSet, AdminViewSet,
     ONGViewSet, IgrejaViewSet, GrupoViewSet, DoacaoViewSet,
     TransferenciaViewSet, FotoEventoViewSet, FotoPostagemViewSet,
-    DocumentoMembroViewSet, EventoPresencaViewSet, EventoComentarioViewSet
+    DocumentoMembroViewSet, EventoPresencaViewSet, EventoComentarioViewSet,
+    UploadSessaoViewSet, FechamentoMensalViewSet, CategoriaFinanceiraViewSet, ExportacaoColunarViewSet
 )
 from app_alfa.relatorio_views import (
-    RelatorioMembrosView, RelatorioFinanceiroView, RelatorioEventosView,
+    RelatorioMembrosView, RelatorioFinanceiroView, RelatorioEventosView, PacoteMensalView,
     DashboardView, EstatisticasMembrosView, EstatisticasFinanceirasView,
     EstatisticasEventosView, ExportarMembrosView, ExportarTransacoesView
 )
+from app_alfa.tempo_real_views import EventosTempoRealView
 
 # Configurar router para viewsets
 router = DefaultRouter()
@@ -55,6 +57,10 @@ router.register(r'fotos-postagens', FotoPostagemViewSet)
 router.register(r'documentos-membros', DocumentoMembroViewSet)
 router.register(r'eventos-presencas', EventoPresencaViewSet)
 router.register(r'eventos-comentarios', EventoComentarioViewSet)
+router.register(r'uploads', UploadSessaoViewSet, basename='uploads')
+router.register(r'fechamentos', FechamentoMensalViewSet)
+router.register(r'categorias-financeiras', CategoriaFinanceiraViewSet, basename='categorias-financeiras')
+router.register(r'exportacoes', ExportacaoColunarViewSet, basename='exportacoes')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -64,6 +70,8 @@ urlpatterns = [
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     
     # API Routes
+    # Álbum sem barra final (o router só gera /api/eventos/<id>/album.zip/)
+    path('api/eventos/<int:pk>/album.zip', EventoViewSet.as_view({'get': 'album'}), name='evento_album'),
     path('api/', include(router.urls)),
     
     # Legacy endpoints (manter para compatibilidade)
@@ -74,10 +82,14 @@ urlpatterns = [
     path('api/relatorios/membros/pdf/', RelatorioMembrosView.as_view(), name='relatorio_membros_pdf'),
     path('api/relatorios/financeiro/pdf/', RelatorioFinanceiroView.as_view(), name='relatorio_financeiro_pdf'),
     path('api/relatorios/eventos/pdf/', RelatorioEventosView.as_view(), name='relatorio_eventos_pdf'),
+    path('api/relatorios/pacote-mensal/', PacoteMensalView.as_view(), name='relatorio_pacote_mensal'),
     path('api/dashboard/', DashboardView.as_view(), name='dashboard'),
     path('api/estatisticas/membros/', EstatisticasMembrosView.as_view(), name='estatisticas_membros'),
     path('api/estatisticas/financeiro/', EstatisticasFinanceirasView.as_view(), name='estatisticas_financeiro'),
     path('api/estatisticas/eventos/', EstatisticasEventosView.as_view(), name='estatisticas_eventos'),
     path('api/exportar/membros/csv/', ExportarMembrosView.as_view(), name='exportar_membros_csv'),
     path('api/exportar/transacoes/csv/', ExportarTransacoesView.as_view(), name='exportar_transacoes_csv'),
+    
+    # Tempo real (Server-Sent Events via ASGI)
+    path('api/tempo-real/', EventosTempoRealView.as_view(), name='tempo_real'),
 ]
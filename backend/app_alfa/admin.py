@@ -7,6 +7,7 @@ from django.forms import PasswordInput
 from .models import (Admin, Usuario, Membro, Grupo, Doacao, Igreja, Evento, 
                      Postagem, FotoEvento, FotoPostagem, Cargo, ONG, Oferta, DistribuicaoOferta,
                      DocumentoMembro, Transacao)
+from . import planilhas
 
 # Registre seus modelos aqui.
 
@@ -165,8 +166,7 @@ class MembroAdmin(admin.ModelAdmin):
     desativar_membros.short_description = 'Desativar membros selecionados'
     
     def exportar_dados(self, request, queryset):
-        # Implementar exportação de dados
-        self.message_user(request, f'Exportação de {queryset.count()} membros iniciada.')
+        return planilhas.resposta('membros', queryset)
     exportar_dados.short_description = 'Exportar dados dos membros selecionados'
 
 @admin.register(DocumentoMembro)
@@ -223,7 +223,7 @@ class EventoAdmin(admin.ModelAdmin):
     get_data_formatada.admin_order_field = 'data'
     
     def get_participantes_count(self, obj):
-        count = obj.presencas.count()
+        count = obj.confirmados_count
         if count > 0:
             return format_html(
                 '<span style="background: #007cba; color: white; padding: 2px 6px; border-radius: 3px; font-size: 11px;">{} participantes</span>',
@@ -231,6 +231,7 @@ class EventoAdmin(admin.ModelAdmin):
             )
         return format_html('<span style="color: #999;">0 participantes</span>')
     get_participantes_count.short_description = 'Participantes'
+    get_participantes_count.admin_order_field = 'confirmados_count'
     
     def duplicar_eventos(self, request, queryset):
         count = 0
@@ -248,7 +249,7 @@ class EventoAdmin(admin.ModelAdmin):
     duplicar_eventos.short_description = 'Duplicar eventos selecionados'
     
     def exportar_eventos(self, request, queryset):
-        self.message_user(request, f'Exportação de {queryset.count()} eventos iniciada.')
+        return planilhas.resposta('eventos', queryset)
     exportar_eventos.short_description = 'Exportar eventos selecionados'
 
 @admin.register(FotoEvento)
@@ -409,7 +410,7 @@ class TransacaoAdmin(admin.ModelAdmin):
     get_descricao_resumida.short_description = 'Descrição'
     
     def exportar_transacoes(self, request, queryset):
-        self.message_user(request, f'Exportação de {queryset.count()} transações iniciada.')
+        return planilhas.resposta('transacoes', queryset)
     exportar_transacoes.short_description = 'Exportar transações selecionadas'
     
     def marcar_como_confirmadas(self, request, queryset):
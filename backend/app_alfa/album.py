@@ -0,0 +1,83 @@
+"""
+Álbum de evento em ZIP gerado sob demanda - Alfa+
+O ZIP é montado enquanto é enviado: cada foto é lida em blocos de tamanho fixo e
+os bytes saem assim que são escritos, então a memória não cresce com o álbum e o
+primeiro byte chega ao navegador antes de qualquer foto ser lida por inteiro.
+
+As entradas são gravadas sem compressão (ZIP_STORED): JPEG/PNG/WebP já são
+comprimidos e recomprimir só gastaria CPU.
+"""
+
+import posixpath
+import zipfile
+
+from django.utils import timezone
+from django.utils.text import slugify
+
+
+TAMANHO_BLOCO = 256 * 1024
+
+
+class SaidaStream:
+    """
+    Destino write-only sem seek(): o zipfile grava cada entrada com data descriptor
+    (CRC e tamanho depois dos dados), que é o que permite enviar sem voltar no arquivo.
+    """
+
+    closed = False  # consultado pelos escritores do pyarrow (exportacao.py)
+
+    def __init__(self):
+        self.partes = []
+        self.posicao = 0
+
+    def write(self, dados):
+        self.partes.append(bytes(dados))
+        self.posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self.posicao
+
+    def flush(self):
+        pass
+
+    def esvaziar(self):
+        dados = b''.join(self.partes)
+        self.partes.clear()
+        return dados
+
+
+def nomes_album(fotos):
+    """001_descricao.jpg, 002_foto.png... sem repetir nomes dentro do ZIP"""
+    for indice, foto in enumerate(fotos, start=1):
+        extensao = posixpath.splitext(foto.imagem.name)[1].lower()
+        yield f'{indice:03d}_{slugify(foto.descricao or "")[:50] or "foto"}{extensao}', foto
+
+
+def gerar_zip(entradas, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera os bytes do ZIP para [(nome no zip, FotoEvento)].
+    Fotos cujo arquivo sumiu do disco são puladas.
+    """
+    saida = SaidaStream()
+    with zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_STORED) as arquivo_zip:
+        for nome, foto in entradas:
+            try:
+                origem = foto.imagem.open('rb')
+            except FileNotFoundError:
+                continue
+
+            with origem:
+                data = timezone.localtime(foto.data_upload) if foto.data_upload else timezone.localtime()
+                info = zipfile.ZipInfo(nome, date_time=data.timetuple()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                # Tamanho antecipado: o zipfile decide sozinho se precisa de ZIP64 (> 4 GB)
+                info.file_size = foto.imagem.size
+                with arquivo_zip.open(info, 'w') as destino:
+                    yield saida.esvaziar()  # cabeçalho local sai antes dos dados
+                    for bloco in iter(lambda: origem.read(tamanho_bloco), b''):
+                        destino.write(bloco)
+                        yield saida.esvaziar()
+            yield saida.esvaziar()
+    # Diretório central
+    yield saida.esvaziar()
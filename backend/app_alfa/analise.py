@@ -0,0 +1,219 @@
+"""
+Análise financeira vetorizada (NumPy) - Alfa+
+As transações do intervalo são lidas uma vez com values_list e viram colunas
+NumPy: dia (datetime64[D]), valor assinado em centavos (int64; entradas positivas,
+saídas negativas) e código da CategoriaFinanceira. Totais mensais, médias móveis,
+variação anual, sazonalidade e projeção do saldo são operações sobre essas colunas,
+sem laços Python sobre Decimal.
+
+Somas são feitas em centavos inteiros (exatas); só médias e projeções usam float e
+são arredondadas para o centavo na saída.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from operator import itemgetter
+
+import numpy as np
+from django.utils import timezone
+
+from .models import CategoriaFinanceira, FechamentoMensal, ResumoFinanceiroMensal, Transacao
+
+
+JANELA_PADRAO = 3
+DIAS_RITMO = 90  # dias usados para o ritmo diário da projeção
+ORDINAL_EPOCA = date(1970, 1, 1).toordinal()  # dia 0 do datetime64
+
+
+def somar_meses(dia, meses):
+    """Primeiro dia do mês `meses` meses depois (ou antes, se negativo) do mês de `dia`"""
+    indice = dia.year * 12 + dia.month - 1 + meses
+    return dia.replace(year=indice // 12, month=indice % 12 + 1, day=1)
+
+
+def _reais(centavos):
+    if centavos is None or np.isnan(centavos):
+        return None
+    return Decimal(int(np.rint(centavos))).scaleb(-2)
+
+
+class ColunasFinanceiras:
+    """Colunas (dia, centavos assinados, categoria) de um conjunto de transações"""
+
+    def __init__(self, dias, centavos, categorias):
+        self.dias = dias
+        self.centavos = centavos
+        self.categorias = categorias
+
+    @classmethod
+    def de_linhas(cls, linhas):
+        """[(data, tipo, valor Decimal, categoria_financeira_id)] -> colunas"""
+        quantidade = len(linhas)
+
+        def coluna(posicao, tipo, conversao=None):
+            valores = map(itemgetter(posicao), linhas)
+            return np.fromiter(map(conversao, valores) if conversao else valores, dtype=tipo, count=quantidade)
+
+        dias = (coluna(0, np.int64, date.toordinal) - ORDINAL_EPOCA).astype('datetime64[D]')
+        # valor tem no máximo 10 dígitos: em float o erro fica muito abaixo de meio centavo,
+        # então o arredondamento devolve o inteiro exato (bem mais rápido que Decimal.scaleb)
+        valores = np.rint(coluna(2, np.float64) * 100).astype(np.int64)
+        entradas = coluna(1, bool, Transacao.ENTRADA.__eq__)
+        categorias = coluna(3, np.int64, lambda codigo: codigo or 0)
+        return cls(dias, np.where(entradas, valores, -valores), categorias)
+
+    @classmethod
+    def carregar(cls, inicio, fim):
+        linhas = list(Transacao.objects.filter(data__gte=inicio, data__lte=fim).values_list(
+            'data', 'tipo', 'valor', 'categoria_financeira_id'
+        ))
+        return cls.de_linhas(linhas)
+
+    def entre(self, inicio, fim):
+        """Máscara das linhas com dia entre `inicio` e `fim`, inclusive"""
+        return (self.dias >= np.datetime64(inicio, 'D')) & (self.dias <= np.datetime64(fim, 'D'))
+
+
+def totais_mensais(colunas, primeiro_mes, quantidade_meses):
+    """(entradas, saídas) em centavos por mês a partir de `primeiro_mes`; saídas positivas"""
+    indices = (colunas.dias.astype('datetime64[M]') - np.datetime64(primeiro_mes, 'M')).astype(np.int64)
+    validos = (indices >= 0) & (indices < quantidade_meses)
+    indices, centavos = indices[validos], colunas.centavos[validos]
+
+    entradas = np.zeros(quantidade_meses, dtype=np.int64)
+    saidas = np.zeros(quantidade_meses, dtype=np.int64)
+    positivos = centavos > 0
+    np.add.at(entradas, indices[positivos], centavos[positivos])
+    np.add.at(saidas, indices[~positivos], -centavos[~positivos])
+    return entradas, saidas
+
+
+def media_movel(valores, janela):
+    """Média dos últimos `janela` valores; NaN enquanto a janela não está completa"""
+    medias = np.full(len(valores), np.nan)
+    if janela <= len(valores):
+        acumulado = np.concatenate(([0], np.cumsum(valores)))
+        medias[janela - 1:] = (acumulado[janela:] - acumulado[:-janela]) / janela
+    return medias
+
+
+def variacao_anual(valores):
+    """(diferença, percentual) de cada mês contra o mesmo mês do ano anterior; NaN sem base"""
+    diferenca = np.full(len(valores), np.nan)
+    percentual = np.full(len(valores), np.nan)
+    if len(valores) > 12:
+        base = valores[:-12].astype(float)
+        diferenca[12:] = valores[12:] - valores[:-12]
+        com_base = base != 0
+        percentual[12:][com_base] = diferenca[12:][com_base] / np.abs(base[com_base]) * 100
+    return diferenca, percentual
+
+
+def sazonalidade(primeiro_mes, *series):
+    """Média de cada série por mês do ano (índice 0 = janeiro); NaN para meses sem ocorrência"""
+    quantidade_meses = len(series[0])
+    mes_do_ano = (np.arange(quantidade_meses) + primeiro_mes.month - 1) % 12
+    ocorrencias = np.bincount(mes_do_ano, minlength=12)
+    medias = []
+    for valores in series:
+        soma = np.zeros(12, dtype=np.int64)
+        np.add.at(soma, mes_do_ano, valores)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias.append(np.where(ocorrencias > 0, soma / np.maximum(ocorrencias, 1), np.nan))
+    return medias
+
+
+def totais_categorias(colunas, mascara):
+    """{categoria_financeira_id: centavos assinados} das linhas selecionadas"""
+    codigos, posicoes = np.unique(colunas.categorias[mascara], return_inverse=True)
+    totais = np.zeros(len(codigos), dtype=np.int64)
+    np.add.at(totais, posicoes, colunas.centavos[mascara])
+    return dict(zip(codigos.tolist(), totais.tolist()))
+
+
+def projecao_fim_mes(colunas, hoje, saldo_inicio_mes):
+    """
+    Saldo projetado para o último dia do mês de `hoje`: saldo no início do mês +
+    movimento do mês até hoje + ritmo diário dos últimos DIAS_RITMO dias x dias restantes.
+    """
+    mes = hoje.replace(day=1)
+    fim_mes = ResumoFinanceiroMensal.proximo_mes(mes) - timedelta(days=1)
+    realizado = int(colunas.centavos[colunas.entre(mes, hoje)].sum())
+    ritmo = colunas.centavos[colunas.entre(hoje - timedelta(days=DIAS_RITMO - 1), hoje)].sum() / DIAS_RITMO
+    dias_restantes = (fim_mes - hoje).days
+    saldo_inicial = int(saldo_inicio_mes.scaleb(2))
+    return {
+        'mes': mes,
+        'saldo_inicial': _reais(saldo_inicial),
+        'realizado': _reais(realizado),
+        'ritmo_diario': _reais(ritmo),
+        'dias_restantes': dias_restantes,
+        'saldo_projetado': _reais(saldo_inicial + realizado + ritmo * dias_restantes),
+    }
+
+
+def calcular(colunas, inicio, fim, janela=JANELA_PADRAO):
+    """
+    Séries mensais de `inicio` a `fim`. As colunas devem cobrir também os 12 meses
+    anteriores: médias móveis e variação anual do começo do intervalo usam esse histórico.
+    """
+    primeiro_mes = somar_meses(inicio, -12)
+    quantidade_meses = (fim.year - primeiro_mes.year) * 12 + fim.month - primeiro_mes.month + 1
+    entradas, saidas = totais_mensais(colunas, primeiro_mes, quantidade_meses)
+    saldos = entradas - saidas
+
+    medias = media_movel(saldos, janela)
+    diferenca, percentual = variacao_anual(saldos)
+    media_entradas, media_saidas, media_saldos = sazonalidade(primeiro_mes, entradas, saidas, saldos)
+
+    meses = []
+    for indice in range(12, quantidade_meses):
+        meses.append({
+            'mes': somar_meses(primeiro_mes, indice),
+            'entradas': _reais(entradas[indice]),
+            'saidas': _reais(saidas[indice]),
+            'saldo': _reais(saldos[indice]),
+            'media_movel': _reais(medias[indice]),
+            'variacao_anual': _reais(diferenca[indice]),
+            'variacao_anual_percentual': None if np.isnan(percentual[indice]) else round(float(percentual[indice]), 1),
+        })
+
+    return {
+        'janela': janela,
+        'meses': meses,
+        'sazonalidade': [
+            {
+                'mes': indice + 1,
+                'entradas': _reais(media_entradas[indice]),
+                'saidas': _reais(media_saidas[indice]),
+                'saldo': _reais(media_saldos[indice]),
+            }
+            for indice in range(12)
+        ],
+        'categorias': totais_categorias(colunas, colunas.entre(inicio, fim)),
+    }
+
+
+def analise_financeira(inicio, fim, janela=JANELA_PADRAO, hoje=None):
+    """Médias móveis, variação anual, sazonalidade, totais por categoria e projeção do mês atual"""
+    hoje = hoje or timezone.localdate()
+    inicio = inicio.replace(day=1)
+    colunas = ColunasFinanceiras.carregar(
+        min(somar_meses(inicio, -12), hoje - timedelta(days=DIAS_RITMO - 1)), max(fim, hoje)
+    )
+
+    resultado = calcular(colunas, inicio, fim, janela)
+    nomes = CategoriaFinanceira.objects.in_bulk(list(resultado['categorias']))
+    resultado['categorias'] = sorted(
+        (
+            {'categoria': nomes[codigo].nome if codigo in nomes else 'Sem categoria', 'total': _reais(total)}
+            for codigo, total in resultado['categorias'].items()
+        ),
+        key=lambda item: -abs(item['total']),
+    )
+    resultado.update({
+        'inicio': inicio,
+        'fim': fim,
+        'projecao': projecao_fim_mes(colunas, hoje, FechamentoMensal.saldo_ate(hoje.replace(day=1))),
+    })
+    return resultado
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AppalfaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_alfa'
+
+    def ready(self):
+        from django.core import checks
+
+        from . import signals  # noqa: F401
+        from .tendencias import verificar_cache_compartilhado
+
+        checks.register(verificar_cache_compartilhado, checks.Tags.caches)
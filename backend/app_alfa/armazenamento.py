@@ -0,0 +1,67 @@
+"""
+Armazenamento endereçado por conteúdo - Alfa+
+Fotos de eventos/postagens e documentos de membros são gravados pelo SHA-256 do
+conteúdo em subpastas fragmentadas: conteudo/ab/cd/abcd...<hash>.jpg
+
+O mesmo arquivo enviado várias vezes (ex.: o cartaz anexado a diversas postagens)
+ocupa o disco uma única vez, e nenhuma pasta cresce além de 256 entradas. Cada blob
+tem uma linha em ArquivoConteudo com o número de referências; os que ficam sem
+referência são removidos pelo comando coletar_arquivos_orfaos.
+"""
+
+import hashlib
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+
+
+PASTA_CONTEUDO = 'conteudo'
+
+
+def caminho_conteudo(digest, nome_original=''):
+    """SHA-256 em hexadecimal -> conteudo/ab/cd/<hash><extensão do nome original>"""
+    _, extensao = posixpath.splitext(nome_original)
+    return posixpath.join(PASTA_CONTEUDO, digest[:2], digest[2:4], digest + extensao.lower())
+
+
+def calcular_sha256(conteudo):
+    digest = hashlib.sha256()
+    tamanho = 0
+    for bloco in conteudo.chunks():
+        digest.update(bloco)
+        tamanho += len(bloco)
+    if hasattr(conteudo, 'seek'):
+        conteudo.seek(0)
+    return digest.hexdigest(), tamanho
+
+
+class ArmazenamentoConteudo(FileSystemStorage):
+    """
+    FileSystemStorage (mesmo MEDIA_ROOT/MEDIA_URL do storage padrão) que troca o nome
+    do arquivo pelo hash do conteúdo. Se o blob já existe nada é gravado.
+
+    Sobrescrever é seguro: o nome só se repete quando o conteúdo é idêntico. Por isso
+    allow_overwrite=True, que também evita o sufixo aleatório de get_available_name.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+
+    def _save(self, name, content):
+        from .models import ArquivoConteudo
+
+        digest, tamanho = calcular_sha256(content)
+        nome = caminho_conteudo(digest, name)
+        if not self.exists(nome):
+            nome = super()._save(nome, content)
+        ArquivoConteudo.registrar(nome, tamanho)
+        return nome
+
+
+armazenamento_conteudo = ArmazenamentoConteudo()
+
+
+def get_armazenamento_conteudo():
+    """Usado como storage= dos campos de arquivo (referência estável para as migrações)"""
+    return armazenamento_conteudo
@@ -0,0 +1,225 @@
+"""
+Geração de cartões de membro em lote - Alfa+
+O processo principal lê os membros e monta os dados de cada cartão; os processos do
+pool só renderizam (WeasyPrint), sem acesso ao banco. Cada worker compila o template
+e carrega as fontes uma única vez e os reutiliza em todos os cartões que recebe.
+
+Os processos são criados por spawn (processos.novo_pool), nunca por fork. O endpoint
+usa um pool único do processo (get_pool), criado na primeira geração e reaproveitado
+pelas seguintes, para não repetir django.setup() a cada requisição.
+
+Cada cartão guarda em DocumentoMembro.assinatura o hash dos dados impressos e do
+template; membros cujo cartão mais recente tem a mesma assinatura são pulados.
+"""
+
+import hashlib
+import json
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .processos import novo_pool
+
+
+TEMPLATE_CARTAO = 'cartao_membro_template.html'
+
+MODO_DOCUMENTOS = 'documentos'  # um PDF por membro, salvo como DocumentoMembro
+MODO_PDF = 'pdf'  # PDFs com um cartão por página, em volumes de até CARTOES_POR_VOLUME
+
+CARTOES_POR_VOLUME = 200
+
+
+def dados_cartao(membro):
+    """Tudo o que é impresso no cartão, em tipos simples (vai para os processos do pool)"""
+    foto_uri = None
+    if membro.foto:
+        try:
+            foto_uri = Path(membro.foto.path).as_uri()
+        except (NotImplementedError, ValueError):
+            foto_uri = None
+    return {
+        'id': membro.pk,
+        'nome': membro.nome,
+        'cpf': membro.cpf or '',
+        'data_nascimento': membro.data_nascimento.strftime('%d/%m/%Y') if membro.data_nascimento else '',
+        'get_status_display': membro.get_status_display(),
+        'codigo_cartao': membro.codigo_cartao,
+        'validade': timezone.localtime(membro.created_at).strftime('%d/%m/%Y') if membro.created_at else '',
+        'foto_uri': foto_uri,
+    }
+
+
+def _versao_template():
+    origem = get_template(TEMPLATE_CARTAO).template.source
+    return hashlib.sha256(origem.encode()).hexdigest()
+
+
+def assinatura_cartao(dados, versao_template):
+    conteudo = json.dumps(dados, sort_keys=True, default=str) + versao_template
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+
+def selecionar_pendentes(membros, forcar=False):
+    """
+    Retorna ({membro_id: (dados, assinatura)} a gerar, quantidade pulada).
+    A assinatura do último cartão de cada membro vem de uma única consulta.
+    """
+    from .models import DocumentoMembro
+
+    versao = _versao_template()
+    candidatos = {}
+    for membro in membros:
+        dados = dados_cartao(membro)
+        candidatos[membro.pk] = (dados, assinatura_cartao(dados, versao))
+
+    if forcar:
+        return candidatos, 0
+
+    ultimas = {}
+    for membro_id, assinatura in DocumentoMembro.objects.filter(
+        tipo=DocumentoMembro.CARTAO_MEMBRO, membro_id__in=candidatos
+    ).order_by('membro_id', '-gerado_em', '-id').values_list('membro_id', 'assinatura'):
+        ultimas.setdefault(membro_id, assinatura)
+
+    pendentes = {
+        membro_id: item for membro_id, item in candidatos.items()
+        if ultimas.get(membro_id) != item[1]
+    }
+    return pendentes, len(candidatos) - len(pendentes)
+
+
+# Estado de cada processo do pool (ou do processo principal quando workers=1)
+_template = None
+_fontes = None
+
+
+def _preparar():
+    global _template, _fontes
+    from weasyprint.text.fonts import FontConfiguration
+
+    _template = get_template(TEMPLATE_CARTAO)
+    _fontes = FontConfiguration()
+
+
+def _novo_pool(workers):
+    return novo_pool(workers, preparar='app_alfa.cartoes._preparar')
+
+
+_pool = None
+_trava_pool = threading.Lock()
+
+
+def get_pool():
+    """Pool de longa duração do processo web, com ALFA_CARTOES_WORKERS processos"""
+    global _pool
+    with _trava_pool:
+        if _pool is None:
+            _pool = _novo_pool(getattr(settings, 'ALFA_CARTOES_WORKERS', 1))
+        return _pool
+
+
+def encerrar_pool():
+    """Encerra o pool compartilhado; o próximo get_pool() cria outro"""
+    global _pool
+    with _trava_pool:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _renderizar(dados):
+    import weasyprint
+
+    if _template is None:
+        _preparar()
+    html = _template.render({'membro': dados})
+    return weasyprint.HTML(string=html).render(font_config=_fontes)
+
+
+def renderizar_cartao(dados):
+    """PDF de um cartão"""
+    return _renderizar(dados).write_pdf()
+
+
+def renderizar_individuais(lote):
+    """[(membro_id, dados)] -> [(membro_id, bytes do PDF)]"""
+    return [(membro_id, renderizar_cartao(dados)) for membro_id, dados in lote]
+
+
+def renderizar_volume(lote):
+    """[dados] -> bytes de um PDF com um cartão por página"""
+    documentos = [_renderizar(dados) for dados in lote]
+    paginas = [pagina for documento in documentos for pagina in documento.pages]
+    return documentos[0].copy(paginas).write_pdf()
+
+
+def _executar(funcao, lotes, workers, pool=None):
+    """
+    Resultados na ordem dos lotes, conforme ficam prontos (sem acumular todos na memória).
+    Sem `pool`, cria um temporário com `workers` processos (comando de gerenciamento).
+    """
+    if workers <= 1 or len(lotes) <= 1:
+        for lote in lotes:
+            yield funcao(lote)
+        return
+    if pool is None:
+        with _novo_pool(workers) as temporario:
+            yield from temporario.map(funcao, lotes)
+        return
+    try:
+        yield from pool.map(funcao, lotes)
+    except BrokenProcessPool:
+        # Um worker morreu (ex.: sem memória); a próxima geração recomeça com outro pool
+        if pool is _pool:
+            encerrar_pool()
+        raise
+
+
+def _dividir(itens, partes):
+    tamanho = max(1, -(-len(itens) // partes))
+    return [itens[inicio:inicio + tamanho] for inicio in range(0, len(itens), tamanho)]
+
+
+def gerar_documentos(membros, workers=1, forcar=False, gerado_por=None, pool=None):
+    """
+    Gera um cartão por membro (apenas os que mudaram) e salva como DocumentoMembro.
+    `pool` (ex.: get_pool()) reaproveita processos já iniciados; `workers` deve ser o tamanho dele.
+    Retorna {'gerados': n, 'ignorados': n}.
+    """
+    from .models import DocumentoMembro
+
+    pendentes, ignorados = selecionar_pendentes(membros, forcar)
+    itens = [(membro_id, dados) for membro_id, (dados, _) in pendentes.items()]
+    # Lotes menores que o necessário para equilibrar a carga entre os processos
+    lotes = _dividir(itens, workers * 4)
+
+    gerados = 0
+    for resultado in _executar(renderizar_individuais, lotes, workers, pool):
+        for membro_id, pdf in resultado:
+            documento = DocumentoMembro(
+                membro_id=membro_id,
+                tipo=DocumentoMembro.CARTAO_MEMBRO,
+                gerado_por=gerado_por,
+                assinatura=pendentes[membro_id][1],
+            )
+            documento.arquivo.save(f'cartao_membro_{membro_id}.pdf', ContentFile(pdf), save=True)
+            gerados += 1
+
+    return {'gerados': gerados, 'ignorados': ignorados}
+
+
+def gerar_volumes(membros, workers=1, por_volume=CARTOES_POR_VOLUME):
+    """
+    Renderiza os cartões em PDFs de várias páginas, cada volume em um processo.
+    Retorna a lista de PDFs (bytes) na ordem dos membros.
+    """
+    dados = [dados_cartao(membro) for membro in membros]
+    if not dados:
+        return []
+    volumes = [dados[inicio:inicio + por_volume] for inicio in range(0, len(dados), por_volume)]
+    return list(_executar(renderizar_volume, volumes, workers))
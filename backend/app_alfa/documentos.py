@@ -0,0 +1,78 @@
+"""
+Documentos PDF gerados com cache por versão - Alfa+
+A carta de transferência é gerada uma vez por versão da Transferencia (updated_at) e
+guardada como DocumentoMembro(tipo='transferencia'); downloads seguintes são só a
+leitura do arquivo, servida com ETag/Range por app_alfa/downloads.py.
+"""
+
+import hashlib
+from functools import lru_cache
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+
+@lru_cache(maxsize=None)
+def estilos_pdf():
+    """StyleSheet do ReportLab montado uma vez por processo (os estilos não são alterados)"""
+    return getSampleStyleSheet()
+
+
+def versao_transferencia(transferencia):
+    chave = f'transferencia:{transferencia.pk}:{transferencia.updated_at.isoformat()}'
+    return hashlib.sha256(chave.encode()).hexdigest()
+
+
+def renderizar_transferencia(transferencia):
+    """PDF da carta de transferência (espera membro e igrejas já carregados via select_related)"""
+    buffer = BytesIO()
+    # invariant: mesma versão gera os mesmos bytes (sem data/ID aleatório no PDF)
+    doc = SimpleDocTemplate(buffer, pagesize=letter, invariant=True)
+    styles = estilos_pdf()
+    story = [
+        Paragraph("Documento de Transferência de Membro", styles['Title']),
+        Spacer(1, 12),
+        Paragraph(f"Membro: {transferencia.membro.nome}", styles['Normal']),
+        Paragraph(f"Igreja Origem: {transferencia.igreja_origem.nome}", styles['Normal']),
+        Paragraph(f"Igreja Destino: {transferencia.igreja_destino.nome}", styles['Normal']),
+        Paragraph(f"Data: {transferencia.data_transferencia}", styles['Normal']),
+        Paragraph(f"Motivo: {transferencia.motivo}", styles['Normal']),
+    ]
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def documento_transferencia(transferencia):
+    """DocumentoMembro da versão atual da transferência, gerando-o só se ainda não existir"""
+    from .models import DocumentoMembro, Transferencia
+
+    assinatura = versao_transferencia(transferencia)
+    documentos = DocumentoMembro.objects.filter(
+        membro_id=transferencia.membro_id, tipo=DocumentoMembro.TRANSFERENCIA, assinatura=assinatura
+    ).exclude(arquivo='').order_by('-gerado_em', '-id')
+
+    documento = documentos.first()
+    if documento and documento.arquivo.storage.exists(documento.arquivo.name):
+        return documento
+
+    with transaction.atomic():
+        # Dois downloads simultâneos da versão nova não geram o PDF duas vezes
+        Transferencia._base_manager.select_for_update().filter(pk=transferencia.pk).first()
+        documento = documentos.first()
+        if documento and documento.arquivo.storage.exists(documento.arquivo.name):
+            return documento
+
+        documento = DocumentoMembro(
+            membro_id=transferencia.membro_id,
+            tipo=DocumentoMembro.TRANSFERENCIA,
+            gerado_por_id=transferencia.gerado_por_id,
+            assinatura=assinatura,
+        )
+        documento.arquivo.save(
+            f'transferencia_{transferencia.pk}.pdf', ContentFile(renderizar_transferencia(transferencia)), save=True
+        )
+    return documento
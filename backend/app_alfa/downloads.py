@@ -0,0 +1,143 @@
+"""
+Downloads protegidos - Alfa+
+Depois da checagem de permissão (feita pelo viewset) a transferência dos bytes fica
+com o sistema operacional ou com o proxy, conforme settings.ALFA_DOWNLOADS_MODO:
+
+- 'direto': FileResponse com o arquivo aberto; servidores WSGI com wsgi.file_wrapper
+  (gunicorn, uwsgi) usam sendfile() a partir da posição atual e do Content-Length,
+  inclusive para intervalos (Range)
+- 'x-accel': resposta vazia com X-Accel-Redirect para uma location internal do nginx
+- 'x-sendfile': resposta vazia com X-Sendfile (Apache mod_xsendfile, lighttpd)
+
+Suporta Range de um intervalo, If-Range, If-None-Match e ETag forte.
+"""
+
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+HASH_CONTEUDO = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ArquivoLimitado:
+    """
+    Lê no máximo `tamanho` bytes a partir da posição atual do arquivo.
+    Expõe fileno() para que o wsgi.file_wrapper continue usando sendfile().
+    """
+
+    def __init__(self, arquivo, tamanho):
+        self.arquivo = arquivo
+        self.restante = tamanho
+
+    def read(self, tamanho=-1):
+        if self.restante <= 0:
+            return b''
+        if tamanho is None or tamanho < 0 or tamanho > self.restante:
+            tamanho = self.restante
+        dados = self.arquivo.read(tamanho)
+        self.restante -= len(dados)
+        return dados
+
+    def fileno(self):
+        return self.arquivo.fileno()
+
+    def close(self):
+        self.arquivo.close()
+
+
+def calcular_etag(nome, estado):
+    """
+    Blobs do armazenamento endereçado por conteúdo já têm o SHA-256 no nome; os
+    demais usam inode-tamanho-mtime (arquivos não são reescritos no lugar).
+    """
+    base = posixpath.splitext(posixpath.basename(nome))[0]
+    if HASH_CONTEUDO.match(base):
+        return quote_etag(base)
+    return quote_etag(f'{estado.st_ino:x}-{estado.st_size:x}-{estado.st_mtime_ns:x}')
+
+
+def interpretar_range(valor, tamanho):
+    """
+    'bytes=inicio-fim' -> (inicio, fim) inclusivo; None para ignorar o cabeçalho
+    (ausente ou com vários intervalos); levanta ValueError se não satisfazível.
+    """
+    encontrado = RANGE.match(valor or '')
+    if not encontrado:
+        return None
+    inicio, fim = encontrado.groups()
+    if not inicio and not fim:
+        return None
+    if not inicio:
+        # Sufixo: últimos N bytes
+        inicio, fim = max(tamanho - int(fim), 0), tamanho - 1
+    else:
+        inicio = int(inicio)
+        fim = min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio >= tamanho or inicio > fim:
+        raise ValueError('Range não satisfazível')
+    return inicio, fim
+
+
+def _etag_confere(cabecalho, etag):
+    valores = [valor.strip() for valor in cabecalho.split(',')]
+    return '*' in valores or etag in valores
+
+
+def servir_arquivo(request, arquivo, nome_download=None, anexo=True):
+    """Resposta de download para um FieldFile já autorizado"""
+    caminho = arquivo.path
+    estado = os.stat(caminho)
+    tamanho = estado.st_size
+    etag = calcular_etag(arquivo.name, estado)
+    nome_download = nome_download or posixpath.basename(arquivo.name)
+    tipo = mimetypes.guess_type(nome_download)[0] or 'application/octet-stream'
+
+    def cabecalhos(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(estado.st_mtime)
+        response['Accept-Ranges'] = 'bytes'
+        response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+        return response
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and _etag_confere(if_none_match, etag):
+        return cabecalhos(HttpResponse(status=304))
+
+    intervalo = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range or if_range == etag:
+        try:
+            intervalo = interpretar_range(request.META.get('HTTP_RANGE'), tamanho)
+        except ValueError:
+            response = cabecalhos(HttpResponse(status=416))
+            response['Content-Range'] = f'bytes */{tamanho}'
+            return response
+
+    modo = getattr(settings, 'ALFA_DOWNLOADS_MODO', 'direto')
+    if modo in ('x-accel', 'x-sendfile'):
+        # O proxy lê o arquivo e atende o Range por conta própria
+        response = HttpResponse(content_type=tipo)
+        if modo == 'x-accel':
+            prefixo = getattr(settings, 'ALFA_DOWNLOADS_PREFIXO_INTERNO', '/protegido/')
+            response['X-Accel-Redirect'] = prefixo.rstrip('/') + '/' + arquivo.name
+        else:
+            response['X-Sendfile'] = caminho
+    else:
+        inicio, fim = intervalo or (0, tamanho - 1)
+        handle = open(caminho, 'rb')
+        handle.seek(inicio)
+        response = FileResponse(ArquivoLimitado(handle, fim - inicio + 1), content_type=tipo)
+        response['Content-Length'] = fim - inicio + 1
+        if intervalo:
+            response.status_code = 206
+            response['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+
+    response['Content-Disposition'] = content_disposition_header(anexo, nome_download)
+    return cabecalhos(response)
@@ -0,0 +1,134 @@
+"""
+Exportação colunar (Parquet e Arrow IPC) - Alfa+
+As tabelas analíticas saem em formatos tipados que planilhas e ferramentas de BI
+leem direto, sem o custo de gerar e interpretar CSV.
+
+- Os tipos vêm dos campos do modelo: DecimalField -> decimal128(max_digits,
+  decimal_places) (ponto fixo, sem float), DateField -> date32, DateTimeField ->
+  timestamp em UTC, chaves estrangeiras -> int64.
+- As linhas são lidas com iterator() (cursor no servidor no PostgreSQL) e cada lote
+  vira um row group do Parquet ou um record batch do stream Arrow, enviado ao cliente
+  assim que é escrito: a memória depende do tamanho do lote, não da tabela.
+- Exportação incremental: com `desde`, saem as linhas com updated_at a partir dessa
+  marca, inclusive as excluídas (deleted_at preenchido), para o destino remover.
+  A marca para a próxima exportação vai no cabeçalho X-Exportacao-Marca, recuada em
+  models.FOLGA_MARCA: updated_at é gravado no save(), e uma linha salva antes da
+  leitura mas confirmada depois dela ficaria fora desta exportação e da seguinte.
+  Por isso linhas podem sair de novo na exportação seguinte (deduplicar por id).
+"""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.db import models
+
+from .album import SaidaStream
+from .models import DistribuicaoOferta, Evento, EventoPresenca, Membro, Oferta, Transacao
+
+
+PARQUET = 'parquet'
+ARROW = 'arrow'
+FORMATOS = {
+    PARQUET: ('application/vnd.apache.parquet', 'parquet'),
+    ARROW: ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+CAMPO_MARCA = 'updated_at'
+AUDITORIA = ('created_at', 'updated_at', 'deleted_at')
+
+
+class Tabela:
+    """Modelo e campos exportados; o esquema Arrow é derivado dos campos do modelo"""
+
+    def __init__(self, modelo, campos):
+        self.modelo = modelo
+        self.campos = campos
+
+    @property
+    def incremental(self):
+        return any(campo.name == CAMPO_MARCA for campo in self.modelo._meta.get_fields())
+
+    def tipo_arrow(self, campo):
+        if isinstance(campo, models.ForeignKey):
+            return pa.int64()
+        if isinstance(campo, models.DecimalField):
+            return pa.decimal128(campo.max_digits, campo.decimal_places)
+        if isinstance(campo, models.DateTimeField):
+            return pa.timestamp('us', tz='UTC' if settings.USE_TZ else None)
+        if isinstance(campo, models.DateField):
+            return pa.date32()
+        if isinstance(campo, models.BooleanField):
+            return pa.bool_()
+        if isinstance(campo, (models.AutoField, models.BigAutoField, models.IntegerField)):
+            return pa.int64()
+        return pa.string()
+
+    def colunas(self):
+        """[(coluna, tipo Arrow)]; chaves estrangeiras saem como <campo>_id"""
+        campos = [self.modelo._meta.get_field(nome) for nome in self.campos]
+        return [(campo.attname, self.tipo_arrow(campo)) for campo in campos]
+
+    def esquema(self):
+        return pa.schema([pa.field(nome, tipo) for nome, tipo in self.colunas()])
+
+    def consulta(self, desde=None):
+        if desde is None:
+            return self.modelo.objects.order_by('pk')
+        # _base_manager inclui as linhas com exclusão lógica
+        return self.modelo._base_manager.filter(**{f'{CAMPO_MARCA}__gte': desde}).order_by('pk')
+
+    def lotes(self, desde=None, linhas_por_lote=None):
+        """RecordBatches de até `linhas_por_lote` linhas"""
+        linhas_por_lote = linhas_por_lote or getattr(settings, 'ALFA_EXPORTACAO_LINHAS_POR_LOTE', 50_000)
+        colunas = self.colunas()
+        esquema = self.esquema()
+
+        def lote(linhas):
+            valores = zip(*linhas)
+            return pa.RecordBatch.from_arrays(
+                [pa.array(coluna, type=tipo) for coluna, (_, tipo) in zip(valores, colunas)], schema=esquema
+            )
+
+        linhas = []
+        consulta = self.consulta(desde).values_list(*[nome for nome, _ in colunas])
+        for linha in consulta.iterator(chunk_size=linhas_por_lote):
+            linhas.append(linha)
+            if len(linhas) == linhas_por_lote:
+                yield lote(linhas)
+                linhas = []
+        if linhas:
+            yield lote(linhas)
+
+
+TABELAS = {
+    'transacoes': Tabela(Transacao, (
+        'id', 'data', 'tipo', 'categoria', 'categoria_financeira', 'valor', 'metodo_pagamento',
+        'descricao', 'registrado_por') + AUDITORIA),
+    # Sem senha e documentos pessoais (CPF/RG)
+    'membros': Tabela(Membro, (
+        'id', 'nome', 'email', 'telefone', 'data_nascimento', 'status', 'cadastrado_por') + AUDITORIA),
+    'eventos': Tabela(Evento, (
+        'id', 'titulo', 'data', 'local', 'organizador', 'confirmados_count', 'comentarios_count') + AUDITORIA),
+    'presencas': Tabela(EventoPresenca, (
+        'id', 'evento', 'membro', 'confirmado', 'data_confirmacao') + AUDITORIA),
+    'ofertas': Tabela(Oferta, (
+        'id', 'valor', 'data', 'descricao', 'registrado_por', 'is_publico') + AUDITORIA),
+    'distribuicoes': Tabela(DistribuicaoOferta, (
+        'id', 'oferta', 'ong', 'valor', 'destino', 'meio_envio', 'data_envio')),
+}
+
+
+def exportar(tabela, formato, desde=None, linhas_por_lote=None):
+    """Bytes do arquivo (Parquet ou stream Arrow IPC), gerados lote a lote"""
+    tabela = TABELAS[tabela]
+    saida = SaidaStream()
+    if formato == PARQUET:
+        escritor = pq.ParquetWriter(saida, tabela.esquema(), compression='zstd')
+    else:
+        escritor = pa.ipc.new_stream(saida, tabela.esquema())
+    with escritor:
+        for lote in tabela.lotes(desde, linhas_por_lote):
+            escritor.write_batch(lote)
+            yield saida.esvaziar()
+    # Rodapé do Parquet / fim do stream
+    yield saida.esvaziar()
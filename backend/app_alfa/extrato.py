@@ -0,0 +1,107 @@
+"""
+Extrato do caixa com saldo corrente - Alfa+
+O saldo de cada linha é calculado no banco com uma window function (SUM ... OVER
+ORDER BY data, id) e a paginação é por keyset sobre (data, id): nenhuma página
+depende de OFFSET nem de somar o histórico anterior linha a linha.
+
+O saldo antes da página parte do fechamento mensal mais próximo
+(FechamentoMensal.saldo_ate) e soma só o dia do cursor; a window function roda
+apenas sobre as linhas da página.
+"""
+
+import base64
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When, Window
+from django.db.models.expressions import RowRange
+
+from .models import FechamentoMensal, Transacao
+
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+CAMPO_VALOR = DecimalField(max_digits=14, decimal_places=2)
+VALOR_ASSINADO = Case(
+    When(tipo=Transacao.ENTRADA, then=F('valor')),
+    default=-F('valor'),
+    output_field=CAMPO_VALOR,
+)
+
+
+def codificar_cursor(dia, pk):
+    return base64.urlsafe_b64encode(f'{dia.isoformat()}|{pk}'.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Cursor -> (date, id); levanta ValueError se inválido"""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        dia, pk = texto.split('|')
+        return date.fromisoformat(dia), int(pk)
+    except (ValueError, UnicodeDecodeError) as erro:
+        raise ValueError('Cursor inválido.') from erro
+
+
+def _depois_de(dia, pk):
+    return Q(data__gt=dia) | Q(data=dia, id__gt=pk)
+
+
+def saldo_antes(dia, pk=None):
+    """Saldo de tudo que vem antes de (dia, pk) na ordem do extrato; pk=None = antes do dia"""
+    saldo = FechamentoMensal.saldo_ate(dia)
+    if pk is not None:
+        saldo += Transacao.objects.filter(data=dia, id__lte=pk).aggregate(
+            total=Sum(VALOR_ASSINADO)
+        )['total'] or Decimal('0')
+    return saldo
+
+
+def pagina_extrato(cursor=None, inicio=None, limite=LIMITE_PADRAO):
+    """
+    Página do extrato em ordem cronológica.
+    `cursor` vem de uma página anterior; sem cursor, começa em `inicio` (date) ou no
+    início do histórico.
+    """
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    transacoes = Transacao.objects.all()
+
+    if cursor:
+        dia, pk = decodificar_cursor(cursor)
+        transacoes = transacoes.filter(_depois_de(dia, pk))
+        saldo_inicial = saldo_antes(dia, pk)
+    elif inicio:
+        transacoes = transacoes.filter(data__gte=inicio)
+        saldo_inicial = saldo_antes(inicio)
+    else:
+        saldo_inicial = Decimal('0')
+
+    # 1. Chaves da página pelo índice (data, id); uma a mais para saber se há próxima
+    chaves = list(transacoes.order_by('data', 'id').values_list('data', 'id')[:limite + 1])
+    tem_proxima = len(chaves) > limite
+    chaves = chaves[:limite]
+
+    # 2. Saldo corrente só sobre as linhas da página
+    linhas = Transacao.objects.filter(id__in=[pk for _, pk in chaves]).annotate(
+        valor_assinado=VALOR_ASSINADO,
+        saldo=Window(
+            Sum(VALOR_ASSINADO),
+            order_by=[F('data').asc(), F('id').asc()],
+            frame=RowRange(start=None, end=0),
+        ) + Value(saldo_inicial, output_field=CAMPO_VALOR),
+    ).order_by('data', 'id').values(
+        'id', 'data', 'tipo', 'categoria', 'descricao', 'metodo_pagamento', 'valor', 'valor_assinado', 'saldo'
+    )
+
+    resultados = []
+    for linha in linhas:
+        for campo in ('valor', 'valor_assinado', 'saldo'):
+            linha[campo] = str(Decimal(linha[campo]).quantize(Decimal('0.01')))
+        resultados.append(linha)
+
+    return {
+        'saldo_inicial': str(saldo_inicial.quantize(Decimal('0.01'))),
+        'results': resultados,
+        'proximo': codificar_cursor(*chaves[-1]) if tem_proxima else None,
+    }
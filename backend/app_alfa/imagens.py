@@ -0,0 +1,177 @@
+"""
+Derivados de imagens (miniaturas) - Alfa+
+Gera versões reduzidas em WebP e JPEG das fotos enviadas, para listas e galerias
+não baixarem o original de vários MB.
+
+Os derivados ficam em derivados/<caminho original>__<tamanho>.<formato> no mesmo
+storage do arquivo original (o do campo). O storage de conteúdo renomeia tudo pelo
+hash, então para ele os derivados vão para um FileSystemStorage na mesma pasta e
+URL base, que mantém o nome dado (ver storage_derivados). A geração roda em um pool de threads em
+segundo plano (o Pillow libera o GIL ao redimensionar e codificar); ao terminar, o
+nome da imagem vai para `derivados_de` da linha, e a API só monta as URLs quando os
+dois coincidem, sem consultar o storage a cada linha listada.
+"""
+
+import logging
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .armazenamento import ArmazenamentoConteudo
+
+
+logger = logging.getLogger(__name__)
+
+
+# Maior lado (px) de cada tamanho
+TAMANHOS = {
+    'thumb': 320,
+    'medio': 1024,
+}
+
+FORMATOS = {
+    'webp': {'formato': 'WEBP', 'opcoes': {'quality': 80, 'method': 4}},
+    'jpeg': {'formato': 'JPEG', 'opcoes': {'quality': 82, 'optimize': True, 'progressive': True}},
+}
+
+PASTA_DERIVADOS = 'derivados'
+
+# Gerado por último: sua existência indica que todos os derivados estão prontos
+SENTINELA = ('thumb', 'jpeg')
+
+
+def caminho_derivado(nome, tamanho, formato):
+    base, _ = posixpath.splitext(nome)
+    return posixpath.join(PASTA_DERIVADOS, f'{base}__{tamanho}.{formato}')
+
+
+def storage_derivados(storage):
+    """Storage onde ficam os derivados das imagens de `storage` (com os nomes de caminho_derivado)"""
+    if isinstance(storage, ArmazenamentoConteudo):
+        return FileSystemStorage(location=storage.location, base_url=storage.base_url)
+    return storage
+
+
+def derivados_prontos(nome, storage):
+    return bool(nome) and storage_derivados(storage).exists(caminho_derivado(nome, *SENTINELA))
+
+
+def gerar_derivados(nome, storage, forcar=False):
+    """
+    Gera todos os tamanhos/formatos para a imagem `nome` do storage.
+    Retorna a quantidade de arquivos gravados (0 se já existiam).
+    """
+    if not nome or (not forcar and derivados_prontos(nome, storage)):
+        return 0
+
+    with storage.open(nome, 'rb') as arquivo:
+        original = Image.open(arquivo)
+        # Fotos de celular vêm rotacionadas via EXIF
+        original = ImageOps.exif_transpose(original)
+        original = original.convert('RGB')
+
+    saida = storage_derivados(storage)
+    ordem = [(tamanho, formato) for tamanho in TAMANHOS for formato in FORMATOS]
+    ordem.remove(SENTINELA)
+    ordem.append(SENTINELA)
+
+    imagens = {}
+    gravados = 0
+    for tamanho, formato in ordem:
+        if tamanho not in imagens:
+            imagem = original.copy()
+            imagem.thumbnail((TAMANHOS[tamanho], TAMANHOS[tamanho]), Image.LANCZOS)
+            imagens[tamanho] = imagem
+
+        buffer = BytesIO()
+        imagens[tamanho].save(buffer, FORMATOS[formato]['formato'], **FORMATOS[formato]['opcoes'])
+
+        destino = caminho_derivado(nome, tamanho, formato)
+        if saida.exists(destino):
+            saida.delete(destino)
+        saida.save(destino, ContentFile(buffer.getvalue()))
+        gravados += 1
+
+    return gravados
+
+
+def remover_derivados(nome, storage):
+    storage = storage_derivados(storage)
+    for tamanho in TAMANHOS:
+        for formato in FORMATOS:
+            destino = caminho_derivado(nome, tamanho, formato)
+            if storage.exists(destino):
+                storage.delete(destino)
+
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        workers = getattr(settings, 'ALFA_IMAGENS_WORKERS', min(4, os.cpu_count() or 1))
+        _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='alfa-imagens')
+    return _pool
+
+
+def registrar_derivados(modelo, campo, nome):
+    """Marca as linhas com a imagem `nome` no `campo` como tendo os derivados prontos"""
+    return modelo._base_manager.filter(**{campo: nome}).exclude(derivados_de=nome).update(derivados_de=nome)
+
+
+def _gerar_e_registrar(modelo, campo, nome, storage):
+    gerar_derivados(nome, storage)
+    registrar_derivados(modelo, campo, nome)
+
+
+def _verificar_falha(futuro, nome):
+    try:
+        futuro.result()
+    except Exception:
+        logger.exception('Falha ao gerar os derivados de %s', nome)
+
+
+def agendar_derivados(arquivo):
+    """Agenda a geração para o arquivo de um ImageField em segundo plano depois do commit (o upload não espera)"""
+    if not arquivo or arquivo.instance.derivados_de == arquivo.name:
+        return
+    modelo, campo, nome, storage = type(arquivo.instance), arquivo.field.name, arquivo.name, arquivo.storage
+
+    def enviar():
+        futuro = get_pool().submit(_gerar_e_registrar, modelo, campo, nome, storage)
+        futuro.add_done_callback(lambda concluido: _verificar_falha(concluido, nome))
+    transaction.on_commit(enviar)
+
+
+def derivados_para_api(arquivo, request=None):
+    """
+    URLs dos derivados de um ImageField no formato usado pelo frontend:
+    {'thumb': {'webp': url, 'jpeg': url}, ..., 'srcset_webp': '... 320w, ... 1024w', 'srcset_jpeg': ...}
+    Retorna None enquanto os derivados não foram gerados (usar o original).
+    """
+    if not arquivo or arquivo.instance.derivados_de != arquivo.name:
+        return None
+
+    storage = storage_derivados(arquivo.storage)
+
+    def url(caminho):
+        endereco = storage.url(caminho)
+        return request.build_absolute_uri(endereco) if request is not None else endereco
+
+    dados = {
+        tamanho: {formato: url(caminho_derivado(arquivo.name, tamanho, formato)) for formato in FORMATOS}
+        for tamanho in TAMANHOS
+    }
+    for formato in FORMATOS:
+        dados[f'srcset_{formato}'] = ', '.join(
+            f'{dados[tamanho][formato]} {largura}w' for tamanho, largura in TAMANHOS.items()
+        )
+    return dados
@@ -0,0 +1,240 @@
+"""
+Instrumentação por requisição - Alfa+
+Middleware que mede, em cada requisição, quantas consultas SQL foram feitas, o tempo
+gasto no banco, na serialização (DRF) e na renderização da resposta.
+
+- As consultas passam por um execute_wrapper instalado em cada conexão ao ser aberta
+  (sinal connection_created), que só mede quando há uma requisição em andamento no
+  contexto (contextvar, que o asgiref leva para as threads de sync_to_async); consultas
+  com o mesmo SQL (os parâmetros ficam fora, como %s) são agrupadas.
+- O mesmo SQL repetido ALFA_INSTRUMENTACAO_REPETICOES vezes ou mais é o padrão N+1
+  (uma consulta por item de uma lista): sai um aviso no log com a view de origem.
+- Os tempos vão no cabeçalho Server-Timing (aba Rede/Timing do navegador) e em uma
+  linha JSON no logger app_alfa.instrumentacao.
+- Serialização conta o acesso a serializer.data mais externo; consultas feitas durante
+  a serialização (relações sem select_related) entram também no tempo de banco. A
+  property `data` dos serializers do DRF só é trocada enquanto há requisições em
+  andamento e volta à original quando a última termina.
+- Síncrono e assíncrono: sob ASGI a requisição não passa por sync_to_async por causa
+  deste middleware (a view de tempo real continua no event loop).
+- Respostas em stream são medidas até o início do envio: o que o gerador consulta
+  depois disso não entra.
+"""
+
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+
+logger = logging.getLogger(__name__)
+
+REPETICOES_PADRAO = 5
+
+# Listas de placeholders de tamanhos diferentes (IN (%s, %s, ...)) são o mesmo SQL
+_LISTA_PARAMETROS = re.compile(r'\((?:%s|\?)(?:\s*,\s*(?:%s|\?))*\)')
+
+_medicao_atual = contextvars.ContextVar('medicao_atual', default=None)
+
+# Serializers com `data` medida: property original de cada classe e requisições em andamento
+_SERIALIZERS = (serializers.Serializer, serializers.ListSerializer)
+_originais = {}
+_em_andamento = 0
+_lock_serializers = threading.Lock()
+
+
+def normalizar_sql(sql):
+    return _LISTA_PARAMETROS.sub('(...)', sql)
+
+
+def nome_view(view_func, metodo):
+    """módulo.Classe.ação para viewsets do DRF; módulo.função/Classe para as demais"""
+    classe = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if classe is None:
+        return f'{view_func.__module__}.{getattr(view_func, "__qualname__", view_func.__class__.__name__)}'
+    nome = f'{classe.__module__}.{classe.__name__}'
+    acao = (getattr(view_func, 'actions', None) or {}).get(metodo.lower())
+    return f'{nome}.{acao}' if acao else nome
+
+
+class Medicao:
+    """Contadores de uma requisição"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.view = None
+        self.consultas = Counter()
+        self.banco = 0.0
+        self.serializacao = 0.0
+        self.renderizacao = 0.0
+        self.serializando = False
+        self._inicio_renderizacao = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Wrapper de connection.execute_wrapper"""
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.banco += time.perf_counter() - inicio
+            self.consultas[normalizar_sql(sql)] += 1
+
+    @property
+    def total_consultas(self):
+        return sum(self.consultas.values())
+
+    def repetidas(self, minimo):
+        """[(sql, vezes)] executados `minimo` vezes ou mais, dos mais repetidos para os menos"""
+        return [(sql, vezes) for sql, vezes in self.consultas.most_common() if vezes >= minimo]
+
+    def iniciar_renderizacao(self):
+        self._inicio_renderizacao = time.perf_counter()
+
+    def terminar_renderizacao(self, response):
+        if self._inicio_renderizacao is not None:
+            self.renderizacao += time.perf_counter() - self._inicio_renderizacao
+            self._inicio_renderizacao = None
+        return response
+
+
+def _medir_serializacao(propriedade):
+    """Envolve a property `data` de um serializer; só o acesso mais externo é contado"""
+    def data(serializer):
+        medicao = _medicao_atual.get()
+        if medicao is None or medicao.serializando:
+            return propriedade.fget(serializer)
+        medicao.serializando = True
+        inicio = time.perf_counter()
+        try:
+            return propriedade.fget(serializer)
+        finally:
+            medicao.serializacao += time.perf_counter() - inicio
+            medicao.serializando = False
+    return property(data)
+
+
+@contextmanager
+def serializers_medidos():
+    """Troca `data` dos serializers na primeira requisição em andamento e desfaz na última"""
+    global _em_andamento
+    with _lock_serializers:
+        if _em_andamento == 0:
+            for classe in _SERIALIZERS:
+                _originais[classe] = classe.__dict__['data']
+                classe.data = _medir_serializacao(_originais[classe])
+        _em_andamento += 1
+    try:
+        yield
+    finally:
+        with _lock_serializers:
+            _em_andamento -= 1
+            if _em_andamento == 0:
+                for classe in _SERIALIZERS:
+                    classe.data = _originais.pop(classe)
+
+
+def _medir_consulta(execute, sql, params, many, context):
+    """execute_wrapper de todas as conexões: mede só dentro de uma requisição"""
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    return medicao(execute, sql, params, many, context)
+
+
+def _instalar_na_conexao(connection, **kwargs):
+    # No início da lista: connection.execute_wrapper() remove o último ao sair do bloco
+    if _medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _medir_consulta)
+
+
+def _ms(segundos):
+    return round(segundos * 1000, 1)
+
+
+class InstrumentacaoMiddleware:
+    """Server-Timing, log estruturado e aviso de N+1 por requisição"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.repeticoes = getattr(settings, 'ALFA_INSTRUMENTACAO_REPETICOES', REPETICOES_PADRAO)
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+        # Conexões abertas daqui em diante e as já abertas nesta thread
+        connection_created.connect(_instalar_na_conexao, dispatch_uid='app_alfa.instrumentacao')
+        for conexao in connections.all(initialized_only=True):
+            _instalar_na_conexao(conexao)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        medicao = Medicao()
+        request.medicao = medicao
+        token = _medicao_atual.set(medicao)
+        try:
+            with serializers_medidos():
+                response = self.get_response(request)
+        finally:
+            _medicao_atual.reset(token)
+        return self._concluir(request, response, medicao)
+
+    async def __acall__(self, request):
+        medicao = Medicao()
+        request.medicao = medicao
+        token = _medicao_atual.set(medicao)
+        try:
+            with serializers_medidos():
+                response = await self.get_response(request)
+        finally:
+            _medicao_atual.reset(token)
+        return self._concluir(request, response, medicao)
+
+    def _concluir(self, request, response, medicao):
+        total = time.perf_counter() - medicao.inicio
+        resolucao = getattr(request, 'resolver_match', None)
+        if resolucao is not None:
+            medicao.view = nome_view(resolucao.func, request.method)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={_ms(medicao.banco)};desc="{medicao.total_consultas} consultas"',
+            f'serializacao;dur={_ms(medicao.serializacao)}',
+            f'renderizacao;dur={_ms(medicao.renderizacao)}',
+            f'total;dur={_ms(total)}',
+        ])
+        self._registrar(request, response, medicao, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # Respostas do DRF (e TemplateResponse) são renderizadas logo depois deste gancho
+        request.medicao.iniciar_renderizacao()
+        response.add_post_render_callback(request.medicao.terminar_renderizacao)
+        return response
+
+    def _registrar(self, request, response, medicao, total):
+        repetidas = medicao.repetidas(self.repeticoes)
+        logger.info(json.dumps({
+            'metodo': request.method,
+            'caminho': request.path,
+            'view': medicao.view,
+            'status': response.status_code,
+            'consultas': medicao.total_consultas,
+            'db_ms': _ms(medicao.banco),
+            'serializacao_ms': _ms(medicao.serializacao),
+            'renderizacao_ms': _ms(medicao.renderizacao),
+            'total_ms': _ms(total),
+            'repetidas': [{'sql': sql, 'vezes': vezes} for sql, vezes in repetidas],
+        }, ensure_ascii=False))
+        for sql, vezes in repetidas:
+            logger.warning('Possível N+1 em %s (%s %s): %d execuções de %s',
+                           medicao.view, request.method, request.path, vezes, sql)
@@ -0,0 +1,91 @@
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from app_alfa.analise import ColunasFinanceiras, calcular, somar_meses
+from app_alfa.models import Transacao
+
+
+def calcular_com_lacos(linhas, inicio, fim, janela):
+    """Como seria sem NumPy: dicionários e laços sobre Decimal (usado como referência)"""
+    primeiro_mes = somar_meses(inicio, -12)
+    meses = []
+    atual = primeiro_mes
+    while atual <= fim:
+        meses.append(atual)
+        atual = somar_meses(atual, 1)
+
+    saldos = defaultdict(Decimal)
+    categorias = defaultdict(Decimal)
+    for dia, tipo, valor, categoria in linhas:
+        assinado = valor if tipo == Transacao.ENTRADA else -valor
+        saldos[dia.replace(day=1)] += assinado
+        if inicio <= dia <= fim:
+            categorias[categoria or 0] += assinado
+
+    serie = [saldos[mes] for mes in meses]
+    medias = [
+        sum(serie[indice - janela + 1:indice + 1]) / janela if indice >= janela - 1 else None
+        for indice in range(len(serie))
+    ]
+    variacoes = [serie[indice] - serie[indice - 12] if indice >= 12 else None for indice in range(len(serie))]
+    por_mes_do_ano = defaultdict(list)
+    for mes, saldo in zip(meses, serie):
+        por_mes_do_ano[mes.month].append(saldo)
+    sazonal = {mes: sum(valores) / len(valores) for mes, valores in por_mes_do_ano.items()}
+    return serie[12:], medias[12:], variacoes[12:], sazonal, dict(categorias)
+
+
+class Command(BaseCommand):
+    help = 'Compara a análise financeira com laços sobre Decimal x colunas NumPy em dados sintéticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transacoes', type=int, default=200_000, help='Transações sintéticas geradas')
+        parser.add_argument('--anos', type=int, default=5, help='Anos cobertos pelas transações')
+        parser.add_argument('--janela', type=int, default=3, help='Meses da média móvel')
+        parser.add_argument('--repeticoes', type=int, default=3, help='Execuções de cada modo (vale a mais rápida)')
+
+    def handle(self, *args, **options):
+        gerador = random.Random(42)
+        fim = date.today()
+        dias = max(1, options['anos'] * 365)
+        # Mesmo formato do values_list('data', 'tipo', 'valor', 'categoria_financeira_id')
+        linhas = [
+            (
+                fim - timedelta(days=gerador.randrange(dias)),
+                gerador.choice((Transacao.ENTRADA, Transacao.SAIDA)),
+                Decimal(gerador.randrange(100, 500_000)).scaleb(-2),
+                gerador.randrange(1, 30),
+            )
+            for _ in range(options['transacoes'])
+        ]
+        inicio = somar_meses(fim, -(options['anos'] - 1) * 12 - 11)
+        janela = options['janela']
+        repeticoes = max(1, options['repeticoes'])
+
+        def medir(funcao):
+            melhor, resultado = None, None
+            for _ in range(repeticoes):
+                comeco = time.perf_counter()
+                resultado = funcao()
+                duracao = time.perf_counter() - comeco
+                melhor = duracao if melhor is None else min(melhor, duracao)
+            return melhor, resultado
+
+        tempo_lacos, referencia = medir(lambda: calcular_com_lacos(linhas, inicio, fim, janela))
+        tempo_colunas, colunas = medir(lambda: ColunasFinanceiras.de_linhas(linhas))
+        tempo_numpy, resultado = medir(lambda: calcular(colunas, inicio, fim, janela))
+
+        saldos = [mes['saldo'] for mes in resultado['meses']]
+        if saldos != referencia[0]:
+            self.stderr.write('Os saldos mensais divergem entre as duas implementações!')
+
+        self.stdout.write(f'{len(linhas)} transações, {len(saldos)} meses, janela de {janela}')
+        self.stdout.write(f'Laços sobre Decimal: {tempo_lacos * 1000:.1f} ms')
+        self.stdout.write(
+            f'NumPy: {tempo_colunas * 1000:.1f} ms para montar as colunas + {tempo_numpy * 1000:.1f} ms de cálculo '
+            f'({tempo_lacos / max(tempo_numpy, 1e-9):.0f}x mais rápido no cálculo)'
+        )
@@ -0,0 +1,72 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from app_alfa import tendencias
+from app_alfa.models import Transacao
+from app_alfa.razao_colunar import RazaoColunar
+
+CATEGORIAS = ['Dízimo', 'Oferta', 'Missões', 'Luz', 'Água', 'Aluguel', 'Manutenção', 'Eventos', 'Salários', 'Outros']
+METODOS = ['pix', 'dinheiro', 'cartao', 'transferencia', None]
+
+RECORTES = [
+    ('total do período', {}, ()),
+    ('por mês', {}, ('mes',)),
+    ('por mês e categoria', {}, ('mes', 'categoria')),
+    ('pix por categoria e responsável', {'metodo_pagamento': ['pix']}, ('categoria', 'registrado_por')),
+    ('dízimos por ano e método', {'categoria': ['dizimo'], 'tipo': [Transacao.ENTRADA]}, ('ano', 'metodo_pagamento')),
+]
+
+
+class Command(BaseCommand):
+    help = 'Mede recortes do razão colunar sobre transações sintéticas (sem banco)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transacoes', type=int, default=1_000_000, help='Transações sintéticas geradas')
+        parser.add_argument('--anos', type=int, default=5, help='Anos cobertos pelas transações')
+        parser.add_argument('--repeticoes', type=int, default=5, help='Execuções de cada recorte (vale a mais rápida)')
+
+    def handle(self, *args, **options):
+        gerador = random.Random(42)
+        fim = date.today()
+        dias = max(1, options['anos'] * 365)
+        # Mesmo formato do values_list(*CAMPOS) usado na carga do banco
+        linhas = [
+            (
+                indice,
+                fim - timedelta(days=gerador.randrange(dias)),
+                Decimal(gerador.randrange(100, 500_000)).scaleb(-2),
+                gerador.choice((Transacao.ENTRADA, Transacao.SAIDA)),
+                gerador.choice(CATEGORIAS),
+                gerador.choice(METODOS),
+                gerador.randrange(1, 8),
+            )
+            for indice in range(1, options['transacoes'] + 1)
+        ]
+
+        razao = RazaoColunar()
+        inicio = time.perf_counter()
+        por_ano = {}
+        for linha in linhas:
+            por_ano.setdefault(linha[1].year, []).append(linha)
+        for ano in sorted(por_ano):
+            razao.segmentos[ano] = razao.segmento(por_ano[ano])
+        # Sem banco: os segmentos sintéticos valem para a versão atual dos dados
+        razao.anos = set(por_ano)
+        razao.versao = tendencias.versao_dados()
+        self.stdout.write(
+            f'{len(linhas)} transações em colunas: {(time.perf_counter() - inicio) * 1000:.0f} ms, '
+            f'{razao.nbytes / 1024 / 1024:.1f} MB'
+        )
+
+        repeticoes = max(1, options['repeticoes'])
+        for nome, filtros, agrupar_por in RECORTES:
+            melhor = None
+            for _ in range(repeticoes):
+                comeco = time.perf_counter()
+                grupos, _ = razao.consultar(filtros=filtros, agrupar_por=agrupar_por)
+                duracao = time.perf_counter() - comeco
+                melhor = duracao if melhor is None else min(melhor, duracao)
+            self.stdout.write(f'{nome}: {melhor * 1000:.1f} ms ({len(grupos)} grupos)')
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from app_alfa.pdf_templates import PDFReportEngine, get_report_engine
+from app_alfa.reports import RelatorioEventos, RelatorioFinanceiro, RelatorioMembros
+
+RELATORIOS = {
+    'membros': RelatorioMembros,
+    'financeiro': RelatorioFinanceiro,
+    'eventos': RelatorioEventos,
+}
+
+
+class Command(BaseCommand):
+    help = 'Compara o custo fixo por relatório PDF: motor novo a cada relatório x motor compartilhado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=20, help='Relatórios gerados de cada tipo em cada modo')
+        parser.add_argument('--relatorio', choices=list(RELATORIOS), action='append',
+                            help='Relatório a medir (pode repetir; padrão: todos)')
+
+    def handle(self, *args, **options):
+        repeticoes = max(1, options['repeticoes'])
+        # Consultas ficam fora da medição: as seções são montadas uma vez por relatório
+        secoes = {nome: RELATORIOS[nome]().get_sections() for nome in options.get('relatorio') or RELATORIOS}
+
+        inicio = time.perf_counter()
+        compartilhado = get_report_engine()
+        self.stdout.write(f'Criação e aquecimento do motor compartilhado: {(time.perf_counter() - inicio) * 1000:.1f} ms')
+
+        for nome, lista in secoes.items():
+            # Como antes: estilos, paletas e TableStyles recriados em cada relatório
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                PDFReportEngine(warm_up=False).render(lista)
+            isolado = (time.perf_counter() - inicio) / repeticoes
+
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                compartilhado.render(lista)
+            reutilizado = (time.perf_counter() - inicio) / repeticoes
+
+            self.stdout.write(
+                f'{nome}: {isolado * 1000:.2f} ms -> {reutilizado * 1000:.2f} ms por relatório '
+                f'({(isolado - reutilizado) * 1000:.2f} ms de custo fixo evitado)'
+            )
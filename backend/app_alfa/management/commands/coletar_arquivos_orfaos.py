@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from app_alfa.models import ArquivoConteudo
+
+class Command(BaseCommand):
+    help = 'Remove do armazenamento endereçado por conteúdo os arquivos que nenhuma foto/documento referencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--carencia-horas', type=int, default=24,
+                            help='Só remove blobs sem referência há mais que este tempo (uploads em andamento)')
+        parser.add_argument('--recalcular', action='store_true',
+                            help='Recalcular as referências de todos os blobs antes da coleta')
+
+    def handle(self, *args, **options):
+        if options['recalcular']:
+            with transaction.atomic():
+                ArquivoConteudo.recalcular_referencias()
+
+        quantidade, liberados = ArquivoConteudo.coletar_orfaos(timedelta(hours=options['carencia_horas']))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{quantidade} arquivos órfãos removidos ({liberados / (1024 * 1024):.1f} MB liberados).')
+        )
@@ -0,0 +1,42 @@
+import os
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from app_alfa.cartoes import CARTOES_POR_VOLUME, MODO_DOCUMENTOS, MODO_PDF, gerar_documentos, gerar_volumes
+from app_alfa.models import Membro
+
+class Command(BaseCommand):
+    help = 'Gera cartões de membro em lote, em paralelo em todos os núcleos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modo', choices=[MODO_DOCUMENTOS, MODO_PDF], default=MODO_DOCUMENTOS,
+                            help='documentos: um PDF por membro salvo em DocumentoMembro; pdf: volumes com um cartão por página')
+        parser.add_argument('--status', default=Membro.ATIVO, help='Status dos membros (padrão: ativo; "todos" para não filtrar)')
+        parser.add_argument('--membro', type=int, action='append', help='ID de membro específico (pode repetir)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Número de processos')
+        parser.add_argument('--forcar', action='store_true', help='Gerar mesmo para quem não mudou desde o último cartão')
+        parser.add_argument('--saida', default='cartoes', help='Pasta dos volumes no modo pdf')
+        parser.add_argument('--por-volume', type=int, default=CARTOES_POR_VOLUME, help='Cartões por PDF no modo pdf')
+
+    def handle(self, *args, **options):
+        membros = Membro.objects.order_by('nome', 'id')
+        if options['status'] != 'todos':
+            membros = membros.filter(status=options['status'])
+        if options.get('membro'):
+            membros = membros.filter(pk__in=options['membro'])
+
+        if options['modo'] == MODO_PDF:
+            saida = Path(options['saida'])
+            saida.mkdir(parents=True, exist_ok=True)
+            volumes = gerar_volumes(membros, workers=options['workers'], por_volume=options['por_volume'])
+            for numero, pdf in enumerate(volumes, start=1):
+                (saida / f'cartoes_{numero:03d}.pdf').write_bytes(pdf)
+            self.stdout.write(self.style.SUCCESS(f'{len(volumes)} volumes gravados em {saida}.'))
+            return
+
+        resumo = gerar_documentos(membros, workers=options['workers'], forcar=options['forcar'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{resumo["gerados"]} cartões gerados; {resumo["ignorados"]} membros sem alterações desde o último cartão.'
+            )
+        )
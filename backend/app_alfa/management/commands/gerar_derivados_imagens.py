@@ -0,0 +1,55 @@
+import os
+from concurrent.futures import as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from app_alfa.imagens import gerar_derivados, registrar_derivados
+from app_alfa.models import Evento, FotoEvento, FotoPostagem, Membro
+from app_alfa.processos import novo_pool
+
+
+def _processar(modelo, campo, nome, forcar):
+    # O storage é o do campo (fotos de eventos/postagens ficam no armazenamento por conteúdo)
+    storage = apps.get_model(modelo)._meta.get_field(campo).storage
+    try:
+        return modelo, campo, nome, gerar_derivados(nome, storage, forcar=forcar), None
+    except Exception as e:
+        return modelo, campo, nome, 0, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Gera miniaturas WebP/JPEG das imagens já enviadas, em paralelo em todos os núcleos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Número de processos')
+        parser.add_argument('--forcar', action='store_true', help='Regerar mesmo se os derivados já existirem')
+
+    def handle(self, *args, **options):
+        nomes = set()
+        for modelo, campo in [(Membro, 'foto'), (Evento, 'foto'), (FotoEvento, 'imagem'), (FotoPostagem, 'imagem')]:
+            nomes.update(
+                (modelo._meta.label, campo, nome) for nome in
+                modelo.objects.exclude(**{campo: ''}).exclude(**{f'{campo}__isnull': True})
+                .values_list(campo, flat=True).iterator()
+            )
+
+        self.stdout.write(f'{len(nomes)} imagens encontradas. Processando com {options["workers"]} processos...')
+
+        gerados = 0
+        erros = 0
+        with novo_pool(max(1, options['workers'])) as pool:
+            futuros = [pool.submit(_processar, *item, options['forcar']) for item in sorted(nomes)]
+            for futuro in as_completed(futuros):
+                modelo, campo, nome, quantidade, erro = futuro.result()
+                if erro:
+                    erros += 1
+                    self.stdout.write(self.style.WARNING(f'{nome}: {erro}'))
+                    continue
+                # Também para derivados que já existiam (linhas anteriores ao campo derivados_de)
+                registrar_derivados(apps.get_model(modelo), campo, nome)
+                if quantidade:
+                    gerados += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Derivados gerados para {gerados} imagens ({erros} com erro).')
+        )
@@ -0,0 +1,36 @@
+import os
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from app_alfa.pacote_mensal import PacoteMensal, mes_anterior
+
+
+class Command(BaseCommand):
+    help = 'Gera o pacote mensal de relatórios (membros, financeiro, eventos e um por ONG) em um ZIP, em paralelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mes', help='Mês no formato AAAA-MM (padrão: mês anterior)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Número de processos')
+        parser.add_argument('--saida', help='Arquivo ZIP gerado (padrão: relatorios_AAAA-MM.zip)')
+
+    def handle(self, *args, **options):
+        mes = mes_anterior()
+        if options.get('mes'):
+            try:
+                mes = datetime.strptime(options['mes'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('Mês inválido; use AAAA-MM.')
+
+        pacote = PacoteMensal(mes, workers=max(1, options['workers']))
+        saida = Path(options.get('saida') or pacote.nome_arquivo)
+        with saida.open('wb') as arquivo:
+            for parte in pacote.gerar():
+                arquivo.write(parte)
+
+        for nome, tempos in sorted(pacote.tempos.items()):
+            self.stdout.write(
+                f'{nome}: consultas {tempos["consultas_ms"]:.1f} ms, renderização {tempos["renderizacao_ms"]:.1f} ms, '
+                f'{tempos["bytes"] / 1024:.0f} KB'
+            )
+        self.stdout.write(self.style.SUCCESS(f'{len(pacote.tempos)} relatórios gravados em {saida}.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from app_alfa.uploads import limpar_expirados
+
+class Command(BaseCommand):
+    help = 'Remove sessões de upload em partes vencidas e arquivos temporários sem sessão (ALFA_UPLOADS_DIR)'
+
+    def handle(self, *args, **options):
+        sessoes, arquivos = limpar_expirados()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{sessoes} sessões de upload expiradas removidas ({arquivos} temporários sem sessão).')
+        )
@@ -0,0 +1,54 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from app_alfa.armazenamento import PASTA_CONTEUDO, get_armazenamento_conteudo
+from app_alfa.imagens import remover_derivados
+from app_alfa.models import ArquivoConteudo, DocumentoMembro, FotoEvento, FotoPostagem
+
+class Command(BaseCommand):
+    help = 'Move fotos e documentos das pastas planas para o armazenamento endereçado por conteúdo (com deduplicação)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--remover-originais', action='store_true',
+                            help='Apagar os arquivos antigos (e suas miniaturas) após migrar')
+
+    def handle(self, *args, **options):
+        armazenamento = get_armazenamento_conteudo()
+        migrados = 0
+        ausentes = 0
+        antigos = set()
+
+        for modelo, campo in [(FotoEvento, 'imagem'), (FotoPostagem, 'imagem'), (DocumentoMembro, 'arquivo')]:
+            linhas = (
+                modelo._base_manager.exclude(**{f'{campo}__startswith': f'{PASTA_CONTEUDO}/'})
+                .exclude(**{campo: ''}).exclude(**{f'{campo}__isnull': True})
+                .values_list('pk', campo)
+            )
+            for pk, nome in linhas.iterator():
+                if not default_storage.exists(nome):
+                    ausentes += 1
+                    self.stdout.write(self.style.WARNING(f'{modelo.__name__} {pk}: arquivo {nome} não encontrado'))
+                    continue
+
+                with default_storage.open(nome, 'rb') as arquivo:
+                    novo = armazenamento.save(nome, arquivo)
+                # update() não dispara sinais: as referências são recalculadas no final
+                modelo._base_manager.filter(pk=pk).update(**{campo: novo})
+                antigos.add(nome)
+                migrados += 1
+
+        with transaction.atomic():
+            ArquivoConteudo.recalcular_referencias()
+
+        if options['remover_originais']:
+            for nome in antigos:
+                default_storage.delete(nome)
+                remover_derivados(nome, default_storage)
+
+        blobs = ArquivoConteudo.objects.count()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{migrados} arquivos migrados para {blobs} blobs ({ausentes} ausentes). '
+                'Rode gerar_derivados_imagens para criar as miniaturas dos novos caminhos.'
+            )
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from app_alfa.models import Evento
+
+class Command(BaseCommand):
+    help = 'Reconstrói os contadores de presenças e comentários dos eventos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evento', type=int, action='append', help='ID de evento específico (pode repetir)')
+
+    def handle(self, *args, **options):
+        eventos = Evento.objects.all()
+        if options.get('evento'):
+            eventos = eventos.filter(pk__in=options['evento'])
+
+        # Um único UPDATE com subqueries - não carrega eventos na memória
+        with transaction.atomic():
+            atualizados = Evento.recalcular_contadores(eventos)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Contadores reconciliados para {atualizados} eventos.')
+        )
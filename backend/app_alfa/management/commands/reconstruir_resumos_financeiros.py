@@ -0,0 +1,27 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from app_alfa import tendencias
+from app_alfa.models import ResumoFinanceiroMensal
+
+class Command(BaseCommand):
+    help = 'Reconstrói os resumos financeiros mensais a partir das transações'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', help='Primeiro mês a refazer (AAAA-MM); padrão: todos')
+        parser.add_argument('--fim', help='Último mês a refazer (AAAA-MM); padrão: todos')
+
+    def _mes(self, valor):
+        if not valor:
+            return None
+        try:
+            ano, mes = valor.split('-')
+            return date(int(ano), int(mes), 1)
+        except ValueError:
+            raise CommandError(f'Mês inválido: {valor} (use AAAA-MM)')
+
+    def handle(self, *args, **options):
+        linhas = ResumoFinanceiroMensal.reconstruir(self._mes(options.get('inicio')), self._mes(options.get('fim')))
+        # Alterações feitas com update() também não invalidaram as séries em cache
+        tendencias.invalidar()
+        self.stdout.write(self.style.SUCCESS(f'{linhas} resumos mensais gravados.'))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:13
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def preencher_contadores(apps, schema_editor):
+    Evento = apps.get_model('app_alfa', 'Evento')
+    EventoPresenca = apps.get_model('app_alfa', 'EventoPresenca')
+    EventoComentario = apps.get_model('app_alfa', 'EventoComentario')
+
+    # Modelos históricos não usam o SoftDeleteManager: filtrar deleted_at explicitamente
+    confirmados = EventoPresenca.objects.filter(
+        evento=OuterRef('pk'), confirmado=True, deleted_at__isnull=True
+    ).values('evento').annotate(total=Count('id')).values('total')
+    comentarios = EventoComentario.objects.filter(
+        evento=OuterRef('pk'), aprovado=True, deleted_at__isnull=True
+    ).values('evento').annotate(total=Count('id')).values('total')
+    Evento.objects.update(
+        confirmados_count=Coalesce(Subquery(confirmados), 0),
+        comentarios_count=Coalesce(Subquery(comentarios), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_alfa', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='comentarios_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Comentários aprovados (ativos)'),
+        ),
+        migrations.AddField(
+            model_name='evento',
+            name='confirmados_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Presenças confirmadas (ativas)'),
+        ),
+        migrations.RunPython(preencher_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_alfa', '0002_evento_contadores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckinIdempotencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(help_text='Chave gerada no dispositivo (ex.: UUID)', max_length=64, unique=True)),
+                ('membro_id', models.BigIntegerField(blank=True, null=True)),
+                ('resultado', models.CharField(max_length=30)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('evento', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='checkins_sincronizados', to='app_alfa.evento')),
+            ],
+        ),
+    ]
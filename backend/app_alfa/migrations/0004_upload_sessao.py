@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:24
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_alfa', '0003_checkin_idempotencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSessao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('destino', models.CharField(choices=[('foto_evento', 'Foto de Evento'), ('foto_postagem', 'Foto de Postagem'), ('comprovante_oferta', 'Comprovante de Distribuição de Oferta')], max_length=30)),
+                ('objeto_id', models.BigIntegerField(help_text='ID do evento, postagem ou distribuição de oferta')),
+                ('nome_arquivo', models.CharField(max_length=255)),
+                ('descricao', models.CharField(blank=True, max_length=255, null=True)),
+                ('tamanho_total', models.BigIntegerField()),
+                ('recebido', models.BigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, help_text='Checksum do arquivo completo (opcional)', max_length=64, null=True)),
+                ('criado_por', models.CharField(max_length=150)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:28
+
+import app_alfa.armazenamento
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_alfa', '0004_upload_sessao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArquivoConteudo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=255, unique=True)),
+                ('tamanho', models.BigIntegerField(default=0)),
+                ('referencias', models.PositiveIntegerField(default=0)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='documentomembro',
+            name='arquivo',
+            field=models.FileField(blank=True, null=True, storage=app_alfa.armazenamento.get_armazenamento_conteudo, upload_to='documentos_membros/'),
+        ),
+        migrations.AlterField(
+            model_name='fotoevento',
+            name='imagem',
+            field=models.ImageField(storage=app_alfa.armazenamento.get_armazenamento_conteudo, upload_to='eventos_fotos/'),
+        ),
+        migrations.AlterField(
+            model_name='fotopostagem',
+            name='imagem',
+            field=models.ImageField(storage=app_alfa.armazenamento.get_armazenamento_conteudo, upload_to='postagens_fotos/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_alfa', '0005_armazenamento_conteudo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentomembro',
+            name='assinatura',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
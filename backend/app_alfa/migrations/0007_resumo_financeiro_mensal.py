@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:49
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def preencher_resumos(apps, schema_editor):
+    Transacao = apps.get_model('app_alfa', 'Transacao')
+    ResumoFinanceiroMensal = apps.get_model('app_alfa', 'ResumoFinanceiroMensal')
+
+    # Modelos históricos não usam o SoftDeleteManager: filtrar deleted_at explicitamente
+    linhas = Transacao.objects.filter(deleted_at__isnull=True).annotate(mes_ref=TruncMonth('data')).values(
+        'mes_ref', 'tipo', 'categoria'
+    ).annotate(soma=Sum('valor'), contagem=Count('id')).order_by()
+    ResumoFinanceiroMensal.objects.bulk_create([
+        ResumoFinanceiroMensal(mes=linha['mes_ref'], tipo=linha['tipo'], categoria=linha['categoria'],
+                               total=linha['soma'], quantidade=linha['contagem'])
+        for linha in linhas
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_alfa', '0006_documento_assinatura'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoFinanceiroMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primeiro dia do mês')),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('saida', 'Saída')], max_length=10)),
+                ('categoria', models.CharField(max_length=100)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('quantidade', models.IntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['mes', 'tipo', 'categoria'],
+                'constraints': [models.UniqueConstraint(fields=('mes', 'tipo', 'categoria'), name='resumo_financeiro_mes_tipo_categoria')],
+            },
+        ),
+        migrations.RunPython(preencher_resumos, migrations.RunPython.noop),
+    ]
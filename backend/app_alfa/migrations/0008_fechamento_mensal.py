@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_alfa', '0007_resumo_financeiro_mensal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FechamentoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primeiro dia do mês', unique=True)),
+                ('saldo_inicial', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('total_entradas', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('total_saidas', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('saldo_final', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('quantidade', models.IntegerField(default=0)),
+                ('categorias', models.JSONField(default=dict)),
+                ('fechado_em', models.DateTimeField(auto_now_add=True)),
+                ('fechado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='fechamentos', to='app_alfa.admin')),
+            ],
+            options={
+                'ordering': ['-mes'],
+            },
+        ),
+    ]
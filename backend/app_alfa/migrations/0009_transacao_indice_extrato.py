@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_alfa', '0008_fechamento_mensal'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['data', 'id'], name='transacao_data_id'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:01
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def normalizar(texto):
+    # Cópia de CategoriaFinanceira.normalizar (migrações não usam métodos dos modelos)
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    sem_acento = ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+    return ' '.join(sem_acento.casefold().split())
+
+
+def preencher_categorias(apps, schema_editor):
+    Transacao = apps.get_model('app_alfa', 'Transacao')
+    CategoriaFinanceira = apps.get_model('app_alfa', 'CategoriaFinanceira')
+    ResumoFinanceiroMensal = apps.get_model('app_alfa', 'ResumoFinanceiroMensal')
+
+    # Um UPDATE por grafia distinta; a primeira grafia (pela transação mais antiga) vira o nome
+    categorias = {}
+    grafias = Transacao.objects.values('categoria').annotate(primeira=models.Min('id')).order_by('primeira')
+    for linha in grafias:
+        texto = linha['categoria']
+        chave = normalizar(texto) or 'sem categoria'
+        if chave not in categorias:
+            categorias[chave] = CategoriaFinanceira.objects.create(
+                nome=' '.join((texto or '').split()) or 'Sem categoria', chave=chave
+            )
+        categoria = categorias[chave]
+        Transacao.objects.filter(categoria=texto).update(categoria_financeira=categoria, categoria=categoria.nome)
+
+    # Resumos mensais agrupam pelo texto da categoria: refazer com as grafias unificadas
+    ResumoFinanceiroMensal.objects.all().delete()
+    linhas = Transacao.objects.filter(deleted_at__isnull=True).annotate(mes_ref=TruncMonth('data')).values(
+        'mes_ref', 'tipo', 'categoria'
+    ).annotate(soma=Sum('valor'), contagem=Count('id')).order_by()
+    ResumoFinanceiroMensal.objects.bulk_create([
+        ResumoFinanceiroMensal(mes=linha['mes_ref'], tipo=linha['tipo'], categoria=linha['categoria'],
+                               total=linha['soma'], quantidade=linha['contagem'])
+        for linha in linhas
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_alfa', '0009_transacao_indice_extrato'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoriaFinanceira',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100)),
+                ('chave', models.CharField(max_length=100, unique=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['nome'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transacao',
+            name='categoria_financeira',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='transacoes', to='app_alfa.categoriafinanceira'),
+        ),
+        migrations.RunPython(preencher_categorias, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_alfa', '0010_categoria_financeira'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['updated_at'], name='transacao_updated_at'),
+        ),
+    ]
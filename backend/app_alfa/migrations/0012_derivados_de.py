@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_alfa', '0011_transacao_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='derivados_de',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='fotoevento',
+            name='derivados_de',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='fotopostagem',
+            name='derivados_de',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='membro',
+            name='derivados_de',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+    ]
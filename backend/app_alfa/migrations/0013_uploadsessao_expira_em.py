@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:01
+
+import app_alfa.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_alfa', '0012_derivados_de'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsessao',
+            name='expira_em',
+            field=models.DateTimeField(db_index=True, default=app_alfa.models.expiracao_upload),
+        ),
+    ]
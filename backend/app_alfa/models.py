@@ -1,9 +1,18 @@
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
 from django.utils import timezone
 from django.contrib.auth.hashers import make_password, check_password
 from django.core.exceptions import ValidationError
 from django.core.validators import EmailValidator
 import re
+import unicodedata
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from .armazenamento import get_armazenamento_conteudo
 from .validators import (
     validate_cpf, validate_phone, validate_email_domain, 
     validate_rg, validate_cep, validate_age
@@ -57,6 +66,11 @@ class SoftDeleteManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset().filter(deleted_at__isnull=True)
 
+# updated_at é gravado no save(), não no commit: uma linha salva em uma transação ainda
+# aberta pode aparecer depois com updated_at anterior a uma marca lida nesse meio tempo.
+# Leituras incrementais por updated_at (razão colunar, exportação) recuam a marca nessa folga.
+FOLGA_MARCA = timedelta(minutes=5)
+
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -214,6 +228,8 @@ class Membro(BaseModel):
     
     dados_completos = models.TextField(blank=True, null=True)  # Campo legado
     foto = models.ImageField(upload_to='membros_fotos/', blank=True, null=True)
+    # Nome da imagem cujos derivados (miniaturas) já foram gerados; ver app_alfa/imagens.py
+    derivados_de = models.CharField(max_length=100, blank=True, default='', editable=False)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=ATIVO)
     
     def set_password(self, raw_password):
@@ -239,6 +255,21 @@ class Membro(BaseModel):
     cargo = models.ForeignKey('app_alfa.Cargo', on_delete=models.PROTECT, null=True, blank=True, related_name='membros', help_text="Cargo do membro na igreja")
     cadastrado_por = models.ForeignKey('app_alfa.Admin', on_delete=models.PROTECT, null=True, blank=True, related_name='membros_cadastrados')
 
+    # Código impresso no cartão de membro (lido pelos leitores no check-in)
+    PREFIXO_CARTAO = 'ALFA-'
+
+    @property
+    def codigo_cartao(self):
+        return f"{self.PREFIXO_CARTAO}{self.pk:06d}"
+
+    @classmethod
+    def id_por_codigo_cartao(cls, codigo):
+        """Converte o código do cartão no ID do membro (None se inválido) sem consultar o banco"""
+        codigo = (codigo or '').strip().upper()
+        if codigo.startswith(cls.PREFIXO_CARTAO):
+            codigo = codigo[len(cls.PREFIXO_CARTAO):]
+        return int(codigo) if codigo.isdigit() else None
+
 class DocumentoMembro(models.Model):
     CARTAO_MEMBRO = 'cartao_membro'
     TRANSFERENCIA = 'transferencia'
@@ -251,9 +282,11 @@ class DocumentoMembro(models.Model):
     
     membro = models.ForeignKey('app_alfa.Membro', on_delete=models.CASCADE, related_name='documentos')
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
-    arquivo = models.FileField(upload_to='documentos_membros/', blank=True, null=True)
+    arquivo = models.FileField(upload_to='documentos_membros/', blank=True, null=True, storage=get_armazenamento_conteudo)
     gerado_em = models.DateTimeField(auto_now_add=True)
     gerado_por = models.ForeignKey('app_alfa.Admin', on_delete=models.SET_NULL, null=True, related_name='documentos_gerados')
+    # Hash dos dados impressos + versão do template: documento igual não é gerado de novo
+    assinatura = models.CharField(max_length=64, blank=True, null=True, db_index=True)
 
 class Grupo(models.Model):
     nome = models.CharField(max_length=100)
@@ -278,10 +311,45 @@ class Evento(BaseModel):
     local = models.CharField(max_length=255, blank=True, null=True)
     organizador = models.ForeignKey('app_alfa.Usuario', on_delete=models.CASCADE, related_name='eventos')
     foto = models.ImageField(upload_to='eventos_fotos/', blank=True, null=True)
+    # Nome da imagem cujos derivados (miniaturas) já foram gerados; ver app_alfa/imagens.py
+    derivados_de = models.CharField(max_length=100, blank=True, default='', editable=False)
+
+    # Contadores desnormalizados - mantidos pelos viewsets de presença/comentário
+    # e reconstruídos pelo comando reconciliar_contadores_eventos
+    confirmados_count = models.PositiveIntegerField(default=0, editable=False, help_text="Presenças confirmadas (ativas)")
+    comentarios_count = models.PositiveIntegerField(default=0, editable=False, help_text="Comentários aprovados (ativos)")
+
+    @classmethod
+    def ajustar_contadores(cls, evento_id, confirmados=0, comentarios=0):
+        """Soma deltas aos contadores de forma atômica no banco (sem ler o valor atual)"""
+        campos = {}
+        if confirmados:
+            campos['confirmados_count'] = F('confirmados_count') + confirmados
+        if comentarios:
+            campos['comentarios_count'] = F('comentarios_count') + comentarios
+        if campos:
+            cls.objects.filter(pk=evento_id).update(**campos)
+
+    @classmethod
+    def recalcular_contadores(cls, queryset=None):
+        """Reconstrói os contadores a partir das presenças e comentários em um único UPDATE"""
+        queryset = cls.objects.all() if queryset is None else queryset
+        confirmados = EventoPresenca.objects.filter(
+            evento=OuterRef('pk'), confirmado=True
+        ).values('evento').annotate(total=Count('id')).values('total')
+        comentarios = EventoComentario.objects.filter(
+            evento=OuterRef('pk'), aprovado=True
+        ).values('evento').annotate(total=Count('id')).values('total')
+        return queryset.update(
+            confirmados_count=Coalesce(Subquery(confirmados), 0),
+            comentarios_count=Coalesce(Subquery(comentarios), 0),
+        )
 
 class FotoEvento(models.Model):
     evento = models.ForeignKey('app_alfa.Evento', on_delete=models.CASCADE, related_name='fotos')
-    imagem = models.ImageField(upload_to='eventos_fotos/')
+    imagem = models.ImageField(upload_to='eventos_fotos/', storage=get_armazenamento_conteudo)
+    # Nome da imagem cujos derivados (miniaturas) já foram gerados; ver app_alfa/imagens.py
+    derivados_de = models.CharField(max_length=100, blank=True, default='', editable=False)
     descricao = models.CharField(max_length=255, blank=True, null=True)
     data_upload = models.DateTimeField(auto_now_add=True)
 
@@ -293,12 +361,130 @@ class Postagem(BaseModel):
 
 class FotoPostagem(models.Model):
     postagem = models.ForeignKey('app_alfa.Postagem', on_delete=models.CASCADE, related_name='fotos')
-    imagem = models.ImageField(upload_to='postagens_fotos/')
+    imagem = models.ImageField(upload_to='postagens_fotos/', storage=get_armazenamento_conteudo)
+    # Nome da imagem cujos derivados (miniaturas) já foram gerados; ver app_alfa/imagens.py
+    derivados_de = models.CharField(max_length=100, blank=True, default='', editable=False)
     descricao = models.CharField(max_length=255, blank=True, null=True)
     data_upload = models.DateTimeField(auto_now_add=True)
 
 
 
+class ArquivoConteudo(models.Model):
+    """
+    Blob do armazenamento endereçado por conteúdo (ver app_alfa/armazenamento.py).
+    `referencias` conta quantas fotos/documentos apontam para o arquivo; é mantido
+    pelos sinais e recalculado antes de qualquer remoção.
+    """
+    nome = models.CharField(max_length=255, unique=True)
+    tamanho = models.BigIntegerField(default=0)
+    referencias = models.PositiveIntegerField(default=0)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    # Modelo -> campo que guarda arquivos neste armazenamento
+    CAMPOS_REFERENCIA = (
+        ('FotoEvento', 'imagem'),
+        ('FotoPostagem', 'imagem'),
+        ('DocumentoMembro', 'arquivo'),
+    )
+
+    @classmethod
+    def registrar(cls, nome, tamanho):
+        """Cria a linha do blob ou renova a existente (reinicia a carência da coleta)"""
+        cls.objects.bulk_create(
+            [cls(nome=nome, tamanho=tamanho, atualizado_em=timezone.now())],
+            update_conflicts=True,
+            unique_fields=['nome'],
+            update_fields=['atualizado_em'],
+        )
+
+    @classmethod
+    def ajustar_referencias(cls, nome, delta):
+        if nome and delta:
+            cls.objects.filter(nome=nome).update(
+                referencias=Greatest(F('referencias') + delta, 0),
+                atualizado_em=timezone.now(),
+            )
+
+    @classmethod
+    def recalcular_referencias(cls, queryset=None):
+        """Recalcula as referências a partir dos campos de arquivo em um único UPDATE"""
+        from django.apps import apps
+
+        queryset = cls.objects.all() if queryset is None else queryset
+        total = 0
+        for modelo, campo in cls.CAMPOS_REFERENCIA:
+            contagem = apps.get_model('app_alfa', modelo)._base_manager.filter(
+                **{campo: OuterRef('nome')}
+            ).values(campo).annotate(total=Count('pk')).values('total')
+            total = total + Coalesce(Subquery(contagem), 0)
+        return queryset.update(referencias=total)
+
+    @classmethod
+    def coletar_orfaos(cls, carencia=timedelta(hours=24), storage=None):
+        """
+        Remove blobs sem referência há mais que `carencia` (e seus derivados).
+        A carência protege uploads em andamento: o blob é gravado antes da linha que o referencia.
+        Retorna (quantidade, bytes liberados).
+        """
+        from .imagens import remover_derivados
+
+        storage = storage or get_armazenamento_conteudo()
+        candidatos = cls.objects.filter(referencias=0, atualizado_em__lt=timezone.now() - carencia)
+        # Contadores podem ter divergido (update()/bulk_create não disparam sinais)
+        cls.recalcular_referencias(candidatos)
+
+        quantidade = liberados = 0
+        for blob in candidatos.filter(referencias=0).iterator():
+            if storage.exists(blob.nome):
+                storage.delete(blob.nome)
+            remover_derivados(blob.nome, storage)
+            blob.delete()
+            quantidade += 1
+            liberados += blob.tamanho
+        return quantidade, liberados
+
+
+def validade_upload():
+    return timedelta(hours=getattr(settings, 'ALFA_UPLOADS_VALIDADE_HORAS', 24))
+
+
+def expiracao_upload():
+    """Prazo de uma sessão de upload; renovado a cada parte aceita"""
+    return timezone.now() + validade_upload()
+
+
+class UploadSessao(models.Model):
+    """
+    Sessão de upload em partes (chunks) com retomada.
+    As partes são gravadas direto em um arquivo temporário (ver app_alfa/uploads.py)
+    e, ao concluir, o arquivo é movido para o campo de destino sem ser relido.
+    Sessões abandonadas expiram (expira_em) e são removidas, com o temporário, pelo
+    comando limpar_uploads_expirados.
+    """
+    FOTO_EVENTO = 'foto_evento'
+    FOTO_POSTAGEM = 'foto_postagem'
+    COMPROVANTE_OFERTA = 'comprovante_oferta'
+    DESTINO_CHOICES = [
+        (FOTO_EVENTO, 'Foto de Evento'),
+        (FOTO_POSTAGEM, 'Foto de Postagem'),
+        (COMPROVANTE_OFERTA, 'Comprovante de Distribuição de Oferta'),
+    ]
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    destino = models.CharField(max_length=30, choices=DESTINO_CHOICES)
+    objeto_id = models.BigIntegerField(help_text="ID do evento, postagem ou distribuição de oferta")
+    nome_arquivo = models.CharField(max_length=255)
+    descricao = models.CharField(max_length=255, blank=True, null=True)
+    tamanho_total = models.BigIntegerField()
+    recebido = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, null=True, help_text="Checksum do arquivo completo (opcional)")
+    criado_por = models.CharField(max_length=150)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    concluido_em = models.DateTimeField(blank=True, null=True)
+    expira_em = models.DateTimeField(default=expiracao_upload, db_index=True)
+
 class ONG(models.Model):
     nome = models.CharField(max_length=200)
     descricao = models.TextField(blank=True, null=True)
@@ -332,6 +518,54 @@ class Transferencia(BaseModel):
     motivo = models.TextField(blank=True)
     gerado_por = models.ForeignKey('app_alfa.Admin', on_delete=models.SET_NULL, null=True, related_name='transferencias_geradas')
 
+class CategoriaFinanceira(models.Model):
+    """
+    Categoria de transação identificada por uma chave normalizada (sem acentos,
+    minúsculas, espaços simples): "Dízimo", "dizimo" e "DIZIMO" são a mesma categoria.
+    `nome` é a grafia exibida, a primeira registrada.
+    """
+    DIZIMO = 'dizimo'
+    OFERTA = 'oferta'
+
+    nome = models.CharField(max_length=100)
+    chave = models.CharField(max_length=100, unique=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['nome']
+
+    def __str__(self):
+        return self.nome
+
+    @staticmethod
+    def normalizar(texto):
+        decomposto = unicodedata.normalize('NFKD', texto or '')
+        sem_acento = ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+        return ' '.join(sem_acento.casefold().split())
+
+    @classmethod
+    def obter(cls, nome):
+        """Categoria da chave de `nome`, criada se ainda não existe"""
+        chave = cls.normalizar(nome)
+        if not chave:
+            raise ValidationError('Categoria é obrigatória.')
+        categoria = cls.objects.filter(chave=chave).first()
+        if categoria:
+            return categoria
+        try:
+            with transaction.atomic():
+                return cls.objects.create(nome=' '.join(nome.split()), chave=chave)
+        except IntegrityError:
+            return cls.objects.get(chave=chave)
+
+    @classmethod
+    def com_uso(cls):
+        """Todas as categorias com o número de transações ativas, das mais usadas para as menos"""
+        return list(cls.objects.annotate(
+            uso=Count('transacoes', filter=models.Q(transacoes__deleted_at__isnull=True))
+        ).order_by('-uso', 'nome').values('id', 'nome', 'chave', 'uso'))
+
+
 class Transacao(BaseModel):
     ENTRADA = 'entrada'
     SAIDA = 'saida'
@@ -341,7 +575,10 @@ class Transacao(BaseModel):
     ]
 
     tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    # Texto informado; ao salvar vira a grafia da categoria normalizada abaixo
     categoria = models.CharField(max_length=100)
+    categoria_financeira = models.ForeignKey(CategoriaFinanceira, on_delete=models.PROTECT, null=True, blank=True,
+                                             editable=False, related_name='transacoes')
     valor = models.DecimalField(max_digits=10, decimal_places=2)
     data = models.DateField()
     descricao = models.TextField(blank=True, null=True)
@@ -349,6 +586,305 @@ class Transacao(BaseModel):
     observacoes = models.TextField(blank=True, null=True)
     registrado_por = models.ForeignKey('app_alfa.Admin', on_delete=models.SET_NULL, null=True, related_name='transacoes_registradas')
 
+    class Meta:
+        indexes = [
+            # Ordem do extrato e paginação por keyset (app_alfa/extrato.py)
+            models.Index(fields=['data', 'id'], name='transacao_data_id'),
+            # Atualização incremental do razão colunar (app_alfa/razao_colunar.py)
+            models.Index(fields=['updated_at'], name='transacao_updated_at'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Nem a data nova nem a antiga podem estar em um mês fechado
+        datas = [self.data]
+        if self.pk:
+            datas.append(Transacao._base_manager.filter(pk=self.pk).values_list('data', flat=True).first())
+        FechamentoMensal.verificar_aberto(*datas)
+        
+        if (self.categoria_financeira_id is None
+                or CategoriaFinanceira.normalizar(self.categoria) != self.categoria_financeira.chave):
+            self.categoria_financeira = CategoriaFinanceira.obter(self.categoria)
+        self.categoria = self.categoria_financeira.nome
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'categoria', 'categoria_financeira'}
+        super().save(*args, **kwargs)
+
+    def hard_delete(self, **kwargs):
+        FechamentoMensal.verificar_aberto(self.data)
+        super().hard_delete(**kwargs)
+
+class ResumoFinanceiroMensal(models.Model):
+    """
+    Soma e quantidade de transações ativas por mês, tipo e categoria.
+    Mantido pelos sinais de Transacao (criação, edição, exclusão lógica e física);
+    update()/bulk_create não disparam sinais, então o comando
+    reconstruir_resumos_financeiros refaz a tabela a partir das transações.
+    """
+    mes = models.DateField(help_text="Primeiro dia do mês")
+    tipo = models.CharField(max_length=10, choices=Transacao.TIPO_CHOICES)
+    categoria = models.CharField(max_length=100)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    quantidade = models.IntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mes', 'tipo', 'categoria'], name='resumo_financeiro_mes_tipo_categoria'),
+        ]
+        ordering = ['mes', 'tipo', 'categoria']
+
+    @staticmethod
+    def inicio_mes(dia):
+        return dia.replace(day=1)
+
+    @staticmethod
+    def proximo_mes(dia):
+        return (dia.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+    @staticmethod
+    def contribuicao(transacao):
+        """(mes, tipo, categoria, valor) de uma transação ativa; None se não conta"""
+        if transacao.get('deleted_at') is not None:
+            return None
+        dia = Transacao._meta.get_field('data').to_python(transacao['data'])
+        valor = Transacao._meta.get_field('valor').to_python(transacao['valor'])
+        return dia.replace(day=1), transacao['tipo'], transacao['categoria'], valor
+
+    @classmethod
+    def aplicar(cls, mes, tipo, categoria, valor, quantidade):
+        """Soma `valor`/`quantidade` (podem ser negativos) no mês, criando a linha se preciso"""
+        filtro = cls.objects.filter(mes=mes, tipo=tipo, categoria=categoria)
+        alteracao = {'total': F('total') + valor, 'quantidade': F('quantidade') + quantidade,
+                     'atualizado_em': timezone.now()}
+        if filtro.update(**alteracao):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(mes=mes, tipo=tipo, categoria=categoria, total=valor, quantidade=quantidade)
+        except IntegrityError:
+            # Outra requisição criou a linha no intervalo
+            filtro.update(**alteracao)
+
+    @classmethod
+    def registrar_alteracao(cls, anterior, atual):
+        """Aplica a diferença entre dois estados de uma transação (dicts; None = inexistente)"""
+        antes = cls.contribuicao(anterior) if anterior else None
+        depois = cls.contribuicao(atual) if atual else None
+        if antes == depois:
+            return
+        if antes:
+            cls.aplicar(*antes[:3], -antes[3], -1)
+        if depois:
+            cls.aplicar(*depois[:3], depois[3], 1)
+
+    @classmethod
+    def agregar_transacoes(cls, transacoes):
+        """Agrupa transações por mês/tipo/categoria direto no banco"""
+        return transacoes.annotate(mes_ref=TruncMonth('data')).values('mes_ref', 'tipo', 'categoria').annotate(
+            soma=Sum('valor'), contagem=Count('id')
+        ).order_by()
+
+    @classmethod
+    def reconstruir(cls, inicio=None, fim=None):
+        """
+        Refaz os resumos dos meses entre `inicio` e `fim` (datas; None = sem limite).
+        Retorna a quantidade de linhas criadas.
+        """
+        transacoes = Transacao.objects.all()
+        resumos = cls.objects.all()
+        if inicio:
+            inicio = cls.inicio_mes(inicio)
+            transacoes = transacoes.filter(data__gte=inicio)
+            resumos = resumos.filter(mes__gte=inicio)
+        if fim:
+            limite = cls.proximo_mes(fim)
+            transacoes = transacoes.filter(data__lt=limite)
+            resumos = resumos.filter(mes__lt=limite)
+
+        with transaction.atomic():
+            resumos.delete()
+            linhas = [
+                cls(mes=linha['mes_ref'], tipo=linha['tipo'], categoria=linha['categoria'],
+                    total=linha['soma'], quantidade=linha['contagem'])
+                for linha in cls.agregar_transacoes(transacoes)
+            ]
+            cls.objects.bulk_create(linhas, batch_size=500)
+        return len(linhas)
+
+    @classmethod
+    def somar_periodo(cls, inicio, fim):
+        """
+        {(tipo, categoria): [total, quantidade]} das transações entre `inicio` e `fim` (inclusive).
+        Meses inteiros vêm dos resumos; só as pontas de meses parciais leem transações.
+        """
+        inicio, fim = como_data(inicio), como_data(fim)
+        resultado = defaultdict(lambda: [Decimal('0'), 0])
+        if fim < inicio:
+            return resultado
+
+        limite = fim + timedelta(days=1)
+        primeiro_inteiro = inicio if inicio.day == 1 else cls.proximo_mes(inicio)
+        fim_inteiros = cls.inicio_mes(limite)
+        if primeiro_inteiro < fim_inteiros:
+            for linha in cls.objects.filter(mes__gte=primeiro_inteiro, mes__lt=fim_inteiros).values(
+                'tipo', 'categoria'
+            ).annotate(soma=Sum('total'), contagem=Sum('quantidade')).order_by():
+                item = resultado[(linha['tipo'], linha['categoria'])]
+                item[0] += linha['soma']
+                item[1] += linha['contagem']
+            pontas = [(inicio, primeiro_inteiro), (fim_inteiros, limite)]
+        else:
+            pontas = [(inicio, limite)]
+
+        for de, ate in pontas:
+            if de >= ate:
+                continue
+            for linha in Transacao.objects.filter(data__gte=de, data__lt=ate).values('tipo', 'categoria').annotate(
+                soma=Sum('valor'), contagem=Count('id')
+            ).order_by():
+                item = resultado[(linha['tipo'], linha['categoria'])]
+                item[0] += linha['soma']
+                item[1] += linha['contagem']
+        return resultado
+
+
+class PeriodoFechadoErro(ValidationError):
+    """Alteração em transação de um mês já fechado"""
+
+
+class FechamentoMensal(models.Model):
+    """
+    Fechamento de um mês do caixa: saldos de abertura e fechamento e totais por
+    categoria congelados no momento do fechamento.
+
+    Os meses são fechados em sequência e tudo até o último mês fechado fica bloqueado
+    para edição. Saldos em qualquer data partem do fechamento mais próximo em vez de
+    somar todo o histórico.
+    """
+    mes = models.DateField(unique=True, help_text="Primeiro dia do mês")
+    saldo_inicial = models.DecimalField(max_digits=14, decimal_places=2)
+    total_entradas = models.DecimalField(max_digits=14, decimal_places=2)
+    total_saidas = models.DecimalField(max_digits=14, decimal_places=2)
+    saldo_final = models.DecimalField(max_digits=14, decimal_places=2)
+    quantidade = models.IntegerField(default=0)
+    # {'entrada': {'Dízimo': '1500.00', ...}, 'saida': {...}}
+    categorias = models.JSONField(default=dict)
+    fechado_em = models.DateTimeField(auto_now_add=True)
+    fechado_por = models.ForeignKey('app_alfa.Admin', on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='fechamentos')
+
+    class Meta:
+        ordering = ['-mes']
+
+    def __str__(self):
+        return f"Fechamento {self.mes.strftime('%m/%Y')}"
+
+    @classmethod
+    def ultimo(cls):
+        return cls.objects.order_by('-mes').first()
+
+    @classmethod
+    def verificar_aberto(cls, *datas):
+        """Levanta PeriodoFechadoErro se alguma data está em um mês fechado"""
+        datas = [Transacao._meta.get_field('data').to_python(dia) for dia in datas if dia]
+        if not datas:
+            return
+        ultimo = cls.ultimo()
+        if ultimo is None:
+            return
+        limite = ResumoFinanceiroMensal.proximo_mes(ultimo.mes)
+        if any(dia < limite for dia in datas):
+            raise PeriodoFechadoErro(
+                f"Período fechado: transações até {ultimo.mes.strftime('%m/%Y')} não podem ser alteradas."
+            )
+
+    @staticmethod
+    def _saldo(somas):
+        return sum(
+            (total if tipo == Transacao.ENTRADA else -total for (tipo, _), (total, _) in somas.items()),
+            Decimal('0')
+        )
+
+    @classmethod
+    def saldo_ate(cls, dia):
+        """
+        Saldo de todas as transações anteriores a `dia` (exclusivo), a partir do fechamento
+        mais recente que termina antes dele.
+        """
+        dia = como_data(dia)
+        base = cls.objects.filter(mes__lt=dia.replace(day=1)).order_by('-mes').first()
+        if base:
+            inicio, saldo = ResumoFinanceiroMensal.proximo_mes(base.mes), base.saldo_final
+        else:
+            inicio, saldo = Transacao.objects.aggregate(inicio=models.Min('data'))['inicio'], Decimal('0')
+        if inicio is None or inicio >= dia:
+            return saldo
+        return saldo + cls._saldo(ResumoFinanceiroMensal.somar_periodo(inicio, dia - timedelta(days=1)))
+
+    @classmethod
+    def fechar(cls, mes, fechado_por=None):
+        """Fecha o mês (date de qualquer dia do mês); levanta PeriodoFechadoErro se não puder"""
+        mes = como_data(mes).replace(day=1)
+        proximo = ResumoFinanceiroMensal.proximo_mes(mes)
+        if proximo > timezone.localdate():
+            raise PeriodoFechadoErro('Só é possível fechar meses já encerrados.')
+
+        with transaction.atomic():
+            ultimo = cls.objects.select_for_update().order_by('-mes').first()
+            if ultimo and mes <= ultimo.mes:
+                raise PeriodoFechadoErro(f"O mês {mes.strftime('%m/%Y')} já está fechado.")
+            if ultimo and mes != ResumoFinanceiroMensal.proximo_mes(ultimo.mes):
+                raise PeriodoFechadoErro(
+                    f"Feche os meses em sequência: o próximo é {ResumoFinanceiroMensal.proximo_mes(ultimo.mes).strftime('%m/%Y')}."
+                )
+
+            # Os valores congelados não dependem de o resumo estar em dia
+            ResumoFinanceiroMensal.reconstruir(mes, mes)
+            somas = ResumoFinanceiroMensal.somar_periodo(mes, proximo - timedelta(days=1))
+            saldo_inicial = ultimo.saldo_final if ultimo else cls.saldo_ate(mes)
+
+            categorias = {Transacao.ENTRADA: {}, Transacao.SAIDA: {}}
+            totais = {Transacao.ENTRADA: Decimal('0'), Transacao.SAIDA: Decimal('0')}
+            quantidade = 0
+            for (tipo, categoria), (total, contagem) in sorted(somas.items()):
+                if not contagem:
+                    continue
+                categorias[tipo][categoria] = str(total.quantize(Decimal('0.01')))
+                totais[tipo] += total
+                quantidade += contagem
+
+            try:
+                with transaction.atomic():
+                    return cls.objects.create(
+                        mes=mes,
+                        saldo_inicial=saldo_inicial,
+                        total_entradas=totais[Transacao.ENTRADA],
+                        total_saidas=totais[Transacao.SAIDA],
+                        saldo_final=saldo_inicial + totais[Transacao.ENTRADA] - totais[Transacao.SAIDA],
+                        quantidade=quantidade,
+                        categorias=categorias,
+                        fechado_por=fechado_por,
+                    )
+            except IntegrityError:
+                raise PeriodoFechadoErro(f"O mês {mes.strftime('%m/%Y')} já está fechado.")
+
+    @classmethod
+    def reabrir(cls):
+        """Reabre o último mês fechado (apenas ele, para manter a sequência)"""
+        with transaction.atomic():
+            ultimo = cls.objects.select_for_update().order_by('-mes').first()
+            if ultimo is None:
+                raise PeriodoFechadoErro('Nenhum mês fechado.')
+            ultimo.delete()
+        return ultimo
+
+
+def como_data(valor):
+    """date a partir de date/datetime (datetimes com fuso vão para o horário local)"""
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).date() if timezone.is_aware(valor) else valor.date()
+    return valor
+
 class EventoPresenca(BaseModel):
     """Modelo para confirmação de presença em eventos"""
     evento = models.ForeignKey('app_alfa.Evento', on_delete=models.CASCADE, related_name='presencas')
@@ -360,6 +896,133 @@ class EventoPresenca(BaseModel):
     class Meta:
         unique_together = ['evento', 'membro']  # Um membro só pode confirmar presença uma vez por evento
 
+    # Resultados possíveis do check-in em lote
+    CHECKIN_CRIADO = 'criado'
+    CHECKIN_CONFIRMADO = 'confirmado'
+    CHECKIN_JA_CONFIRMADO = 'ja_confirmado'
+    CHECKIN_MEMBRO_INEXISTENTE = 'membro_nao_encontrado'
+    CHECKIN_CODIGO_INVALIDO = 'codigo_invalido'
+    CHECKIN_EVENTO_INEXISTENTE = 'evento_nao_encontrado'
+
+    @classmethod
+    def checkin_em_lote(cls, evento, membro_ids, batch_size=1000):
+        """
+        Confirma presença de vários membros em um evento com um único upsert
+        (INSERT ... ON CONFLICT (evento, membro) DO UPDATE).
+
+        Presenças removidas (soft delete) são reativadas. Retorna um dict
+        {membro_id: resultado} com um dos valores CHECKIN_*.
+        """
+        membro_ids = list(dict.fromkeys(membro_ids))
+        resultados = {}
+
+        with transaction.atomic():
+            # Trava o evento: check-ins simultâneos do mesmo culto ficam serializados
+            # e o delta de confirmados_count é exato
+            Evento.objects.select_for_update().filter(pk=evento.pk).first()
+
+            validos = set(Membro.objects.filter(pk__in=membro_ids).values_list('pk', flat=True))
+            # _base_manager inclui presenças com soft delete (que ocupam a chave única)
+            existentes = {
+                membro_id: confirmado and deleted_at is None
+                for membro_id, confirmado, deleted_at in cls._base_manager.filter(
+                    evento=evento, membro_id__in=validos
+                ).values_list('membro_id', 'confirmado', 'deleted_at')
+            }
+
+            novos = []
+            for membro_id in membro_ids:
+                if membro_id not in validos:
+                    resultados[membro_id] = cls.CHECKIN_MEMBRO_INEXISTENTE
+                elif existentes.get(membro_id):
+                    resultados[membro_id] = cls.CHECKIN_JA_CONFIRMADO
+                else:
+                    resultados[membro_id] = cls.CHECKIN_CONFIRMADO if membro_id in existentes else cls.CHECKIN_CRIADO
+                    novos.append(cls(evento=evento, membro_id=membro_id, confirmado=True))
+
+            if novos:
+                cls.objects.bulk_create(
+                    novos,
+                    batch_size=batch_size,
+                    update_conflicts=True,
+                    unique_fields=['evento', 'membro'],
+                    update_fields=['confirmado', 'data_confirmacao', 'deleted_at', 'is_active', 'updated_at'],
+                )
+                Evento.ajustar_contadores(evento.pk, confirmados=len(novos))
+
+        return resultados
+
+class CheckinIdempotencia(models.Model):
+    """
+    Chaves de idempotência dos check-ins sincronizados pelos tablets (modo offline).
+    Uma chave já registrada não é reprocessada: o resultado original é devolvido.
+    """
+    chave = models.CharField(max_length=64, unique=True, help_text="Chave gerada no dispositivo (ex.: UUID)")
+    evento = models.ForeignKey('app_alfa.Evento', on_delete=models.SET_NULL, null=True, blank=True, related_name='checkins_sincronizados')
+    membro_id = models.BigIntegerField(null=True, blank=True)
+    resultado = models.CharField(max_length=30)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def sincronizar(cls, checkins):
+        """
+        Processa um lote de check-ins offline [{'chave', 'evento', 'membro'}].
+
+        As chaves já conhecidas são resolvidas com uma única consulta indexada
+        (chave__in); as novas viram um upsert por evento e o lote inteiro é
+        gravado atomicamente. Retorna {chave: (resultado, duplicado)}.
+        """
+        chaves = [checkin['chave'] for checkin in checkins]
+
+        with transaction.atomic():
+            conhecidas = dict(cls.objects.filter(chave__in=chaves).values_list('chave', 'resultado'))
+            resultados = {chave: (resultado, True) for chave, resultado in conhecidas.items()}
+
+            pendentes = []
+            for checkin in checkins:
+                if checkin['chave'] not in resultados:
+                    resultados[checkin['chave']] = None
+                    pendentes.append(checkin)
+            if not pendentes:
+                return resultados
+
+            eventos = Evento.objects.in_bulk({checkin['evento'] for checkin in pendentes})
+            por_evento = {}
+            novos = {}
+            for checkin in pendentes:
+                if not checkin['membro']:
+                    novos[checkin['chave']] = EventoPresenca.CHECKIN_CODIGO_INVALIDO
+                elif checkin['evento'] not in eventos:
+                    novos[checkin['chave']] = EventoPresenca.CHECKIN_EVENTO_INEXISTENTE
+                else:
+                    por_evento.setdefault(checkin['evento'], []).append(checkin)
+
+            for evento_id, itens in por_evento.items():
+                status_por_membro = EventoPresenca.checkin_em_lote(
+                    eventos[evento_id], [item['membro'] for item in itens]
+                )
+                # O mesmo membro lido duas vezes no lote só é "criado" na primeira leitura
+                vistos = set()
+                for item in itens:
+                    resultado = status_por_membro[item['membro']]
+                    if item['membro'] in vistos and resultado != EventoPresenca.CHECKIN_MEMBRO_INEXISTENTE:
+                        resultado = EventoPresenca.CHECKIN_JA_CONFIRMADO
+                    vistos.add(item['membro'])
+                    novos[item['chave']] = resultado
+
+            cls.objects.bulk_create([
+                cls(
+                    chave=checkin['chave'],
+                    evento_id=checkin['evento'] if checkin['evento'] in eventos else None,
+                    membro_id=checkin['membro'],
+                    resultado=novos[checkin['chave']],
+                )
+                for checkin in pendentes
+            ], ignore_conflicts=True)
+
+        resultados.update({chave: (resultado, False) for chave, resultado in novos.items()})
+        return resultados
+
 class EventoComentario(BaseModel):
     """Modelo para comentários em eventos"""
     evento = models.ForeignKey('app_alfa.Evento', on_delete=models.CASCADE, related_name='comentarios')
@@ -0,0 +1,173 @@
+"""
+Pacote mensal de relatórios - Alfa+
+Relatórios de membros, financeiro, eventos e um por ONG de um mês, em um único ZIP.
+
+- O processo principal faz todas as consultas de uma vez, antes de qualquer
+  renderização: cada relatório vira sua lista de seções (só dados simples).
+- Os processos do pool só renderizam com ReportLab, sem acesso ao banco, cada um
+  com o seu motor (get_report_engine); os relatórios maiores entram primeiro.
+- Os processos são criados por spawn (o processo web já tem threads); o endpoint
+  usa o pool de longa duração de get_pool() em vez de criar um a cada pedido.
+- O ZIP sai enquanto é montado (como o álbum de eventos): cada PDF entra assim que
+  fica pronto, na ordem em que terminam.
+- tempos.json, a última entrada, registra por relatório o tempo de consultas, o de
+  renderização e o tamanho do PDF.
+"""
+
+import json
+import threading
+import time
+import zipfile
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, time as horario, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .album import SaidaStream
+from .analise import somar_meses
+from .pdf_templates import TableSection, get_report_engine
+from .processos import novo_pool
+from .reports import RelatorioEventos, RelatorioFinanceiro, RelatorioMembros, RelatorioONG
+
+
+ARQUIVO_TEMPOS = 'tempos.json'
+
+
+def mes_anterior(hoje=None):
+    """Primeiro dia do mês anterior (padrão do fechamento)"""
+    return somar_meses((hoje or timezone.localdate()).replace(day=1), -1)
+
+
+def _linhas(secoes):
+    return sum(len(secao.rows) for secao in secoes if isinstance(secao, TableSection))
+
+
+def _novo_pool(workers):
+    # Cada worker monta o seu motor uma vez, antes do primeiro relatório
+    return novo_pool(workers, preparar='app_alfa.pdf_templates.get_report_engine')
+
+
+_pool = None
+_trava_pool = threading.Lock()
+
+
+def get_pool():
+    """Pool de longa duração do processo web, com ALFA_RELATORIOS_WORKERS processos"""
+    global _pool
+    with _trava_pool:
+        if _pool is None:
+            _pool = _novo_pool(getattr(settings, 'ALFA_RELATORIOS_WORKERS', 1))
+        return _pool
+
+
+def encerrar_pool():
+    """Encerra o pool compartilhado; o próximo get_pool() cria outro"""
+    global _pool
+    with _trava_pool:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def renderizar(item):
+    """(nome, seções) -> (nome, bytes do PDF, segundos de renderização)"""
+    nome, secoes = item
+    inicio = time.perf_counter()
+    pdf = get_report_engine().render(secoes)
+    return nome, pdf, time.perf_counter() - inicio
+
+
+def _executar(itens, workers, pool=None):
+    """
+    Resultados na ordem em que ficam prontos.
+    Sem `pool`, cria um temporário com até `workers` processos (comando de gerenciamento).
+    """
+    if workers <= 1 or len(itens) <= 1:
+        for item in itens:
+            yield renderizar(item)
+        return
+    if pool is None:
+        with _novo_pool(min(workers, len(itens))) as temporario:
+            for futuro in as_completed([temporario.submit(renderizar, item) for item in itens]):
+                yield futuro.result()
+        return
+    futuros = [pool.submit(renderizar, item) for item in itens]
+    try:
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+    except BrokenProcessPool:
+        # Um worker morreu; o próximo pedido recomeça com outro pool
+        if pool is _pool:
+            encerrar_pool()
+        raise
+    finally:
+        # Download interrompido: não deixa o pool compartilhado ocupado à toa
+        for futuro in futuros:
+            futuro.cancel()
+
+
+class PacoteMensal:
+    """
+    Relatórios de um mês; `tempos` é preenchido enquanto o ZIP é gerado.
+    `pool` (ex.: get_pool()) reaproveita processos já iniciados; `workers` deve ser o tamanho dele.
+    """
+
+    def __init__(self, mes, workers=1, pool=None):
+        self.mes = mes.replace(day=1)
+        self.workers = workers
+        self.pool = pool
+        self.tempos = {}
+
+    @property
+    def nome_arquivo(self):
+        return f'relatorios_{self.mes:%Y-%m}.zip'
+
+    def relatorios(self):
+        """[(nome no ZIP, relatório)]; o período vai do primeiro ao último instante do mês"""
+        inicio = timezone.make_aware(datetime.combine(self.mes, horario.min))
+        fim = timezone.make_aware(datetime.combine(somar_meses(self.mes, 1), horario.min)) - timedelta(microseconds=1)
+        relatorios = [
+            ('membros.pdf', RelatorioMembros(inicio, fim)),
+            ('financeiro.pdf', RelatorioFinanceiro(inicio, fim)),
+            ('eventos.pdf', RelatorioEventos(inicio, fim)),
+        ]
+        relatorios += [
+            (f'ongs/{relatorio.ong.pk:03d}_{slugify(relatorio.ong.nome)[:50] or "ong"}.pdf', relatorio)
+            for relatorio in RelatorioONG.do_periodo(inicio, fim)
+        ]
+        return relatorios
+
+    def preparar(self):
+        """[(nome, seções)] com todas as consultas já feitas, dos maiores para os menores"""
+        itens = []
+        for nome, relatorio in self.relatorios():
+            inicio = time.perf_counter()
+            secoes = relatorio.get_sections()
+            self.tempos[nome] = {'consultas_ms': round((time.perf_counter() - inicio) * 1000, 1)}
+            itens.append((nome, secoes))
+        return sorted(itens, key=lambda item: _linhas(item[1]), reverse=True)
+
+    def gerar(self):
+        """Bytes do ZIP, gerados conforme os relatórios ficam prontos"""
+        inicio = time.perf_counter()
+        itens = self.preparar()
+        saida = SaidaStream()
+        # PDFs do ReportLab já saem com os streams comprimidos
+        with zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_STORED) as arquivo_zip:
+            for nome, pdf, segundos in _executar(itens, self.workers, self.pool):
+                self.tempos[nome].update(renderizacao_ms=round(segundos * 1000, 1), bytes=len(pdf))
+                arquivo_zip.writestr(zipfile.ZipInfo(nome, date_time=timezone.localtime().timetuple()[:6]), pdf)
+                yield saida.esvaziar()
+            resumo = {
+                'mes': f'{self.mes:%Y-%m}',
+                'workers': self.workers,
+                'total_ms': round((time.perf_counter() - inicio) * 1000, 1),
+                'relatorios': self.tempos,
+            }
+            arquivo_zip.writestr(ARQUIVO_TEMPOS, json.dumps(resumo, indent=2, ensure_ascii=False))
+            yield saida.esvaziar()
+        # Diretório central
+        yield saida.esvaziar()
@@ -4,20 +4,27 @@ Templates profissionais e reutilizáveis para geração de relatórios
 """
 
 from reportlab.lib.pagesizes import A4, letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
+from reportlab.pdfbase import pdfmetrics
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
-from reportlab.graphics.shapes import Drawing, Rect, String
+from reportlab.graphics.shapes import Drawing, Group, Rect, String, UserNode
 from reportlab.graphics.charts.piecharts import Pie
 from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.graphics import renderPDF
 from reportlab.lib.utils import ImageReader
+from collections import OrderedDict
 from datetime import datetime
+import copy
+import hashlib
 import io
+import json
 import os
+import threading
 from django.conf import settings
+from django.utils import timezone
 
 class PDFStyles:
     """Classe com estilos padronizados para PDFs"""
@@ -207,26 +214,94 @@ class PDFFooter:
             ])
         )
 
+def _copiar_forma(forma):
+    """
+    Cópia de um desenho só com formas básicas: widgets (eixos, legendas) são expandidos
+    em qualquer nível e cada forma é um objeto novo (Group.copy reaproveita os filhos).
+    """
+    if isinstance(forma, UserNode):
+        return _copiar_forma(forma.provideNode())
+    copia = copy.copy(forma)
+    if isinstance(forma, Group):
+        copia.contents = [_copiar_forma(filho) for filho in forma.contents]
+    return copia
+
+
 class PDFCharts:
-    """Classe para gerar gráficos nos PDFs"""
+    """
+    Classe para gerar gráficos nos PDFs.
+    Cada gráfico é guardado já expandido em formas simples (_copiar_forma), então o
+    mesmo gráfico pedido de novo (mesmos dados, título e tamanho) não é recalculado;
+    cada relatório recebe uma cópia, para que renderizações simultâneas não colidam.
+    O cache é limitado (LRU) e vale para o processo, já que o motor é compartilhado.
+    """
     
-    def __init__(self, styles):
+    def __init__(self, styles, cache_size=None):
         self.styles = styles
         self.colors = styles.colors
-    
-    def create_pie_chart(self, data, title, width=4*inch, height=3*inch):
-        """Cria gráfico de pizza"""
-        drawing = Drawing(width, height)
-        
-        # Cores para o gráfico
-        chart_colors = [
+        # Cores para os gráficos
+        self.chart_colors = (
             self.colors['primary'],
             self.colors['secondary'],
             self.colors['accent'],
             self.colors['success'],
             self.colors['warning'],
             self.colors['danger']
-        ]
+        )
+        if cache_size is None:
+            cache_size = getattr(settings, 'ALFA_PDF_GRAFICOS_CACHE', 128)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def cache_key(kind, data, title, width, height):
+        """Hash dos dados (na ordem de exibição), título e dimensões"""
+        conteudo = json.dumps([kind, list(data.items()), title, width, height], default=str)
+        return hashlib.sha256(conteudo.encode()).hexdigest()
+    
+    def _cached(self, kind, data, title, width, height, build):
+        if not self.cache_size:
+            return build()
+        key = self.cache_key(kind, data, title, width, height)
+        with self._lock:
+            drawing = self._cache.get(key)
+            if drawing is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                # Cópia: o ReportLab marca o desenho e as formas (canv, _parent) enquanto desenha
+                return _copiar_forma(drawing)
+        
+        # Desenhado fora do lock; se duas threads montarem o mesmo gráfico, fica o último
+        drawing = _copiar_forma(build())
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = drawing
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return _copiar_forma(drawing)
+    
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+    
+    def create_pie_chart(self, data, title, width=4*inch, height=3*inch):
+        """Cria gráfico de pizza"""
+        return self._cached('pie', data, title, width, height,
+                            lambda: self._build_pie_chart(data, width, height))
+    
+    def create_bar_chart(self, data, title, width=6*inch, height=3*inch):
+        """Cria gráfico de barras"""
+        return self._cached('bar', data, title, width, height,
+                            lambda: self._build_bar_chart(data, width, height))
+    
+    def _build_pie_chart(self, data, width, height):
+        drawing = Drawing(width, height)
+        chart_colors = self.chart_colors
         
         pie = Pie()
         pie.x = 0.5*inch
@@ -250,8 +325,7 @@ class PDFCharts:
         drawing.add(pie)
         return drawing
     
-    def create_bar_chart(self, data, title, width=6*inch, height=3*inch):
-        """Cria gráfico de barras"""
+    def _build_bar_chart(self, data, width, height):
         drawing = Drawing(width, height)
         
         chart = VerticalBarChart()
@@ -282,6 +356,16 @@ class PDFMetrics:
     
     def __init__(self, styles):
         self.styles = styles
+        self.summary_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f8fafc')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb'))
+        ])
     
     def create_metrics_summary(self, metrics):
         """Cria resumo de métricas destacadas"""
@@ -300,16 +384,7 @@ class PDFMetrics:
             ])
         
         table = Table(data, colWidths=[3*inch, 2*inch, 2*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f8fafc')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb'))
-        ]))
+        table.setStyle(self.summary_style)
         
         elements.append(table)
         elements.append(Spacer(1, 0.2*inch))
@@ -335,22 +410,7 @@ class PDFTable:
     
     def __init__(self, styles):
         self.styles = styles
-    
-    def create_professional_table(self, headers, data, title=None):
-        """Cria tabela profissional com estilo"""
-        elements = []
-        
-        if title:
-            elements.append(Paragraph(title, self.styles['CabecSecao']))
-        
-        # Preparar dados da tabela
-        table_data = [headers] + data
-        
-        # Criar tabela
-        table = Table(table_data, repeatRows=1)
-        
-        # Aplicar estilo
-        table.setStyle(TableStyle([
+        self.table_style = TableStyle([
             # Cabeçalho
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
@@ -371,9 +431,181 @@ class PDFTable:
             
             # Alternância de cores nas linhas
             ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')])
-        ]))
+        ])
+    
+    def create_professional_table(self, headers, data, title=None):
+        """Cria tabela profissional com estilo"""
+        elements = []
+        
+        if title:
+            elements.append(Paragraph(title, self.styles['CabecSecao']))
+        
+        # Preparar dados da tabela
+        table_data = [headers] + data
+        
+        # Criar tabela
+        table = Table(table_data, repeatRows=1)
+        
+        # Aplicar estilo
+        table.setStyle(self.table_style)
         
         elements.append(table)
         elements.append(Spacer(1, 0.2*inch))
         
         return elements
+
+
+# ---------------------------------------------------------------------------
+# Motor de renderização compartilhado
+#
+# Estilos, fontes, paletas e TableStyles são montados uma única vez por processo
+# e só lidos depois disso, então o mesmo motor atende relatórios simultâneos.
+# Cada relatório descreve o conteúdo como uma lista de seções.
+# ---------------------------------------------------------------------------
+
+class HeaderSection:
+    """Cabeçalho com logo, título, subtítulo e data de geração"""
+    
+    def __init__(self, titulo, subtitulo=None):
+        self.titulo = titulo
+        self.subtitulo = subtitulo
+    
+    def build(self, engine):
+        return engine.header.create_header(self.titulo, self.subtitulo, timezone.now())
+
+
+class MetricsSection:
+    """Resumo executivo: [{'label', 'value', 'change'}]"""
+    
+    def __init__(self, metrics):
+        self.metrics = metrics
+    
+    def build(self, engine):
+        return engine.metrics.create_metrics_summary(self.metrics)
+
+
+class ChartSection:
+    """Gráfico de pizza ('pie') ou barras ('bar'); omitido quando não há valores"""
+    
+    SIZES = {
+        'pie': (4*inch, 3*inch),
+        'bar': (6*inch, 3*inch),
+    }
+    
+    def __init__(self, heading, kind, data, title):
+        self.heading = heading
+        self.kind = kind
+        self.data = data
+        self.title = title
+    
+    def build(self, engine):
+        if not self.data or not any(self.data.values()):
+            return []
+        width, height = self.SIZES[self.kind]
+        create = engine.charts.create_pie_chart if self.kind == 'pie' else engine.charts.create_bar_chart
+        return [
+            Paragraph(self.heading, engine.styles['CabecSecao']),
+            create(self.data, self.title, width=width, height=height),
+            Spacer(1, 0.2*inch),
+        ]
+
+
+class InsightsSection:
+    """Lista de insights automáticos"""
+    
+    def __init__(self, insights):
+        self.insights = insights
+    
+    def build(self, engine):
+        return engine.metrics.create_insights(self.insights)
+
+
+class TableSection:
+    """Tabela detalhada; com `page_title` começa em uma nova página"""
+    
+    def __init__(self, headers, rows, title=None, page_title=None):
+        self.headers = headers
+        self.rows = rows
+        self.title = title
+        self.page_title = page_title
+    
+    def build(self, engine):
+        elements = []
+        if self.page_title:
+            elements.append(PageBreak())
+            elements.append(Paragraph(self.page_title, engine.styles['TituloPrincipal']))
+            elements.append(Spacer(1, 0.2*inch))
+        elements.extend(engine.table.create_professional_table(self.headers, list(self.rows), self.title))
+        return elements
+
+
+class PDFReportEngine:
+    """
+    Motor de relatórios PDF: um por processo (ver get_report_engine).
+    Concentra a configuração do documento e o rodapé que antes cada relatório repetia.
+    """
+    
+    PAGE_SETUP = {
+        'pagesize': A4,
+        'rightMargin': 72,
+        'leftMargin': 72,
+        'topMargin': 72,
+        'bottomMargin': 72,
+    }
+    FONTS = ('Helvetica', 'Helvetica-Bold')
+    SISTEMA = "Sistema Alfa+ v1.0.0"
+    
+    def __init__(self, warm_up=True):
+        self.styles = PDFStyles()
+        self.header = PDFHeader(self.styles)
+        self.footer = PDFFooter(self.styles)
+        self.charts = PDFCharts(self.styles)
+        self.metrics = PDFMetrics(self.styles)
+        self.table = PDFTable(self.styles)
+        if warm_up:
+            self._warm_up()
+    
+    def _warm_up(self):
+        """Carrega métricas das fontes e os módulos de gráficos antes do primeiro relatório"""
+        for font in self.FONTS:
+            pdfmetrics.getFont(font)
+        self.render([
+            ChartSection('', 'pie', {'a': 1}, ''),
+            ChartSection('', 'bar', {'a': 1}, ''),
+            TableSection(['a'], [['b']]),
+        ])
+        self.charts.clear_cache()
+    
+    def render(self, sections):
+        """Gera o PDF (bytes) a partir de uma lista de seções"""
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, **self.PAGE_SETUP)
+        
+        story = []
+        for section in sections:
+            story.extend(section.build(self))
+        
+        doc.build(story, onFirstPage=self.draw_footer, onLaterPages=self.draw_footer)
+        return buffer.getvalue()
+    
+    def draw_footer(self, canvas, doc):
+        """Adiciona rodapé às páginas"""
+        canvas.saveState()
+        canvas.setFont("Helvetica", 8)
+        canvas.setFillColor(self.styles.colors['muted'])
+        canvas.drawString(72, 50, f"Página {canvas.getPageNumber()} | {self.SISTEMA} | {timezone.now().strftime('%d/%m/%Y %H:%M')}")
+        canvas.restoreState()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_report_engine():
+    """Motor compartilhado do processo, criado (e aquecido) no primeiro uso"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = PDFReportEngine()
+    return _engine
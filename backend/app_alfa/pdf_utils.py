@@ -7,7 +7,28 @@ from django.db.models import Count, Sum, Avg, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
-from .models import Membro, Evento, Transacao, EventoPresenca
+from .models import Membro, Evento, Transacao, EventoPresenca, FechamentoMensal, ResumoFinanceiroMensal, como_data
+
+
+def _total_tipo(somas, tipo):
+    return sum((total for (tipo_item, _), (total, _) in somas.items() if tipo_item == tipo), Decimal('0'))
+
+
+def _top_categorias(somas, tipo, limite=5):
+    itens = [
+        {'categoria': categoria, 'total': total}
+        for (tipo_item, categoria), (total, _) in somas.items()
+        if tipo_item == tipo and total
+    ]
+    return sorted(itens, key=lambda item: item['total'], reverse=True)[:limite]
+
+
+def _ano_anterior(dia):
+    try:
+        return dia.replace(year=dia.year - 1)
+    except ValueError:  # 29/02
+        return dia.replace(year=dia.year - 1, day=28)
+
 
 class MetricsCalculator:
     """Classe para calcular métricas e insights dos dados"""
@@ -92,40 +113,30 @@ class MetricsCalculator:
         }
     
     def calculate_financial_metrics(self):
-        """Calcula métricas financeiras"""
-        # Período atual
-        transacoes_periodo = Transacao.objects.filter(
-            data__gte=self.data_inicio,
-            data__lte=self.data_fim
-        )
-        
-        # Receitas e despesas
-        receitas = transacoes_periodo.filter(tipo='entrada').aggregate(
-            total=Sum('valor')
-        )['total'] or Decimal('0')
-        
-        despesas = transacoes_periodo.filter(tipo='saida').aggregate(
-            total=Sum('valor')
-        )['total'] or Decimal('0')
-        
+        """
+        Calcula métricas financeiras a partir dos resumos mensais
+        (ver ResumoFinanceiroMensal.somar_periodo): o custo depende do número de meses,
+        não do número de transações.
+        """
+        inicio = como_data(self.data_inicio)
+        fim = como_data(self.data_fim)
+        periodo = ResumoFinanceiroMensal.somar_periodo(inicio, fim)
+        
+        receitas = _total_tipo(periodo, Transacao.ENTRADA)
+        despesas = _total_tipo(periodo, Transacao.SAIDA)
         saldo = receitas - despesas
         
-        # Comparação com período anterior
-        periodo_anterior_inicio = self.data_inicio - (self.data_fim - self.data_inicio)
-        periodo_anterior_fim = self.data_inicio
+        # Saldo em caixa no início do período, a partir do fechamento mensal mais próximo
+        saldo_inicial = FechamentoMensal.saldo_ate(inicio)
         
-        transacoes_anterior = Transacao.objects.filter(
-            data__gte=periodo_anterior_inicio,
-            data__lte=periodo_anterior_fim
-        )
+        # Comparação com período anterior (mesma duração, terminando na véspera do início)
+        duracao = fim - inicio
+        anterior = ResumoFinanceiroMensal.somar_periodo(inicio - duracao - timedelta(days=1), inicio - timedelta(days=1))
+        receitas_anterior = _total_tipo(anterior, Transacao.ENTRADA)
+        despesas_anterior = _total_tipo(anterior, Transacao.SAIDA)
         
-        receitas_anterior = transacoes_anterior.filter(tipo='entrada').aggregate(
-            total=Sum('valor')
-        )['total'] or Decimal('0')
-        
-        despesas_anterior = transacoes_anterior.filter(tipo='saida').aggregate(
-            total=Sum('valor')
-        )['total'] or Decimal('0')
+        # Mesmo período do ano anterior
+        ano_anterior = ResumoFinanceiroMensal.somar_periodo(_ano_anterior(inicio), _ano_anterior(fim))
         
         # Calcular crescimento
         crescimento_receitas = 0
@@ -136,24 +147,19 @@ class MetricsCalculator:
         if despesas_anterior > 0:
             crescimento_despesas = ((despesas - despesas_anterior) / despesas_anterior) * 100
         
-        # Categorias mais gastas
-        categorias_gastos = transacoes_periodo.filter(tipo='saida').values('categoria').annotate(
-            total=Sum('valor')
-        ).order_by('-total')[:5]
-        
-        # Categorias mais recebidas
-        categorias_receitas = transacoes_periodo.filter(tipo='entrada').values('categoria').annotate(
-            total=Sum('valor')
-        ).order_by('-total')[:5]
-        
         return {
             'receitas': float(receitas),
             'despesas': float(despesas),
             'saldo': float(saldo),
+            'saldo_inicial': float(saldo_inicial),
+            'saldo_final': float(saldo_inicial + saldo),
             'crescimento_receitas': crescimento_receitas,
             'crescimento_despesas': crescimento_despesas,
-            'categorias_gastos': list(categorias_gastos),
-            'categorias_receitas': list(categorias_receitas),
+            # Categorias mais gastas / mais recebidas
+            'categorias_gastos': _top_categorias(periodo, Transacao.SAIDA),
+            'categorias_receitas': _top_categorias(periodo, Transacao.ENTRADA),
+            'receitas_ano_anterior': float(_total_tipo(ano_anterior, Transacao.ENTRADA)),
+            'despesas_ano_anterior': float(_total_tipo(ano_anterior, Transacao.SAIDA)),
             'margem_lucro': (float(saldo) / float(receitas) * 100) if receitas > 0 else 0
         }
     
@@ -169,20 +175,19 @@ class MetricsCalculator:
         eventos_realizados = eventos_periodo.filter(data__lt=self.agora).count()
         eventos_agendados = eventos_periodo.filter(data__gte=self.agora).count()
         
-        # Participação média
-        presencas_periodo = EventoPresenca.objects.filter(
-            evento__in=eventos_periodo,
-            confirmado=True
-        )
+        # Participação média (a partir do contador desnormalizado)
+        total_presencas = eventos_periodo.aggregate(
+            total=Sum('confirmados_count')
+        )['total'] or 0
         
         participacao_media = 0
         if total_eventos > 0:
-            participacao_media = presencas_periodo.count() / total_eventos
+            participacao_media = total_presencas / total_eventos
         
         # Eventos mais populares
-        eventos_populares = eventos_periodo.annotate(
-            total_presencas=Count('presencas', filter=Q(presencas__confirmado=True))
-        ).order_by('-total_presencas')[:5]
+        eventos_populares = eventos_periodo.order_by('-confirmados_count').values(
+            'id', 'titulo', 'data', 'confirmados_count'
+        )[:5]
         
         # Eventos por mês (últimos 6 meses)
         eventos_por_mes = {}
@@ -0,0 +1,160 @@
+"""
+Planilhas XLSX em escrita contínua - Alfa+
+Exportação de membros, eventos e transações para Excel, usada pelas ações do admin
+e pela API (/api/exportacoes/<tabela>/?formato=xlsx).
+
+- XlsxWriter em constant_memory: cada linha vai para o XML da aba assim que a
+  seguinte começa, sem um objeto por célula em memória; o .xlsx é montado no close().
+- As linhas vêm de values_list(...).iterator(), com os nomes relacionados por JOIN:
+  nada de instâncias de modelo nem uma consulta por linha.
+- O arquivo é escrito em um SpooledTemporaryFile: fica em memória enquanto pequeno
+  e vai para o disco acima de ALFA_PLANILHAS_MEMORIA bytes.
+- Valores saem tipados (números, datas) com formato de número aplicado, para a
+  planilha somar e ordenar sem conversões. Texto é sempre gravado como texto:
+  "=..." vindo de um cadastro não vira fórmula.
+"""
+
+import tempfile
+
+import xlsxwriter
+from django.conf import settings
+from django.http import FileResponse
+from django.utils import timezone
+
+from .models import Membro, Transacao
+
+
+XLSX = 'xlsx'
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+TEXTO = 'texto'
+INTEIRO = 'inteiro'
+MOEDA = 'moeda'
+DATA = 'data'
+DATA_HORA = 'data_hora'
+
+# Separadores seguem a localidade do Excel (1.234,56 em pt-BR)
+FORMATOS_NUMERO = {
+    INTEIRO: '0',
+    MOEDA: '"R$" #,##0.00',
+    DATA: 'DD/MM/YYYY',
+    DATA_HORA: 'DD/MM/YYYY HH:MM',
+}
+
+LINHAS_POR_CONSULTA = 2000
+
+
+class Coluna:
+    """Título, campo (aceita lookups como cargo__nome), tipo e largura de uma coluna"""
+
+    def __init__(self, titulo, campo, tipo=TEXTO, largura=15, rotulos=None):
+        self.titulo = titulo
+        self.campo = campo
+        self.tipo = tipo
+        self.largura = largura
+        # Rótulos das choices (ex.: 'saida' -> 'Saída')
+        self.rotulos = dict(rotulos) if rotulos else None
+
+
+class Planilha:
+    """Uma aba com as colunas de um modelo"""
+
+    def __init__(self, titulo, colunas):
+        self.titulo = titulo
+        self.colunas = colunas
+
+    def linhas(self, queryset):
+        campos = [coluna.campo for coluna in self.colunas]
+        return queryset.values_list(*campos).iterator(chunk_size=LINHAS_POR_CONSULTA)
+
+    def escrever(self, queryset):
+        """Arquivo XLSX (SpooledTemporaryFile posicionado no início) com as linhas do queryset"""
+        arquivo = tempfile.SpooledTemporaryFile(
+            max_size=getattr(settings, 'ALFA_PLANILHAS_MEMORIA', 8 * 1024 * 1024)
+        )
+        livro = xlsxwriter.Workbook(arquivo, {'constant_memory': True})
+        aba = livro.add_worksheet(self.titulo)
+
+        # Em constant_memory as linhas só podem ser escritas em ordem: cabeçalho primeiro
+        negrito = livro.add_format({'bold': True})
+        for indice, coluna in enumerate(self.colunas):
+            aba.set_column(indice, indice, coluna.largura)
+            aba.write_string(0, indice, coluna.titulo, negrito)
+        aba.freeze_panes(1, 0)
+
+        escritores = [self._escritor(livro, aba, coluna) for coluna in self.colunas]
+        ultima = 0
+        for ultima, linha in enumerate(self.linhas(queryset), start=1):
+            for indice, (escrever, valor) in enumerate(zip(escritores, linha)):
+                if valor is not None:
+                    escrever(ultima, indice, valor)
+        aba.autofilter(0, 0, ultima, len(self.colunas) - 1)
+
+        livro.close()
+        arquivo.seek(0)
+        return arquivo
+
+    def _escritor(self, livro, aba, coluna):
+        """Função (linha, coluna, valor) que grava a célula com o tipo e o formato da coluna"""
+        if coluna.rotulos:
+            rotulos = coluna.rotulos
+            return lambda linha, indice, valor: aba.write_string(linha, indice, rotulos.get(valor, valor))
+        if coluna.tipo == TEXTO:
+            return lambda linha, indice, valor: aba.write_string(linha, indice, str(valor))
+
+        formato = livro.add_format({'num_format': FORMATOS_NUMERO[coluna.tipo]})
+        if coluna.tipo in (INTEIRO, MOEDA):
+            # Decimal(10, 2) cabe sem perda no double do Excel
+            return lambda linha, indice, valor: aba.write_number(linha, indice, valor, formato)
+
+        fuso = timezone.get_current_timezone() if coluna.tipo == DATA_HORA and settings.USE_TZ else None
+
+        def escrever_data(linha, indice, valor):
+            # O Excel não guarda fuso: data e hora saem no horário local
+            if fuso is not None and timezone.is_aware(valor):
+                valor = timezone.make_naive(valor, fuso)
+            aba.write_datetime(linha, indice, valor, formato)
+        return escrever_data
+
+
+PLANILHAS = {
+    # Sem senha e documentos pessoais (CPF/RG), como na exportação colunar
+    'membros': Planilha('Membros', [
+        Coluna('ID', 'id', INTEIRO, 8),
+        Coluna('Nome', 'nome', largura=40),
+        Coluna('Email', 'email', largura=30),
+        Coluna('Telefone', 'telefone'),
+        Coluna('Nascimento', 'data_nascimento', DATA, 12),
+        Coluna('Batismo', 'data_batismo', DATA, 12),
+        Coluna('Status', 'status', largura=10, rotulos=Membro.STATUS_CHOICES),
+        Coluna('Cargo', 'cargo__nome', largura=20),
+        Coluna('Cadastrado em', 'created_at', DATA_HORA, 17),
+    ]),
+    'eventos': Planilha('Eventos', [
+        Coluna('ID', 'id', INTEIRO, 8),
+        Coluna('Título', 'titulo', largura=40),
+        Coluna('Data', 'data', DATA_HORA, 17),
+        Coluna('Local', 'local', largura=30),
+        Coluna('Organizador', 'organizador__username', largura=20),
+        Coluna('Confirmados', 'confirmados_count', INTEIRO, 12),
+        Coluna('Comentários', 'comentarios_count', INTEIRO, 12),
+    ]),
+    'transacoes': Planilha('Transações', [
+        Coluna('ID', 'id', INTEIRO, 8),
+        Coluna('Data', 'data', DATA, 12),
+        Coluna('Tipo', 'tipo', largura=10, rotulos=Transacao.TIPO_CHOICES),
+        Coluna('Categoria', 'categoria', largura=20),
+        Coluna('Valor', 'valor', MOEDA, 16),
+        Coluna('Método', 'metodo_pagamento'),
+        Coluna('Descrição', 'descricao', largura=40),
+        Coluna('Registrado por', 'registrado_por__nome', largura=25),
+        Coluna('Criado em', 'created_at', DATA_HORA, 17),
+    ]),
+}
+
+
+def resposta(nome, queryset):
+    """FileResponse com a planilha `nome` das linhas do queryset"""
+    arquivo = PLANILHAS[nome].escrever(queryset)
+    data = timezone.localdate().strftime('%Y%m%d')
+    return FileResponse(arquivo, as_attachment=True, filename=f'{nome}_{data}.{XLSX}', content_type=CONTENT_TYPE)
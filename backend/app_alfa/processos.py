@@ -0,0 +1,32 @@
+"""
+Pools de processos para renderização em lote - Alfa+
+Os processos são sempre criados por spawn, nunca por fork: o processo web já tem
+threads (pool de imagens, instrumentação) e um fork copiaria travas em estado
+indefinido.
+
+Um processo criado por spawn desserializa o inicializador antes de o Django estar
+configurado; por isso este módulo não importa nada do app no nível do módulo e a
+preparação de cada worker é indicada pelo caminho pontilhado da função.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import django
+from django.utils.module_loading import import_string
+
+
+def _inicializar(preparar):
+    django.setup()
+    if preparar:
+        import_string(preparar)()
+
+
+def novo_pool(workers, preparar=None):
+    """ProcessPoolExecutor por spawn; `preparar` roda uma vez em cada worker, após django.setup()"""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context('spawn'),
+        initializer=_inicializar,
+        initargs=(preparar,),
+    )
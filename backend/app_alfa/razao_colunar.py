@@ -0,0 +1,344 @@
+"""
+Razão colunar em memória - Alfa+
+Cópia das transações ativas em colunas NumPy, por processo, para recortes interativos
+(por tipo, categoria, método de pagamento, responsável, mês ou ano) sem uma nova
+varredura de Transacao a cada filtro.
+
+- Segmentos por ano, carregados no primeiro uso; textos (tipo, categoria, método)
+  viram códigos inteiros de um dicionário compartilhado pelos segmentos.
+- Atualização incremental: quando a versão dos dados financeiros muda (sinais de
+  Transacao, ver tendencias.versao_dados; fica no cache compartilhado, então vale
+  também para alterações feitas por outros workers) só as linhas com updated_at a
+  partir da última marca são relidas. Exclusões físicas e update() em massa não mexem em
+  updated_at; a contagem por ano detecta a diferença e o ano é recarregado.
+- settings.ALFA_RAZAO_COLUNAR_MEMORIA limita os bytes em memória; passando do
+  limite, os anos usados há mais tempo são descartados (e recarregados se voltarem
+  a ser pedidos).
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from operator import itemgetter
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
+
+from . import tendencias
+from .analise import ORDINAL_EPOCA
+from .models import FOLGA_MARCA, CategoriaFinanceira, Transacao
+
+
+DIMENSOES = ('tipo', 'categoria', 'metodo_pagamento', 'registrado_por')
+AGRUPAMENTOS = DIMENSOES + ('ano', 'mes')
+CAMPOS = ('id', 'data', 'valor', 'tipo', 'categoria', 'metodo_pagamento', 'registrado_por_id')
+
+# Acima disso as combinações de grupo são compactadas com np.unique em vez de indexadas direto
+LIMITE_GRUPOS_DIRETOS = 1 << 22
+
+
+class Dicionario:
+    """Valor <-> código inteiro; o código 0 é reservado para vazio (None ou '')"""
+
+    def __init__(self):
+        self.valores = [None]
+        self.codigos = {None: 0}
+
+    def codificar(self, valor):
+        valor = valor if valor != '' else None
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            codigo = self.codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def procurar(self, valores, normalizar=None):
+        """Códigos dos valores pedidos (comparados após `normalizar`, se informado)"""
+        if normalizar:
+            chaves = {normalizar(valor) for valor in valores}
+            return np.array([codigo for codigo, valor in enumerate(self.valores)
+                             if valor is not None and normalizar(valor) in chaves], dtype=np.int32)
+        return np.array([self.codigos[valor] for valor in valores if valor in self.codigos], dtype=np.int32)
+
+
+class Segmento:
+    """Colunas de um ano: id, dia (datetime64[D]), mês, centavos assinados e os códigos das dimensões"""
+
+    def __init__(self, colunas):
+        self.colunas = colunas
+        # Intervalo de dias do segmento: recortes que o cobrem inteiro dispensam a máscara de datas
+        dias = colunas['dia']
+        self.primeiro = dias.min() if len(dias) else None
+        self.ultimo = dias.max() if len(dias) else None
+
+    def __len__(self):
+        return len(self.colunas['id'])
+
+    @property
+    def nbytes(self):
+        return sum(coluna.nbytes for coluna in self.colunas.values())
+
+    def sem(self, ids):
+        """Segmento sem as linhas desses ids"""
+        manter = ~np.isin(self.colunas['id'], ids)
+        return Segmento({nome: coluna[manter] for nome, coluna in self.colunas.items()})
+
+    def com(self, outro):
+        return Segmento({nome: np.concatenate((coluna, outro.colunas[nome])) for nome, coluna in self.colunas.items()})
+
+
+def agrupar(partes, agrupar_por, dicionarios, meses):
+    """
+    Entradas, saídas e quantidade por combinação das dimensões pedidas. Os códigos de
+    cada linha viram uma chave única (base mista) somada com np.bincount, parte a parte
+    (um segmento por vez, sem concatenar). `meses` = (primeiro, último) em meses desde 1970-01.
+    """
+    bases, rotulos = [], []
+    for dimensao in agrupar_por:
+        if dimensao == 'mes':
+            bases.append(meses[1] - meses[0] + 1)
+            rotulos.append(_rotulo_periodo(dimensao, meses[0]))
+        elif dimensao == 'ano':
+            bases.append(meses[1] // 12 - meses[0] // 12 + 1)
+            rotulos.append(_rotulo_periodo(dimensao, meses[0] // 12))
+        else:
+            bases.append(len(dicionarios[dimensao].valores))
+            rotulos.append(dicionarios[dimensao].valores.__getitem__)
+    tamanho = int(np.prod(bases, dtype=np.int64))
+
+    if not agrupar_por:
+        centavos = [colunas['centavos'] for colunas in partes]
+        quantidade = sum(len(valores) for valores in centavos)
+        saldo = sum(int(valores.sum()) for valores in centavos)
+        entrada = sum(int(np.maximum(valores, 0).sum()) for valores in centavos)
+        return [_linha({}, entrada, saldo, quantidade)] if quantidade else []
+
+    chaves, valores = [], []
+    for colunas in partes:
+        chave = 0
+        for dimensao, base in zip(agrupar_por, bases):
+            if dimensao == 'mes':
+                codigo = colunas['mes'] - meses[0]
+            elif dimensao == 'ano':
+                codigo = colunas['mes'] // 12 - meses[0] // 12
+            else:
+                codigo = colunas[dimensao]
+            # Base mista feita à mão: ravel_multi_index valida cada índice e custa bem mais
+            chave = chave * base + codigo.astype(np.int64)
+        chaves.append(chave)
+        valores.append(colunas['centavos'])
+
+    grupos = None
+    if tamanho > LIMITE_GRUPOS_DIRETOS:
+        # Muitas combinações possíveis: só as que existem, numeradas por np.unique
+        grupos, chave = np.unique(np.concatenate(chaves), return_inverse=True)
+        chaves, valores, tamanho = [chave], [np.concatenate(valores)], len(grupos)
+
+    saldos = np.zeros(tamanho)
+    entradas = np.zeros(tamanho)
+    quantidades = np.zeros(tamanho, dtype=np.int64)
+    for chave, centavos in zip(chaves, valores):
+        # Somas em float64 são exatas para inteiros até 2**53 centavos
+        saldos += np.bincount(chave, weights=centavos, minlength=tamanho)
+        entradas += np.bincount(chave, weights=np.maximum(centavos, 0), minlength=tamanho)
+        quantidades += np.bincount(chave, minlength=tamanho)
+
+    resultado = []
+    for posicao in np.flatnonzero(quantidades).tolist():
+        linha = {}
+        chave = int(grupos[posicao]) if grupos is not None else posicao
+        for dimensao, indice, rotulo in zip(agrupar_por, np.unravel_index(chave, bases), rotulos):
+            linha[dimensao] = rotulo(int(indice))
+        resultado.append(_linha(linha, int(entradas[posicao]), int(saldos[posicao]), int(quantidades[posicao])))
+
+    resultado.sort(key=lambda linha: tuple((linha[dimensao] is None, linha[dimensao] or 0) for dimensao in agrupar_por))
+    return resultado
+
+
+def _linha(linha, entrada, saldo, quantidade):
+    linha.update({
+        'entradas': Decimal(entrada).scaleb(-2),
+        'saidas': Decimal(entrada - saldo).scaleb(-2),
+        'saldo': Decimal(saldo).scaleb(-2),
+        'quantidade': quantidade,
+    })
+    return linha
+
+
+def _rotulo_periodo(dimensao, inicio):
+    if dimensao == 'ano':
+        return lambda indice: 1970 + inicio + indice
+    return lambda indice: date(1970 + (inicio + indice) // 12, (inicio + indice) % 12 + 1, 1)
+
+
+class RazaoColunar:
+    """Segmentos anuais em ordem de uso (o último é o mais recente) e dicionários das dimensões"""
+
+    def __init__(self, memoria_maxima=None):
+        self.memoria_maxima = memoria_maxima or getattr(settings, 'ALFA_RAZAO_COLUNAR_MEMORIA', 256 * 1024 * 1024)
+        self.dicionarios = {dimensao: Dicionario() for dimensao in DIMENSOES}
+        self.segmentos = OrderedDict()
+        self.anos = None
+        self.versao = None
+        self.marca = None
+        self.carregamentos = 0
+        self.descartes = 0
+        self.lock = threading.RLock()
+
+    @property
+    def nbytes(self):
+        return sum(segmento.nbytes for segmento in self.segmentos.values())
+
+    def segmento(self, linhas):
+        """Segmento a partir de linhas no formato de values_list(*CAMPOS)"""
+        quantidade = len(linhas)
+
+        def coluna(posicao, tipo, conversao=None):
+            valores = map(itemgetter(posicao), linhas)
+            return np.fromiter(map(conversao, valores) if conversao else valores, dtype=tipo, count=quantidade)
+
+        # Mesmo arredondamento de analise.ColunasFinanceiras (valor tem no máximo 10 dígitos)
+        valores = np.rint(coluna(2, np.float64) * 100).astype(np.int64)
+        entradas = coluna(3, bool, Transacao.ENTRADA.__eq__)
+        dias = (coluna(1, np.int64, date.toordinal) - ORDINAL_EPOCA).astype('datetime64[D]')
+        colunas = {
+            'id': coluna(0, np.int64),
+            'dia': dias,
+            'mes': dias.astype('datetime64[M]').astype(np.int32),  # meses desde 1970-01
+            'centavos': np.where(entradas, valores, -valores),
+        }
+        for posicao, dimensao in enumerate(DIMENSOES, start=3):
+            colunas[dimensao] = coluna(posicao, np.int32, self.dicionarios[dimensao].codificar)
+        return Segmento(colunas)
+
+    def _carregar(self, ano):
+        linhas = list(Transacao.objects.filter(
+            data__gte=date(ano, 1, 1), data__lte=date(ano, 12, 31)
+        ).values_list(*CAMPOS))
+        self.segmentos[ano] = self.segmento(linhas)
+        self.carregamentos += 1
+
+    def _sincronizar(self):
+        versao = tendencias.versao_dados()
+        if versao == self.versao:
+            return
+        agora = timezone.now()
+
+        if self.segmentos and self.marca is not None:
+            alteradas = list(Transacao._base_manager.filter(
+                updated_at__gte=self.marca - FOLGA_MARCA
+            ).values_list(*CAMPOS, 'deleted_at'))
+            if alteradas:
+                ids = np.fromiter(map(itemgetter(0), alteradas), dtype=np.int64, count=len(alteradas))
+                ativas = {}
+                for linha in alteradas:
+                    if linha[-1] is None and linha[1].year in self.segmentos:
+                        ativas.setdefault(linha[1].year, []).append(linha[:-1])
+                for ano in list(self.segmentos):
+                    segmento = self.segmentos[ano].sem(ids)
+                    if ano in ativas:
+                        segmento = segmento.com(self.segmento(ativas[ano]))
+                    self.segmentos[ano] = segmento
+
+            contagens = dict(Transacao.objects.filter(
+                data__gte=date(min(self.segmentos), 1, 1), data__lte=date(max(self.segmentos), 12, 31)
+            ).annotate(ano=ExtractYear('data')).values_list('ano').annotate(quantidade=Count('id')).order_by())
+            for ano, segmento in list(self.segmentos.items()):
+                if contagens.get(ano, 0) != len(segmento):
+                    self._carregar(ano)
+
+        self.anos = {dia.year for dia in Transacao.objects.dates('data', 'year')}
+        self.versao = versao
+        self.marca = agora
+
+    def _descartar_excedente(self):
+        while len(self.segmentos) > 1 and self.nbytes > self.memoria_maxima:
+            self.segmentos.popitem(last=False)
+            self.descartes += 1
+
+    def _segmentos(self, inicio, fim):
+        with self.lock:
+            self._sincronizar()
+            anos = sorted(ano for ano in self.anos
+                          if (inicio is None or ano >= inicio.year) and (fim is None or ano <= fim.year))
+            for ano in anos:
+                if ano not in self.segmentos:
+                    self._carregar(ano)
+                self.segmentos.move_to_end(ano)
+            selecionados = [self.segmentos[ano] for ano in anos]
+            # Os segmentos já selecionados continuam válidos mesmo se descartados aqui
+            self._descartar_excedente()
+            return selecionados
+
+    def consultar(self, inicio=None, fim=None, filtros=None, agrupar_por=()):
+        """
+        Recorte das transações ativas:
+        filtros={'categoria': [...], 'metodo_pagamento': [...], 'tipo': [...], 'registrado_por': [ids]}
+        agrupar_por=('mes', 'categoria'), por exemplo. Retorna (linhas agrupadas, totais gerais).
+        """
+        filtros = {dimensao: valores for dimensao, valores in (filtros or {}).items() if valores}
+        segmentos = self._segmentos(inicio, fim)
+        # Depois da sincronização: valores novos já estão nos dicionários
+        codigos = {}
+        for dimensao, valores in filtros.items():
+            normalizar = CategoriaFinanceira.normalizar if dimensao == 'categoria' else None
+            codigos[dimensao] = self.dicionarios[dimensao].procurar(valores, normalizar)
+
+        nomes = ('mes', 'centavos') + tuple(dimensao for dimensao in agrupar_por if dimensao in DIMENSOES)
+        partes, meses = [], None
+        for segmento in segmentos:
+            if not len(segmento):
+                continue
+            colunas = segmento.colunas
+            mascara = None
+            if inicio is not None and segmento.primeiro < np.datetime64(inicio, 'D'):
+                mascara = colunas['dia'] >= np.datetime64(inicio, 'D')
+            if fim is not None and segmento.ultimo > np.datetime64(fim, 'D'):
+                mascara = _e(mascara, colunas['dia'] <= np.datetime64(fim, 'D'))
+            for dimensao, valores in codigos.items():
+                mascara = _e(mascara, _pertence(colunas[dimensao], valores, len(self.dicionarios[dimensao].valores)))
+            partes.append({nome: colunas[nome] if mascara is None else colunas[nome][mascara] for nome in nomes})
+            intervalo = (int(segmento.primeiro.astype('datetime64[M]').astype(np.int64)),
+                         int(segmento.ultimo.astype('datetime64[M]').astype(np.int64)))
+            meses = intervalo if meses is None else (min(meses[0], intervalo[0]), max(meses[1], intervalo[1]))
+
+        grupos = agrupar(partes, tuple(agrupar_por), self.dicionarios, meses or (0, 0))
+        totais = {'entradas': Decimal('0.00'), 'saidas': Decimal('0.00'), 'saldo': Decimal('0.00'), 'quantidade': 0}
+        for linha in grupos:
+            for campo in totais:
+                totais[campo] += linha[campo]
+        return grupos, totais
+
+
+def _e(mascara, condicao):
+    return condicao if mascara is None else mascara & condicao
+
+
+def _pertence(codigos, valores, tamanho):
+    """np.isin para códigos de dicionário: comparações diretas (poucos valores) ou tabela"""
+    if len(valores) <= 8:
+        mascara = np.zeros(len(codigos), dtype=bool)
+        for valor in valores.tolist():
+            mascara |= codigos == valor
+        return mascara
+    tabela = np.zeros(tamanho, dtype=bool)
+    tabela[valores] = True
+    return tabela[codigos]
+
+
+_razao = None
+_razao_lock = threading.Lock()
+
+
+def get_razao_colunar():
+    """Razão colunar compartilhado do processo, criado no primeiro uso"""
+    global _razao
+    if _razao is None:
+        with _razao_lock:
+            if _razao is None:
+                _razao = RazaoColunar()
+    return _razao
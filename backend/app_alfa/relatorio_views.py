@@ -2,7 +2,8 @@
 Views para Relatórios e Analytics - Alfa+
 """
 
-from django.http import JsonResponse, HttpResponse
+from django.conf import settings
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 from django.views import View
@@ -10,7 +11,12 @@ from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from datetime import datetime, timedelta
 import json
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from .analise import JANELA_PADRAO, analise_financeira, somar_meses
+from .pacote_mensal import PacoteMensal, get_pool as get_pool_relatorios, mes_anterior
 from .reports import (
     RelatorioMembros, 
     RelatorioFinanceiro, 
@@ -18,6 +24,7 @@ from .reports import (
     RelatorioGeral,
     ExportadorDados
 )
+from .viewsets import CanViewRelatorios
 
 
 class RelatorioMembrosView(View):
@@ -86,6 +93,34 @@ class RelatorioEventosView(View):
         return response
 
 
+class PacoteMensalView(APIView):
+    """
+    View para o pacote mensal de relatórios (ZIP com todos os PDFs do mês).
+    Cada pedido roda todas as consultas e ocupa o pool de processos compartilhado:
+    só para quem pode visualizar relatórios.
+    """
+    permission_classes = [IsAuthenticated, CanViewRelatorios]
+    
+    def get(self, request):
+        """Gera o ZIP do mês (?mes=AAAA-MM; padrão: mês anterior), enviado enquanto é montado"""
+        mes = request.query_params.get('mes')
+        if mes:
+            try:
+                mes = datetime.strptime(mes, '%Y-%m').date()
+            except ValueError:
+                return Response({'success': False, 'message': 'Mês inválido; use AAAA-MM.'}, status=400)
+        
+        pacote = PacoteMensal(
+            mes or mes_anterior(),
+            workers=getattr(settings, 'ALFA_RELATORIOS_WORKERS', 1),
+            pool=get_pool_relatorios()
+        )
+        response = StreamingHttpResponse(pacote.gerar(), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{pacote.nome_arquivo}"'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
 class DashboardView(View):
     """View para dashboard com dados gerais"""
     
@@ -131,6 +166,16 @@ class EstatisticasFinanceirasView(View):
         
         relatorio = RelatorioFinanceiro(data_inicio, data_fim)
         dados = relatorio.get_estatisticas_financeiras()
+        
+        # Séries mensais (padrão: últimos 12 meses) calculadas com NumPy
+        try:
+            janela = min(max(int(request.GET.get('janela', JANELA_PADRAO)), 1), 12)
+        except ValueError:
+            janela = JANELA_PADRAO
+        hoje = timezone.localdate()
+        dados['analise'] = analise_financeira(
+            data_inicio or somar_meses(hoje, -11), data_fim or hoje, janela=janela, hoje=hoje
+        )
         return JsonResponse(dados)
 
 
@@ -1,26 +1,19 @@
 """
 Sistema de Relatórios e Analytics - Alfa+ (VERSÃO MELHORADA)
 Gera relatórios PDF, Excel e estatísticas do sistema
+
+Cada relatório descreve seu conteúdo em get_sections(); estilos, fontes, gráficos e
+rodapé vêm do motor compartilhado de pdf_templates (criado uma vez por processo).
 """
 
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from django.db.models import Count, Sum, Avg, Q
+from django.db.models import Q
 from django.utils import timezone
-from datetime import datetime, timedelta
-import csv
-import json
-from decimal import Decimal
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-import io
+from datetime import timedelta
 
-from .models import Membro, Evento, Transacao, Cargo, EventoPresenca
-from .pdf_templates import PDFStyles, PDFHeader, PDFFooter, PDFCharts, PDFMetrics, PDFTable
+from .models import Membro, Evento, Transacao, ONG, DistribuicaoOferta, como_data
+from .pdf_templates import (
+    get_report_engine, HeaderSection, MetricsSection, ChartSection, InsightsSection, TableSection,
+)
 from .pdf_utils import MetricsCalculator
 
 
@@ -30,6 +23,7 @@ class RelatorioBase:
     def __init__(self, data_inicio=None, data_fim=None):
         self.data_inicio = data_inicio or (timezone.now() - timedelta(days=30))
         self.data_fim = data_fim or timezone.now()
+        self.calculator = MetricsCalculator(data_inicio, data_fim)
     
     def get_context_data(self):
         """Retorna dados comuns para todos os relatórios"""
@@ -38,50 +32,29 @@ class RelatorioBase:
             'data_fim': self.data_fim,
             'data_geracao': timezone.now(),
         }
+    
+    def get_sections(self):
+        """Seções do relatório, na ordem em que aparecem no PDF"""
+        raise NotImplementedError
+    
+    def gerar_pdf(self):
+        """Gera o PDF (bytes) com o motor compartilhado"""
+        return get_report_engine().render(self.get_sections())
+    
+    def _subtitulo(self):
+        return f"Período: {self.calculator.get_period_description()}"
 
 
 class RelatorioMembros(RelatorioBase):
     """Relatório de Membros com design profissional"""
     
-    def __init__(self, data_inicio=None, data_fim=None):
-        super().__init__(data_inicio, data_fim)
-        self.styles = PDFStyles()
-        self.header = PDFHeader(self.styles)
-        self.footer = PDFFooter(self.styles)
-        self.charts = PDFCharts(self.styles)
-        self.metrics = PDFMetrics(self.styles)
-        self.table = PDFTable(self.styles)
-        self.calculator = MetricsCalculator(data_inicio, data_fim)
-    
     def get_estatisticas_membros(self):
         """Estatísticas gerais de membros usando o novo sistema"""
         return self.calculator.calculate_member_metrics()
     
-    def gerar_pdf(self):
-        """Gera relatório PDF de membros com design profissional"""
-        # Criar buffer para o PDF
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer, 
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Obter métricas
+    def get_sections(self):
         metrics = self.get_estatisticas_membros()
         
-        # Construir conteúdo do PDF
-        story = []
-        
-        # 1. Cabeçalho
-        titulo = "📊 RELATÓRIO DE MEMBROS"
-        subtitulo = f"Período: {self.calculator.get_period_description()}"
-        story.extend(self.header.create_header(titulo, subtitulo, timezone.now()))
-        
-        # 2. Resumo Executivo
         resumo_metrics = [
             {
                 'label': 'Total de Membros',
@@ -99,33 +72,7 @@ class RelatorioMembros(RelatorioBase):
                 'change': f"{metrics['crescimento']:+.1f}%" if metrics['crescimento'] != 0 else ''
             }
         ]
-        story.extend(self.metrics.create_metrics_summary(resumo_metrics))
-        
-        # 3. Gráfico de Status
-        if metrics['status_distribution']:
-            story.append(Paragraph("📈 DISTRIBUIÇÃO POR STATUS", self.styles['CabecSecao']))
-            chart = self.charts.create_pie_chart(
-                metrics['status_distribution'],
-                "Status dos Membros",
-                width=4*inch,
-                height=3*inch
-            )
-            story.append(chart)
-            story.append(Spacer(1, 0.2*inch))
         
-        # 4. Gráfico de Faixa Etária
-        if metrics['faixas_etarias'] and any(metrics['faixas_etarias'].values()):
-            story.append(Paragraph("👥 DISTRIBUIÇÃO POR FAIXA ETÁRIA", self.styles['CabecSecao']))
-            chart = self.charts.create_bar_chart(
-                metrics['faixas_etarias'],
-                "Faixas Etárias",
-                width=6*inch,
-                height=3*inch
-            )
-            story.append(chart)
-            story.append(Spacer(1, 0.2*inch))
-        
-        # 5. Insights Automáticos
         insights = [
             f"📊 Total de {metrics['total_membros']} membros cadastrados",
             f"✅ {metrics['taxa_ativos']:.1f}% dos membros estão ativos",
@@ -137,158 +84,76 @@ class RelatorioMembros(RelatorioBase):
         elif metrics['crescimento'] < 0:
             insights.append(f"⚠️ Redução de {abs(metrics['crescimento']):.1f}% em novos membros")
         
-        story.extend(self.metrics.create_insights(insights))
-        
-        # 6. Nova página para lista detalhada
-        story.append(PageBreak())
-        story.append(Paragraph("📋 LISTA DETALHADA DE MEMBROS", self.styles['TituloPrincipal']))
-        story.append(Spacer(1, 0.2*inch))
-        
-        # 7. Tabela de membros
-        membros = Membro.objects.filter(is_active=True).order_by('nome')
-        headers = ['Nome', 'Email', 'Status', 'Cargo', 'Idade']
-        data = []
-        
-        for membro in membros:
-            idade = ''
-            if membro.data_nascimento:
-                idade_calc = timezone.now().year - membro.data_nascimento.year
-                idade = f"{idade_calc} anos"
-            
-            data.append([
+        membros = Membro.objects.filter(is_active=True).select_related('cargo').order_by('nome')
+        ano_atual = timezone.now().year
+        data = [
+            [
                 membro.nome,
                 membro.email,
                 membro.get_status_display(),
                 membro.cargo.nome if membro.cargo else 'Sem cargo',
-                idade
-            ])
-        
-        story.extend(self.table.create_professional_table(
-            headers, 
-            data, 
-            "Lista Completa de Membros"
-        ))
-        
-        # 8. Construir PDF
-        doc.build(story, onFirstPage=self._add_footer, onLaterPages=self._add_footer)
-        
-        # Retornar PDF
-        buffer.seek(0)
-        return buffer.getvalue()
-    
-    def _add_footer(self, canvas, doc):
-        """Adiciona rodapé às páginas"""
-        canvas.saveState()
-        
-        # Obter número da página
-        page_num = canvas.getPageNumber()
-        
-        # Desenhar rodapé
-        canvas.setFont("Helvetica", 8)
-        canvas.setFillColor(self.styles.colors['muted'])
-        canvas.drawString(72, 50, f"Página {page_num} | Sistema Alfa+ v1.0.0 | {timezone.now().strftime('%d/%m/%Y %H:%M')}")
+                f"{ano_atual - membro.data_nascimento.year} anos" if membro.data_nascimento else '',
+            ]
+            for membro in membros
+        ]
         
-        canvas.restoreState()
+        return [
+            HeaderSection("📊 RELATÓRIO DE MEMBROS", self._subtitulo()),
+            MetricsSection(resumo_metrics),
+            ChartSection("📈 DISTRIBUIÇÃO POR STATUS", 'pie', metrics['status_distribution'], "Status dos Membros"),
+            ChartSection("👥 DISTRIBUIÇÃO POR FAIXA ETÁRIA", 'bar', metrics['faixas_etarias'], "Faixas Etárias"),
+            InsightsSection(insights),
+            TableSection(
+                ['Nome', 'Email', 'Status', 'Cargo', 'Idade'], data, "Lista Completa de Membros",
+                page_title="📋 LISTA DETALHADA DE MEMBROS",
+            ),
+        ]
 
 
 class RelatorioFinanceiro(RelatorioBase):
     """Relatório Financeiro com design profissional"""
     
-    def __init__(self, data_inicio=None, data_fim=None):
-        super().__init__(data_inicio, data_fim)
-        self.styles = PDFStyles()
-        self.header = PDFHeader(self.styles)
-        self.footer = PDFFooter(self.styles)
-        self.charts = PDFCharts(self.styles)
-        self.metrics = PDFMetrics(self.styles)
-        self.table = PDFTable(self.styles)
-        self.calculator = MetricsCalculator(data_inicio, data_fim)
-    
     def get_estatisticas_financeiras(self):
         """Estatísticas financeiras usando o novo sistema"""
         return self.calculator.calculate_financial_metrics()
     
-    def gerar_pdf(self):
-        """Gera relatório PDF financeiro com design profissional"""
-        # Criar buffer para o PDF
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer, 
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Obter métricas
+    def get_sections(self):
         metrics = self.get_estatisticas_financeiras()
+        moeda = self.calculator.format_currency
         
-        # Construir conteúdo do PDF
-        story = []
-        
-        # 1. Cabeçalho
-        titulo = "💰 RELATÓRIO FINANCEIRO"
-        subtitulo = f"Período: {self.calculator.get_period_description()}"
-        story.extend(self.header.create_header(titulo, subtitulo, timezone.now()))
-        
-        # 2. Resumo Executivo
         resumo_metrics = [
             {
                 'label': 'Receitas',
-                'value': self.calculator.format_currency(metrics['receitas']),
+                'value': moeda(metrics['receitas']),
                 'change': f"{metrics['crescimento_receitas']:+.1f}%" if metrics['crescimento_receitas'] != 0 else ''
             },
             {
                 'label': 'Despesas',
-                'value': self.calculator.format_currency(metrics['despesas']),
+                'value': moeda(metrics['despesas']),
                 'change': f"{metrics['crescimento_despesas']:+.1f}%" if metrics['crescimento_despesas'] != 0 else ''
             },
             {
                 'label': 'Saldo',
-                'value': self.calculator.format_currency(metrics['saldo']),
+                'value': moeda(metrics['saldo']),
                 'change': f"Margem: {metrics['margem_lucro']:.1f}%"
+            },
+            {
+                'label': 'Saldo em Caixa',
+                'value': moeda(metrics['saldo_final']),
+                'change': f"Início: {moeda(metrics['saldo_inicial'])}"
             }
         ]
-        story.extend(self.metrics.create_metrics_summary(resumo_metrics))
         
-        # 3. Gráfico de Receitas vs Despesas
-        if metrics['receitas'] > 0 or metrics['despesas'] > 0:
-            story.append(Paragraph("📊 RECEITAS VS DESPESAS", self.styles['CabecSecao']))
-            chart_data = {
-                'Receitas': metrics['receitas'],
-                'Despesas': metrics['despesas']
-            }
-            chart = self.charts.create_bar_chart(
-                chart_data,
-                "Receitas vs Despesas",
-                width=6*inch,
-                height=3*inch
-            )
-            story.append(chart)
-            story.append(Spacer(1, 0.2*inch))
-        
-        # 4. Top Categorias de Gastos
-        if metrics['categorias_gastos']:
-            story.append(Paragraph("💸 TOP CATEGORIAS DE GASTOS", self.styles['CabecSecao']))
-            gastos_data = {}
-            for item in metrics['categorias_gastos']:
-                gastos_data[item['categoria']] = float(item['total'])
-            
-            chart = self.charts.create_pie_chart(
-                gastos_data,
-                "Categorias de Gastos",
-                width=4*inch,
-                height=3*inch
-            )
-            story.append(chart)
-            story.append(Spacer(1, 0.2*inch))
+        receitas_despesas = {
+            'Receitas': metrics['receitas'],
+            'Despesas': metrics['despesas']
+        }
+        gastos_data = {item['categoria']: float(item['total']) for item in metrics['categorias_gastos']}
         
-        # 5. Insights Automáticos
         insights = [
-            f"💰 Receitas: {self.calculator.format_currency(metrics['receitas'])}",
-            f"💸 Despesas: {self.calculator.format_currency(metrics['despesas'])}",
-            f"💚 Saldo: {self.calculator.format_currency(metrics['saldo'])}",
+            f"💰 Receitas: {moeda(metrics['receitas'])}",
+            f"💸 Despesas: {moeda(metrics['despesas'])}",
+            f"💚 Saldo: {moeda(metrics['saldo'])}",
         ]
         
         if metrics['crescimento_receitas'] > 0:
@@ -301,102 +166,44 @@ class RelatorioFinanceiro(RelatorioBase):
         elif metrics['margem_lucro'] < 10:
             insights.append(f"⚠️ Margem de lucro baixa: {metrics['margem_lucro']:.1f}%")
         
-        story.extend(self.metrics.create_insights(insights))
-        
-        # 6. Nova página para lista detalhada
-        story.append(PageBreak())
-        story.append(Paragraph("📋 LISTA DETALHADA DE TRANSAÇÕES", self.styles['TituloPrincipal']))
-        story.append(Spacer(1, 0.2*inch))
-        
-        # 7. Tabela de transações
         transacoes = Transacao.objects.filter(
             data__gte=self.data_inicio,
             data__lte=self.data_fim
         ).order_by('-data')
-        
-        headers = ['Data', 'Tipo', 'Categoria', 'Valor', 'Descrição']
-        data = []
-        
-        for transacao in transacoes:
-            tipo_icon = '📈' if transacao.tipo == 'entrada' else '📉'
-            data.append([
+        data = [
+            [
                 transacao.data.strftime('%d/%m/%Y'),
-                f"{tipo_icon} {transacao.get_tipo_display()}",
+                f"{'📈' if transacao.tipo == 'entrada' else '📉'} {transacao.get_tipo_display()}",
                 transacao.categoria,
-                self.calculator.format_currency(float(transacao.valor)),
+                moeda(float(transacao.valor)),
                 transacao.descricao or '-'
-            ])
-        
-        story.extend(self.table.create_professional_table(
-            headers, 
-            data, 
-            "Transações do Período"
-        ))
-        
-        # 8. Construir PDF
-        doc.build(story, onFirstPage=self._add_footer, onLaterPages=self._add_footer)
-        
-        # Retornar PDF
-        buffer.seek(0)
-        return buffer.getvalue()
-    
-    def _add_footer(self, canvas, doc):
-        """Adiciona rodapé às páginas"""
-        canvas.saveState()
-        
-        # Obter número da página
-        page_num = canvas.getPageNumber()
-        
-        # Desenhar rodapé
-        canvas.setFont("Helvetica", 8)
-        canvas.setFillColor(self.styles.colors['muted'])
-        canvas.drawString(72, 50, f"Página {page_num} | Sistema Alfa+ v1.0.0 | {timezone.now().strftime('%d/%m/%Y %H:%M')}")
+            ]
+            for transacao in transacoes
+        ]
         
-        canvas.restoreState()
+        return [
+            HeaderSection("💰 RELATÓRIO FINANCEIRO", self._subtitulo()),
+            MetricsSection(resumo_metrics),
+            ChartSection("📊 RECEITAS VS DESPESAS", 'bar', receitas_despesas, "Receitas vs Despesas"),
+            ChartSection("💸 TOP CATEGORIAS DE GASTOS", 'pie', gastos_data, "Categorias de Gastos"),
+            InsightsSection(insights),
+            TableSection(
+                ['Data', 'Tipo', 'Categoria', 'Valor', 'Descrição'], data, "Transações do Período",
+                page_title="📋 LISTA DETALHADA DE TRANSAÇÕES",
+            ),
+        ]
 
 
 class RelatorioEventos(RelatorioBase):
     """Relatório de Eventos com design profissional"""
     
-    def __init__(self, data_inicio=None, data_fim=None):
-        super().__init__(data_inicio, data_fim)
-        self.styles = PDFStyles()
-        self.header = PDFHeader(self.styles)
-        self.footer = PDFFooter(self.styles)
-        self.charts = PDFCharts(self.styles)
-        self.metrics = PDFMetrics(self.styles)
-        self.table = PDFTable(self.styles)
-        self.calculator = MetricsCalculator(data_inicio, data_fim)
-    
     def get_estatisticas_eventos(self):
         """Estatísticas de eventos usando o novo sistema"""
         return self.calculator.calculate_event_metrics()
     
-    def gerar_pdf(self):
-        """Gera relatório PDF de eventos com design profissional"""
-        # Criar buffer para o PDF
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer, 
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Obter métricas
+    def get_sections(self):
         metrics = self.get_estatisticas_eventos()
         
-        # Construir conteúdo do PDF
-        story = []
-        
-        # 1. Cabeçalho
-        titulo = "📅 RELATÓRIO DE EVENTOS"
-        subtitulo = f"Período: {self.calculator.get_period_description()}"
-        story.extend(self.header.create_header(titulo, subtitulo, timezone.now()))
-        
-        # 2. Resumo Executivo
         resumo_metrics = [
             {
                 'label': 'Total de Eventos',
@@ -419,37 +226,12 @@ class RelatorioEventos(RelatorioBase):
                 'change': ''
             }
         ]
-        story.extend(self.metrics.create_metrics_summary(resumo_metrics))
         
-        # 3. Gráfico de Status dos Eventos
-        if metrics['total_eventos'] > 0:
-            story.append(Paragraph("📊 STATUS DOS EVENTOS", self.styles['CabecSecao']))
-            status_data = {
-                'Realizados': metrics['eventos_realizados'],
-                'Agendados': metrics['eventos_agendados']
-            }
-            chart = self.charts.create_pie_chart(
-                status_data,
-                "Status dos Eventos",
-                width=4*inch,
-                height=3*inch
-            )
-            story.append(chart)
-            story.append(Spacer(1, 0.2*inch))
-        
-        # 4. Gráfico de Eventos por Mês
-        if metrics['eventos_por_mes'] and any(metrics['eventos_por_mes'].values()):
-            story.append(Paragraph("📈 EVENTOS POR MÊS", self.styles['CabecSecao']))
-            chart = self.charts.create_bar_chart(
-                metrics['eventos_por_mes'],
-                "Eventos por Mês",
-                width=6*inch,
-                height=3*inch
-            )
-            story.append(chart)
-            story.append(Spacer(1, 0.2*inch))
+        status_data = {
+            'Realizados': metrics['eventos_realizados'],
+            'Agendados': metrics['eventos_agendados']
+        }
         
-        # 5. Insights Automáticos
         insights = [
             f"📅 Total de {metrics['total_eventos']} eventos no período",
             f"✅ {metrics['eventos_realizados']} eventos já realizados",
@@ -464,67 +246,101 @@ class RelatorioEventos(RelatorioBase):
         if metrics['eventos_agendados'] > 0:
             insights.append(f"📅 {metrics['eventos_agendados']} eventos agendados para o futuro")
         
-        story.extend(self.metrics.create_insights(insights))
-        
-        # 6. Nova página para lista detalhada
-        story.append(PageBreak())
-        story.append(Paragraph("📋 LISTA DETALHADA DE EVENTOS", self.styles['TituloPrincipal']))
-        story.append(Spacer(1, 0.2*inch))
-        
-        # 7. Tabela de eventos
         eventos = Evento.objects.filter(
             data__gte=self.data_inicio,
             data__lte=self.data_fim
         ).order_by('-data')
-        
-        headers = ['Título', 'Data', 'Status', 'Participantes', 'Local']
-        data = []
-        
-        for evento in eventos:
-            # Determinar status
-            agora = timezone.now()
-            status = '✅ Realizado' if evento.data < agora else '📅 Agendado'
-            
-            # Contar participantes
-            participantes = EventoPresenca.objects.filter(
-                evento=evento,
-                confirmado=True
-            ).count()
-            
-            data.append([
+        agora = timezone.now()
+        data = [
+            [
                 evento.titulo,
                 evento.data.strftime('%d/%m/%Y %H:%M'),
-                status,
-                str(participantes),
+                '✅ Realizado' if evento.data < agora else '📅 Agendado',
+                str(evento.confirmados_count),
                 evento.local or '-'
-            ])
-        
-        story.extend(self.table.create_professional_table(
-            headers, 
-            data, 
-            "Eventos do Período"
-        ))
-        
-        # 8. Construir PDF
-        doc.build(story, onFirstPage=self._add_footer, onLaterPages=self._add_footer)
+            ]
+            for evento in eventos
+        ]
         
-        # Retornar PDF
-        buffer.seek(0)
-        return buffer.getvalue()
+        return [
+            HeaderSection("📅 RELATÓRIO DE EVENTOS", self._subtitulo()),
+            MetricsSection(resumo_metrics),
+            ChartSection("📊 STATUS DOS EVENTOS", 'pie', status_data, "Status dos Eventos"),
+            ChartSection("📈 EVENTOS POR MÊS", 'bar', metrics['eventos_por_mes'], "Eventos por Mês"),
+            InsightsSection(insights),
+            TableSection(
+                ['Título', 'Data', 'Status', 'Participantes', 'Local'], data, "Eventos do Período",
+                page_title="📋 LISTA DETALHADA DE EVENTOS",
+            ),
+        ]
+
+
+class RelatorioONG(RelatorioBase):
+    """Relatório dos repasses de ofertas a uma ONG no período"""
+    
+    def __init__(self, ong, distribuicoes, data_inicio=None, data_fim=None):
+        super().__init__(data_inicio, data_fim)
+        self.ong = ong
+        # [{'data_envio', 'destino', 'meio_envio', 'valor'}], já lidas do banco
+        self.distribuicoes = distribuicoes
     
-    def _add_footer(self, canvas, doc):
-        """Adiciona rodapé às páginas"""
-        canvas.saveState()
+    @classmethod
+    def do_periodo(cls, data_inicio, data_fim):
+        """
+        Um relatório por ONG ativa (e por ONG inativa que recebeu repasses no período),
+        com os repasses de todas lidos em uma única consulta.
+        """
+        por_ong = {}
+        for distribuicao in DistribuicaoOferta.objects.filter(
+            ong__isnull=False,
+            data_envio__gte=como_data(data_inicio),
+            data_envio__lte=como_data(data_fim),
+        ).order_by('data_envio', 'id').values('ong_id', 'data_envio', 'destino', 'meio_envio', 'valor'):
+            por_ong.setdefault(distribuicao.pop('ong_id'), []).append(distribuicao)
+        
+        ongs = ONG.objects.filter(Q(is_active=True) | Q(pk__in=por_ong)).order_by('nome', 'id')
+        return [cls(ong, por_ong.get(ong.pk, []), data_inicio, data_fim) for ong in ongs]
+    
+    def get_sections(self):
+        moeda = self.calculator.format_currency
+        valores = [float(item['valor']) for item in self.distribuicoes]
+        total = sum(valores)
         
-        # Obter número da página
-        page_num = canvas.getPageNumber()
+        resumo_metrics = [
+            {'label': 'Total Recebido', 'value': moeda(total), 'change': ''},
+            {'label': 'Repasses', 'value': str(len(valores)), 'change': ''},
+            {'label': 'Maior Repasse', 'value': moeda(max(valores, default=0)), 'change': ''},
+        ]
         
-        # Desenhar rodapé
-        canvas.setFont("Helvetica", 8)
-        canvas.setFillColor(self.styles.colors['muted'])
-        canvas.drawString(72, 50, f"Página {page_num} | Sistema Alfa+ v1.0.0 | {timezone.now().strftime('%d/%m/%Y %H:%M')}")
+        meios = {}
+        for item, valor in zip(self.distribuicoes, valores):
+            meio = item['meio_envio'] or 'Não informado'
+            meios[meio] = meios.get(meio, 0) + valor
+        
+        insights = [f"🤝 {len(valores)} repasses somando {moeda(total)} no período"]
+        if not valores:
+            insights = ["📭 Nenhum repasse registrado no período"]
+        
+        data = [
+            [
+                item['data_envio'].strftime('%d/%m/%Y'),
+                item['destino'],
+                item['meio_envio'] or '-',
+                moeda(valor),
+            ]
+            for item, valor in zip(self.distribuicoes, valores)
+        ]
         
-        canvas.restoreState()
+        return [
+            HeaderSection(f"🤝 RELATÓRIO DA ONG {self.ong.nome.upper()}", self._subtitulo()),
+            MetricsSection(resumo_metrics),
+            ChartSection("💸 REPASSES POR MEIO DE ENVIO", 'pie', meios, "Meios de Envio"),
+            InsightsSection(insights),
+            TableSection(
+                ['Data', 'Destino', 'Meio de Envio', 'Valor'], data, "Repasses do Período",
+                page_title="📋 LISTA DETALHADA DE REPASSES",
+            ),
+        ]
 
 
 # Classes auxiliares para compatibilidade
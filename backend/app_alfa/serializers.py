@@ -1,9 +1,13 @@
+import os
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
+from .imagens import derivados_para_api
 from .models import (
     Membro, Admin, Usuario, Cargo, Evento, Postagem, 
     Transacao, Oferta, ONG, Grupo, Doacao, Igreja,
     FotoEvento, FotoPostagem, DocumentoMembro, Transferencia,
-    EventoPresenca, EventoComentario
+    EventoPresenca, EventoComentario, UploadSessao, FechamentoMensal, PeriodoFechadoErro
 )
 
 class CargoSerializer(serializers.ModelSerializer):
@@ -31,11 +35,15 @@ class MembroSerializer(serializers.ModelSerializer):
     cadastrado_por_nome = serializers.CharField(source='cadastrado_por.nome', read_only=True)
     cargo_nome = serializers.CharField(source='cargo.nome', read_only=True)
     cargo = CargoSerializer(read_only=True)  # Incluir dados completos do cargo
+    foto_derivados = serializers.SerializerMethodField()
     
     class Meta:
         model = Membro
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at', 'deleted_at', 'is_active']
+    
+    def get_foto_derivados(self, obj):
+        return derivados_para_api(obj.foto, self.context.get('request'))
 
 class MembroCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -59,10 +67,14 @@ class IgrejaSerializer(serializers.ModelSerializer):
 
 class EventoSerializer(serializers.ModelSerializer):
     organizador_nome = serializers.CharField(source='organizador.username', read_only=True)
+    foto_derivados = serializers.SerializerMethodField()
     
     class Meta:
         model = Evento
         fields = '__all__'
+    
+    def get_foto_derivados(self, obj):
+        return derivados_para_api(obj.foto, self.context.get('request'))
 
 class EventoCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -70,9 +82,14 @@ class EventoCreateSerializer(serializers.ModelSerializer):
         exclude = ['organizador']
 
 class FotoEventoSerializer(serializers.ModelSerializer):
+    imagem_derivados = serializers.SerializerMethodField()
+    
     class Meta:
         model = FotoEvento
         fields = '__all__'
+    
+    def get_imagem_derivados(self, obj):
+        return derivados_para_api(obj.imagem, self.context.get('request'))
 
 class PostagemSerializer(serializers.ModelSerializer):
     autor_nome = serializers.CharField(source='autor.username', read_only=True)
@@ -87,9 +104,14 @@ class PostagemCreateSerializer(serializers.ModelSerializer):
         exclude = ['autor']
 
 class FotoPostagemSerializer(serializers.ModelSerializer):
+    imagem_derivados = serializers.SerializerMethodField()
+    
     class Meta:
         model = FotoPostagem
         fields = '__all__'
+    
+    def get_imagem_derivados(self, obj):
+        return derivados_para_api(obj.imagem, self.context.get('request'))
 
 class TransacaoSerializer(serializers.ModelSerializer):
     registrado_por_nome = serializers.CharField(source='registrado_por.nome', read_only=True)
@@ -103,6 +125,27 @@ class TransacaoCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transacao
         exclude = ['created_at', 'updated_at', 'deleted_at', 'is_active', 'registrado_por']
+    
+    def validate(self, attrs):
+        datas = [attrs.get('data')]
+        if self.instance is not None:
+            datas.append(self.instance.data)
+        try:
+            FechamentoMensal.verificar_aberto(*datas)
+        except PeriodoFechadoErro as erro:
+            raise serializers.ValidationError({'data': erro.messages})
+        return attrs
+
+class FechamentoMensalSerializer(serializers.ModelSerializer):
+    fechado_por_nome = serializers.CharField(source='fechado_por.nome', read_only=True)
+    
+    class Meta:
+        model = FechamentoMensal
+        fields = '__all__'
+        read_only_fields = ['saldo_inicial', 'total_entradas', 'total_saidas', 'saldo_final',
+                            'quantidade', 'categorias', 'fechado_em', 'fechado_por']
+        # A unicidade do mês é verificada em FechamentoMensal.fechar
+        extra_kwargs = {'mes': {'validators': [], 'help_text': 'Qualquer dia do mês a fechar'}}
 
 class ONGSerializer(serializers.ModelSerializer):
     class Meta:
@@ -173,6 +216,43 @@ class EventoPresencaCreateSerializer(serializers.ModelSerializer):
         model = EventoPresenca
         exclude = ['created_at', 'updated_at', 'deleted_at', 'is_active', 'data_confirmacao']
 
+class EventoPresencaCheckinSerializer(serializers.Serializer):
+    """Entrada do check-in em lote: IDs de membros e/ou códigos lidos dos cartões"""
+    MAX_CHECKINS = 5000
+    
+    evento = serializers.PrimaryKeyRelatedField(queryset=Evento.objects.all())
+    membros = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+    codigos = serializers.ListField(child=serializers.CharField(max_length=32), required=False, default=list)
+    
+    def validate(self, attrs):
+        total = len(attrs['membros']) + len(attrs['codigos'])
+        if total == 0:
+            raise serializers.ValidationError('Informe ao menos um membro ou código de cartão.')
+        if total > self.MAX_CHECKINS:
+            raise serializers.ValidationError(f'Máximo de {self.MAX_CHECKINS} check-ins por requisição.')
+        return attrs
+
+class CheckinOfflineSerializer(serializers.Serializer):
+    """Um check-in capturado offline pelo tablet, identificado por chave de idempotência"""
+    chave = serializers.CharField(max_length=64)
+    evento = serializers.IntegerField(min_value=1)
+    membro = serializers.IntegerField(min_value=1, required=False)
+    codigo = serializers.CharField(max_length=32, required=False)
+    
+    def validate(self, attrs):
+        if 'membro' not in attrs and 'codigo' not in attrs:
+            raise serializers.ValidationError('Informe o membro ou o código do cartão.')
+        if 'membro' not in attrs:
+            attrs['membro'] = Membro.id_por_codigo_cartao(attrs['codigo'])
+        return attrs
+
+class EventoPresencaSincronizacaoSerializer(serializers.Serializer):
+    checkins = serializers.ListField(
+        child=CheckinOfflineSerializer(),
+        allow_empty=False,
+        max_length=EventoPresencaCheckinSerializer.MAX_CHECKINS
+    )
+
 class EventoComentarioSerializer(serializers.ModelSerializer):
     membro_nome = serializers.CharField(source='membro.nome', read_only=True)
     evento_titulo = serializers.CharField(source='evento.titulo', read_only=True)
@@ -186,3 +266,90 @@ class EventoComentarioCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = EventoComentario
         exclude = ['created_at', 'updated_at', 'deleted_at', 'is_active', 'data_comentario']
+
+class UploadSessaoSerializer(serializers.ModelSerializer):
+    progresso = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UploadSessao
+        fields = ['token', 'destino', 'objeto_id', 'nome_arquivo', 'descricao', 'tamanho_total',
+                  'recebido', 'progresso', 'sha256', 'criado_em', 'concluido_em']
+        read_only_fields = ['token', 'recebido', 'criado_em', 'concluido_em']
+    
+    def get_progresso(self, obj):
+        return round(obj.recebido * 100 / obj.tamanho_total, 1) if obj.tamanho_total else 0
+    
+    def validate_nome_arquivo(self, value):
+        # Nunca confiar em caminhos enviados pelo cliente
+        nome = os.path.basename(value.replace('\\', '/')).strip()
+        if not nome:
+            raise serializers.ValidationError('Nome de arquivo inválido.')
+        return nome
+    
+    def validate_tamanho_total(self, value):
+        maximo = getattr(settings, 'ALFA_UPLOAD_TAMANHO_MAXIMO', 200 * 1024 * 1024)
+        if value <= 0 or value > maximo:
+            raise serializers.ValidationError(f'Tamanho deve estar entre 1 byte e {maximo} bytes.')
+        return value
+    
+    def validate(self, attrs):
+        from .uploads import destino_existe
+        if not destino_existe(attrs['destino'], attrs['objeto_id']):
+            raise serializers.ValidationError({'objeto_id': 'Objeto de destino não encontrado.'})
+        return attrs
+
+
+class CartaoLoteSerializer(serializers.Serializer):
+    """Filtro e modo da geração de cartões em lote"""
+    membros = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    status = serializers.ChoiceField(choices=Membro.STATUS_CHOICES, required=False)
+    modo = serializers.ChoiceField(choices=['documentos', 'pdf'], default='documentos')
+    forcar = serializers.BooleanField(default=False)
+
+class TendenciaFinanceiraSerializer(serializers.Serializer):
+    """Parâmetros da série de tendência financeira"""
+    LIMITE_ANOS = 5
+    
+    granularidade = serializers.ChoiceField(choices=['dia', 'semana', 'mes'], default='mes')
+    inicio = serializers.DateField(required=False)
+    fim = serializers.DateField(required=False)
+    por_categoria = serializers.BooleanField(default=False)
+    
+    def validate(self, attrs):
+        # Padrão: do mesmo mês do ano anterior até hoje
+        fim = attrs.get('fim') or timezone.localdate()
+        inicio = attrs.get('inicio') or fim.replace(year=fim.year - 1, day=1)
+        if inicio > fim:
+            raise serializers.ValidationError('A data inicial deve ser anterior à final.')
+        if (fim - inicio).days > self.LIMITE_ANOS * 366:
+            raise serializers.ValidationError(f'Intervalo máximo de {self.LIMITE_ANOS} anos.')
+        attrs['inicio'], attrs['fim'] = inicio, fim
+        return attrs
+
+
+class RecorteFinanceiroSerializer(serializers.Serializer):
+    """Parâmetros de um recorte do razão colunar (listas aceitam o parâmetro repetido)"""
+    agrupar = serializers.ListField(
+        child=serializers.ChoiceField(choices=['tipo', 'categoria', 'metodo_pagamento', 'registrado_por', 'ano', 'mes']),
+        required=False, default=list, max_length=3
+    )
+    inicio = serializers.DateField(required=False)
+    fim = serializers.DateField(required=False)
+    tipo = serializers.ListField(child=serializers.ChoiceField(choices=Transacao.TIPO_CHOICES), required=False)
+    categoria = serializers.ListField(child=serializers.CharField(), required=False)
+    metodo_pagamento = serializers.ListField(child=serializers.CharField(), required=False)
+    registrado_por = serializers.ListField(child=serializers.IntegerField(), required=False)
+    
+    def validate(self, attrs):
+        if attrs.get('inicio') and attrs.get('fim') and attrs['inicio'] > attrs['fim']:
+            raise serializers.ValidationError('A data inicial deve ser anterior à final.')
+        if len(set(attrs['agrupar'])) != len(attrs['agrupar']):
+            raise serializers.ValidationError({'agrupar': 'Dimensão repetida.'})
+        return attrs
+
+
+class ExportacaoColunarSerializer(serializers.Serializer):
+    """Parâmetros da exportação colunar"""
+    formato = serializers.ChoiceField(choices=['parquet', 'arrow', 'xlsx'], default='parquet')
+    desde = serializers.DateTimeField(required=False, help_text="Só linhas alteradas a partir desta marca")
+
@@ -0,0 +1,99 @@
+"""
+Sinais do app Alfa+
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import tendencias
+from .imagens import agendar_derivados
+from .models import (
+    ArquivoConteudo, DocumentoMembro, Evento, FotoEvento, FotoPostagem, Membro, ResumoFinanceiroMensal, Transacao,
+)
+
+
+# Modelo -> campo de imagem que recebe derivados (miniaturas WebP/JPEG)
+CAMPOS_IMAGEM = {
+    Membro: 'foto',
+    Evento: 'foto',
+    FotoEvento: 'imagem',
+    FotoPostagem: 'imagem',
+}
+
+
+@receiver(post_save)
+def gerar_derivados_imagem(sender, instance, update_fields=None, **kwargs):
+    campo = CAMPOS_IMAGEM.get(sender)
+    if campo is None or (update_fields is not None and campo not in update_fields):
+        return
+    # Salvar sem trocar a foto não agenda nada (derivados_de já tem o nome da imagem)
+    agendar_derivados(getattr(instance, campo))
+
+
+# Modelo -> campo guardado no armazenamento endereçado por conteúdo (contagem de referências)
+CAMPOS_CONTEUDO = {
+    FotoEvento: 'imagem',
+    FotoPostagem: 'imagem',
+    DocumentoMembro: 'arquivo',
+}
+
+
+@receiver(pre_save)
+def guardar_arquivo_anterior(sender, instance, **kwargs):
+    campo = CAMPOS_CONTEUDO.get(sender)
+    if campo is None:
+        return
+    instance._arquivo_anterior = sender._base_manager.filter(pk=instance.pk).values_list(
+        campo, flat=True
+    ).first() if instance.pk else None
+
+
+@receiver(post_save)
+def contar_referencia_arquivo(sender, instance, **kwargs):
+    campo = CAMPOS_CONTEUDO.get(sender)
+    if campo is None:
+        return
+    anterior = getattr(instance, '_arquivo_anterior', None) or ''
+    atual = getattr(instance, campo).name or ''
+    if anterior != atual:
+        ArquivoConteudo.ajustar_referencias(atual, 1)
+        ArquivoConteudo.ajustar_referencias(anterior, -1)
+
+
+@receiver(post_delete)
+def liberar_referencia_arquivo(sender, instance, **kwargs):
+    campo = CAMPOS_CONTEUDO.get(sender)
+    if campo is not None:
+        ArquivoConteudo.ajustar_referencias(getattr(instance, campo).name, -1)
+
+
+# Campos de Transacao que entram nos resumos financeiros mensais
+CAMPOS_RESUMO = ('data', 'tipo', 'categoria', 'valor', 'deleted_at')
+
+
+def _estado_transacao(instance):
+    return {campo: getattr(instance, campo) for campo in CAMPOS_RESUMO}
+
+
+@receiver(pre_save, sender=Transacao)
+def guardar_transacao_anterior(sender, instance, **kwargs):
+    instance._resumo_anterior = sender._base_manager.filter(pk=instance.pk).values(
+        *CAMPOS_RESUMO
+    ).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Transacao)
+def atualizar_resumo_financeiro(sender, instance, **kwargs):
+    # Exclusão lógica chega aqui com deleted_at preenchido
+    ResumoFinanceiroMensal.registrar_alteracao(
+        getattr(instance, '_resumo_anterior', None), _estado_transacao(instance)
+    )
+    instance._resumo_anterior = _estado_transacao(instance)
+    transaction.on_commit(tendencias.invalidar)
+
+
+@receiver(post_delete, sender=Transacao)
+def remover_do_resumo_financeiro(sender, instance, **kwargs):
+    ResumoFinanceiroMensal.registrar_alteracao(_estado_transacao(instance), None)
+    transaction.on_commit(tendencias.invalidar)
@@ -0,0 +1,128 @@
+"""
+Publicação de eventos em tempo real - Alfa+
+Pub/sub em processo com tópicos por evento ('evento:<id>') e para o dashboard ('dashboard').
+
+Os viewsets publicam após o commit da transação; a view SSE (tempo_real_views.py)
+entrega as mensagens aos navegadores pela aplicação ASGI. O broker padrão vive na
+memória do processo: com vários workers ASGI cada um atende apenas os seus clientes,
+então um broker externo pode ser plugado em settings.ALFA_TEMPO_REAL_BROKER.
+"""
+
+import asyncio
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+TOPICO_DASHBOARD = 'dashboard'
+
+
+def topico_evento(evento_id):
+    return f'evento:{evento_id}'
+
+
+class Assinatura:
+    """Fila de mensagens de um cliente conectado"""
+
+    def __init__(self, broker, topicos, loop, tamanho_fila):
+        self.broker = broker
+        self.topicos = set(topicos)
+        self.loop = loop
+        self.fila = asyncio.Queue(maxsize=tamanho_fila)
+
+    def entregar(self, mensagem):
+        # Executado no loop do assinante; cliente lento perde as mensagens mais antigas
+        if self.fila.full():
+            self.fila.get_nowait()
+        self.fila.put_nowait(mensagem)
+
+    async def proxima(self, timeout=None):
+        """Aguarda a próxima mensagem (levanta asyncio.TimeoutError após timeout segundos)"""
+        return await asyncio.wait_for(self.fila.get(), timeout)
+
+    def cancelar(self):
+        self.broker.remover(self)
+
+
+class BrokerMemoria:
+    """Broker em memória do processo. Também usado nos testes (ver definir_broker)."""
+
+    def __init__(self, tamanho_fila=100, tamanho_historico=200):
+        self.tamanho_fila = tamanho_fila
+        self.historico = deque(maxlen=tamanho_historico)
+        self._assinaturas = {}
+        self._lock = threading.Lock()
+
+    def assinar(self, topicos):
+        """Cria uma assinatura; deve ser chamado dentro do loop asyncio do cliente"""
+        assinatura = Assinatura(self, topicos, asyncio.get_running_loop(), self.tamanho_fila)
+        with self._lock:
+            for topico in assinatura.topicos:
+                self._assinaturas.setdefault(topico, set()).add(assinatura)
+        return assinatura
+
+    def remover(self, assinatura):
+        with self._lock:
+            for topico in assinatura.topicos:
+                assinantes = self._assinaturas.get(topico)
+                if assinantes:
+                    assinantes.discard(assinatura)
+                    if not assinantes:
+                        del self._assinaturas[topico]
+
+    def publicar(self, topico, tipo, dados):
+        """Publica uma mensagem; pode ser chamado de qualquer thread (views síncronas)"""
+        mensagem = {'topico': topico, 'tipo': tipo, 'dados': dados}
+        with self._lock:
+            self.historico.append(mensagem)
+            assinantes = list(self._assinaturas.get(topico, ()))
+
+        for assinatura in assinantes:
+            try:
+                assinatura.loop.call_soon_threadsafe(assinatura.entregar, mensagem)
+            except RuntimeError:
+                # Loop já encerrado: cliente desconectou sem cancelar
+                self.remover(assinatura)
+        return mensagem
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        caminho = getattr(settings, 'ALFA_TEMPO_REAL_BROKER', 'app_alfa.tempo_real.BrokerMemoria')
+        _broker = import_string(caminho)()
+    return _broker
+
+
+def definir_broker(broker):
+    """Substitui o broker do processo (usado pelos testes para isolar as mensagens)"""
+    global _broker
+    _broker = broker
+    return broker
+
+
+def publicar_apos_commit(topico, tipo, dados):
+    """Publica somente se a transação atual for confirmada"""
+    transaction.on_commit(lambda: get_broker().publicar(topico, tipo, dados))
+
+
+def notificar_presencas(evento_id):
+    """Envia o total atualizado de confirmados do evento para o próprio evento e o dashboard"""
+    def _publicar():
+        from .models import Evento
+
+        confirmados = Evento.objects.filter(pk=evento_id).values_list('confirmados_count', flat=True).first()
+        if confirmados is None:
+            return
+        dados = {'evento': evento_id, 'confirmados_count': confirmados}
+        broker = get_broker()
+        broker.publicar(topico_evento(evento_id), 'presencas', dados)
+        broker.publicar(TOPICO_DASHBOARD, 'presencas', dados)
+
+    transaction.on_commit(_publicar)
@@ -0,0 +1,79 @@
+"""
+Views de tempo real (Server-Sent Events) - Alfa+
+Servidas pela aplicação ASGI (alfa_project/asgi.py)
+"""
+
+import asyncio
+import json
+import re
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .tempo_real import TOPICO_DASHBOARD, get_broker
+
+
+TOPICO_VALIDO = re.compile(r'^(dashboard|evento:\d+)$')
+
+
+class EventosTempoRealView(View):
+    """
+    Stream SSE: GET /api/tempo-real/?topicos=evento:12,dashboard&token=<access token>
+
+    O EventSource do navegador não envia cabeçalhos, por isso o JWT vem na query string.
+    """
+
+    intervalo_ping = 15  # segundos entre comentários de keep-alive
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            # Sob WSGI a resposta infinita seria consumida inteira antes de ser enviada
+            return JsonResponse({
+                'success': False,
+                'message': 'Tempo real disponível apenas via servidor ASGI'
+            }, status=501)
+
+        try:
+            AccessToken(request.GET.get('token', ''))
+        except TokenError:
+            return JsonResponse({
+                'success': False,
+                'message': 'Token inválido ou expirado'
+            }, status=401)
+
+        topicos = [
+            topico for topico in request.GET.get('topicos', TOPICO_DASHBOARD).split(',')
+            if TOPICO_VALIDO.match(topico)
+        ]
+        if not topicos:
+            return JsonResponse({
+                'success': False,
+                'message': 'Nenhum tópico válido informado'
+            }, status=400)
+
+        response = StreamingHttpResponse(self.stream(topicos), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx não deve bufferizar o stream
+        return response
+
+    async def stream(self, topicos):
+        assinatura = get_broker().assinar(topicos)
+        try:
+            yield ': conectado\n\n'
+            while True:
+                try:
+                    mensagem = await assinatura.proxima(timeout=self.intervalo_ping)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                yield formatar_sse(mensagem)
+        finally:
+            assinatura.cancelar()
+
+
+def formatar_sse(mensagem):
+    dados = json.dumps({'topico': mensagem['topico'], **mensagem['dados']}, default=str)
+    return f"event: {mensagem['tipo']}\ndata: {dados}\n\n"
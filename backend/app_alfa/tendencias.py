@@ -0,0 +1,140 @@
+"""
+Séries financeiras para gráficos de tendência - Alfa+
+Uma única consulta agrupada (TruncDay/TruncWeek/TruncMonth x tipo [x categoria])
+e os períodos sem movimento preenchidos no servidor com a série completa de
+períodos, para que o frontend receba colunas alinhadas e prontas para o gráfico.
+
+O resultado fica no cache do Django por (intervalo, granularidade, categorias,
+versão dos dados). A versão muda a cada transação salva ou removida (sinais) e
+após reconstruir_resumos_financeiros. Ela só vale entre processos (workers) se o
+cache for compartilhado: com um cache por processo (LocMemCache) cada worker
+veria só as próprias alterações, e verificar_cache_compartilhado acusa erro.
+"""
+
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache, caches
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from .models import ResumoFinanceiroMensal, Transacao
+
+
+DIA = 'dia'
+SEMANA = 'semana'
+MES = 'mes'
+GRANULARIDADES = {
+    DIA: TruncDay,
+    SEMANA: TruncWeek,
+    MES: TruncMonth,
+}
+
+CHAVE_VERSAO = 'alfa:financeiro:versao'
+
+# Backends de cache que guardam os dados no próprio processo
+CACHES_POR_PROCESSO = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def versao_dados():
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        versao = uuid.uuid4().hex
+        # add() não sobrescreve a versão criada por outro processo no intervalo
+        if not cache.add(CHAVE_VERSAO, versao, timeout=None):
+            versao = cache.get(CHAVE_VERSAO, versao)
+    return versao
+
+
+def invalidar():
+    """Nova versão dos dados financeiros: séries em cache deixam de ser usadas"""
+    cache.set(CHAVE_VERSAO, uuid.uuid4().hex, timeout=None)
+
+
+def verificar_cache_compartilhado(app_configs=None, **kwargs):
+    """System check: a versão dos dados financeiros precisa de um cache visto por todos os processos"""
+    backend = f'{type(caches["default"]).__module__}.{type(caches["default"]).__name__}'
+    if backend not in CACHES_POR_PROCESSO:
+        return []
+    return [checks.Error(
+        f'O cache padrão ({backend}) é de cada processo: com mais de um worker, alterações '
+        'feitas em um não invalidam as séries de tendência, as categorias e o razão colunar dos outros.',
+        hint='Configure CACHES com um backend compartilhado (DatabaseCache, Redis ou Memcached).',
+        id='app_alfa.E001',
+    )]
+
+
+def inicio_periodo(dia, granularidade):
+    if granularidade == SEMANA:
+        return dia - timedelta(days=dia.weekday())  # TruncWeek: segunda-feira
+    if granularidade == MES:
+        return dia.replace(day=1)
+    return dia
+
+
+def periodos(inicio, fim, granularidade):
+    """Início de cada período entre `inicio` e `fim`, inclusive"""
+    atual = inicio_periodo(inicio, granularidade)
+    while atual <= fim:
+        yield atual
+        if granularidade == MES:
+            atual = ResumoFinanceiroMensal.proximo_mes(atual)
+        else:
+            atual += timedelta(days=7 if granularidade == SEMANA else 1)
+
+
+def _calcular(inicio, fim, granularidade, por_categoria):
+    campos = ['periodo', 'tipo'] + (['categoria'] if por_categoria else [])
+    linhas = Transacao.objects.filter(data__gte=inicio, data__lte=fim).annotate(
+        periodo=GRANULARIDADES[granularidade]('data')
+    ).values(*campos).annotate(total=Sum('valor'), quantidade=Count('id')).order_by()
+
+    eixo = list(periodos(inicio, fim, granularidade))
+    posicao = {periodo: indice for indice, periodo in enumerate(eixo)}
+
+    # Entradas e saídas sempre presentes (zeradas se não houver movimento)
+    series = {}
+    if not por_categoria:
+        for tipo, _ in Transacao.TIPO_CHOICES:
+            series[(tipo, None)] = None
+    for linha in linhas:
+        periodo = linha['periodo']
+        if hasattr(periodo, 'date'):
+            periodo = periodo.date()
+        chave = (linha['tipo'], linha.get('categoria'))
+        if series.get(chave) is None:
+            series[chave] = ([Decimal('0')] * len(eixo), [0] * len(eixo))
+        totais, quantidades = series[chave]
+        totais[posicao[periodo]] += linha['total']
+        quantidades[posicao[periodo]] += linha['quantidade']
+
+    resultado = []
+    for (tipo, categoria), valores in sorted(series.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+        totais, quantidades = valores or ([Decimal('0')] * len(eixo), [0] * len(eixo))
+        resultado.append({
+            'tipo': tipo,
+            'categoria': categoria,
+            'totais': [str(total.quantize(Decimal('0.01'))) for total in totais],
+            'quantidades': quantidades,
+        })
+
+    return {
+        'granularidade': granularidade,
+        'inicio': inicio,
+        'fim': fim,
+        'periodos': eixo,
+        'series': resultado,
+    }
+
+
+def serie_financeira(inicio, fim, granularidade=MES, por_categoria=False):
+    """Série de entradas/saídas (e por categoria, se pedido) com todos os períodos do intervalo"""
+    chave = f'alfa:tendencia:{versao_dados()}:{inicio}:{fim}:{granularidade}:{int(por_categoria)}'
+    resultado = cache.get(chave)
+    if resultado is None:
+        resultado = _calcular(inicio, fim, granularidade, por_categoria)
+        cache.set(chave, resultado, getattr(settings, 'ALFA_TENDENCIAS_CACHE_SEGUNDOS', 3600))
+    return resultado
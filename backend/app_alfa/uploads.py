@@ -0,0 +1,222 @@
+"""
+Upload em partes (chunks) com retomada - Alfa+
+Cada parte é lida do corpo da requisição em blocos para um arquivo temporário próprio
+(em memória até TAMANHO_PARTE_RECOMENDADO) e só então, com a sessão travada, copiada
+para o arquivo da sessão: o Django não bufferiza o arquivo inteiro, um cliente lento
+não segura a transação nem o lock da sessão, e uma conexão que cai retoma do último
+byte confirmado (UploadSessao.recebido). Sessões sem partes novas até expira_em são
+recusadas e removidas por limpar_expirados (comando limpar_uploads_expirados).
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .models import (
+    DistribuicaoOferta, Evento, FotoEvento, FotoPostagem, Postagem, UploadSessao, expiracao_upload, validade_upload,
+)
+
+
+TAMANHO_BLOCO = 64 * 1024
+TAMANHO_PARTE_RECOMENDADO = 2 * 1024 * 1024
+
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadErro(Exception):
+    """Erro de upload com status HTTP sugerido"""
+
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.mensagem = mensagem
+        self.status = status
+
+
+def diretorio_uploads():
+    diretorio = getattr(settings, 'ALFA_UPLOADS_DIR', None) or os.path.join(tempfile.gettempdir(), 'alfa_uploads')
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+
+EXTENSAO_TEMPORARIO = '.part'
+
+
+def caminho_temporario(sessao):
+    return os.path.join(diretorio_uploads(), f'{sessao.token}{EXTENSAO_TEMPORARIO}')
+
+
+def verificar_validade(sessao):
+    if not sessao.concluido_em and sessao.expira_em <= timezone.now():
+        raise UploadErro('Sessão de upload expirada: crie uma nova sessão.', status=410)
+
+
+def destino_existe(destino, objeto_id):
+    modelos = {
+        UploadSessao.FOTO_EVENTO: Evento,
+        UploadSessao.FOTO_POSTAGEM: Postagem,
+        UploadSessao.COMPROVANTE_OFERTA: DistribuicaoOferta,
+    }
+    return modelos[destino].objects.filter(pk=objeto_id).exists()
+
+
+def interpretar_content_range(valor):
+    """'bytes 0-1048575/5000000' -> (inicio, tamanho da parte, total)"""
+    encontrado = CONTENT_RANGE.match(valor or '')
+    if not encontrado:
+        raise UploadErro('Cabeçalho Content-Range ausente ou inválido (use "bytes inicio-fim/total").')
+    inicio, fim, total = (int(grupo) for grupo in encontrado.groups())
+    if fim < inicio:
+        raise UploadErro('Content-Range com fim menor que o início.')
+    return inicio, fim - inicio + 1, total
+
+
+def validar_parte(sessao, inicio, tamanho):
+    """
+    A parte só é aceita se começar exatamente no último byte confirmado. Verificada antes
+    de ler o corpo (recusa cedo) e de novo com a sessão travada, em gravar_parte.
+    """
+    if sessao.concluido_em:
+        raise UploadErro('Upload já concluído.', status=409)
+    verificar_validade(sessao)
+    if inicio != sessao.recebido:
+        raise UploadErro(f'Parte fora de ordem: o próximo byte esperado é {sessao.recebido}.', status=409)
+    if inicio + tamanho > sessao.tamanho_total:
+        raise UploadErro('A parte ultrapassa o tamanho total declarado.')
+
+    if inicio > 0 and not os.path.exists(caminho_temporario(sessao)):
+        # Temporário perdido (limpeza do /tmp, outro servidor): recomeçar do zero
+        sessao.recebido = 0
+        sessao.save(update_fields=['recebido', 'atualizado_em'])
+        raise UploadErro('Arquivo temporário não encontrado: reenvie a partir do byte 0.', status=409)
+
+
+def receber_parte(stream, tamanho, sha256_parte=None):
+    """
+    Lê `tamanho` bytes de `stream` para um arquivo temporário, sem nenhum lock aberto.
+    Confere o tamanho e, quando informado, o SHA-256. Retorna o arquivo no início.
+    """
+    parte = tempfile.SpooledTemporaryFile(max_size=TAMANHO_PARTE_RECOMENDADO, dir=diretorio_uploads())
+    digest = hashlib.sha256()
+    escritos = 0
+    while escritos < tamanho:
+        bloco = stream.read(min(TAMANHO_BLOCO, tamanho - escritos))
+        if not bloco:
+            break
+        digest.update(bloco)
+        parte.write(bloco)
+        escritos += len(bloco)
+
+    if escritos != tamanho:
+        parte.close()
+        raise UploadErro(f'Parte incompleta: recebidos {escritos} de {tamanho} bytes.')
+    if sha256_parte and digest.hexdigest() != sha256_parte.lower():
+        parte.close()
+        raise UploadErro('Checksum SHA-256 da parte não confere.', status=422)
+    parte.seek(0)
+    return parte
+
+
+def gravar_parte(sessao, parte, inicio, tamanho):
+    """
+    Com a sessão travada (select_for_update): confere a posição de novo e copia a parte
+    já recebida (receber_parte) para a posição `inicio` do arquivo temporário da sessão.
+    """
+    validar_parte(sessao, inicio, tamanho)
+    caminho = caminho_temporario(sessao)
+    with open(caminho, 'r+b' if os.path.exists(caminho) else 'wb') as arquivo:
+        arquivo.seek(inicio)
+        arquivo.truncate()
+        shutil.copyfileobj(parte, arquivo, TAMANHO_BLOCO)
+
+    sessao.recebido = inicio + tamanho
+    sessao.expira_em = expiracao_upload()
+    sessao.save(update_fields=['recebido', 'expira_em', 'atualizado_em'])
+    return sessao.recebido
+
+
+class ArquivoTemporario(File):
+    """
+    File com temporary_file_path(): o FileSystemStorage move o arquivo
+    (os.rename) em vez de copiá-lo para o destino.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def _sha256_arquivo(caminho):
+    digest = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO), b''):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+def concluir(sessao):
+    """Valida o arquivo montado e o anexa ao destino. Retorna o objeto criado/atualizado."""
+    if sessao.concluido_em:
+        raise UploadErro('Upload já concluído.', status=409)
+    verificar_validade(sessao)
+    if sessao.recebido != sessao.tamanho_total:
+        raise UploadErro(f'Upload incompleto: {sessao.recebido} de {sessao.tamanho_total} bytes.', status=409)
+
+    caminho = caminho_temporario(sessao)
+    if sessao.sha256 and _sha256_arquivo(caminho) != sessao.sha256.lower():
+        raise UploadErro('Checksum SHA-256 do arquivo não confere.', status=422)
+
+    with open(caminho, 'rb') as arquivo:
+        conteudo = ArquivoTemporario(arquivo, name=sessao.nome_arquivo)
+        if sessao.destino == UploadSessao.FOTO_EVENTO:
+            objeto = FotoEvento(evento_id=sessao.objeto_id, descricao=sessao.descricao)
+            objeto.imagem.save(sessao.nome_arquivo, conteudo, save=True)
+        elif sessao.destino == UploadSessao.FOTO_POSTAGEM:
+            objeto = FotoPostagem(postagem_id=sessao.objeto_id, descricao=sessao.descricao)
+            objeto.imagem.save(sessao.nome_arquivo, conteudo, save=True)
+        else:
+            objeto = DistribuicaoOferta.objects.get(pk=sessao.objeto_id)
+            objeto.comprovante.save(sessao.nome_arquivo, conteudo, save=True)
+
+    # Storage que copia (em vez de mover) deixa o temporário para trás
+    if os.path.exists(caminho):
+        os.remove(caminho)
+
+    sessao.concluido_em = timezone.now()
+    sessao.save(update_fields=['concluido_em', 'atualizado_em'])
+    return objeto
+
+
+def cancelar(sessao):
+    caminho = caminho_temporario(sessao)
+    if os.path.exists(caminho):
+        os.remove(caminho)
+    sessao.delete()
+
+
+def limpar_expirados(agora=None):
+    """
+    Remove as sessões vencidas (abandonadas ou já concluídas) com seus temporários e os
+    temporários sem sessão mais antigos que a validade. Retorna (sessões, arquivos).
+    """
+    agora = agora or timezone.now()
+    sessoes = 0
+    for sessao in UploadSessao.objects.filter(expira_em__lte=agora).iterator():
+        cancelar(sessao)
+        sessoes += 1
+
+    diretorio = diretorio_uploads()
+    limite = (agora - validade_upload()).timestamp()
+    tokens = {str(token) for token in UploadSessao.objects.values_list('token', flat=True)}
+    arquivos = 0
+    for nome in os.listdir(diretorio):
+        token, extensao = os.path.splitext(nome)
+        caminho = os.path.join(diretorio, nome)
+        if extensao == EXTENSAO_TEMPORARIO and token not in tokens and os.path.getmtime(caminho) < limite:
+            os.remove(caminho)
+            arquivos += 1
+    return sessoes, arquivos
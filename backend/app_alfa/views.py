@@ -1,11 +1,12 @@
 from django.shortcuts import render
 from django.http import HttpResponse, JsonResponse
 from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from .models import Transferencia, Membro, Transacao, Evento, Postagem, Usuario, Admin
-from io import BytesIO
+from .models import (
+    Transferencia, Membro, Transacao, Evento, Postagem, Usuario, Admin, PeriodoFechadoErro, CategoriaFinanceira,
+)
+from .cartoes import dados_cartao, renderizar_cartao
+from .documentos import documento_transferencia
+from .downloads import servir_arquivo
 from django.views.decorators.csrf import csrf_exempt
 import json
 from rest_framework.decorators import api_view, permission_classes
@@ -16,37 +17,20 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 # Crie suas views aqui.
 def gerar_pdf_transferencia(request, transferencia_id):
     try:
-        transferencia = Transferencia.objects.get(id=transferencia_id)
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-
-        # Título
-        title = Paragraph("Documento de Transferência de Membro", styles['Title'])
-        story.append(title)
-        story.append(Spacer(1, 12))
-
-        # Dados
-        story.append(Paragraph(f"Membro: {transferencia.membro.nome}", styles['Normal']))
-        story.append(Paragraph(f"Igreja Origem: {transferencia.igreja_origem.nome}", styles['Normal']))
-        story.append(Paragraph(f"Igreja Destino: {transferencia.igreja_destino.nome}", styles['Normal']))
-        story.append(Paragraph(f"Data: {transferencia.data_transferencia}", styles['Normal']))
-        story.append(Paragraph(f"Motivo: {transferencia.motivo}", styles['Normal']))
-
-        doc.build(story)
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="transferencia_{transferencia_id}.pdf"'
-        return response
+        transferencia = Transferencia.objects.select_related(
+            'membro', 'igreja_origem', 'igreja_destino'
+        ).get(id=transferencia_id)
     except Transferencia.DoesNotExist:
         return HttpResponse('Transferência não encontrada', status=404)
 
+    # Gerado uma vez por versão (updated_at); depois é só leitura do arquivo, com ETag
+    documento = documento_transferencia(transferencia)
+    return servir_arquivo(request, documento.arquivo, nome_download=f'transferencia_{transferencia_id}.pdf')
+
 def gerar_cartao_membro(request, membro_id):
     try:
         membro = Membro.objects.get(id=membro_id)
-        html_string = render_to_string('cartao_membro_template.html', {'membro': membro})
-        pdf = weasyprint.HTML(string=html_string).write_pdf()
+        pdf = renderizar_cartao(dados_cartao(membro))
         response = HttpResponse(pdf, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="cartao_membro_{membro_id}.pdf"'
         return response
@@ -70,13 +54,14 @@ def transacao_create(request):
 
         # Verificar se o tipo de transação requer permissão específica
         tipo = data['tipo']
-        if tipo == 'entrada' and data['categoria'].lower() in ['dízimo', 'dizimo']:
+        chave = CategoriaFinanceira.normalizar(data['categoria'])
+        if tipo == 'entrada' and chave == CategoriaFinanceira.DIZIMO:
             if not admin_user.cargo.pode_registrar_dizimos:
                 return JsonResponse({
                     'success': False,
                     'message': 'Permissões insuficientes para registrar dízimos'
                 }, status=403)
-        elif tipo == 'entrada' and data['categoria'].lower() == 'oferta':
+        elif tipo == 'entrada' and chave == CategoriaFinanceira.OFERTA:
             if not admin_user.cargo.pode_registrar_ofertas:
                 return JsonResponse({
                     'success': False,
@@ -98,6 +83,11 @@ def transacao_create(request):
             'message': 'Transação registrada com sucesso!',
             'transacao_id': transacao.id
         })
+    except PeriodoFechadoErro as e:
+        return JsonResponse({
+            'success': False,
+            'message': e.messages[0]
+        }, status=400)
     except Exception as e:
         return JsonResponse({
             'success': False,
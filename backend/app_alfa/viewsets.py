@@ -1,17 +1,27 @@
-from rest_framework import viewsets, status
+import os
+from datetime import timedelta
+from rest_framework import mixins, serializers, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, BasePermission
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models import Q
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.http import content_disposition_header
+from django.utils.text import slugify
 from .models import (
     Membro, Admin, Usuario, Cargo, Evento, Postagem, 
     Transacao, Oferta, ONG, Grupo, Doacao, Igreja,
     FotoEvento, FotoPostagem, DocumentoMembro, Transferencia,
-    EventoPresenca, EventoComentario
+    EventoPresenca, EventoComentario, CheckinIdempotencia, UploadSessao,
+    FechamentoMensal, PeriodoFechadoErro, CategoriaFinanceira, FOLGA_MARCA
 )
 from .serializers import (
     MembroSerializer, MembroCreateSerializer, AdminSerializer, UsuarioSerializer,
@@ -21,8 +31,16 @@ from .serializers import (
     DoacaoSerializer, IgrejaSerializer, DocumentoMembroSerializer,
     TransferenciaSerializer, TransferenciaCreateSerializer, FotoEventoSerializer,
     FotoPostagemSerializer, EventoPresencaSerializer, EventoPresencaCreateSerializer,
-    EventoComentarioSerializer, EventoComentarioCreateSerializer
+    EventoPresencaCheckinSerializer, EventoPresencaSincronizacaoSerializer, EventoComentarioSerializer, EventoComentarioCreateSerializer,
+    UploadSessaoSerializer, CartaoLoteSerializer, FechamentoMensalSerializer, TendenciaFinanceiraSerializer,
+    RecorteFinanceiroSerializer, ExportacaoColunarSerializer
 )
+from . import exportacao, extrato, planilhas, tendencias, uploads
+from .album import gerar_zip, nomes_album
+from .cartoes import CARTOES_POR_VOLUME, MODO_PDF, gerar_documentos, gerar_volumes, get_pool as get_pool_cartoes
+from .downloads import servir_arquivo
+from .razao_colunar import get_razao_colunar
+from .tempo_real import TOPICO_DASHBOARD, notificar_presencas, publicar_apos_commit, topico_evento
 
 
 # Custom Permissions
@@ -53,6 +71,40 @@ class CanRegisterTransacao(BasePermission):
                 return False
 
 
+# Permissão do cargo exigida por tabela exportada; as não listadas exigem pode_visualizar_relatorios
+PERMISSOES_EXPORTACAO = {
+    'membros': 'pode_gerenciar_membros',
+}
+
+
+def pode_exportar(user, tabela):
+    """
+    Exportar uma tabela inteira exige a mesma permissão de quem a vê completa:
+    gerenciar membros para `membros`, visualizar relatórios para as demais.
+    Admin sem cargo pode tudo; Usuario só com o cargo que dá a permissão.
+    """
+    permissao = PERMISSOES_EXPORTACAO.get(tabela, 'pode_visualizar_relatorios')
+    admin = Admin.objects.select_related('cargo').filter(email=user.username).first()
+    if admin is not None:
+        return admin.cargo is None or getattr(admin.cargo, permissao)
+    usuario = Usuario.objects.select_related('cargo').filter(email=user.username).first()
+    return bool(usuario and usuario.cargo and getattr(usuario.cargo, permissao))
+
+
+class CanExportarTabela(BasePermission):
+    """Permissão por tabela na exportação (/api/exportacoes/<tabela>/), em qualquer formato"""
+    message = "Você não tem permissões suficientes para exportar esta tabela."
+    
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+        tabela = view.kwargs.get('pk')
+        # A listagem só mostra as tabelas permitidas; tabela desconhecida cai no 404
+        if tabela is None or tabela not in exportacao.TABELAS:
+            return True
+        return pode_exportar(request.user, tabela)
+
+
 class CanManageMembros(BasePermission):
     """Permissão customizada para gerenciar membros baseada no cargo"""
     message = "Você não tem permissões insuficientes para gerenciar membros."
@@ -107,6 +159,29 @@ class CanManageEventos(BasePermission):
                 return False
 
 
+class CanViewRelatorios(BasePermission):
+    """Permissão customizada para visualizar relatórios baseada no cargo (inclusive leitura)"""
+    message = "Você não tem permissões insuficientes para visualizar relatórios."
+    
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+        
+        try:
+            admin = Admin.objects.get(email=request.user.username)
+            if admin.cargo and not admin.cargo.pode_visualizar_relatorios:
+                return False
+            return True
+        except Admin.DoesNotExist:
+            try:
+                usuario = Usuario.objects.get(email=request.user.username)
+                if usuario.cargo and not usuario.cargo.pode_visualizar_relatorios:
+                    return False
+                return True
+            except Usuario.DoesNotExist:
+                return False
+
+
 class AuthViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['post'], permission_classes=[])
     def login(self, request):
@@ -302,7 +377,7 @@ class MembroViewSet(viewsets.ModelViewSet):
         return MembroSerializer
     
     def get_queryset(self):
-        queryset = Membro.objects.all()
+        queryset = Membro.objects.select_related('cargo', 'cadastrado_por')
         
         # Se não tiver permissão de gerenciar membros, retornar queryset vazio
         # (detalhes só para quem tem permissão)
@@ -347,6 +422,47 @@ class MembroViewSet(viewsets.ModelViewSet):
         # Membros não podem ver detalhes de outros membros
         return False
     
+    @action(detail=False, methods=['post'], url_path='cartoes-lote')
+    def cartoes_lote(self, request):
+        """
+        Cartões de membro em lote: 'documentos' salva um PDF por membro (pula quem não mudou
+        desde o último cartão); 'pdf' devolve um único PDF com um cartão por página.
+        """
+        serializer = CartaoLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        filtros = serializer.validated_data
+        
+        membros = self.get_queryset().order_by('nome', 'id')
+        if filtros.get('membros'):
+            membros = membros.filter(pk__in=filtros['membros'])
+        if filtros.get('status'):
+            membros = membros.filter(status=filtros['status'])
+        
+        if filtros['modo'] == MODO_PDF:
+            if membros.count() > CARTOES_POR_VOLUME:
+                return Response({
+                    'success': False,
+                    'message': f'Máximo de {CARTOES_POR_VOLUME} cartões por PDF; use o comando gerar_cartoes_membros'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            volumes = gerar_volumes(membros)
+            if not volumes:
+                return Response({
+                    'success': False,
+                    'message': 'Nenhum membro encontrado'
+                }, status=status.HTTP_404_NOT_FOUND)
+            response = HttpResponse(volumes[0], content_type='application/pdf')
+            response['Content-Disposition'] = content_disposition_header(True, 'cartoes_membros.pdf')
+            return response
+        
+        resumo = gerar_documentos(
+            membros,
+            workers=getattr(settings, 'ALFA_CARTOES_WORKERS', 1),
+            pool=get_pool_cartoes(),
+            forcar=filtros['forcar'],
+            gerado_por=Admin.objects.filter(email=request.user.username).first()
+        )
+        return Response({'success': True, **resumo})
+    
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def estatisticas(self, request):
         """Retorna apenas estatísticas de membros (sem detalhes)"""
@@ -397,9 +513,10 @@ class MembroViewSet(viewsets.ModelViewSet):
         
         # Salvar com admin (se encontrado) ou sem admin
         if admin:
-            serializer.save(cadastrado_por=admin)
+            membro = serializer.save(cadastrado_por=admin)
         else:
-            serializer.save()
+            membro = serializer.save()
+        publicar_apos_commit(TOPICO_DASHBOARD, 'membro', {'membros': 1, 'status': membro.status})
 
 class EventoViewSet(viewsets.ModelViewSet):
     queryset = Evento.objects.all()
@@ -411,7 +528,7 @@ class EventoViewSet(viewsets.ModelViewSet):
         return EventoSerializer
     
     def get_queryset(self):
-        queryset = Evento.objects.all()
+        queryset = Evento.objects.select_related('organizador')
         search = self.request.query_params.get('search')
         
         if search:
@@ -452,6 +569,20 @@ class EventoViewSet(viewsets.ModelViewSet):
                 }
             )
         serializer.save(organizador=organizador)
+    
+    @action(detail=True, methods=['get'], url_path=r'album\.zip')
+    def album(self, request, pk=None):
+        """Todas as fotos do evento em um ZIP montado durante o envio (memória constante)"""
+        evento = self.get_object()
+        fotos = evento.fotos.order_by('data_upload', 'id').iterator()
+        partes = (parte for parte in gerar_zip(nomes_album(fotos)) if parte)
+        
+        response = StreamingHttpResponse(partes, content_type='application/zip')
+        response['Content-Disposition'] = content_disposition_header(
+            True, f'album_{slugify(evento.titulo) or evento.id}.zip'
+        )
+        response['X-Accel-Buffering'] = 'no'  # nginx não deve segurar o stream
+        return response
 
 class PostagemViewSet(viewsets.ModelViewSet):
     queryset = Postagem.objects.all()
@@ -463,7 +594,7 @@ class PostagemViewSet(viewsets.ModelViewSet):
         return PostagemSerializer
     
     def get_queryset(self):
-        return Postagem.objects.all().order_by('-data_publicacao')
+        return Postagem.objects.select_related('autor').order_by('-data_publicacao')
     
     def perform_create(self, serializer):
         # Assumir que o usuário autenticado é um Admin
@@ -501,7 +632,7 @@ class TransacaoViewSet(viewsets.ModelViewSet):
         return TransacaoSerializer
     
     def get_queryset(self):
-        queryset = Transacao.objects.all()
+        queryset = Transacao.objects.select_related('registrado_por')
         tipo = self.request.query_params.get('tipo')
         categoria = self.request.query_params.get('categoria')
         
@@ -509,7 +640,8 @@ class TransacaoViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(tipo=tipo)
         
         if categoria:
-            queryset = queryset.filter(categoria__icontains=categoria)
+            # Igualdade na chave normalizada (índice único), sem varrer textos
+            queryset = queryset.filter(categoria_financeira__chave=CategoriaFinanceira.normalizar(categoria))
         
         return queryset.order_by('-data')
     
@@ -517,9 +649,193 @@ class TransacaoViewSet(viewsets.ModelViewSet):
         # Assumir que o usuário autenticado é um Admin
         try:
             admin = Admin.objects.get(email=self.request.user.username)
-            serializer.save(registrado_por=admin)
+            transacao = serializer.save(registrado_por=admin)
         except Admin.DoesNotExist:
-            serializer.save()
+            transacao = serializer.save()
+        publicar_apos_commit(TOPICO_DASHBOARD, 'transacao', {
+            'tipo': transacao.tipo,
+            'valor': str(transacao.valor),
+            'data': transacao.data
+        })
+    
+    def perform_destroy(self, instance):
+        try:
+            instance.delete()
+        except PeriodoFechadoErro as erro:
+            raise serializers.ValidationError({'data': erro.messages})
+    
+    @action(detail=False, methods=['get'])
+    def extrato(self, request):
+        """
+        Extrato com saldo corrente, paginado por keyset:
+        ?inicio=AAAA-MM-DD&limite=50, depois ?cursor=<proximo da página anterior>
+        """
+        try:
+            inicio = request.query_params.get('inicio')
+            inicio = serializers.DateField().to_internal_value(inicio) if inicio else None
+            limite = request.query_params.get('limite') or extrato.LIMITE_PADRAO
+            if not str(limite).isdigit():
+                raise ValueError('Parâmetro limite inválido.')
+            limite = int(limite)
+            pagina = extrato.pagina_extrato(request.query_params.get('cursor'), inicio, limite)
+        except serializers.ValidationError as erro:
+            return Response({'success': False, 'message': erro.detail[0]}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as erro:
+            return Response({'success': False, 'message': str(erro)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(pagina)
+    
+    @action(detail=False, methods=['get'])
+    def tendencia(self, request):
+        """
+        Série de entradas/saídas por dia, semana ou mês, com todos os períodos do intervalo:
+        ?granularidade=semana&inicio=AAAA-MM-DD&fim=AAAA-MM-DD&por_categoria=true
+        """
+        serializer = TendenciaFinanceiraSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        parametros = serializer.validated_data
+        return Response(tendencias.serie_financeira(
+            parametros['inicio'], parametros['fim'], parametros['granularidade'], parametros['por_categoria']
+        ))
+    
+    @action(detail=False, methods=['get'])
+    def recortes(self, request):
+        """
+        Totais agrupados a partir do razão colunar em memória, sem nova consulta por filtro:
+        ?agrupar=mes&agrupar=categoria&metodo_pagamento=pix&inicio=AAAA-MM-DD&fim=AAAA-MM-DD
+        """
+        serializer = RecorteFinanceiroSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        parametros = serializer.validated_data
+        grupos, totais = get_razao_colunar().consultar(
+            parametros.get('inicio'), parametros.get('fim'),
+            filtros={dimensao: parametros.get(dimensao) for dimensao in ('tipo', 'categoria', 'metodo_pagamento', 'registrado_por')},
+            agrupar_por=parametros['agrupar'],
+        )
+        return Response({'agrupar': parametros['agrupar'], 'grupos': grupos, 'totais': totais})
+    
+    @action(detail=False, methods=['get'])
+    def saldo(self, request):
+        """Saldo acumulado até a data (inclusive), a partir do último fechamento anterior"""
+        campo = serializers.DateField()
+        try:
+            dia = campo.to_internal_value(request.query_params.get('data') or timezone.localdate().isoformat())
+        except serializers.ValidationError as erro:
+            return Response({'success': False, 'message': erro.detail[0]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'data': dia,
+            'saldo': FechamentoMensal.saldo_ate(dia + timedelta(days=1)),
+        })
+
+class CategoriaFinanceiraViewSet(viewsets.GenericViewSet):
+    """
+    Autocomplete de categorias: GET /api/categorias-financeiras/?q=diz
+    A lista com o uso de cada categoria fica em cache até a próxima transação alterada
+    (em qualquer worker: a versão dos dados fica no cache compartilhado, ver tendencias).
+    """
+    queryset = CategoriaFinanceira.objects.all()
+    permission_classes = [IsAuthenticated]
+    LIMITE = 20
+    
+    def list(self, request):
+        chave_cache = f'alfa:categorias:{tendencias.versao_dados()}'
+        categorias = cache.get(chave_cache)
+        if categorias is None:
+            categorias = CategoriaFinanceira.com_uso()
+            cache.set(chave_cache, categorias, settings.ALFA_TENDENCIAS_CACHE_SEGUNDOS)
+        
+        termo = CategoriaFinanceira.normalizar(request.query_params.get('q'))
+        if termo:
+            categorias = [categoria for categoria in categorias if termo in categoria['chave']]
+        return Response(categorias[:self.LIMITE])
+
+class ExportacaoColunarViewSet(viewsets.ViewSet):
+    """
+    Exportação colunar das tabelas analíticas:
+    - GET /api/exportacoes/ lista as tabelas com colunas e tipos
+    - GET /api/exportacoes/transacoes/?formato=parquet|arrow&desde=<marca ISO 8601>
+    - GET /api/exportacoes/transacoes/?formato=xlsx (membros, eventos e transações; sempre completa)
+    Cada tabela exige a permissão de quem a vê completa (CanExportarTabela).
+    """
+    permission_classes = [IsAuthenticated, CanExportarTabela]
+    lookup_value_regex = '[a-z_]+'
+    
+    def list(self, request):
+        return Response([
+            {
+                'tabela': nome,
+                'incremental': tabela.incremental,
+                'formatos': list(exportacao.FORMATOS) + ([planilhas.XLSX] if nome in planilhas.PLANILHAS else []),
+                'colunas': [{'nome': coluna, 'tipo': str(tipo)} for coluna, tipo in tabela.colunas()],
+            }
+            for nome, tabela in exportacao.TABELAS.items()
+            if pode_exportar(request.user, nome)
+        ])
+    
+    def retrieve(self, request, pk=None):
+        tabela = exportacao.TABELAS.get(pk)
+        if tabela is None:
+            return Response({'success': False, 'message': 'Tabela não encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = ExportacaoColunarSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        formato, desde = serializer.validated_data['formato'], serializer.validated_data.get('desde')
+        if formato == planilhas.XLSX:
+            if pk not in planilhas.PLANILHAS or desde:
+                return Response({
+                    'success': False,
+                    'message': 'Planilha disponível só para membros, eventos e transações, sempre completa.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            return planilhas.resposta(pk, tabela.consulta())
+        if desde and not tabela.incremental:
+            return Response({
+                'success': False,
+                'message': 'Esta tabela não registra alterações; exporte-a por completo.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Marca lida antes da consulta e recuada na folga: linhas salvas em transações ainda
+        # abertas (updated_at anterior, commit posterior) saem na próxima exportação
+        marca = timezone.now() - FOLGA_MARCA
+        tipo, extensao = exportacao.FORMATOS[formato]
+        partes = (parte for parte in exportacao.exportar(pk, formato, desde) if parte)
+        response = StreamingHttpResponse(partes, content_type=tipo)
+        response['Content-Disposition'] = content_disposition_header(True, f'{pk}.{extensao}')
+        response['X-Exportacao-Marca'] = marca.isoformat()
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class FechamentoMensalViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                              mixins.CreateModelMixin, viewsets.GenericViewSet):
+    """
+    Fechamento mensal do caixa:
+    - POST /api/fechamentos/ {"mes": "2025-03-01"} fecha o mês e bloqueia suas transações
+    - POST /api/fechamentos/reabrir/ reabre o último mês fechado
+    """
+    queryset = FechamentoMensal.objects.select_related('fechado_por')
+    serializer_class = FechamentoMensalSerializer
+    permission_classes = [IsAuthenticated, CanRegisterTransacao]
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            fechamento = FechamentoMensal.fechar(
+                serializer.validated_data['mes'],
+                fechado_por=Admin.objects.filter(email=request.user.username).first()
+            )
+        except PeriodoFechadoErro as erro:
+            return Response({'success': False, 'message': erro.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(fechamento).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'])
+    def reabrir(self, request):
+        try:
+            fechamento = FechamentoMensal.reabrir()
+        except PeriodoFechadoErro as erro:
+            return Response({'success': False, 'message': erro.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'success': True,
+            'message': f"Mês {fechamento.mes.strftime('%m/%Y')} reaberto."
+        })
 
 class OfertaViewSet(viewsets.ModelViewSet):
     queryset = Oferta.objects.all()
@@ -531,7 +847,7 @@ class OfertaViewSet(viewsets.ModelViewSet):
         return OfertaSerializer
     
     def get_queryset(self):
-        return Oferta.objects.all().order_by('-data')
+        return Oferta.objects.select_related('registrado_por').order_by('-data')
     
     def perform_create(self, serializer):
         # Assumir que o usuário autenticado é um Admin
@@ -567,12 +883,12 @@ class GrupoViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
 class DoacaoViewSet(viewsets.ModelViewSet):
-    queryset = Doacao.objects.all()
+    queryset = Doacao.objects.select_related('membro', 'grupo')
     serializer_class = DoacaoSerializer
     permission_classes = [IsAuthenticated]
 
 class TransferenciaViewSet(viewsets.ModelViewSet):
-    queryset = Transferencia.objects.all()
+    queryset = Transferencia.objects.select_related('membro', 'igreja_origem', 'igreja_destino', 'gerado_por')
     permission_classes = [IsAuthenticated]
     
     def get_serializer_class(self):
@@ -592,11 +908,21 @@ class FotoEventoViewSet(viewsets.ModelViewSet):
     queryset = FotoEvento.objects.all()
     serializer_class = FotoEventoSerializer
     permission_classes = [IsAuthenticated]
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        foto = self.get_object()
+        return servir_arquivo(request, foto.imagem, anexo=False)
 
 class FotoPostagemViewSet(viewsets.ModelViewSet):
     queryset = FotoPostagem.objects.all()
     serializer_class = FotoPostagemSerializer
     permission_classes = [IsAuthenticated]
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        foto = self.get_object()
+        return servir_arquivo(request, foto.imagem, anexo=False)
 
 class DocumentoMembroViewSet(viewsets.ModelViewSet):
     queryset = DocumentoMembro.objects.all()
@@ -604,7 +930,7 @@ class DocumentoMembroViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        queryset = DocumentoMembro.objects.all()
+        queryset = DocumentoMembro.objects.select_related('membro', 'gerado_por')
         
         # Se for admin ou usuário com permissão de gerenciar documentos, ver todos
         # Caso contrário, ver apenas os próprios documentos
@@ -628,6 +954,36 @@ class DocumentoMembroViewSet(viewsets.ModelViewSet):
         except Membro.DoesNotExist:
             # Se não encontrou membro, retornar queryset vazio
             return DocumentoMembro.objects.none()
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download protegido (mesma regra de acesso do get_queryset), com Range e ETag"""
+        documento = self.get_object()
+        if not documento.arquivo:
+            return Response({
+                'success': False,
+                'message': 'Documento sem arquivo gerado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        extensao = os.path.splitext(documento.arquivo.name)[1]
+        return servir_arquivo(request, documento.arquivo, nome_download=f'{documento.tipo}_{documento.membro_id}{extensao}')
+
+def _travar_estado_contador(instancia, campo):
+    """
+    Trava a linha (presença ou comentário) e devolve o evento e a flag que
+    conta no contador como estão no banco, não como foram lidos pelo get_object.
+    Duas requisições concorrentes que movem a mesma linha se serializam aqui,
+    e a segunda desconta do evento que a primeira gravou.
+    """
+    estado = (
+        type(instancia)._base_manager.select_for_update()
+        .filter(pk=instancia.pk)
+        .values('evento_id', campo, 'deleted_at')
+        .first()
+    )
+    if estado is None or estado['deleted_at'] is not None:
+        raise NotFound()
+    return estado['evento_id'], estado[campo]
 
 class EventoPresencaViewSet(viewsets.ModelViewSet):
     queryset = EventoPresenca.objects.all()
@@ -639,7 +995,7 @@ class EventoPresencaViewSet(viewsets.ModelViewSet):
         return EventoPresencaSerializer
     
     def get_queryset(self):
-        queryset = EventoPresenca.objects.all()
+        queryset = EventoPresenca.objects.select_related('membro', 'evento')
         evento_id = self.request.query_params.get('evento')
         membro_id = self.request.query_params.get('membro')
         
@@ -649,6 +1005,98 @@ class EventoPresencaViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(membro_id=membro_id)
             
         return queryset.order_by('-data_confirmacao')
+    
+    # Manutenção de Evento.confirmados_count (apenas presenças confirmadas contam)
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            presenca = serializer.save()
+            if presenca.confirmado:
+                Evento.ajustar_contadores(presenca.evento_id, confirmados=1)
+                notificar_presencas(presenca.evento_id)
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            evento_anterior, contava_antes = _travar_estado_contador(serializer.instance, 'confirmado')
+            presenca = serializer.save()
+            if contava_antes:
+                Evento.ajustar_contadores(evento_anterior, confirmados=-1)
+                notificar_presencas(evento_anterior)
+            if presenca.confirmado:
+                Evento.ajustar_contadores(presenca.evento_id, confirmados=1)
+                if presenca.evento_id != evento_anterior or not contava_antes:
+                    notificar_presencas(presenca.evento_id)
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            evento_id, contava = _travar_estado_contador(instance, 'confirmado')
+            if contava:
+                Evento.ajustar_contadores(evento_id, confirmados=-1)
+                notificar_presencas(evento_id)
+            instance.delete()
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, CanManageEventos])
+    def checkin_lote(self, request):
+        """Check-in em lote de um culto/evento (IDs de membros ou códigos de cartão)"""
+        serializer = EventoPresencaCheckinSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        evento = serializer.validated_data['evento']
+        
+        # Códigos de cartão são convertidos em IDs sem consulta ao banco
+        entradas = [(membro_id, None) for membro_id in serializer.validated_data['membros']]
+        entradas += [
+            (Membro.id_por_codigo_cartao(codigo), codigo)
+            for codigo in serializer.validated_data['codigos']
+        ]
+        
+        status_por_membro = EventoPresenca.checkin_em_lote(
+            evento, [membro_id for membro_id, _ in entradas if membro_id]
+        )
+        notificar_presencas(evento.id)
+        
+        resultados = []
+        resumo = {}
+        for membro_id, codigo in entradas:
+            resultado = status_por_membro.get(membro_id, EventoPresenca.CHECKIN_CODIGO_INVALIDO)
+            resumo[resultado] = resumo.get(resultado, 0) + 1
+            item = {'membro': membro_id, 'status': resultado}
+            if codigo is not None:
+                item['codigo'] = codigo
+            resultados.append(item)
+        
+        evento.refresh_from_db(fields=['confirmados_count'])
+        return Response({
+            'success': True,
+            'evento': evento.id,
+            'confirmados_count': evento.confirmados_count,
+            'resumo': resumo,
+            'resultados': resultados
+        })
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, CanManageEventos])
+    def sincronizar(self, request):
+        """Sincroniza check-ins capturados offline; reenvios da mesma chave não duplicam presenças"""
+        serializer = EventoPresencaSincronizacaoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        checkins = serializer.validated_data['checkins']
+        
+        resultados = CheckinIdempotencia.sincronizar(checkins)
+        for evento_id in {
+            checkin['evento'] for checkin in checkins
+            if resultados[checkin['chave']][0] in (EventoPresenca.CHECKIN_CRIADO, EventoPresenca.CHECKIN_CONFIRMADO)
+        }:
+            notificar_presencas(evento_id)
+        
+        return Response({
+            'success': True,
+            'resultados': [
+                {
+                    'chave': checkin['chave'],
+                    'status': resultados[checkin['chave']][0],
+                    'duplicado': resultados[checkin['chave']][1]
+                }
+                for checkin in checkins
+            ]
+        })
 
 class EventoComentarioViewSet(viewsets.ModelViewSet):
     queryset = EventoComentario.objects.all()
@@ -660,7 +1108,7 @@ class EventoComentarioViewSet(viewsets.ModelViewSet):
         return EventoComentarioSerializer
     
     def get_queryset(self):
-        queryset = EventoComentario.objects.filter(aprovado=True)  # Só comentários aprovados
+        queryset = EventoComentario.objects.filter(aprovado=True).select_related('membro', 'evento')  # Só comentários aprovados
         evento_id = self.request.query_params.get('evento')
         membro_id = self.request.query_params.get('membro')
         
@@ -670,3 +1118,106 @@ class EventoComentarioViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(membro_id=membro_id)
             
         return queryset.order_by('-data_comentario')
+    
+    # Manutenção de Evento.comentarios_count (apenas comentários aprovados contam)
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            comentario = serializer.save()
+            if comentario.aprovado:
+                Evento.ajustar_contadores(comentario.evento_id, comentarios=1)
+                publicar_apos_commit(
+                    topico_evento(comentario.evento_id), 'comentario',
+                    EventoComentarioSerializer(comentario).data
+                )
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            evento_anterior, contava_antes = _travar_estado_contador(serializer.instance, 'aprovado')
+            comentario = serializer.save()
+            if contava_antes:
+                Evento.ajustar_contadores(evento_anterior, comentarios=-1)
+            if comentario.aprovado:
+                Evento.ajustar_contadores(comentario.evento_id, comentarios=1)
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            evento_id, contava = _travar_estado_contador(instance, 'aprovado')
+            if contava:
+                Evento.ajustar_contadores(evento_id, comentarios=-1)
+            instance.delete()
+
+class UploadSessaoViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                          mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Upload em partes com retomada (fotos de eventos/postagens e comprovantes):
+    1. POST /api/uploads/ cria a sessão e devolve o token
+    2. PUT /api/uploads/<token>/parte/ com o corpo binário e Content-Range: bytes inicio-fim/total
+    3. GET /api/uploads/<token>/ informa quantos bytes já chegaram (para retomar)
+    4. POST /api/uploads/<token>/concluir/ anexa o arquivo ao destino
+    """
+    serializer_class = UploadSessaoSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'token'
+    
+    def get_queryset(self):
+        return UploadSessao.objects.filter(criado_por=self.request.user.username)
+    
+    def perform_create(self, serializer):
+        serializer.save(criado_por=self.request.user.username)
+    
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data['tamanho_parte'] = uploads.TAMANHO_PARTE_RECOMENDADO
+        return response
+    
+    def perform_destroy(self, instance):
+        uploads.cancelar(instance)
+    
+    def _erro(self, erro):
+        return Response({
+            'success': False,
+            'message': erro.mensagem
+        }, status=erro.status)
+    
+    @action(detail=True, methods=['put'])
+    def parte(self, request, token=None):
+        """Recebe uma parte; o corpo é lido em blocos antes de travar a sessão"""
+        sessao = self.get_object()
+        try:
+            inicio, tamanho, total = uploads.interpretar_content_range(request.META.get('HTTP_CONTENT_RANGE'))
+            if total != sessao.tamanho_total:
+                raise uploads.UploadErro('Tamanho total do Content-Range difere do declarado na sessão.')
+            uploads.validar_parte(sessao, inicio, tamanho)
+            # A leitura do cliente (que pode ser lenta) acontece sem transação nem lock
+            with uploads.receber_parte(request.stream, tamanho, request.META.get('HTTP_X_CHUNK_SHA256')) as parte:
+                with transaction.atomic():
+                    # Duas partes simultâneas da mesma sessão não podem gravar no mesmo arquivo
+                    sessao = UploadSessao.objects.select_for_update().get(pk=sessao.pk)
+                    uploads.gravar_parte(sessao, parte, inicio, tamanho)
+        except uploads.UploadErro as erro:
+            return self._erro(erro)
+        
+        return Response(self.get_serializer(sessao).data)
+    
+    @action(detail=True, methods=['post'])
+    def concluir(self, request, token=None):
+        sessao = self.get_object()
+        try:
+            with transaction.atomic():
+                sessao = UploadSessao.objects.select_for_update().get(pk=sessao.pk)
+                objeto = uploads.concluir(sessao)
+        except uploads.UploadErro as erro:
+            return self._erro(erro)
+        
+        if isinstance(objeto, FotoEvento):
+            dados = FotoEventoSerializer(objeto, context={'request': request}).data
+        elif isinstance(objeto, FotoPostagem):
+            dados = FotoPostagemSerializer(objeto, context={'request': request}).data
+        else:
+            dados = {'id': objeto.pk, 'comprovante': request.build_absolute_uri(objeto.comprovante.url)}
+        
+        return Response({
+            'success': True,
+            'upload': self.get_serializer(sessao).data,
+            'objeto': dados
+        }, status=status.HTTP_201_CREATED)
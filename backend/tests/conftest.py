@@ -119,3 +119,10 @@ def ong_test(db):
         nome="ONG Teste",
         cnpj="12.345.678/0001-90"
     )
+
+
+@pytest.fixture
+def orcamento_consultas(db):
+    """Orçamento de consultas SQL: with orcamento_consultas(3): ... (tests/orcamento_consultas.py)."""
+    from orcamento_consultas import orcamento_consultas as orcamento
+    return orcamento
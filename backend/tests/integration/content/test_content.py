@@ -2,14 +2,18 @@
 Testes de integração para conteúdo disponível aos membros.
 Valida visualização e acesso a conteúdo baseado em permissões.
 """
+import tempfile
 import pytest
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from datetime import timedelta
 
 from app_alfa.models import (
-    Admin, Usuario, Membro, Cargo, Evento, FotoEvento, Oferta
+    Admin, Usuario, Membro, Cargo, Evento, FotoEvento, Oferta, DocumentoMembro
 )
+from rest_framework.test import APIClient
 
 
 @pytest.mark.integration
@@ -201,3 +205,85 @@ class TestPublicContent(TestCase):
         ofertas_publicas = Oferta.objects.filter(is_publico=True)
         assert ofertas_publicas.count() == 5
 
+
+@pytest.mark.integration
+@pytest.mark.content
+class TestDownloadProtegido(TestCase):
+    """Testes do download protegido de documentos (Range, ETag e permissão)"""
+    
+    def setUp(self):
+        """Preparar dados de teste"""
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.diretorio.cleanup)
+        configuracao = override_settings(MEDIA_ROOT=self.diretorio.name, ALFA_DOWNLOADS_MODO='direto')
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        
+        self.admin = Admin.objects.create(nome="Admin", email="admin@test.com", senha="123")
+        self.membro = Membro.objects.create(
+            nome="João Silva", email="joao@test.com", status=Membro.ATIVO, cadastrado_por=self.admin
+        )
+        self.outro = Membro.objects.create(
+            nome="Maria", email="maria@test.com", status=Membro.ATIVO, cadastrado_por=self.admin
+        )
+        self.conteudo = bytes(range(256)) * 40
+        self.documento = DocumentoMembro(membro=self.membro, tipo=DocumentoMembro.CARTAO_MEMBRO)
+        self.documento.arquivo.save('cartao.pdf', ContentFile(self.conteudo), save=True)
+        self.url = f'/api/documentos-membros/{self.documento.id}/download/'
+        self.client = APIClient()
+    
+    def _autenticar(self, email):
+        self.client.force_authenticate(user=User.objects.create(username=email))
+    
+    def test_download_completo_com_etag(self):
+        """Testa o download completo e a revalidação pelo ETag forte"""
+        self._autenticar(self.membro.email)
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.conteudo)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn(f'cartao_membro_{self.membro.id}.pdf', response['Content-Disposition'])
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+    
+    def test_download_parcial(self):
+        """Testa Range, If-Range desatualizado e intervalo inválido"""
+        self._autenticar(self.membro.email)
+        
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.conteudo)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(b''.join(response.streaming_content), self.conteudo[100:200])
+        
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.conteudo[-10:])
+        
+        # If-Range com ETag antigo: o arquivo mudou, então vai inteiro
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199', HTTP_IF_RANGE='"antigo"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.conteudo)
+        
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.conteudo)}-')
+        self.assertEqual(response.status_code, 416)
+    
+    def test_download_respeita_permissao(self):
+        """Testa que um membro não baixa o documento de outro"""
+        self._autenticar(self.outro.email)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+    
+    @override_settings(ALFA_DOWNLOADS_MODO='x-accel')
+    def test_download_via_nginx(self):
+        """Testa que atrás do nginx a transferência é delegada via X-Accel-Redirect"""
+        self._autenticar(self.admin.email)
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protegido/{self.documento.arquivo.name}')
+        self.assertEqual(response.content, b'')
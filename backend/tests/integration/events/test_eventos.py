@@ -2,14 +2,32 @@
 Testes de integração para eventos, fotos e presenças.
 Valida fluxos completos de criação e gerenciamento de eventos.
 """
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+from unittest import mock
 import pytest
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from datetime import timedelta
+from rest_framework.exceptions import NotFound
+from rest_framework.test import APIClient
 
 from app_alfa.models import (
-    Admin, Usuario, Evento, FotoEvento, Membro, EventoPresenca
+    Admin, Usuario, Evento, FotoEvento, Membro, EventoPresenca, EventoComentario,
+    CheckinIdempotencia, UploadSessao
 )
+from app_alfa import uploads
+from app_alfa.album import gerar_zip, nomes_album
+from app_alfa.serializers import EventoPresencaCreateSerializer
+from app_alfa.tempo_real import BrokerMemoria, definir_broker
+from app_alfa.viewsets import EventoPresencaViewSet
 
 
 @pytest.mark.integration
@@ -199,3 +217,469 @@ class TestPresencaIntegration(TestCase):
         
         assert total_presencas == 10
 
+
+
+@pytest.mark.integration
+@pytest.mark.events
+class TestContadoresEventoIntegration(TestCase):
+    """Testes dos contadores desnormalizados de presenças e comentários"""
+    
+    def setUp(self):
+        """Preparar dados de teste"""
+        self.admin = Admin.objects.create(
+            nome="Admin",
+            email="admin@test.com",
+            senha="123"
+        )
+        self.usuario = Usuario.objects.create(
+            username="usuario_teste",
+            email="usuario@test.com",
+            senha="123"
+        )
+        self.evento = Evento.objects.create(
+            titulo="Culto Domingo",
+            descricao="Culto dominical",
+            data=timezone.now(),
+            local="Igreja",
+            organizador=self.usuario
+        )
+        self.membro = Membro.objects.create(
+            nome="João",
+            email="joao@test.com",
+            status=Membro.ATIVO,
+            cadastrado_por=self.admin
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create(username=self.admin.email))
+    
+    def test_presenca_confirmada_incrementa_e_soft_delete_decrementa(self):
+        """Testa manutenção de confirmados_count pelo viewset"""
+        response = self.client.post('/api/eventos-presencas/', {
+            'evento': self.evento.id,
+            'membro': self.membro.id,
+            'confirmado': True
+        }, format='json')
+        assert response.status_code == 201
+        self.evento.refresh_from_db()
+        assert self.evento.confirmados_count == 1
+        
+        response = self.client.patch(f"/api/eventos-presencas/{response.data['id']}/", {
+            'confirmado': False
+        }, format='json')
+        assert response.status_code == 200
+        self.evento.refresh_from_db()
+        assert self.evento.confirmados_count == 0
+        
+        presenca = EventoPresenca.objects.get(evento=self.evento, membro=self.membro)
+        self.client.patch(f'/api/eventos-presencas/{presenca.id}/', {'confirmado': True}, format='json')
+        self.client.delete(f'/api/eventos-presencas/{presenca.id}/')
+        self.evento.refresh_from_db()
+        assert self.evento.confirmados_count == 0
+    
+    def test_presenca_publica_contador_em_tempo_real(self):
+        """Testa que a confirmação publica o novo total após o commit"""
+        broker = definir_broker(BrokerMemoria())
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post('/api/eventos-presencas/', {
+                    'evento': self.evento.id,
+                    'membro': self.membro.id,
+                    'confirmado': True
+                }, format='json')
+        finally:
+            definir_broker(None)
+        
+        topicos = [mensagem['topico'] for mensagem in broker.historico]
+        assert topicos == [f'evento:{self.evento.id}', 'dashboard']
+        assert broker.historico[0]['dados']['confirmados_count'] == 1
+    
+    def test_comentario_incrementa_contador(self):
+        """Testa manutenção de comentarios_count pelo viewset"""
+        response = self.client.post('/api/eventos-comentarios/', {
+            'evento': self.evento.id,
+            'membro': self.membro.id,
+            'comentario': 'Benção!'
+        }, format='json')
+        assert response.status_code == 201
+        self.evento.refresh_from_db()
+        assert self.evento.comentarios_count == 1
+        
+        self.client.delete(f"/api/eventos-comentarios/{response.data['id']}/")
+        self.evento.refresh_from_db()
+        assert self.evento.comentarios_count == 0
+
+    def test_atualizacao_concorrente_desconta_do_evento_gravado(self):
+        """Testa que a atualização desconta do evento atual da linha, não do lido antes"""
+        outro = Evento.objects.create(
+            titulo="Culto Quarta",
+            descricao="Culto de oração",
+            data=timezone.now(),
+            local="Igreja",
+            organizador=self.usuario
+        )
+        terceiro = Evento.objects.create(
+            titulo="Vigília",
+            descricao="Vigília",
+            data=timezone.now(),
+            local="Igreja",
+            organizador=self.usuario
+        )
+        response = self.client.post('/api/eventos-presencas/', {
+            'evento': self.evento.id,
+            'membro': self.membro.id,
+            'confirmado': True
+        }, format='json')
+        # Requisição lenta: leu a linha antes de outra requisição movê-la
+        lida_antes = EventoPresenca.objects.get(pk=response.data['id'])
+        response = self.client.patch(f"/api/eventos-presencas/{lida_antes.id}/", {
+            'evento': outro.id
+        }, format='json')
+        assert response.status_code == 200
+
+        serializer = EventoPresencaCreateSerializer(lida_antes, data={'evento': terceiro.id}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        EventoPresencaViewSet().perform_update(serializer)
+
+        contadores = dict(Evento.objects.values_list('id', 'confirmados_count'))
+        assert contadores == {self.evento.id: 0, outro.id: 0, terceiro.id: 1}
+
+        # Exclusão de uma linha já excluída por outra requisição não desconta de novo
+        lida_antes.delete()
+        with pytest.raises(NotFound):
+            EventoPresencaViewSet().perform_destroy(EventoPresenca._base_manager.get(pk=lida_antes.pk))
+
+    def test_comando_reconcilia_contadores(self):
+        """Testa reconstrução dos contadores a partir das linhas existentes"""
+        EventoPresenca.objects.create(evento=self.evento, membro=self.membro, confirmado=True)
+        EventoComentario.objects.create(evento=self.evento, membro=self.membro, comentario="Amém")
+        Evento.objects.filter(pk=self.evento.pk).update(confirmados_count=7, comentarios_count=3)
+        
+        call_command('reconciliar_contadores_eventos', stdout=io.StringIO())
+        
+        self.evento.refresh_from_db()
+        assert self.evento.confirmados_count == 1
+        assert self.evento.comentarios_count == 1
+
+
+@pytest.mark.integration
+@pytest.mark.events
+class TestCheckinLoteIntegration(TestCase):
+    """Testes do check-in em lote (upsert de presenças)"""
+    
+    def setUp(self):
+        """Preparar dados de teste"""
+        self.admin = Admin.objects.create(
+            nome="Admin",
+            email="admin@test.com",
+            senha="123"
+        )
+        self.usuario = Usuario.objects.create(
+            username="usuario_teste",
+            email="usuario@test.com",
+            senha="123"
+        )
+        self.evento = Evento.objects.create(
+            titulo="Culto Domingo",
+            descricao="Culto dominical",
+            data=timezone.now(),
+            local="Igreja",
+            organizador=self.usuario
+        )
+        self.membros = [
+            Membro.objects.create(
+                nome=f"Membro {i}",
+                email=f"membro_checkin{i}@test.com",
+                status=Membro.ATIVO,
+                cadastrado_por=self.admin
+            )
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create(username=self.admin.email))
+    
+    def test_checkin_lote_por_ids_e_codigos(self):
+        """Testa check-in misturando IDs, códigos de cartão e entradas inválidas"""
+        EventoPresenca.objects.create(evento=self.evento, membro=self.membros[0], confirmado=True)
+        Evento.objects.filter(pk=self.evento.pk).update(confirmados_count=1)
+        
+        response = self.client.post('/api/eventos-presencas/checkin_lote/', {
+            'evento': self.evento.id,
+            'membros': [self.membros[0].id, self.membros[1].id, 999999],
+            'codigos': [self.membros[2].codigo_cartao, 'XYZ']
+        }, format='json')
+        
+        assert response.status_code == 200
+        status_por_entrada = [item['status'] for item in response.data['resultados']]
+        assert status_por_entrada == [
+            EventoPresenca.CHECKIN_JA_CONFIRMADO,
+            EventoPresenca.CHECKIN_CRIADO,
+            EventoPresenca.CHECKIN_MEMBRO_INEXISTENTE,
+            EventoPresenca.CHECKIN_CRIADO,
+            EventoPresenca.CHECKIN_CODIGO_INVALIDO,
+        ]
+        assert response.data['confirmados_count'] == 3
+        assert EventoPresenca.objects.filter(evento=self.evento, confirmado=True).count() == 3
+    
+    def test_checkin_lote_reativa_presenca_removida(self):
+        """Testa que o upsert reativa presença com soft delete sem violar a chave única"""
+        presenca = EventoPresenca.objects.create(evento=self.evento, membro=self.membros[0], confirmado=True)
+        presenca.delete()
+        
+        resultados = EventoPresenca.checkin_em_lote(self.evento, [self.membros[0].id])
+        
+        assert resultados == {self.membros[0].id: EventoPresenca.CHECKIN_CONFIRMADO}
+        presenca = EventoPresenca.objects.get(evento=self.evento, membro=self.membros[0])
+        assert presenca.confirmado is True
+        assert presenca.deleted_at is None
+        self.evento.refresh_from_db()
+        assert self.evento.confirmados_count == 1
+    
+    def test_sincronizacao_offline_idempotente(self):
+        """Testa que reenviar o mesmo lote offline não duplica presenças"""
+        lote = {'checkins': [
+            {'chave': 'tablet1-0001', 'evento': self.evento.id, 'membro': self.membros[0].id},
+            {'chave': 'tablet1-0002', 'evento': self.evento.id, 'codigo': self.membros[1].codigo_cartao},
+            {'chave': 'tablet1-0003', 'evento': 999999, 'membro': self.membros[2].id},
+        ]}
+        
+        response = self.client.post('/api/eventos-presencas/sincronizar/', lote, format='json')
+        assert response.status_code == 200
+        assert [item['status'] for item in response.data['resultados']] == [
+            EventoPresenca.CHECKIN_CRIADO,
+            EventoPresenca.CHECKIN_CRIADO,
+            EventoPresenca.CHECKIN_EVENTO_INEXISTENTE,
+        ]
+        assert not any(item['duplicado'] for item in response.data['resultados'])
+        
+        response = self.client.post('/api/eventos-presencas/sincronizar/', lote, format='json')
+        assert response.status_code == 200
+        assert all(item['duplicado'] for item in response.data['resultados'])
+        assert response.data['resultados'][0]['status'] == EventoPresenca.CHECKIN_CRIADO
+        
+        assert CheckinIdempotencia.objects.count() == 3
+        assert EventoPresenca.objects.filter(evento=self.evento).count() == 2
+        self.evento.refresh_from_db()
+        assert self.evento.confirmados_count == 2
+
+
+@pytest.mark.integration
+@pytest.mark.events
+class TestUploadEmPartesIntegration(TestCase):
+    """Testes do upload em partes com retomada"""
+    
+    def setUp(self):
+        """Preparar dados de teste"""
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.diretorio.cleanup)
+        configuracao = override_settings(
+            ALFA_UPLOADS_DIR=os.path.join(self.diretorio.name, 'partes'),
+            MEDIA_ROOT=os.path.join(self.diretorio.name, 'media')
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        
+        usuario = Usuario.objects.create(username="usuario_teste", email="usuario@test.com", senha="123")
+        self.evento = Evento.objects.create(
+            titulo="Retiro",
+            descricao="Retiro anual",
+            data=timezone.now(),
+            local="Sítio",
+            organizador=usuario
+        )
+        self.conteudo = os.urandom(300 * 1024)
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create(username="admin@test.com"))
+    
+    def _enviar(self, token, inicio, fim, **extra):
+        return self.client.put(
+            f'/api/uploads/{token}/parte/', self.conteudo[inicio:fim + 1],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {inicio}-{fim}/{len(self.conteudo)}',
+            **extra
+        )
+    
+    def test_upload_em_partes_com_retomada(self):
+        """Testa envio em duas partes, rejeição fora de ordem, retomada e conclusão"""
+        response = self.client.post('/api/uploads/', {
+            'destino': UploadSessao.FOTO_EVENTO,
+            'objeto_id': self.evento.id,
+            'nome_arquivo': '../../retiro.jpg',
+            'descricao': 'Foto do grupo',
+            'tamanho_total': len(self.conteudo),
+            'sha256': hashlib.sha256(self.conteudo).hexdigest()
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        token = response.data['token']
+        self.assertEqual(response.data['nome_arquivo'], 'retiro.jpg')
+        self.assertIn('tamanho_parte', response.data)
+        
+        meio = 200 * 1024
+        response = self._enviar(token, 0, meio - 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['recebido'], meio)
+        
+        # Parte repetida/fora de ordem não é aceita
+        response = self._enviar(token, 0, meio - 1)
+        self.assertEqual(response.status_code, 409)
+        
+        # Checksum errado descarta a parte
+        response = self._enviar(token, meio, len(self.conteudo) - 1, HTTP_X_CHUNK_SHA256='0' * 64)
+        self.assertEqual(response.status_code, 422)
+        
+        # Cliente retoma consultando o que já chegou
+        response = self.client.get(f'/api/uploads/{token}/')
+        self.assertEqual(response.data['recebido'], meio)
+        
+        response = self._enviar(
+            token, meio, len(self.conteudo) - 1,
+            HTTP_X_CHUNK_SHA256=hashlib.sha256(self.conteudo[meio:]).hexdigest()
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['progresso'], 100)
+        
+        response = self.client.post(f'/api/uploads/{token}/concluir/')
+        self.assertEqual(response.status_code, 201)
+        
+        foto = FotoEvento.objects.get(evento=self.evento)
+        self.assertEqual(foto.descricao, 'Foto do grupo')
+        with foto.imagem.open('rb') as arquivo:
+            self.assertEqual(arquivo.read(), self.conteudo)
+        self.assertFalse(os.listdir(os.path.join(self.diretorio.name, 'partes')))
+        
+        response = self.client.post(f'/api/uploads/{token}/concluir/')
+        self.assertEqual(response.status_code, 409)
+    
+    def test_parte_lida_antes_de_travar_a_sessao(self):
+        """Testa que o corpo da parte é lido fora da transação que trava a sessão"""
+        sessao = UploadSessao.objects.create(
+            destino=UploadSessao.FOTO_EVENTO,
+            objeto_id=self.evento.id,
+            nome_arquivo='foto.jpg',
+            tamanho_total=len(self.conteudo),
+            criado_por='admin@test.com'
+        )
+        profundidades = {}
+        
+        def espiar(nome, funcao):
+            def espiao(*args, **kwargs):
+                profundidades[nome] = len(connection.atomic_blocks)
+                return funcao(*args, **kwargs)
+            return espiao
+        
+        with mock.patch.object(uploads, 'receber_parte', espiar('leitura', uploads.receber_parte)), \
+                mock.patch.object(uploads, 'gravar_parte', espiar('gravacao', uploads.gravar_parte)):
+            response = self._enviar(sessao.token, 0, 1023)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(profundidades['leitura'], profundidades['gravacao'])
+    
+    def test_concluir_upload_incompleto(self):
+        """Testa que um upload incompleto não é anexado e pode ser cancelado"""
+        sessao = UploadSessao.objects.create(
+            destino=UploadSessao.FOTO_EVENTO,
+            objeto_id=self.evento.id,
+            nome_arquivo='foto.jpg',
+            tamanho_total=len(self.conteudo),
+            criado_por='admin@test.com'
+        )
+        self._enviar(sessao.token, 0, 1023)
+        
+        response = self.client.post(f'/api/uploads/{sessao.token}/concluir/')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(FotoEvento.objects.exists())
+        
+        response = self.client.delete(f'/api/uploads/{sessao.token}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(UploadSessao.objects.exists())
+    
+    def test_sessoes_expiradas(self):
+        """Testa a recusa de partes em sessão vencida e a limpeza de sessões e temporários"""
+        sessao = UploadSessao.objects.create(
+            destino=UploadSessao.FOTO_EVENTO,
+            objeto_id=self.evento.id,
+            nome_arquivo='foto.jpg',
+            tamanho_total=len(self.conteudo),
+            criado_por='admin@test.com'
+        )
+        self.assertEqual(self._enviar(sessao.token, 0, 1023).status_code, 200)
+        sessao.refresh_from_db()
+        self.assertGreater(sessao.expira_em, timezone.now() + timedelta(hours=23))
+        
+        UploadSessao.objects.filter(pk=sessao.pk).update(expira_em=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self._enviar(sessao.token, 1024, 2047).status_code, 410)
+        
+        # Temporário sem sessão: removido só depois da validade
+        partes = os.path.join(self.diretorio.name, 'partes')
+        orfao, recente = (os.path.join(partes, f'{nome}.part') for nome in ('orfao', 'recente'))
+        for caminho in (orfao, recente):
+            open(caminho, 'wb').close()
+        antigo = (timezone.now() - timedelta(hours=25)).timestamp()
+        os.utime(orfao, (antigo, antigo))
+        
+        call_command('limpar_uploads_expirados', stdout=io.StringIO())
+        self.assertFalse(UploadSessao.objects.exists())
+        self.assertEqual(sorted(os.listdir(partes)), ['recente.part'])
+    
+    def test_destino_inexistente(self):
+        """Testa que a sessão exige um objeto de destino existente"""
+        response = self.client.post('/api/uploads/', {
+            'destino': UploadSessao.FOTO_EVENTO,
+            'objeto_id': 999999,
+            'nome_arquivo': 'foto.jpg',
+            'tamanho_total': 10
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@pytest.mark.integration
+@pytest.mark.events
+class TestAlbumZipIntegration(TestCase):
+    """Testes do download do álbum do evento em ZIP"""
+    
+    def setUp(self):
+        """Preparar dados de teste"""
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.diretorio.cleanup)
+        configuracao = override_settings(MEDIA_ROOT=self.diretorio.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        
+        self.admin = Admin.objects.create(nome="Admin", email="admin@test.com", senha="123")
+        usuario = Usuario.objects.create(username="usuario_teste", email="usuario@test.com", senha="123")
+        self.evento = Evento.objects.create(
+            titulo="Retiro de Jovens",
+            descricao="Retiro",
+            data=timezone.now(),
+            local="Sítio",
+            organizador=usuario
+        )
+        self.conteudos = [os.urandom(50 * 1024 + i) for i in range(3)]
+        for i, conteudo in enumerate(self.conteudos):
+            foto = FotoEvento(evento=self.evento, descricao="Louvor" if i == 0 else None)
+            foto.imagem.save(f'foto{i}.JPG', ContentFile(conteudo), save=True)
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create(username=self.admin.email))
+    
+    def test_download_album(self):
+        """Testa o ZIP com todas as fotos, sem compressão e nomes legíveis"""
+        response = self.client.get(f'/api/eventos/{self.evento.id}/album.zip')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn('album_retiro-de-jovens.zip', response['Content-Disposition'])
+        
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as album:
+            self.assertEqual(album.namelist(), ['001_louvor.jpg', '002_foto.jpg', '003_foto.jpg'])
+            for info, conteudo in zip(album.infolist(), self.conteudos):
+                self.assertEqual(info.compress_type, zipfile.ZIP_STORED)
+                self.assertEqual(album.read(info), conteudo)
+    
+    def test_zip_enviado_em_blocos(self):
+        """Testa que o cabeçalho sai primeiro e nenhum pedaço passa do bloco de leitura"""
+        fotos = FotoEvento.objects.filter(evento=self.evento).order_by('id')
+        partes = [parte for parte in gerar_zip(nomes_album(fotos), tamanho_bloco=8 * 1024) if parte]
+        
+        self.assertTrue(partes[0].startswith(b'PK\x03\x04'))
+        self.assertLess(len(partes[0]), 1024)
+        self.assertLessEqual(max(len(parte) for parte in partes), 8 * 1024 + 1024)
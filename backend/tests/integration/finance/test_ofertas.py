@@ -3,12 +3,18 @@ Testes de integração para ofertas e transações financeiras.
 Valida fluxos completos de entrada/saída de dinheiro.
 """
 import pytest
-from django.test import TestCase, TransactionTestCase
+from datetime import date
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
 from decimal import Decimal
 from django.utils import timezone
+from rest_framework.test import APIClient
 
+from app_alfa import razao_colunar, tendencias
 from app_alfa.models import (
-    Admin, Oferta, Transacao, ONG, DistribuicaoOferta, Membro
+    Admin, Oferta, Transacao, ONG, DistribuicaoOferta, Membro, FechamentoMensal, PeriodoFechadoErro
 )
 
 
@@ -208,3 +214,247 @@ class TestTransacoesIntegration(TransactionTestCase):
         assert total_saida == Decimal("200.00")
         assert total_entrada > total_saida
 
+
+@pytest.mark.integration
+@pytest.mark.finance
+class TestFechamentoMensalIntegration(TestCase):
+    """Testes do fechamento mensal do caixa"""
+    
+    def setUp(self):
+        """Preparar dados de teste"""
+        self.admin = Admin.objects.create(nome="Tesoureiro", email="admin@test.com", senha="123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create(username="admin@test.com"))
+        for dia, tipo, categoria, valor in [
+            (date(2025, 1, 10), 'entrada', 'Dízimo', '1000.00'),
+            (date(2025, 1, 20), 'saida', 'Luz', '200.00'),
+            (date(2025, 2, 5), 'entrada', 'Oferta', '300.00'),
+            (date(2025, 3, 15), 'saida', 'Água', '50.00'),
+        ]:
+            Transacao.objects.create(tipo=tipo, categoria=categoria, valor=Decimal(valor), data=dia)
+    
+    def test_fechamento_congela_saldos_em_sequencia(self):
+        """Testa saldos de abertura/fechamento, totais por categoria e a ordem dos fechamentos"""
+        response = self.client.post('/api/fechamentos/', {'mes': '2025-01-31'}, format='json')
+        assert response.status_code == 201
+        assert Decimal(response.data['saldo_inicial']) == Decimal('0')
+        assert Decimal(response.data['saldo_final']) == Decimal('800.00')
+        assert response.data['categorias'] == {'entrada': {'Dízimo': '1000.00'}, 'saida': {'Luz': '200.00'}}
+        assert response.data['fechado_por'] == self.admin.pk
+        
+        # Pular fevereiro não é permitido
+        response = self.client.post('/api/fechamentos/', {'mes': '2025-03-01'}, format='json')
+        assert response.status_code == 400
+        
+        fevereiro = FechamentoMensal.fechar(date(2025, 2, 1))
+        assert fevereiro.saldo_inicial == Decimal('800.00')
+        assert fevereiro.saldo_final == Decimal('1100.00')
+    
+    def test_mes_fechado_bloqueia_edicao(self):
+        """Testa que transações de meses fechados não podem ser criadas, editadas ou removidas"""
+        FechamentoMensal.fechar(date(2025, 1, 1))
+        janeiro = Transacao.objects.get(categoria='Luz')
+        fevereiro = Transacao.objects.get(categoria='Oferta')
+        
+        response = self.client.patch(f'/api/transacoes/{janeiro.pk}/', {'valor': '10.00'}, format='json')
+        assert response.status_code == 400
+        response = self.client.patch(f'/api/transacoes/{fevereiro.pk}/', {'data': '2025-01-31'}, format='json')
+        assert response.status_code == 400
+        response = self.client.delete(f'/api/transacoes/{janeiro.pk}/')
+        assert response.status_code == 400
+        with pytest.raises(PeriodoFechadoErro):
+            Transacao.objects.create(tipo='entrada', categoria='Oferta', valor=Decimal('1'), data=date(2024, 12, 1))
+        
+        # Fevereiro continua aberto
+        response = self.client.patch(f'/api/transacoes/{fevereiro.pk}/', {'valor': '350.00'}, format='json')
+        assert response.status_code == 200
+        
+        # Reabrir libera janeiro
+        assert self.client.post('/api/fechamentos/reabrir/').status_code == 200
+        response = self.client.delete(f'/api/transacoes/{janeiro.pk}/')
+        assert response.status_code == 204
+    
+    def test_saldo_parte_do_fechamento(self):
+        """Testa que o saldo usa o fechamento e só soma o que vem depois dele"""
+        FechamentoMensal.fechar(date(2025, 1, 1))
+        # O saldo congelado prevalece sobre as transações do mês fechado
+        FechamentoMensal.objects.filter(mes=date(2025, 1, 1)).update(saldo_final=Decimal('5000.00'))
+        
+        response = self.client.get('/api/transacoes/saldo/', {'data': '2025-03-15'})
+        assert response.status_code == 200
+        assert Decimal(str(response.data['saldo'])) == Decimal('5250.00')
+        assert FechamentoMensal.saldo_ate(date(2025, 1, 15)) == Decimal('1000.00')
+
+
+@pytest.mark.integration
+@pytest.mark.finance
+class TestExtratoIntegration(TestCase):
+    """Testes do extrato com saldo corrente e paginação por keyset"""
+    
+    def setUp(self):
+        """Preparar dados de teste"""
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create(username="admin@test.com"))
+        Admin.objects.create(nome="Tesoureiro", email="admin@test.com", senha="123")
+        self.valores = []
+        for indice in range(7):
+            tipo = 'saida' if indice % 3 == 2 else 'entrada'
+            valor = Decimal(10 * (indice + 1))
+            # Dois lançamentos por dia para exercitar o desempate por id
+            Transacao.objects.create(tipo=tipo, categoria='Geral', valor=valor, data=date(2025, 1 + indice // 2, 1 + indice % 2))
+            self.valores.append(valor if tipo == 'entrada' else -valor)
+    
+    def test_saldo_corrente_em_todas_as_paginas(self):
+        """Testa que o saldo corrente continua entre páginas"""
+        saldos, cursor = [], None
+        while True:
+            params = {'limite': 3}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get('/api/transacoes/extrato/', params)
+            assert response.status_code == 200
+            saldos += [Decimal(linha['saldo']) for linha in response.data['results']]
+            cursor = response.data['proximo']
+            if not cursor:
+                break
+        
+        esperado, acumulado = [], Decimal('0')
+        for valor in self.valores:
+            acumulado += valor
+            esperado.append(acumulado)
+        assert saldos == esperado
+    
+    def test_inicio_parte_do_fechamento(self):
+        """Testa o saldo inicial a partir de uma data e do fechamento mensal"""
+        FechamentoMensal.fechar(date(2025, 1, 1))
+        response = self.client.get('/api/transacoes/extrato/', {'inicio': '2025-02-02', 'limite': 2})
+        assert response.status_code == 200
+        assert Decimal(response.data['saldo_inicial']) == sum(self.valores[:3])
+        assert [Decimal(linha['valor_assinado']) for linha in response.data['results']] == self.valores[3:5]
+        
+        assert self.client.get('/api/transacoes/extrato/', {'cursor': 'xyz'}).status_code == 400
+
+
+@pytest.mark.integration
+@pytest.mark.finance
+class TestTendenciaFinanceiraIntegration(TestCase):
+    """Testes da série de tendência com períodos preenchidos e cache por versão"""
+    
+    def setUp(self):
+        """Preparar dados de teste"""
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create(username="admin@test.com"))
+        Transacao.objects.create(tipo='entrada', categoria='Dízimo', valor=Decimal('100'), data=date(2025, 1, 6))
+        Transacao.objects.create(tipo='entrada', categoria='Oferta', valor=Decimal('40'), data=date(2025, 1, 8))
+        Transacao.objects.create(tipo='saida', categoria='Luz', valor=Decimal('30'), data=date(2025, 1, 22))
+    
+    def _tendencia(self, **params):
+        response = self.client.get('/api/transacoes/tendencia/', params)
+        assert response.status_code == 200
+        return response.data
+    
+    def test_semanas_sem_movimento_sao_preenchidas(self):
+        """Testa que todas as semanas aparecem, inclusive as vazias"""
+        dados = self._tendencia(granularidade='semana', inicio='2025-01-01', fim='2025-01-31')
+        assert dados['periodos'] == [date(2024, 12, 30), date(2025, 1, 6), date(2025, 1, 13),
+                                     date(2025, 1, 20), date(2025, 1, 27)]
+        series = {serie['tipo']: serie['totais'] for serie in dados['series']}
+        assert series['entrada'] == ['0.00', '140.00', '0.00', '0.00', '0.00']
+        assert series['saida'] == ['0.00', '0.00', '0.00', '30.00', '0.00']
+    
+    def test_por_categoria(self):
+        """Testa a divisão por tipo e categoria"""
+        dados = self._tendencia(granularidade='mes', inicio='2024-12-01', fim='2025-02-28', por_categoria='true')
+        assert len(dados['periodos']) == 3
+        assert [(serie['tipo'], serie['categoria'], serie['totais']) for serie in dados['series']] == [
+            ('entrada', 'Dízimo', ['0.00', '100.00', '0.00']),
+            ('entrada', 'Oferta', ['0.00', '40.00', '0.00']),
+            ('saida', 'Luz', ['0.00', '30.00', '0.00']),
+        ]
+    
+    def test_cache_invalidado_por_nova_transacao(self):
+        """Testa que a série sai do cache até uma transação mudar os dados"""
+        params = {'granularidade': 'dia', 'inicio': '2025-01-01', 'fim': '2025-01-10'}
+        self._tendencia(**params)
+        # Cache compartilhado no banco: a versão e a série, sem agregar as transações
+        with self.assertNumQueries(2):
+            tendencias_cache = self.client.get('/api/transacoes/tendencia/', params).data
+        assert tendencias_cache['series'][0]['totais'][5] == '100.00'
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Transacao.objects.create(tipo='entrada', categoria='Dízimo', valor=Decimal('5'), data=date(2025, 1, 6))
+        assert self._tendencia(**params)['series'][0]['totais'][5] == '105.00'
+    
+    def test_cache_por_processo_acusa_erro(self):
+        """Testa o system check: a versão dos dados exige um cache compartilhado entre workers"""
+        assert tendencias.verificar_cache_compartilhado() == []
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            assert [erro.id for erro in tendencias.verificar_cache_compartilhado()] == ['app_alfa.E001']
+    
+    def test_intervalo_invalido(self):
+        """Testa os limites de intervalo"""
+        response = self.client.get('/api/transacoes/tendencia/', {'inicio': '2015-01-01', 'fim': '2025-01-01'})
+        assert response.status_code == 400
+
+
+@pytest.mark.integration
+@pytest.mark.finance
+class TestCategoriaFinanceiraIntegration(TestCase):
+    """Testes do filtro por categoria, autocomplete e permissões por categoria"""
+    
+    def setUp(self):
+        """Preparar dados de teste"""
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create(username="admin@test.com"))
+        for texto in ['Dízimo', 'DIZIMO', 'Oferta', 'Dízimos especiais']:
+            Transacao.objects.create(tipo='entrada', categoria=texto, valor=Decimal('10'), data=date(2025, 5, 1))
+    
+    def test_filtro_por_chave_normalizada(self):
+        """Testa que o filtro compara a chave inteira, ignorando acentos e caixa"""
+        response = self.client.get('/api/transacoes/', {'categoria': 'dizimo'})
+        assert response.status_code == 200
+        assert len(response.data) == 2
+        assert {linha['categoria'] for linha in response.data} == {'Dízimo'}
+    
+    def test_autocomplete(self):
+        """Testa as sugestões ordenadas por uso"""
+        response = self.client.get('/api/categorias-financeiras/', {'q': 'DÍZ'})
+        assert response.status_code == 200
+        assert [(item['nome'], item['uso']) for item in response.data] == [('Dízimo', 2), ('Dízimos especiais', 1)]
+    
+
+
+@pytest.mark.integration
+@pytest.mark.finance
+class TestRecortesFinanceirosIntegration(TestCase):
+    """Testes do endpoint de recortes sobre o razão colunar"""
+    
+    def setUp(self):
+        """Preparar dados de teste"""
+        cache.clear()
+        # Razão novo a cada teste: o do processo guardaria linhas de testes anteriores
+        patcher = mock.patch.object(razao_colunar, '_razao', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create(username="admin@test.com"))
+        Transacao.objects.create(tipo='entrada', categoria='Dízimo', valor=Decimal('100'), data=date(2025, 1, 5), metodo_pagamento='pix')
+        Transacao.objects.create(tipo='entrada', categoria='Oferta', valor=Decimal('20'), data=date(2025, 1, 6), metodo_pagamento='dinheiro')
+        Transacao.objects.create(tipo='saida', categoria='Luz', valor=Decimal('70'), data=date(2025, 2, 1), metodo_pagamento='pix')
+    
+    def test_agrupa_por_mes_com_filtro(self):
+        """Testa o agrupamento por mês e tipo filtrando pelo método de pagamento"""
+        response = self.client.get('/api/transacoes/recortes/', {'agrupar': ['mes', 'tipo'], 'metodo_pagamento': 'pix'})
+        assert response.status_code == 200
+        assert [(linha['mes'], linha['tipo'], linha['saldo']) for linha in response.data['grupos']] == [
+            (date(2025, 1, 1), 'entrada', Decimal('100.00')),
+            (date(2025, 2, 1), 'saida', Decimal('-70.00')),
+        ]
+        assert response.data['totais']['quantidade'] == 2
+    
+    def test_parametros_invalidos(self):
+        """Testa dimensões desconhecidas ou repetidas"""
+        assert self.client.get('/api/transacoes/recortes/', {'agrupar': 'cor'}).status_code == 400
+        assert self.client.get('/api/transacoes/recortes/', {'agrupar': ['mes', 'mes']}).status_code == 400
@@ -1,9 +1,13 @@
 """
 Testes de integração para registro e gerenciamento de membros.
 """
+import tempfile
 import pytest
-from django.test import TestCase
-from app_alfa.models import Admin, Membro
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from app_alfa.models import Admin, DocumentoMembro, Igreja, Membro, Transferencia
 
 
 @pytest.mark.integration
@@ -99,3 +103,56 @@ class TestManageMembersStatus(TestCase):
         
         membro_atualizado = Membro.objects.get(id=self.membro.id)
         assert membro_atualizado.status == Membro.ATIVO
+
+
+@pytest.mark.integration
+@pytest.mark.members
+class TestCartaTransferencia(TestCase):
+    """Testes da carta de transferência gerada uma vez por versão"""
+    
+    def setUp(self):
+        """Preparar dados de teste"""
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        configuracao = override_settings(MEDIA_ROOT=diretorio.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        
+        admin = Admin.objects.create(nome="Admin", email="admin@test.com", senha="123")
+        membro = Membro.objects.create(nome="João Silva", email="joao@test.com", cadastrado_por=admin)
+        self.transferencia = Transferencia.objects.create(
+            membro=membro,
+            igreja_origem=Igreja.objects.create(nome="Igreja Alfa", endereco="Rua 1"),
+            igreja_destino=Igreja.objects.create(nome="Igreja Beta", endereco="Rua 2"),
+            data_transferencia=timezone.now().date(),
+            motivo="Mudança de cidade",
+            gerado_por=admin
+        )
+        self.url = f'/api/gerar-pdf-transferencia/{self.transferencia.id}/'
+    
+    def test_pdf_gerado_uma_vez_por_versao(self):
+        """Testa que downloads repetidos reutilizam o PDF e uma alteração gera nova versão"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        etag = response['ETag']
+        
+        # Download repetido: 1 consulta da transferência (select_related) + 1 do documento
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(consultas), 2)
+        self.assertEqual(DocumentoMembro.objects.filter(tipo=DocumentoMembro.TRANSFERENCIA).count(), 1)
+        
+        self.transferencia.motivo = "Casamento"
+        self.transferencia.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(DocumentoMembro.objects.filter(tipo=DocumentoMembro.TRANSFERENCIA).count(), 2)
+    
+    def test_transferencia_inexistente(self):
+        """Testa o 404 para transferência inexistente"""
+        response = self.client.get('/api/gerar-pdf-transferencia/999999/')
+        self.assertEqual(response.status_code, 404)
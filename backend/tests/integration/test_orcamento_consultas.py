@@ -0,0 +1,160 @@
+"""
+Orçamento de consultas por endpoint: as listagens não podem fazer mais consultas
+com 100 linhas do que com 1 (N+1) nem passar do máximo da tabela.
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app_alfa.models import (
+    Admin, Cargo, Doacao, DocumentoMembro, Evento, EventoComentario, EventoPresenca, Grupo, Igreja,
+    Membro, Oferta, Postagem, Transacao, Transferencia, Usuario,
+)
+from orcamento_consultas import OrcamentoExcedido, comparar_escala, orcamento_consultas
+
+
+class Base:
+    """Objetos relacionados compartilhados pelas linhas criadas"""
+
+    def __init__(self):
+        self.cargo = Cargo.objects.create(nome="Diácono")
+        self.admin = Admin.objects.create(nome="Admin", email="admin@test.com", senha="123", cargo=self.cargo)
+        self.usuario = Usuario.objects.create(username="organizador", email="organizador@test.com", senha="senha123")
+        self.evento = Evento.objects.create(titulo="Culto", descricao="Culto", data=timezone.now(), organizador=self.usuario)
+        self.grupo = Grupo.objects.create(nome="Missões")
+        self.igrejas = [Igreja.objects.create(nome=nome, endereco="Rua A") for nome in ("Origem", "Destino")]
+        self.criados = 0
+
+    def membro(self):
+        self.criados += 1
+        return Membro.objects.create(
+            nome=f"Membro {self.criados}", email=f"membro{self.criados}@test.com",
+            cargo=self.cargo, cadastrado_por=self.admin,
+        )
+
+
+def _membros(base, n):
+    for _ in range(n):
+        base.membro()
+
+
+def _eventos(base, n):
+    Evento.objects.bulk_create([
+        Evento(titulo=f"Evento {i}", descricao="-", data=timezone.now(), organizador=base.usuario) for i in range(n)
+    ])
+
+
+def _postagens(base, n):
+    Postagem.objects.bulk_create([Postagem(titulo=f"Post {i}", conteudo="-", autor=base.usuario) for i in range(n)])
+
+
+def _transacoes(base, n):
+    Transacao.objects.bulk_create([
+        Transacao(tipo='entrada', categoria='Dízimo', valor=Decimal('10'), data=date(2025, 1, 5), registrado_por=base.admin)
+        for _ in range(n)
+    ])
+
+
+def _ofertas(base, n):
+    Oferta.objects.bulk_create([Oferta(valor=Decimal('10'), registrado_por=base.admin) for _ in range(n)])
+
+
+def _doacoes(base, n):
+    membro = base.membro()
+    Doacao.objects.bulk_create([Doacao(valor=Decimal('10'), tipo='pix', membro=membro, grupo=base.grupo) for _ in range(n)])
+
+
+def _documentos(base, n):
+    membro = base.membro()
+    DocumentoMembro.objects.bulk_create([
+        DocumentoMembro(membro=membro, tipo=DocumentoMembro.CARTAO_MEMBRO, gerado_por=base.admin) for _ in range(n)
+    ])
+
+
+def _transferencias(base, n):
+    membro = base.membro()
+    origem, destino = base.igrejas
+    Transferencia.objects.bulk_create([
+        Transferencia(membro=membro, igreja_origem=origem, igreja_destino=destino,
+                      data_transferencia=date(2025, 1, 5), gerado_por=base.admin)
+        for _ in range(n)
+    ])
+
+
+def _presencas(base, n):
+    EventoPresenca.objects.bulk_create([
+        EventoPresenca(evento=base.evento, membro=base.membro(), confirmado=True) for _ in range(n)
+    ])
+
+
+def _comentarios(base, n):
+    membro = base.membro()
+    EventoComentario.objects.bulk_create([
+        EventoComentario(evento=base.evento, membro=membro, comentario="Amém", aprovado=True) for _ in range(n)
+    ])
+
+
+# (endpoint, cria n linhas, máximo de consultas na requisição)
+# O máximo inclui autenticação/permissões da view; não deve crescer com as linhas.
+ORCAMENTOS = [
+    ('/api/membros/', _membros, 3),
+    ('/api/eventos/', _eventos, 2),
+    ('/api/postagens/', _postagens, 2),
+    ('/api/transacoes/', _transacoes, 2),
+    ('/api/ofertas/', _ofertas, 2),
+    ('/api/doacoes/', _doacoes, 2),
+    ('/api/documentos-membros/', _documentos, 3),
+    ('/api/transferencias/', _transferencias, 2),
+    ('/api/eventos-presencas/', _presencas, 2),
+    ('/api/eventos-comentarios/', _comentarios, 2),
+]
+
+
+@pytest.mark.integration
+class TestOrcamentoConsultas(TestCase):
+    """Testes do custo em consultas das listagens da API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create(username="admin@test.com"))
+        self.base = Base()
+
+    def test_listagens_sem_n_mais_1(self):
+        """Testa cada listagem com 1 e com 100 linhas contra o orçamento da tabela"""
+        for url, criar_linhas, maximo in ORCAMENTOS:
+            with self.subTest(url=url):
+                def requisicao():
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+
+                _, com_cem = comparar_escala(requisicao, lambda n: criar_linhas(self.base, n))
+                self.assertLessEqual(com_cem, maximo, f'GET {url}: {com_cem} consultas; orçamento de {maximo}')
+
+    def test_relatorio_aponta_sql_e_origem(self):
+        """Testa a mensagem de falha: SQL repetido, vezes e linha do código que o disparou"""
+        _transacoes(self.base, 3)
+
+        with self.assertRaises(OrcamentoExcedido) as erro:
+            with orcamento_consultas(1):
+                for transacao in Transacao.objects.all():
+                    transacao.registrado_por.nome
+
+        mensagem = str(erro.exception)
+        self.assertIn('4 consultas; orçamento de 1', mensagem)
+        self.assertIn('3x SELECT "app_alfa_admin"', mensagem)
+        self.assertIn('test_orcamento_consultas.py', mensagem)
+
+        with self.assertRaises(OrcamentoExcedido) as erro:
+            comparar_escala(lambda: [t.registrado_por.nome for t in Transacao.objects.all()],
+                            lambda n: _transacoes(self.base, n), poucas=1, muitas=5)
+        self.assertIn('N+1', str(erro.exception))
+
+    @orcamento_consultas(1)
+    def test_decorador(self):
+        """Testa o orçamento como decorador de um teste"""
+        self.assertEqual(Transacao.objects.count(), 0)
@@ -0,0 +1,157 @@
+"""
+Orçamento de consultas SQL para os testes - Alfa+
+Os testes verificam comportamento; este módulo verifica custo, para que um N+1 em
+serializers.py ou viewsets.py quebre um teste em vez de aparecer em produção.
+
+- orcamento_consultas(maximo): context manager e decorador; falha se o bloco fizer
+  mais de `maximo` consultas. Nos testes pytest, também como a fixture de mesmo nome
+  (conftest.py, ao lado). Fica em tests/: só os testes o usam.
+- comparar_escala(requisicao, criar_linhas): mede a mesma requisição com 1 e com 100
+  linhas e falha se o número de consultas crescer junto com as linhas.
+- A falha lista cada SQL (agrupado como na instrumentação, sem parâmetros) com o
+  número de execuções, o campo de serializer que o disparou (quando há) e os
+  quadros do código do projeto na pilha.
+"""
+
+import os
+import sys
+from collections import Counter
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.db import connections
+from rest_framework import serializers
+
+from app_alfa import instrumentacao
+from app_alfa.instrumentacao import normalizar_sql
+
+
+# Quadros da pilha mostrados por consulta (os mais próximos da execução)
+QUADROS_ORIGEM = 4
+
+_PROJETO = str(settings.BASE_DIR) + os.sep
+# Ferramentas de medição não são a origem de nada
+_IGNORADOS = {os.path.abspath(__file__), os.path.abspath(instrumentacao.__file__)}
+
+
+def _campo_serializado(quadro):
+    """'Serializer.campo' se o quadro é o to_representation de um serializer percorrendo campos"""
+    if quadro.f_code.co_name != 'to_representation':
+        return None
+    serializer, campo = quadro.f_locals.get('self'), quadro.f_locals.get('field')
+    if isinstance(serializer, serializers.Serializer) and campo is not None:
+        return f'serializer {type(serializer).__name__}.{campo.field_name}'
+    return None
+
+
+def origem_consulta():
+    """
+    De onde veio a consulta: o campo de serializer sendo lido (se for o caso) e os
+    quadros 'arquivo:linha em função' do código do projeto, do mais interno para fora.
+    """
+    origem = []
+    campo = None
+    quadro = sys._getframe(1)
+    while quadro is not None and len(origem) < QUADROS_ORIGEM:
+        campo = campo or _campo_serializado(quadro)
+        arquivo = quadro.f_code.co_filename
+        if (arquivo.startswith(_PROJETO) and arquivo not in _IGNORADOS
+                and f'{os.sep}site-packages{os.sep}' not in arquivo):
+            origem.append(f'{os.path.relpath(arquivo, _PROJETO)}:{quadro.f_lineno} em {quadro.f_code.co_name}')
+        quadro = quadro.f_back
+    return tuple([campo] if campo else []) + tuple(origem)
+
+
+class OrcamentoExcedido(AssertionError):
+    pass
+
+
+class RegistroConsultas:
+    """Consultas executadas em uma conexão enquanto ativo: [(sql, origem)]"""
+
+    def __init__(self, using='default'):
+        self.using = using
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.consultas.append((sql, origem_consulta()))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.consultas = []
+        self._wrapper = connections[self.using].execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._wrapper.__exit__(*exc)
+
+    def __len__(self):
+        return len(self.consultas)
+
+    def contagem(self):
+        return Counter(normalizar_sql(sql) for sql, _ in self.consultas)
+
+    def relatorio(self, somente=None):
+        """Texto com cada SQL, quantas vezes rodou e de onde veio (a primeira execução)"""
+        contagem = self.contagem()
+        origens = {}
+        for sql, origem in self.consultas:
+            origens.setdefault(normalizar_sql(sql), origem)
+        linhas = []
+        for sql, vezes in contagem.most_common():
+            if somente is not None and sql not in somente:
+                continue
+            linhas.append(f'  {vezes}x {sql}')
+            linhas.extend(f'      {quadro}' for quadro in origens[sql])
+        return '\n'.join(linhas)
+
+
+class orcamento_consultas(ContextDecorator):
+    """
+    with orcamento_consultas(3): ...  ou  @orcamento_consultas(3)
+    Falha (OrcamentoExcedido) se o bloco fizer mais de `maximo` consultas.
+    """
+
+    def __init__(self, maximo, using='default'):
+        self.maximo = maximo
+        self.registro = RegistroConsultas(using)
+
+    def _recreate_cm(self):
+        # Como decorador, cada chamada mede do zero
+        return type(self)(self.maximo, self.registro.using)
+
+    def __enter__(self):
+        self.registro.__enter__()
+        return self.registro
+
+    def __exit__(self, tipo, *exc):
+        self.registro.__exit__(tipo, *exc)
+        if tipo is None and len(self.registro) > self.maximo:
+            raise OrcamentoExcedido(
+                f'{len(self.registro)} consultas; orçamento de {self.maximo}:\n{self.registro.relatorio()}'
+            )
+        return False
+
+
+def comparar_escala(requisicao, criar_linhas, poucas=1, muitas=100, using='default'):
+    """
+    Executa requisicao() com `poucas` linhas e depois com `muitas` (criar_linhas(n) cria
+    n linhas a mais). Falha se alguma consulta rodar mais vezes com mais linhas.
+    Retorna (consultas com poucas, consultas com muitas).
+    """
+    criar_linhas(poucas)
+    with RegistroConsultas(using) as com_poucas:
+        requisicao()
+    criar_linhas(muitas - poucas)
+    with RegistroConsultas(using) as com_muitas:
+        requisicao()
+
+    antes, depois = com_poucas.contagem(), com_muitas.contagem()
+    cresceram = {sql for sql, vezes in depois.items() if vezes > antes.get(sql, 0)}
+    if cresceram:
+        raise OrcamentoExcedido(
+            f'{len(com_poucas)} consultas com {poucas} linha(s), {len(com_muitas)} com {muitas}; '
+            f'consultas que crescem com as linhas (N+1):\n{com_muitas.relatorio(somente=cresceram)}'
+        )
+    return len(com_poucas), len(com_muitas)
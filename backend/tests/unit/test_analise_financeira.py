@@ -0,0 +1,100 @@
+"""
+Testes da análise financeira vetorizada (NumPy).
+"""
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from django.test import TestCase
+from django.urls import reverse
+
+from app_alfa.analise import ColunasFinanceiras, analise_financeira, media_movel, sazonalidade, variacao_anual
+from app_alfa.models import Admin, Transacao
+
+
+@pytest.mark.unit
+@pytest.mark.finance
+class TestAnaliseFinanceira(TestCase):
+    """Testes das séries mensais, da projeção e da view de estatísticas"""
+
+    def setUp(self):
+        self.admin = Admin.objects.create(nome="Admin", email="admin@test.com", senha="123")
+
+    def _transacao(self, dia, valor, tipo=Transacao.ENTRADA, categoria="Dízimo"):
+        return Transacao.objects.create(
+            tipo=tipo, categoria=categoria, valor=Decimal(valor), data=dia, registrado_por=self.admin
+        )
+
+    def test_colunas_em_centavos_exatos(self):
+        """Testa que os valores viram centavos inteiros assinados"""
+        colunas = ColunasFinanceiras.de_linhas([
+            (date(2025, 1, 5), Transacao.ENTRADA, Decimal('0.29'), 3),
+            (date(2025, 1, 6), Transacao.SAIDA, Decimal('99999999.99'), None),
+        ])
+
+        self.assertEqual(colunas.centavos.tolist(), [29, -9999999999])
+        self.assertEqual(colunas.categorias.tolist(), [3, 0])
+        self.assertEqual(str(colunas.dias[0]), '2025-01-05')
+
+    def test_funcoes_vetorizadas(self):
+        """Testa média móvel, variação anual e sazonalidade"""
+        valores = np.arange(1, 15, dtype=np.int64)  # 14 meses
+
+        medias = media_movel(valores, 3)
+        self.assertTrue(np.isnan(medias[:2]).all())
+        self.assertEqual(medias[2:5].tolist(), [2.0, 3.0, 4.0])
+
+        diferenca, percentual = variacao_anual(valores)
+        self.assertEqual(diferenca[12:].tolist(), [12.0, 12.0])
+        self.assertEqual(percentual[12:].tolist(), [1200.0, 600.0])
+        self.assertTrue(np.isnan(diferenca[:12]).all())
+
+        # Começando em novembro: novembro e dezembro aparecem duas vezes
+        (medias_mes,) = sazonalidade(date(2024, 11, 1), valores)
+        self.assertEqual(medias_mes[10], 7.0)  # (1 + 13) / 2
+        self.assertEqual(medias_mes[0], 3.0)
+
+    def test_series_e_projecao(self):
+        """Testa as séries mensais com histórico do ano anterior e a projeção do mês atual"""
+        self._transacao(date(2024, 3, 10), '100.00')
+        self._transacao(date(2025, 1, 10), '300.00')
+        self._transacao(date(2025, 2, 10), '50.00', tipo=Transacao.SAIDA, categoria="Luz")
+        self._transacao(date(2025, 3, 5), '400.00')
+        self._transacao(date(2025, 3, 8), '10.00', tipo=Transacao.SAIDA, categoria="luz ")
+
+        resultado = analise_financeira(date(2025, 1, 1), date(2025, 3, 31), janela=2, hoje=date(2025, 3, 10))
+
+        meses = resultado['meses']
+        self.assertEqual([mes['mes'] for mes in meses], [date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1)])
+        self.assertEqual([mes['saldo'] for mes in meses], [Decimal('300.00'), Decimal('-50.00'), Decimal('390.00')])
+        self.assertEqual(meses[1]['media_movel'], Decimal('125.00'))
+        self.assertEqual(meses[2]['variacao_anual'], Decimal('290.00'))
+        self.assertEqual(meses[2]['variacao_anual_percentual'], 290.0)
+        self.assertIsNone(meses[0]['variacao_anual_percentual'])
+
+        self.assertEqual(resultado['sazonalidade'][2]['saldo'], Decimal('245.00'))  # (100 + 390) / 2
+        self.assertEqual(resultado['categorias'], [
+            {'categoria': 'Dízimo', 'total': Decimal('700.00')},
+            {'categoria': 'Luz', 'total': Decimal('-60.00')},
+        ])
+
+        projecao = resultado['projecao']
+        self.assertEqual(projecao['saldo_inicial'], Decimal('350.00'))
+        self.assertEqual(projecao['realizado'], Decimal('390.00'))
+        self.assertEqual(projecao['ritmo_diario'], Decimal('7.11'))  # 640 / 90
+        self.assertEqual(projecao['dias_restantes'], 21)
+        self.assertEqual(projecao['saldo_projetado'], Decimal('889.33'))
+
+    def test_view_de_estatisticas(self):
+        """Testa que a view financeira inclui a análise"""
+        self._transacao(date(2025, 1, 10), '300.00')
+
+        response = self.client.get(
+            reverse('estatisticas_financeiro'), {'data_inicio': '2025-01-01', 'data_fim': '2025-02-28', 'janela': '2'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        analise = response.json()['analise']
+        self.assertEqual(analise['janela'], 2)
+        self.assertEqual([mes['saldo'] for mes in analise['meses']], ['300.00', '0.00'])
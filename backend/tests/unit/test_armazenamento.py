@@ -0,0 +1,101 @@
+"""
+Testes do armazenamento endereçado por conteúdo (deduplicação e coleta de órfãos).
+"""
+import hashlib
+import io
+import os
+import tempfile
+from datetime import timedelta
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from app_alfa.armazenamento import caminho_conteudo
+from app_alfa.models import ArquivoConteudo, Evento, FotoEvento, Usuario
+
+
+@pytest.mark.unit
+@pytest.mark.content
+class TestArmazenamentoConteudo(TestCase):
+    """Testes da deduplicação por hash e da contagem de referências"""
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.diretorio.cleanup)
+        configuracao = override_settings(MEDIA_ROOT=self.diretorio.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        usuario = Usuario.objects.create(username="usuario_teste", email="usuario@test.com", senha="123")
+        self.evento = Evento.objects.create(
+            titulo="Culto", descricao="Culto", data=timezone.now(), local="Igreja", organizador=usuario
+        )
+        self.conteudo = b'cartaz do retiro' * 1000
+
+    def _foto(self, nome='cartaz.JPG', conteudo=None):
+        foto = FotoEvento(evento=self.evento)
+        foto.imagem.save(nome, ContentFile(conteudo or self.conteudo), save=True)
+        return foto
+
+    def test_uploads_identicos_compartilham_o_blob(self):
+        """Testa que o mesmo arquivo é gravado uma vez, em subpastas pelo hash"""
+        primeira = self._foto('cartaz.JPG')
+        segunda = self._foto('outro_nome.jpg')
+
+        digest = hashlib.sha256(self.conteudo).hexdigest()
+        self.assertEqual(primeira.imagem.name, f'conteudo/{digest[:2]}/{digest[2:4]}/{digest}.jpg')
+        self.assertEqual(primeira.imagem.name, segunda.imagem.name)
+        self.assertEqual(os.listdir(os.path.dirname(primeira.imagem.path)), [f'{digest}.jpg'])
+
+        blob = ArquivoConteudo.objects.get()
+        self.assertEqual(blob.referencias, 2)
+        self.assertEqual(blob.tamanho, len(self.conteudo))
+
+    def test_referencias_ao_trocar_e_apagar(self):
+        """Testa que trocar o arquivo ou apagar a foto libera a referência"""
+        foto = self._foto()
+        antigo = foto.imagem.name
+        foto.imagem.save('novo.jpg', ContentFile(b'outra imagem'), save=True)
+
+        self.assertEqual(ArquivoConteudo.objects.get(nome=antigo).referencias, 0)
+        self.assertEqual(ArquivoConteudo.objects.get(nome=foto.imagem.name).referencias, 1)
+
+        foto.delete()
+        self.assertFalse(ArquivoConteudo.objects.filter(referencias__gt=0).exists())
+
+    def test_coleta_respeita_carencia_e_referencias(self):
+        """Testa que só blobs sem referência e fora da carência são removidos"""
+        mantida = self._foto()
+        orfa = self._foto(conteudo=b'foto apagada')
+        nome_orfao = orfa.imagem.name
+        orfa.delete()
+
+        # Dentro da carência nada é removido
+        self.assertEqual(ArquivoConteudo.coletar_orfaos()[0], 0)
+
+        # Contador divergente (update() não dispara sinais) é corrigido antes de remover
+        ArquivoConteudo.objects.update(referencias=0, atualizado_em=timezone.now() - timedelta(days=2))
+        quantidade, liberados = ArquivoConteudo.coletar_orfaos()
+
+        self.assertEqual((quantidade, liberados), (1, len(b'foto apagada')))
+        self.assertFalse(default_storage.exists(nome_orfao))
+        self.assertTrue(default_storage.exists(mantida.imagem.name))
+        self.assertEqual(ArquivoConteudo.objects.get().referencias, 1)
+
+    def test_comando_migra_arquivos_existentes(self):
+        """Testa a migração de arquivos das pastas planas com deduplicação"""
+        antigos = [default_storage.save(f'eventos_fotos/foto{i}.jpg', ContentFile(self.conteudo)) for i in range(2)]
+        ids = [FotoEvento.objects.create(evento=self.evento, imagem=nome).pk for nome in antigos]
+
+        call_command('migrar_arquivos_conteudo', '--remover-originais', stdout=io.StringIO())
+
+        nomes = set(FotoEvento.objects.filter(pk__in=ids).values_list('imagem', flat=True))
+        digest = hashlib.sha256(self.conteudo).hexdigest()
+        self.assertEqual(nomes, {caminho_conteudo(digest, 'foto.jpg')})
+        self.assertEqual(ArquivoConteudo.objects.get().referencias, 2)
+        for nome in antigos:
+            self.assertFalse(default_storage.exists(nome))
@@ -0,0 +1,88 @@
+"""
+Testes da geração de cartões de membro em lote.
+"""
+import tempfile
+
+import pytest
+from django.test import TestCase, override_settings
+
+from app_alfa.cartoes import encerrar_pool, gerar_documentos, gerar_volumes, get_pool, selecionar_pendentes
+from app_alfa.models import Admin, DocumentoMembro, Membro
+
+try:
+    import weasyprint  # noqa: F401
+    WEASYPRINT_DISPONIVEL = True
+except (ImportError, OSError):
+    # WeasyPrint instalado mas sem as bibliotecas do sistema (Pango)
+    WEASYPRINT_DISPONIVEL = False
+
+
+@pytest.mark.unit
+@pytest.mark.members
+class TestCartoesLote(TestCase):
+    """Testes da seleção e geração de cartões"""
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.diretorio.cleanup)
+        configuracao = override_settings(MEDIA_ROOT=self.diretorio.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        admin = Admin.objects.create(nome="Admin", email="admin@test.com", senha="123")
+        self.membros = [
+            Membro.objects.create(nome=f"Membro {i}", email=f"cartao{i}@test.com", status=Membro.ATIVO, cadastrado_por=admin)
+            for i in range(3)
+        ]
+
+    def test_pula_membros_sem_alteracao(self):
+        """Testa que só membros com dados impressos alterados voltam para a fila"""
+        pendentes, ignorados = selecionar_pendentes(Membro.objects.all())
+        self.assertEqual((len(pendentes), ignorados), (3, 0))
+
+        for membro_id, (_, assinatura) in pendentes.items():
+            DocumentoMembro.objects.create(membro_id=membro_id, tipo=DocumentoMembro.CARTAO_MEMBRO, assinatura=assinatura)
+
+        # Telefone não é impresso no cartão; o nome é
+        Membro.objects.filter(pk=self.membros[0].pk).update(telefone='11999999999')
+        Membro.objects.filter(pk=self.membros[1].pk).update(nome='Nome Corrigido')
+
+        pendentes, ignorados = selecionar_pendentes(Membro.objects.all())
+        self.assertEqual(list(pendentes), [self.membros[1].pk])
+        self.assertEqual(ignorados, 2)
+
+        pendentes, ignorados = selecionar_pendentes(Membro.objects.all(), forcar=True)
+        self.assertEqual((len(pendentes), ignorados), (3, 0))
+
+    @override_settings(ALFA_CARTOES_WORKERS=2)
+    def test_pool_compartilhado_criado_por_spawn(self):
+        """Testa que o endpoint reaproveita um único pool, sem fork do processo web"""
+        self.addCleanup(encerrar_pool)
+        pool = get_pool()
+        self.assertIs(get_pool(), pool)
+        self.assertEqual(pool._mp_context.get_start_method(), 'spawn')
+
+        encerrar_pool()
+        self.assertIsNot(get_pool(), pool)
+
+    @pytest.mark.skipif(not WEASYPRINT_DISPONIVEL, reason='WeasyPrint sem bibliotecas do sistema')
+    def test_gera_documentos_e_volume(self):
+        """Testa a geração dos PDFs individuais e do volume com um cartão por página"""
+        self.assertEqual(gerar_documentos(Membro.objects.all()), {'gerados': 3, 'ignorados': 0})
+        self.assertEqual(gerar_documentos(Membro.objects.all()), {'gerados': 0, 'ignorados': 3})
+
+        documento = DocumentoMembro.objects.filter(tipo=DocumentoMembro.CARTAO_MEMBRO).first()
+        with documento.arquivo.open('rb') as arquivo:
+            self.assertTrue(arquivo.read().startswith(b'%PDF'))
+
+        Membro.objects.update(nome='Nome Corrigido')
+        with override_settings(ALFA_CARTOES_WORKERS=2):
+            self.addCleanup(encerrar_pool)
+            self.assertEqual(
+                gerar_documentos(Membro.objects.all(), workers=2, pool=get_pool()),
+                {'gerados': 3, 'ignorados': 0}
+            )
+
+        volumes = gerar_volumes(Membro.objects.order_by('id'), por_volume=2)
+        self.assertEqual(len(volumes), 2)
+        self.assertTrue(all(volume.startswith(b'%PDF') for volume in volumes))
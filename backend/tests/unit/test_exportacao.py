@@ -0,0 +1,110 @@
+"""
+Testes da exportação colunar (Parquet e Arrow IPC).
+"""
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app_alfa.exportacao import exportar
+from app_alfa.models import Admin, Cargo, Oferta, Transacao, Usuario
+
+
+@pytest.mark.unit
+@pytest.mark.finance
+class TestExportacaoColunar(TestCase):
+    """Testes dos tipos, dos lotes e da exportação incremental"""
+
+    def setUp(self):
+        self.client = APIClient()
+        Admin.objects.create(nome="Admin", email="admin@test.com", senha="123")
+        self.client.force_authenticate(user=User.objects.create(username="admin@test.com"))
+        self.transacoes = [
+            Transacao.objects.create(tipo='entrada', categoria='Dízimo', valor=Decimal(valor), data=date(2025, 1, dia))
+            for dia, valor in ((5, '100.10'), (6, '0.01'), (7, '99999999.99'))
+        ]
+
+    def test_parquet_tipado_em_row_groups(self):
+        """Testa decimal em ponto fixo, date32 e um row group por lote"""
+        arquivo = pq.ParquetFile(io.BytesIO(b''.join(exportar('transacoes', 'parquet', linhas_por_lote=2))))
+
+        self.assertEqual(arquivo.metadata.num_row_groups, 2)
+        esquema = arquivo.schema_arrow
+        self.assertEqual(esquema.field('valor').type, pa.decimal128(10, 2))
+        self.assertEqual(esquema.field('data').type, pa.date32())
+        self.assertEqual(esquema.field('registrado_por_id').type, pa.int64())
+
+        tabela = arquivo.read()
+        self.assertEqual(tabela.column('valor').to_pylist(), [Decimal('100.10'), Decimal('0.01'), Decimal('99999999.99')])
+        self.assertEqual(tabela.column('data').to_pylist()[0], date(2025, 1, 5))
+
+    def test_stream_arrow_incremental(self):
+        """Testa o stream Arrow só com as alterações desde a marca, incluindo exclusões"""
+        antes_da_leitura = timezone.now()
+        response = self.client.get('/api/exportacoes/transacoes/', {'formato': 'arrow'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.arrow.stream')
+        marca = response['X-Exportacao-Marca']
+        self.assertEqual(pa.ipc.open_stream(b''.join(response.streaming_content)).read_all().num_rows, 3)
+
+        # updated_at (auto_now) de linhas antigas fica antes da marca
+        Transacao.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        self.transacoes[0].delete()
+        novo = Transacao.objects.create(tipo='saida', categoria='Luz', valor=Decimal('70'), data=date(2025, 1, 8))
+        # Salva antes da leitura e confirmada depois: não entrou na exportação anterior
+        Transacao.objects.filter(pk=self.transacoes[1].pk).update(updated_at=antes_da_leitura)
+
+        response = self.client.get('/api/exportacoes/transacoes/', {'formato': 'arrow', 'desde': marca})
+        tabela = pa.ipc.open_stream(b''.join(response.streaming_content)).read_all()
+        self.assertEqual(tabela.column('id').to_pylist(), [self.transacoes[0].pk, self.transacoes[1].pk, novo.pk])
+        self.assertIsNotNone(tabela.column('deleted_at').to_pylist()[0])
+
+    def test_lista_e_validacoes(self):
+        """Testa a listagem das tabelas e os parâmetros inválidos"""
+        response = self.client.get('/api/exportacoes/')
+        self.assertEqual(response.status_code, 200)
+        tabelas = {item['tabela']: item for item in response.data}
+        self.assertFalse(tabelas['distribuicoes']['incremental'])
+        self.assertNotIn('cpf', [coluna['nome'] for coluna in tabelas['membros']['colunas']])
+
+        Oferta.objects.create(valor=Decimal('10'))
+        response = self.client.get('/api/exportacoes/ofertas/')
+        self.assertEqual(pq.read_table(io.BytesIO(b''.join(response.streaming_content))).num_rows, 1)
+
+        self.assertEqual(self.client.get('/api/exportacoes/desconhecida/').status_code, 404)
+        self.assertEqual(self.client.get('/api/exportacoes/transacoes/', {'formato': 'csv'}).status_code, 400)
+        self.assertEqual(
+            self.client.get('/api/exportacoes/distribuicoes/', {'desde': '2025-01-01T00:00:00Z'}).status_code, 400
+        )
+
+    def test_permissao_por_tabela(self):
+        """Testa que membros exige gerenciar membros e transações exige visualizar relatórios"""
+        membro = APIClient()
+        Usuario.objects.create(username="membro", email="membro@test.com", senha="123")
+        membro.force_authenticate(user=User.objects.create(username="membro@test.com"))
+        for tabela in ('membros', 'transacoes'):
+            for formato in ('parquet', 'arrow'):
+                self.assertEqual(membro.get(f'/api/exportacoes/{tabela}/', {'formato': formato}).status_code, 403)
+        self.assertEqual(membro.get('/api/exportacoes/').data, [])
+
+        tesoureiro = APIClient()
+        Usuario.objects.create(username="tesoureiro", email="tesoureiro@test.com", senha="123",
+                               cargo=Cargo.objects.create(nome="Tesoureiro", pode_visualizar_relatorios=True))
+        tesoureiro.force_authenticate(user=User.objects.create(username="tesoureiro@test.com"))
+        self.assertEqual(tesoureiro.get('/api/exportacoes/transacoes/').status_code, 200)
+        self.assertEqual(tesoureiro.get('/api/exportacoes/membros/').status_code, 403)
+        self.assertNotIn('membros', [item['tabela'] for item in tesoureiro.get('/api/exportacoes/').data])
+
+        secretaria = APIClient()
+        Usuario.objects.create(username="secretaria", email="secretaria@test.com", senha="123",
+                               cargo=Cargo.objects.create(nome="Secretaria", pode_gerenciar_membros=True))
+        secretaria.force_authenticate(user=User.objects.create(username="secretaria@test.com"))
+        self.assertEqual(secretaria.get('/api/exportacoes/membros/').status_code, 200)
+        self.assertEqual(secretaria.get('/api/exportacoes/transacoes/').status_code, 403)
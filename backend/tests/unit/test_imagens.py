@@ -0,0 +1,167 @@
+"""
+Testes da geração de derivados (miniaturas) de imagens.
+"""
+import os
+import tempfile
+from concurrent.futures import Future
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from app_alfa import imagens
+from app_alfa.imagens import (
+    TAMANHOS, caminho_derivado, derivados_para_api, derivados_prontos, gerar_derivados, remover_derivados
+)
+from app_alfa.models import ArquivoConteudo, Evento, FotoEvento, Membro, Usuario
+
+
+def _foto_jpeg(largura, altura):
+    buffer = BytesIO()
+    Image.new('RGB', (largura, altura), (200, 30, 30)).save(buffer, 'JPEG')
+    return ContentFile(buffer.getvalue())
+
+
+class _PoolImediato:
+    """Executa na hora, na thread do teste (as threads do pool não veem a transação do teste)"""
+
+    def submit(self, funcao, *args):
+        futuro = Future()
+        try:
+            futuro.set_result(funcao(*args))
+        except Exception as erro:
+            futuro.set_exception(erro)
+        return futuro
+
+
+@pytest.mark.unit
+@pytest.mark.events
+class TestDerivadosImagem:
+    """Testes do pipeline de miniaturas"""
+    
+    def setup_method(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.storage = FileSystemStorage(location=self.diretorio.name, base_url='/media/')
+        self.nome = self.storage.save('eventos_fotos/culto.jpg', _foto_jpeg(3000, 2000))
+    
+    def teardown_method(self):
+        self.diretorio.cleanup()
+    
+    def test_gera_todos_os_tamanhos_e_formatos(self):
+        """Testa que cada tamanho é gerado em WebP e JPEG respeitando o maior lado"""
+        assert gerar_derivados(self.nome, storage=self.storage) == 4
+        
+        for tamanho, lado in TAMANHOS.items():
+            for formato in ('webp', 'jpeg'):
+                with self.storage.open(caminho_derivado(self.nome, tamanho, formato)) as arquivo:
+                    imagem = Image.open(arquivo)
+                    assert imagem.format == formato.upper()
+                    assert max(imagem.size) == lado
+        assert derivados_prontos(self.nome, self.storage)
+    
+    def test_nao_regera_derivados_existentes(self):
+        """Testa que a geração é idempotente (salvar o modelo de novo não refaz o trabalho)"""
+        gerar_derivados(self.nome, storage=self.storage)
+        
+        assert gerar_derivados(self.nome, storage=self.storage) == 0
+        assert gerar_derivados(self.nome, forcar=True, storage=self.storage) == 4
+    
+    def test_caminho_derivado(self):
+        """Testa o caminho dos derivados dentro da pasta dedicada"""
+        assert caminho_derivado('eventos_fotos/culto.jpg', 'thumb', 'webp') == 'derivados/eventos_fotos/culto__thumb.webp'
+
+
+@pytest.mark.unit
+@pytest.mark.events
+class TestAgendamentoDerivados(TestCase):
+    """Testes do agendamento após o upload e do registro no modelo"""
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.diretorio.cleanup)
+        self.storage = FileSystemStorage(location=self.diretorio.name, base_url='/media/')
+        for patcher in (mock.patch.object(Membro._meta.get_field('foto'), 'storage', self.storage),
+                        mock.patch.object(imagens, 'get_pool', _PoolImediato)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _membro(self, conteudo):
+        with self.captureOnCommitCallbacks(execute=True):
+            membro = Membro.objects.create(nome="Maria", email="maria@test.com", foto=conteudo)
+        membro.refresh_from_db()
+        return membro
+
+    def test_gera_no_storage_do_campo_e_registra(self):
+        """Testa os derivados no storage do campo e as URLs sem consultar o storage"""
+        conteudo = _foto_jpeg(800, 600)
+        conteudo.name = 'maria.jpg'
+        membro = self._membro(conteudo)
+
+        self.assertEqual(membro.derivados_de, membro.foto.name)
+        self.assertTrue(derivados_prontos(membro.foto.name, self.storage))
+        with mock.patch.object(self.storage, 'exists', side_effect=AssertionError('consulta ao storage')):
+            dados = derivados_para_api(membro.foto)
+        self.assertEqual(dados['thumb']['webp'], f'/media/{caminho_derivado(membro.foto.name, "thumb", "webp")}')
+
+    def test_falha_na_geracao_vai_para_o_log(self):
+        """Testa que uma imagem corrompida gera erro no log e fica sem derivados"""
+        with self.assertLogs('app_alfa.imagens', level='ERROR') as logs:
+            membro = self._membro(ContentFile(b'nao e uma imagem', name='corrompida.jpg'))
+
+        self.assertIn(membro.foto.name, logs.output[0])
+        self.assertEqual(membro.derivados_de, '')
+        self.assertIsNone(derivados_para_api(membro.foto))
+
+
+@pytest.mark.unit
+@pytest.mark.events
+class TestDerivadosArmazenamentoConteudo(TestCase):
+    """Testes dos derivados de fotos gravadas no storage endereçado por conteúdo"""
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.diretorio.cleanup)
+        configuracao = override_settings(MEDIA_ROOT=self.diretorio.name, MEDIA_URL='/media/')
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        patcher = mock.patch.object(imagens, 'get_pool', _PoolImediato)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        organizador = Usuario.objects.create(username="org", email="org@test.com", senha="123")
+        self.evento = Evento.objects.create(
+            titulo="Culto", descricao="Culto", data=timezone.now(), local="Igreja", organizador=organizador
+        )
+
+    def test_derivados_mantem_o_nome_e_as_urls_existem(self):
+        """Testa que os derivados não viram blobs por hash: URLs válidas e sem regerar"""
+        conteudo = _foto_jpeg(2000, 1500)
+        conteudo.name = 'culto.jpg'
+        with self.captureOnCommitCallbacks(execute=True):
+            foto = FotoEvento.objects.create(evento=self.evento, imagem=conteudo)
+        foto.refresh_from_db()
+        nome, storage = foto.imagem.name, foto.imagem.storage
+
+        self.assertTrue(nome.startswith('conteudo/'))
+        self.assertEqual(foto.derivados_de, nome)
+        self.assertTrue(derivados_prontos(nome, storage))
+        # Só o original é um blob de conteúdo
+        self.assertEqual(list(ArquivoConteudo.objects.values_list('nome', flat=True)), [nome])
+
+        dados = derivados_para_api(foto.imagem)
+        for tamanho in TAMANHOS:
+            for formato in ('webp', 'jpeg'):
+                url = dados[tamanho][formato]
+                self.assertEqual(url, f'/media/{caminho_derivado(nome, tamanho, formato)}')
+                self.assertTrue(os.path.exists(os.path.join(self.diretorio.name, url[len('/media/'):])))
+
+        self.assertEqual(gerar_derivados(nome, storage), 0)
+
+        remover_derivados(nome, storage)
+        self.assertFalse(derivados_prontos(nome, storage))
+        self.assertTrue(storage.exists(nome))
@@ -0,0 +1,106 @@
+"""
+Testes da instrumentação por requisição (Server-Timing, log estruturado e N+1).
+"""
+import json
+
+import pytest
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import ResolverMatch
+from rest_framework import serializers
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from app_alfa.instrumentacao import InstrumentacaoMiddleware, normalizar_sql, serializers_medidos
+from app_alfa.models import ONG, Membro
+
+
+def _view_com_n_mais_1(request):
+    # Uma consulta por membro: o padrão que o middleware deve apontar
+    for membro in Membro.objects.order_by('pk'):
+        list(membro.presencas_eventos.all())
+    return HttpResponse('ok')
+
+
+@pytest.mark.unit
+class TestInstrumentacao(TestCase):
+    """Testes dos tempos medidos, do cabeçalho e do aviso de consultas repetidas"""
+
+    def test_server_timing_e_log(self):
+        """Testa consultas, serialização e renderização medidas em uma view do DRF"""
+        ONG.objects.create(nome="Casa Esperança")
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create(username="admin@test.com"))
+
+        with self.assertLogs('app_alfa.instrumentacao', level='INFO') as logs:
+            response = client.get('/api/ongs/')
+
+        self.assertEqual(response.status_code, 200)
+        metricas = [metrica.split(';')[0] for metrica in response['Server-Timing'].split(', ')]
+        self.assertEqual(metricas, ['db', 'serializacao', 'renderizacao', 'total'])
+        medicao = response.wsgi_request.medicao
+        self.assertGreater(medicao.serializacao, 0)
+        self.assertGreater(medicao.renderizacao, 0)
+        self.assertIn(f'desc="{medicao.total_consultas} consultas"', response['Server-Timing'])
+
+        linha = json.loads(logs.records[0].getMessage())
+        self.assertEqual(linha['view'], 'app_alfa.viewsets.ONGViewSet.list')
+        self.assertEqual((linha['status'], linha['consultas'], linha['repetidas']), (200, medicao.total_consultas, []))
+
+    def test_aponta_n_mais_1(self):
+        """Testa o aviso com a view de origem quando o mesmo SQL se repete"""
+        for indice in range(6):
+            Membro.objects.create(nome=f"Membro {indice}", email=f"membro{indice}@test.com")
+
+        def resposta(request):
+            request.resolver_match = ResolverMatch(_view_com_n_mais_1, (), {})
+            return _view_com_n_mais_1(request)
+        middleware = InstrumentacaoMiddleware(resposta)
+
+        with self.assertLogs('app_alfa.instrumentacao', level='INFO') as logs:
+            response = middleware(RequestFactory().get('/membros/'))
+
+        self.assertIn('desc="7 consultas"', response['Server-Timing'])
+        linha = json.loads(logs.records[0].getMessage())
+        self.assertEqual(linha['repetidas'][0]['vezes'], 6)
+        aviso = logs.records[1]
+        self.assertEqual(aviso.levelname, 'WARNING')
+        self.assertIn(f'{__name__}._view_com_n_mais_1', aviso.getMessage())
+
+    async def test_requisicao_assincrona(self):
+        """Testa o middleware no modo assíncrono (ASGI): sem thread extra e com as consultas da view"""
+        async def resposta(request):
+            return HttpResponse('ok')
+        self.assertTrue(iscoroutinefunction(InstrumentacaoMiddleware(resposta)))
+
+        usuario = await User.objects.acreate(username="admin@test.com")
+        token = str(AccessToken.for_user(usuario))
+        with self.assertLogs('app_alfa.instrumentacao', level='INFO') as logs:
+            response = await self.async_client.get('/api/ongs/', headers={'Authorization': f'Bearer {token}'})
+
+        self.assertEqual(response.status_code, 200)
+        linha = json.loads(logs.records[0].getMessage())
+        self.assertEqual(linha['view'], 'app_alfa.viewsets.ONGViewSet.list')
+        self.assertGreater(linha['consultas'], 0)
+        self.assertGreater(linha['serializacao_ms'], 0)
+
+    def test_serializers_so_medidos_durante_requisicoes(self):
+        """Testa que a property data do DRF volta à original fora das requisições"""
+        original = serializers.Serializer.__dict__['data']
+        with serializers_medidos():
+            with serializers_medidos():
+                self.assertIsNot(serializers.Serializer.__dict__['data'], original)
+            self.assertIsNot(serializers.Serializer.__dict__['data'], original)
+        self.assertIs(serializers.Serializer.__dict__['data'], original)
+
+        self.client.get('/api/ongs/')
+        self.assertIs(serializers.Serializer.__dict__['data'], original)
+
+    def test_normalizar_sql(self):
+        """Testa que listas IN de tamanhos diferentes contam como o mesmo SQL"""
+        self.assertEqual(
+            normalizar_sql('SELECT 1 WHERE id IN (%s, %s, %s)'),
+            normalizar_sql('SELECT 1 WHERE id IN (%s)'),
+        )
@@ -0,0 +1,113 @@
+"""
+Testes do pacote mensal de relatórios (ZIP com todos os PDFs do mês).
+"""
+import io
+import json
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from app_alfa.models import ONG, Admin, Cargo, DistribuicaoOferta, Membro, Oferta, Transacao, Usuario
+from app_alfa.pacote_mensal import ARQUIVO_TEMPOS, PacoteMensal, encerrar_pool, get_pool, mes_anterior
+from app_alfa.reports import RelatorioONG
+
+
+@pytest.mark.unit
+@pytest.mark.finance
+class TestPacoteMensal(TestCase):
+    """Testes do conteúdo do ZIP, das consultas antecipadas e da renderização em processos"""
+
+    def setUp(self):
+        Membro.objects.create(nome="Maria", email="maria@test.com")
+        Transacao.objects.create(tipo='entrada', categoria='Dízimo', valor=Decimal('100'), data=date(2025, 3, 31))
+        oferta = Oferta.objects.create(valor=Decimal('300'))
+        self.ativa = ONG.objects.create(nome="Casa Esperança")
+        self.inativa = ONG.objects.create(nome="Projeto Antigo", is_active=False)
+        ONG.objects.create(nome="Sem Repasses Inativa", is_active=False)
+        for ong, dia in ((self.ativa, 1), (self.ativa, 31), (self.inativa, 15), (self.ativa, 10)):
+            DistribuicaoOferta.objects.create(
+                oferta=oferta, ong=ong, valor=Decimal('50'), destino='Cestas', meio_envio='pix',
+                data_envio=date(2025, 4 if dia == 10 else 3, dia)
+            )
+
+    def _abrir(self, pacote):
+        return zipfile.ZipFile(io.BytesIO(b''.join(pacote.gerar())))
+
+    def test_conteudo_do_zip(self):
+        """Testa um PDF por relatório, uma ONG por repasse no mês e os tempos registrados"""
+        with self._abrir(PacoteMensal(date(2025, 3, 20))) as arquivo:
+            nomes = arquivo.namelist()
+            self.assertEqual(sorted(nomes), [
+                'eventos.pdf', 'financeiro.pdf', 'membros.pdf',
+                f'ongs/{self.ativa.pk:03d}_casa-esperanca.pdf', f'ongs/{self.inativa.pk:03d}_projeto-antigo.pdf',
+                ARQUIVO_TEMPOS,
+            ])
+            self.assertEqual(nomes[-1], ARQUIVO_TEMPOS)
+            self.assertTrue(arquivo.read('financeiro.pdf').startswith(b'%PDF'))
+            tempos = json.loads(arquivo.read(ARQUIVO_TEMPOS))
+
+        self.assertEqual(tempos['mes'], '2025-03')
+        self.assertEqual(len(tempos['relatorios']), 5)
+        for medidas in tempos['relatorios'].values():
+            self.assertEqual(set(medidas), {'consultas_ms', 'renderizacao_ms', 'bytes'})
+
+    def test_repasses_de_todas_as_ongs_em_uma_consulta(self):
+        """Testa que os relatórios por ONG não consultam o banco por ONG"""
+        with CaptureQueriesContext(connection) as consultas:
+            relatorios = RelatorioONG.do_periodo(date(2025, 3, 1), date(2025, 3, 31))
+            for relatorio in relatorios:
+                relatorio.get_sections()
+        self.assertEqual(len(consultas), 2)
+        self.assertEqual([len(relatorio.distribuicoes) for relatorio in relatorios], [2, 1])
+
+    def test_renderizacao_em_processos(self):
+        """Testa o pool de processos: mesmos arquivos que a renderização sequencial"""
+        with self._abrir(PacoteMensal(date(2025, 3, 1), workers=2)) as arquivo:
+            pdfs = [nome for nome in arquivo.namelist() if nome.endswith('.pdf')]
+            self.assertEqual(len(pdfs), 5)
+            self.assertTrue(all(arquivo.read(nome).startswith(b'%PDF') for nome in pdfs))
+
+    @override_settings(ALFA_RELATORIOS_WORKERS=2)
+    def test_pool_compartilhado_criado_por_spawn(self):
+        """Testa que os pedidos reaproveitam um único pool, sem fork do processo web"""
+        self.addCleanup(encerrar_pool)
+        pool = get_pool()
+        self.assertIs(get_pool(), pool)
+        self.assertEqual(pool._mp_context.get_start_method(), 'spawn')
+
+        for _ in range(2):
+            with self._abrir(PacoteMensal(date(2025, 3, 1), workers=2, pool=get_pool())) as arquivo:
+                self.assertEqual(len([nome for nome in arquivo.namelist() if nome.endswith('.pdf')]), 5)
+        self.assertIs(get_pool(), pool)
+
+    def test_view(self):
+        """Testa o endpoint, o mês padrão e o mês inválido"""
+        self.addCleanup(encerrar_pool)
+        client = APIClient()
+        self.assertEqual(client.get('/api/relatorios/pacote-mensal/').status_code, 401)
+
+        # Cargo sem permissão de relatórios: nada é gerado
+        sem_relatorios = Cargo.objects.create(nome="Recepção")
+        Usuario.objects.create(username="recepcao", email="recepcao@test.com", senha="123", cargo=sem_relatorios)
+        client.force_authenticate(user=User.objects.create(username="recepcao@test.com"))
+        self.assertEqual(client.get('/api/relatorios/pacote-mensal/').status_code, 403)
+
+        Admin.objects.create(nome="Tesoureiro", email="tesoureiro@test.com", senha="123",
+                             cargo=Cargo.objects.create(nome="Tesoureiro", pode_visualizar_relatorios=True))
+        client.force_authenticate(user=User.objects.create(username="tesoureiro@test.com"))
+        response = client.get('/api/relatorios/pacote-mensal/', {'mes': '2025-03'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn('relatorios_2025-03.zip', response['Content-Disposition'])
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as arquivo:
+            self.assertIn('membros.pdf', arquivo.namelist())
+
+        self.assertEqual(client.get('/api/relatorios/pacote-mensal/', {'mes': '03/2025'}).status_code, 400)
+        self.assertEqual(mes_anterior(date(2025, 1, 15)), date(2024, 12, 1))
@@ -0,0 +1,61 @@
+"""
+Testes do motor compartilhado de relatórios PDF.
+"""
+import pytest
+from reportlab.graphics import renderSVG
+from django.test import TestCase
+from django.utils import timezone
+
+from app_alfa.models import Evento, Membro, Transacao, Usuario
+from app_alfa.pdf_templates import ChartSection, PDFCharts, PDFReportEngine, PDFStyles, TableSection, get_report_engine
+from app_alfa.reports import RelatorioEventos, RelatorioFinanceiro, RelatorioMembros
+
+
+@pytest.mark.unit
+class TestPDFReportEngine(TestCase):
+    """Testes do motor único por processo e da API de seções"""
+
+    def setUp(self):
+        usuario = Usuario.objects.create(username="admin_teste", email="admin@test.com", senha="123")
+        Membro.objects.create(nome="Maria", email="maria@test.com", data_nascimento="1990-05-01")
+        Evento.objects.create(titulo="Culto", descricao="Culto", data=timezone.now(), local="Igreja", organizador=usuario)
+        Transacao.objects.create(tipo='entrada', categoria='Dízimo', valor=100, data=timezone.now().date())
+
+    def test_motor_compartilhado(self):
+        """Testa que relatórios diferentes usam o mesmo motor"""
+        self.assertIs(get_report_engine(), get_report_engine())
+        self.assertIsInstance(get_report_engine(), PDFReportEngine)
+
+    def test_relatorios_geram_pdf(self):
+        """Testa os três relatórios montados por seções"""
+        for classe in (RelatorioMembros, RelatorioFinanceiro, RelatorioEventos):
+            with self.subTest(relatorio=classe.__name__):
+                pdf = classe().gerar_pdf()
+                self.assertTrue(pdf.startswith(b'%PDF'))
+
+    def test_secoes(self):
+        """Testa que gráficos sem valores são omitidos e tabelas com título abrem página"""
+        engine = get_report_engine()
+        self.assertEqual(ChartSection('Vazio', 'pie', {'a': 0}, 'Vazio').build(engine), [])
+        self.assertEqual(len(ChartSection('Gráfico', 'bar', {'a': 1}, 'Gráfico').build(engine)), 3)
+        elementos = TableSection(['Nome'], [['Maria']], page_title='Lista').build(engine)
+        self.assertEqual(type(elementos[0]).__name__, 'PageBreak')
+
+    def test_cache_de_graficos(self):
+        """Testa que o mesmo gráfico é reaproveitado (em cópias) e que o cache é limitado"""
+        charts = PDFCharts(PDFStyles(), cache_size=2)
+        dados = {'Ativos': 10, 'Inativos': 2}
+
+        primeiro = charts.create_pie_chart(dados, "Status")
+        repetido = charts.create_pie_chart(dict(dados), "Status")
+        # Mesmo conteúdo, objetos distintos: o ReportLab altera o desenho ao desenhá-lo
+        self.assertIsNot(repetido, primeiro)
+        self.assertEqual(renderSVG.drawToString(repetido), renderSVG.drawToString(primeiro))
+        self.assertTrue(all(a is not b for a, b in zip(repetido.contents, primeiro.contents)))
+        charts.create_pie_chart(dados, "Outro título")
+        charts.create_bar_chart(dados, "Status")
+        self.assertEqual((charts.hits, charts.misses), (1, 3))
+
+        # O mais antigo saiu do cache
+        charts.create_pie_chart(dados, "Status")
+        self.assertEqual((charts.hits, charts.misses), (1, 4))
@@ -0,0 +1,103 @@
+"""
+Testes da exportação XLSX (ações do admin e /api/exportacoes/<tabela>/?formato=xlsx).
+"""
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+from xml.etree import ElementTree
+
+import pytest
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+from rest_framework.test import APIClient
+
+from app_alfa.admin import TransacaoAdmin
+from app_alfa.models import Admin, Cargo, Membro, Transacao, Usuario
+from app_alfa.planilhas import CONTENT_TYPE, PLANILHAS
+
+NS = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+def _ler(conteudo):
+    """({referência: texto} da primeira aba, há fórmulas?, styles.xml)"""
+    with zipfile.ZipFile(io.BytesIO(conteudo)) as pacote:
+        aba = ElementTree.fromstring(pacote.read('xl/worksheets/sheet1.xml'))
+        estilos = pacote.read('xl/styles.xml').decode()
+    celulas = {celula.get('r'): ''.join(celula.itertext()) for celula in aba.iterfind('.//x:c', NS)}
+    return celulas, aba.find('.//x:f', NS) is not None, estilos
+
+
+@pytest.mark.unit
+@pytest.mark.finance
+class TestPlanilhas(TestCase):
+    """Testes dos tipos e formatos das células e das rotas que geram a planilha"""
+
+    def setUp(self):
+        self.admin = Admin.objects.create(nome="Tesoureiro", email="admin@test.com", senha="123")
+        Transacao.objects.create(tipo='entrada', categoria='Dízimo', valor=Decimal('1234.56'),
+                                 data=date(2025, 1, 5), registrado_por=self.admin)
+        Transacao.objects.create(tipo='saida', categoria='Luz', valor=Decimal('0.10'),
+                                 data=date(2025, 1, 6), descricao='=1+1')
+
+    def test_celulas_tipadas(self):
+        """Testa números e datas com formato, rótulos das choices e texto sem fórmula"""
+        arquivo = PLANILHAS['transacoes'].escrever(Transacao.objects.order_by('pk'))
+        celulas, formulas, estilos = _ler(arquivo.read())
+
+        self.assertEqual([celulas[f'{letra}1'] for letra in 'ABCDE'], ['ID', 'Data', 'Tipo', 'Categoria', 'Valor'])
+        self.assertEqual(celulas['B2'], '45662')  # 05/01/2025 como número de série
+        self.assertEqual(celulas['E2'], '1234.56')
+        self.assertEqual(celulas['H2'], 'Tesoureiro')
+        self.assertEqual(celulas['C3'], 'Saída')
+        self.assertEqual(celulas['G3'], '=1+1')
+        self.assertNotIn('H3', celulas)
+        self.assertFalse(formulas)
+        self.assertIn('formatCode="&quot;R$&quot; #,##0.00"', estilos)
+        self.assertIn('formatCode="DD/MM/YYYY"', estilos)
+
+    def test_acao_do_admin(self):
+        """Testa que a ação do admin devolve a planilha só das linhas selecionadas"""
+        request = RequestFactory().post('/admin/app_alfa/transacao/')
+        modelo_admin = TransacaoAdmin(Transacao, admin.site)
+        response = modelo_admin.exportar_transacoes(request, Transacao.objects.filter(categoria='Luz'))
+
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+        self.assertIn('transacoes_', response['Content-Disposition'])
+        celulas, _, _ = _ler(b''.join(response.streaming_content))
+        self.assertEqual(celulas['D2'], 'Luz')
+        self.assertNotIn('A3', celulas)
+
+    def test_api(self):
+        """Testa ?formato=xlsx na exportação e as tabelas sem planilha"""
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create(username="admin@test.com"))
+        Membro.objects.create(nome="Maria", email="maria@test.com", cpf="123.456.789-00")
+
+        response = client.get('/api/exportacoes/membros/', {'formato': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        celulas, _, _ = _ler(b''.join(response.streaming_content))
+        self.assertEqual((celulas['B2'], celulas['G2']), ('Maria', 'Ativo'))
+        self.assertNotIn('123.456.789-00', celulas.values())
+
+        self.assertEqual(client.get('/api/exportacoes/ofertas/', {'formato': 'xlsx'}).status_code, 400)
+        self.assertEqual(client.get('/api/exportacoes/transacoes/', {
+            'formato': 'xlsx', 'desde': '2025-01-01T00:00:00Z'
+        }).status_code, 400)
+
+    def test_api_exige_permissao_da_tabela(self):
+        """Testa que a planilha segue a mesma permissão por tabela da exportação colunar"""
+        client = APIClient()
+        Usuario.objects.create(username="membro", email="membro@test.com", senha="123")
+        client.force_authenticate(user=User.objects.create(username="membro@test.com"))
+        for tabela in ('membros', 'transacoes', 'eventos'):
+            self.assertEqual(client.get(f'/api/exportacoes/{tabela}/', {'formato': 'xlsx'}).status_code, 403)
+
+        Usuario.objects.create(username="tesoureiro", email="tesoureiro@test.com", senha="123",
+                               cargo=Cargo.objects.create(nome="Tesoureiro", pode_visualizar_relatorios=True))
+        client.force_authenticate(user=User.objects.create(username="tesoureiro@test.com"))
+        self.assertEqual(client.get('/api/exportacoes/membros/', {'formato': 'xlsx'}).status_code, 403)
+        response = client.get('/api/exportacoes/transacoes/', {'formato': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
@@ -0,0 +1,100 @@
+"""
+Testes do razão colunar em memória (recortes sem nova consulta a Transacao).
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from app_alfa.models import Admin, Transacao
+from app_alfa.razao_colunar import RazaoColunar
+
+
+@pytest.mark.unit
+@pytest.mark.finance
+class TestRazaoColunar(TestCase):
+    """Testes dos recortes, da atualização incremental e do descarte por memória"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = Admin.objects.create(nome="Admin", email="admin@test.com", senha="123")
+        self.razao = RazaoColunar()
+
+    def _transacao(self, dia, valor, tipo=Transacao.ENTRADA, categoria="Dízimo", metodo="pix"):
+        # Sinais invalidam a versão dos dados só depois do commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return Transacao.objects.create(
+                tipo=tipo, categoria=categoria, valor=Decimal(valor), data=dia,
+                metodo_pagamento=metodo, registrado_por=self.admin
+            )
+
+    def test_agrupa_e_filtra(self):
+        """Testa totais por mês e categoria, com filtro por método de pagamento"""
+        self._transacao(date(2025, 1, 10), '100.00')
+        self._transacao(date(2025, 1, 20), '50.00', metodo="dinheiro")
+        self._transacao(date(2025, 2, 5), '30.00', tipo=Transacao.SAIDA, categoria="Luz")
+
+        grupos, totais = self.razao.consultar(agrupar_por=('mes', 'categoria'))
+        self.assertEqual([(linha['mes'], linha['categoria'], linha['saldo'], linha['quantidade']) for linha in grupos], [
+            (date(2025, 1, 1), 'Dízimo', Decimal('150.00'), 2),
+            (date(2025, 2, 1), 'Luz', Decimal('-30.00'), 1),
+        ])
+        self.assertEqual((totais['entradas'], totais['saidas'], totais['quantidade']), (Decimal('150.00'), Decimal('30.00'), 3))
+
+        grupos, totais = self.razao.consultar(filtros={'metodo_pagamento': ['pix'], 'categoria': ['DIZIMO']},
+                                              agrupar_por=('registrado_por',))
+        self.assertEqual(grupos, [{
+            'registrado_por': self.admin.pk, 'entradas': Decimal('100.00'), 'saidas': Decimal('0.00'),
+            'saldo': Decimal('100.00'), 'quantidade': 1,
+        }])
+
+        # Sem alterações nos dados, o recorte seguinte só lê a versão no cache compartilhado
+        with CaptureQueriesContext(connection) as consultas:
+            self.razao.consultar(inicio=date(2025, 2, 1), agrupar_por=('tipo',))
+        self.assertEqual(len(consultas), 1)
+        self.assertIn('alfa_cache', consultas[0]['sql'])
+
+    def test_atualizacao_incremental(self):
+        """Testa que inclusões, edições e exclusões aparecem no próximo recorte"""
+        primeira = self._transacao(date(2025, 1, 10), '100.00')
+        segunda = self._transacao(date(2025, 1, 11), '40.00')
+        self.razao.consultar()
+        self.assertEqual(self.razao.carregamentos, 1)
+
+        self._transacao(date(2025, 1, 12), '5.00', categoria="Oferta")
+        primeira.valor = Decimal('90.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            primeira.save()
+            segunda.delete()
+
+        grupos, totais = self.razao.consultar(agrupar_por=('categoria',))
+        self.assertEqual([(linha['categoria'], linha['saldo']) for linha in grupos], [
+            ('Dízimo', Decimal('90.00')), ('Oferta', Decimal('5.00')),
+        ])
+        self.assertEqual(self.razao.carregamentos, 1)
+
+        # Exclusão física não deixa rastro em updated_at: a contagem por ano recarrega o segmento
+        with self.captureOnCommitCallbacks(execute=True):
+            Transacao.objects.filter(categoria="Oferta").delete()
+        _, totais = self.razao.consultar()
+        self.assertEqual(totais['saldo'], Decimal('90.00'))
+        self.assertEqual(self.razao.carregamentos, 2)
+
+    def test_descarta_anos_menos_usados(self):
+        """Testa o limite de memória: só o ano mais recente fica carregado"""
+        self._transacao(date(2024, 6, 1), '10.00')
+        self._transacao(date(2025, 6, 1), '20.00')
+        razao = RazaoColunar(memoria_maxima=1)
+
+        _, totais = razao.consultar(agrupar_por=('ano',))
+        self.assertEqual(totais['saldo'], Decimal('30.00'))
+        self.assertEqual(list(razao.segmentos), [2025])
+        self.assertEqual(razao.descartes, 1)
+
+        razao.consultar(inicio=date(2024, 1, 1), fim=date(2024, 12, 31))
+        self.assertEqual(list(razao.segmentos), [2024])
+        self.assertEqual(razao.carregamentos, 3)
@@ -0,0 +1,92 @@
+"""
+Testes do pub/sub de tempo real e do stream SSE.
+"""
+import asyncio
+
+import pytest
+
+from app_alfa.tempo_real import BrokerMemoria, definir_broker, topico_evento
+from app_alfa.tempo_real_views import EventosTempoRealView
+
+
+@pytest.mark.unit
+@pytest.mark.events
+class TestBrokerMemoria:
+    """Testes do broker em memória"""
+    
+    def test_publicacao_de_outra_thread_chega_ao_assinante(self):
+        """Testa entrega de mensagem publicada por uma view síncrona (outra thread)"""
+        broker = BrokerMemoria()
+        
+        async def cenario():
+            assinatura = broker.assinar([topico_evento(1)])
+            await asyncio.get_running_loop().run_in_executor(
+                None, broker.publicar, topico_evento(1), 'presencas', {'confirmados_count': 3}
+            )
+            mensagem = await assinatura.proxima(timeout=1)
+            assinatura.cancelar()
+            return mensagem
+        
+        mensagem = asyncio.run(cenario())
+        assert mensagem['tipo'] == 'presencas'
+        assert mensagem['dados'] == {'confirmados_count': 3}
+        assert broker._assinaturas == {}
+    
+    def test_topicos_sao_isolados(self):
+        """Testa que assinante de um evento não recebe mensagens de outro"""
+        broker = BrokerMemoria()
+        
+        async def cenario():
+            assinatura = broker.assinar([topico_evento(1)])
+            broker.publicar(topico_evento(2), 'presencas', {'confirmados_count': 1})
+            try:
+                with pytest.raises(asyncio.TimeoutError):
+                    await assinatura.proxima(timeout=0.05)
+            finally:
+                assinatura.cancelar()
+        
+        asyncio.run(cenario())
+        assert len(broker.historico) == 1
+    
+    def test_fila_cheia_descarta_mais_antiga(self):
+        """Testa que cliente lento não faz a fila crescer sem limite"""
+        broker = BrokerMemoria(tamanho_fila=2)
+        
+        async def cenario():
+            assinatura = broker.assinar(['dashboard'])
+            for i in range(5):
+                broker.publicar('dashboard', 'membro', {'n': i})
+            await asyncio.sleep(0)
+            recebidas = [(await assinatura.proxima(timeout=1))['dados']['n'] for _ in range(2)]
+            assinatura.cancelar()
+            return recebidas
+        
+        assert asyncio.run(cenario()) == [3, 4]
+
+
+@pytest.mark.unit
+@pytest.mark.events
+class TestStreamSSE:
+    """Testes do formato do stream Server-Sent Events"""
+    
+    def test_stream_envia_eventos_no_formato_sse(self):
+        """Testa abertura do stream e formatação de uma mensagem"""
+        broker = definir_broker(BrokerMemoria())
+        
+        async def cenario():
+            stream = EventosTempoRealView().stream([topico_evento(7)])
+            abertura = await stream.__anext__()
+            broker.publicar(topico_evento(7), 'presencas', {'evento': 7, 'confirmados_count': 12})
+            mensagem = await stream.__anext__()
+            await stream.aclose()
+            return abertura, mensagem
+        
+        try:
+            abertura, mensagem = asyncio.run(cenario())
+        finally:
+            definir_broker(None)
+        
+        assert abertura == ': conectado\n\n'
+        assert mensagem.startswith('event: presencas\n')
+        assert '"confirmados_count": 12' in mensagem
+        assert broker._assinaturas == {}
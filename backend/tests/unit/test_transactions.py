@@ -4,13 +4,17 @@ Testes de modelos de Oferta, Doação e Transacao.
 """
 import pytest
 from django.test import TestCase, TransactionTestCase
+from datetime import date
 from decimal import Decimal
+from django.core.management import call_command
 from django.utils import timezone
+import io
 
 from app_alfa.models import (
     Admin, Oferta, DistribuicaoOferta, ONG, Membro, 
-    Doacao, Transacao
+    Doacao, Transacao, ResumoFinanceiroMensal, CategoriaFinanceira
 )
+from app_alfa.pdf_utils import MetricsCalculator
 
 
 @pytest.mark.unit
@@ -469,3 +473,87 @@ class TestTransacaoFinancial(TransactionTestCase):
         
         assert pix_count == 1
         assert dinheiro_count == 1
+
+
+@pytest.mark.unit
+@pytest.mark.finance
+class TestResumoFinanceiroMensal(TestCase):
+    """Testes dos resumos mensais mantidos incrementalmente"""
+
+    def _resumo(self, mes, tipo, categoria):
+        return ResumoFinanceiroMensal.objects.filter(mes=mes, tipo=tipo, categoria=categoria).values_list(
+            'total', 'quantidade'
+        ).first()
+
+    def test_criacao_edicao_e_exclusao(self):
+        """Testa que o resumo acompanha criação, edição, exclusão lógica e física"""
+        transacao = Transacao.objects.create(tipo='entrada', categoria='Dízimo', valor='100.00', data='2025-03-10')
+        Transacao.objects.create(tipo='entrada', categoria='Dízimo', valor=Decimal('50.00'), data=date(2025, 3, 20))
+        self.assertEqual(self._resumo(date(2025, 3, 1), 'entrada', 'Dízimo'), (Decimal('150.00'), 2))
+
+        # Troca de mês e de valor: sai de março, entra em abril
+        transacao.data = date(2025, 4, 1)
+        transacao.valor = Decimal('120.00')
+        transacao.save()
+        self.assertEqual(self._resumo(date(2025, 3, 1), 'entrada', 'Dízimo'), (Decimal('50.00'), 1))
+        self.assertEqual(self._resumo(date(2025, 4, 1), 'entrada', 'Dízimo'), (Decimal('120.00'), 1))
+
+        transacao.delete()
+        self.assertEqual(self._resumo(date(2025, 4, 1), 'entrada', 'Dízimo'), (Decimal('0.00'), 0))
+
+        Transacao.objects.get(data=date(2025, 3, 20)).hard_delete()
+        self.assertEqual(self._resumo(date(2025, 3, 1), 'entrada', 'Dízimo'), (Decimal('0.00'), 0))
+
+    def test_reconstrucao(self):
+        """Testa que o comando refaz os resumos alterados sem sinais"""
+        Transacao.objects.create(tipo='saida', categoria='Água', valor=Decimal('80.00'), data=date(2025, 1, 5))
+        Transacao.objects.create(tipo='saida', categoria='Água', valor=Decimal('20.00'), data=date(2025, 1, 25))
+        # update() não dispara sinais
+        Transacao.objects.filter(valor=Decimal('20.00')).update(valor=Decimal('40.00'))
+        self.assertEqual(self._resumo(date(2025, 1, 1), 'saida', 'Água'), (Decimal('100.00'), 2))
+
+        call_command('reconstruir_resumos_financeiros', stdout=io.StringIO())
+        self.assertEqual(self._resumo(date(2025, 1, 1), 'saida', 'Água'), (Decimal('120.00'), 2))
+
+    def test_metricas_com_meses_parciais(self):
+        """Testa que meses inteiros (resumo) e pontas parciais (transações) somam como antes"""
+        for dia, valor in [(date(2025, 1, 10), '10'), (date(2025, 1, 31), '20'), (date(2025, 2, 15), '30'),
+                           (date(2025, 3, 5), '40'), (date(2025, 3, 20), '50')]:
+            Transacao.objects.create(tipo='entrada', categoria='Oferta', valor=Decimal(valor), data=dia)
+        Transacao.objects.create(tipo='saida', categoria='Luz', valor=Decimal('25'), data=date(2025, 2, 1))
+        Transacao.objects.create(tipo='entrada', categoria='Oferta', valor=Decimal('5'), data=date(2024, 2, 10))
+
+        somas = ResumoFinanceiroMensal.somar_periodo(date(2025, 1, 31), date(2025, 3, 5))
+        self.assertEqual(somas[('entrada', 'Oferta')], [Decimal('90'), 3])
+        self.assertEqual(somas[('saida', 'Luz')], [Decimal('25'), 1])
+
+        metricas = MetricsCalculator(date(2025, 1, 31), date(2025, 3, 5)).calculate_financial_metrics()
+        self.assertEqual(metricas['receitas'], 90.0)
+        self.assertEqual(metricas['despesas'], 25.0)
+        self.assertEqual(metricas['categorias_gastos'], [{'categoria': 'Luz', 'total': Decimal('25')}])
+        self.assertEqual(metricas['receitas_ano_anterior'], 5.0)
+
+
+@pytest.mark.unit
+@pytest.mark.finance
+class TestCategoriaFinanceira(TestCase):
+    """Testes da categoria normalizada das transações"""
+
+    def test_grafias_diferentes_mesma_categoria(self):
+        """Testa que acentos, caixa e espaços não criam categorias novas"""
+        for texto in ['Dízimo', 'dizimo', '  DIZIMO ']:
+            Transacao.objects.create(tipo='entrada', categoria=texto, valor=Decimal('10'), data=date(2025, 5, 1))
+
+        categoria = CategoriaFinanceira.objects.get()
+        self.assertEqual((categoria.nome, categoria.chave), ('Dízimo', CategoriaFinanceira.DIZIMO))
+        self.assertEqual(set(Transacao.objects.values_list('categoria', flat=True)), {'Dízimo'})
+        self.assertEqual(ResumoFinanceiroMensal.objects.get().quantidade, 3)
+
+    def test_troca_de_categoria(self):
+        """Testa que editar o texto troca a categoria vinculada"""
+        transacao = Transacao.objects.create(tipo='saida', categoria='Água', valor=Decimal('10'), data=date(2025, 5, 1))
+        transacao.categoria = 'energia'
+        transacao.save()
+        self.assertEqual(transacao.categoria_financeira.chave, 'energia')
+        self.assertEqual(CategoriaFinanceira.objects.count(), 2)
+
@@ -13,7 +13,7 @@ import {
 import { cn } from '@/lib/utils';
 
 interface ImageUploadProps {
-  onUpload: (file: File) => Promise<string>;
+  onUpload: (file: File, onProgress?: (percent: number) => void) => Promise<string>;
   onRemove?: (url: string) => void;
   existingImages?: string[];
   maxImages?: number;
@@ -65,20 +65,9 @@ export function ImageUpload({
     setUploadProgress(0);
 
     try {
-      // Simular progresso de upload
-      const progressInterval = setInterval(() => {
-        setUploadProgress(prev => {
-          if (prev >= 90) {
-            clearInterval(progressInterval);
-            return 90;
-          }
-          return prev + 10;
-        });
-      }, 100);
-
-      const imageUrl = await onUpload(file);
+      // Progresso informado por quem faz o upload (bytes realmente enviados)
+      const imageUrl = await onUpload(file, setUploadProgress);
       
-      clearInterval(progressInterval);
       setUploadProgress(100);
       
       // Reset após sucesso
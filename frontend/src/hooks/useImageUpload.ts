@@ -14,47 +14,48 @@ export const useImageUpload = () => {
   const uploadImage = async (
     file: File,
     endpoint: 'membros' | 'eventos' | 'postagens',
-    entityId?: number
+    entityId?: number,
+    onProgress?: (percent: number) => void
   ): Promise<UploadResult> => {
     setUploading(true);
     setProgress(0);
 
     try {
-      const formData = new FormData();
-      formData.append('imagem', file);
-      
-      if (entityId) {
-        formData.append('entity_id', entityId.toString());
-      }
-
-      // Simular progresso
-      const progressInterval = setInterval(() => {
-        setProgress(prev => {
-          if (prev >= 90) {
-            clearInterval(progressInterval);
-            return 90;
-          }
-          return prev + 10;
-        });
-      }, 100);
+      const reportProgress = (percent: number) => {
+        setProgress(percent);
+        onProgress?.(percent);
+      };
 
       let response;
-      switch (endpoint) {
-        case 'membros':
-          response = await apiClient.uploadMembroFoto(formData, entityId);
-          break;
-        case 'eventos':
-          response = await apiClient.uploadEventoFoto(formData, entityId);
-          break;
-        case 'postagens':
-          response = await apiClient.uploadPostagemFoto(formData, entityId);
-          break;
-        default:
-          throw new Error('Endpoint não suportado');
+      if (entityId && endpoint !== 'membros') {
+        // Fotos de eventos/postagens já existentes: upload em partes com progresso real
+        const destino = endpoint === 'eventos' ? 'foto_evento' : 'foto_postagem';
+        const resultado = await apiClient.uploadInParts(file, destino, entityId, { onProgress: reportProgress });
+        response = resultado.objeto;
+      } else {
+        const formData = new FormData();
+        formData.append('imagem', file);
+
+        if (entityId) {
+          formData.append('entity_id', entityId.toString());
+        }
+
+        switch (endpoint) {
+          case 'membros':
+            response = await apiClient.uploadMembroFoto(formData, entityId);
+            break;
+          case 'eventos':
+            response = await apiClient.uploadEventoFoto(formData, entityId);
+            break;
+          case 'postagens':
+            response = await apiClient.uploadPostagemFoto(formData, entityId);
+            break;
+          default:
+            throw new Error('Endpoint não suportado');
+        }
       }
 
-      clearInterval(progressInterval);
-      setProgress(100);
+      reportProgress(100);
 
       return {
         url: response.url || response.imagem,
@@ -0,0 +1,30 @@
+import { useEffect, useRef } from 'react';
+import { apiClient } from '@/lib/api';
+
+export interface MensagemTempoReal {
+  tipo: string;
+  topico: string;
+  [campo: string]: any;
+}
+
+const TIPOS_MENSAGEM = ['presencas', 'comentario', 'membro', 'transacao'];
+
+// Hook para assinar tópicos do stream de tempo real ('dashboard', 'evento:<id>')
+export const useTempoReal = (topicos: string[], onMensagem: (mensagem: MensagemTempoReal) => void) => {
+  const callbackRef = useRef(onMensagem);
+  callbackRef.current = onMensagem;
+  const chave = topicos.join(',');
+
+  useEffect(() => {
+    if (!chave) return;
+
+    const stream = apiClient.openRealtimeStream(chave.split(','));
+    const handler = (event: MessageEvent) => {
+      callbackRef.current({ tipo: event.type, ...JSON.parse(event.data) });
+    };
+    TIPOS_MENSAGEM.forEach((tipo) => stream.addEventListener(tipo, handler));
+
+    // O EventSource reconecta sozinho em quedas de rede
+    return () => stream.close();
+  }, [chave]);
+};
@@ -1,5 +1,5 @@
-import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
-import { apiClient, Transacao, TransacaoCreate } from '@/lib/api';
+import { useInfiniteQuery, useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
+import { apiClient, Granularidade, Transacao, TransacaoCreate } from '@/lib/api';
 
 // Hook para buscar transações
 export const useTransacoes = (params?: { tipo?: string; categoria?: string }) => {
@@ -10,6 +10,49 @@ export const useTransacoes = (params?: { tipo?: string; categoria?: string }) =>
   });
 };
 
+// Hook para o extrato com saldo corrente (páginas por cursor, em ordem cronológica)
+export const useExtrato = (params?: { inicio?: string; limite?: number }) => {
+  return useInfiniteQuery({
+    queryKey: ['transacoes', 'extrato', params],
+    queryFn: ({ pageParam }) => apiClient.getExtrato({ ...params, cursor: pageParam }),
+    initialPageParam: null as string | null,
+    getNextPageParam: (ultimaPagina) => ultimaPagina.proximo,
+    staleTime: 5 * 60 * 1000, // 5 minutos
+  });
+};
+
+// Hook para recortes do razão (totais agrupados por mês, categoria, método...)
+export const useRecortesFinanceiros = (params: Parameters<typeof apiClient.getRecortesFinanceiros>[0]) => {
+  return useQuery({
+    queryKey: ['transacoes', 'recortes', params],
+    queryFn: () => apiClient.getRecortesFinanceiros(params),
+    staleTime: 60 * 1000, // 1 minuto
+  });
+};
+
+// Hook para a série de tendência (entradas/saídas por dia, semana ou mês)
+export const useTendenciaFinanceira = (params?: {
+  granularidade?: Granularidade;
+  inicio?: string;
+  fim?: string;
+  porCategoria?: boolean;
+}) => {
+  return useQuery({
+    queryKey: ['transacoes', 'tendencia', params],
+    queryFn: () => apiClient.getTendenciaFinanceira(params),
+    staleTime: 5 * 60 * 1000, // 5 minutos
+  });
+};
+
+// Hook para o autocomplete de categorias (mais usadas primeiro)
+export const useCategoriasFinanceiras = (q?: string) => {
+  return useQuery({
+    queryKey: ['categorias-financeiras', q],
+    queryFn: () => apiClient.getCategoriasFinanceiras(q),
+    staleTime: 5 * 60 * 1000, // 5 minutos
+  });
+};
+
 // Hook para buscar uma transação específica
 export const useTransacao = (id: number) => {
   return useQuery({
@@ -1,6 +1,16 @@
 // Configuração da API
 const API_BASE_URL = 'http://localhost:8000/api';
 
+// Miniaturas geradas no servidor (null enquanto não ficam prontas: usar o original)
+export type UploadDestino = 'foto_evento' | 'foto_postagem' | 'comprovante_oferta';
+
+export interface ImagemDerivados {
+  thumb: { webp: string; jpeg: string };
+  medio: { webp: string; jpeg: string };
+  srcset_webp: string;
+  srcset_jpeg: string;
+}
+
 // Tipos para autenticação
 export interface LoginRequest {
   email: string;
@@ -34,6 +44,7 @@ export interface Membro {
   email: string;
   endereco?: string;
   foto?: string;
+  foto_derivados?: ImagemDerivados | null;
   status: 'ativo' | 'inativo' | 'falecido' | 'afastado';
   data_batismo?: string;
   igreja_origem?: string;
@@ -71,6 +82,9 @@ export interface Evento {
   observacoes?: string;
   organizador_nome: string;
   foto?: string;
+  foto_derivados?: ImagemDerivados | null;
+  confirmados_count: number;
+  comentarios_count: number;
 }
 
 export interface EventoCreate {
@@ -97,6 +111,63 @@ export interface Transacao {
   updated_at: string;
 }
 
+export interface CategoriaFinanceira {
+  id: number;
+  nome: string;
+  chave: string;
+  uso: number;
+}
+
+// Extrato com saldo corrente (valores decimais chegam como string)
+export interface ExtratoLinha {
+  id: number;
+  data: string;
+  tipo: 'entrada' | 'saida';
+  categoria: string;
+  descricao: string | null;
+  metodo_pagamento: string | null;
+  valor: string;
+  valor_assinado: string;
+  saldo: string;
+}
+
+export interface ExtratoPagina {
+  saldo_inicial: string;
+  results: ExtratoLinha[];
+  proximo: string | null;
+}
+
+// Série de tendência financeira: uma coluna por período, todos os períodos presentes
+export type Granularidade = 'dia' | 'semana' | 'mes';
+
+export interface TendenciaFinanceira {
+  granularidade: Granularidade;
+  inicio: string;
+  fim: string;
+  periodos: string[];
+  series: {
+    tipo: 'entrada' | 'saida';
+    categoria: string | null;
+    totais: string[];
+    quantidades: number[];
+  }[];
+}
+
+export type DimensaoRecorte = 'tipo' | 'categoria' | 'metodo_pagamento' | 'registrado_por' | 'ano' | 'mes';
+
+export interface TotaisRecorte {
+  entradas: string;
+  saidas: string;
+  saldo: string;
+  quantidade: number;
+}
+
+export interface RecorteFinanceiro {
+  agrupar: DimensaoRecorte[];
+  grupos: (TotaisRecorte & Partial<Record<DimensaoRecorte, string | number | null>>)[];
+  totais: TotaisRecorte;
+}
+
 export interface TransacaoCreate {
   tipo: 'entrada' | 'saida';
   categoria: string;
@@ -353,6 +424,59 @@ class ApiClient {
     return this.request<Transacao[]>(endpoint);
   }
 
+  async getExtrato(params?: { cursor?: string | null; inicio?: string; limite?: number }): Promise<ExtratoPagina> {
+    const queryParams = new URLSearchParams();
+    if (params?.cursor) queryParams.append('cursor', params.cursor);
+    if (params?.inicio) queryParams.append('inicio', params.inicio);
+    if (params?.limite) queryParams.append('limite', params.limite.toString());
+
+    const queryString = queryParams.toString();
+    return this.request<ExtratoPagina>(queryString ? `/transacoes/extrato/?${queryString}` : '/transacoes/extrato/');
+  }
+
+  async getTendenciaFinanceira(params?: {
+    granularidade?: Granularidade;
+    inicio?: string;
+    fim?: string;
+    porCategoria?: boolean;
+  }): Promise<TendenciaFinanceira> {
+    const queryParams = new URLSearchParams();
+    if (params?.granularidade) queryParams.append('granularidade', params.granularidade);
+    if (params?.inicio) queryParams.append('inicio', params.inicio);
+    if (params?.fim) queryParams.append('fim', params.fim);
+    if (params?.porCategoria) queryParams.append('por_categoria', 'true');
+
+    const queryString = queryParams.toString();
+    return this.request<TendenciaFinanceira>(queryString ? `/transacoes/tendencia/?${queryString}` : '/transacoes/tendencia/');
+  }
+
+  async getRecortesFinanceiros(params: {
+    agrupar?: DimensaoRecorte[];
+    inicio?: string;
+    fim?: string;
+    tipo?: string[];
+    categoria?: string[];
+    metodoPagamento?: string[];
+    registradoPor?: number[];
+  } = {}): Promise<RecorteFinanceiro> {
+    const queryParams = new URLSearchParams();
+    params.agrupar?.forEach((dimensao) => queryParams.append('agrupar', dimensao));
+    if (params.inicio) queryParams.append('inicio', params.inicio);
+    if (params.fim) queryParams.append('fim', params.fim);
+    params.tipo?.forEach((valor) => queryParams.append('tipo', valor));
+    params.categoria?.forEach((valor) => queryParams.append('categoria', valor));
+    params.metodoPagamento?.forEach((valor) => queryParams.append('metodo_pagamento', valor));
+    params.registradoPor?.forEach((valor) => queryParams.append('registrado_por', String(valor)));
+
+    const queryString = queryParams.toString();
+    return this.request<RecorteFinanceiro>(queryString ? `/transacoes/recortes/?${queryString}` : '/transacoes/recortes/');
+  }
+
+  async getCategoriasFinanceiras(q?: string): Promise<CategoriaFinanceira[]> {
+    const endpoint = q ? `/categorias-financeiras/?q=${encodeURIComponent(q)}` : '/categorias-financeiras/';
+    return this.request<CategoriaFinanceira[]>(endpoint);
+  }
+
   async getTransacao(id: number): Promise<Transacao> {
     return this.request<Transacao>(`/transacoes/${id}/`);
   }
@@ -472,6 +596,77 @@ class ApiClient {
     });
   }
 
+  // Upload em partes com retomada (/api/uploads/): o progresso reflete os bytes
+  // realmente enviados e uma parte que falha é retomada do último byte confirmado
+  async uploadInParts(
+    file: File,
+    destino: UploadDestino,
+    objetoId: number,
+    options: { descricao?: string; onProgress?: (percent: number) => void } = {}
+  ): Promise<any> {
+    const sessao = await this.request<any>('/uploads/', {
+      method: 'POST',
+      body: JSON.stringify({
+        destino,
+        objeto_id: objetoId,
+        nome_arquivo: file.name,
+        descricao: options.descricao,
+        tamanho_total: file.size,
+      }),
+    });
+
+    let recebido: number = sessao.recebido;
+    let falhas = 0;
+    while (recebido < file.size) {
+      const fim = Math.min(recebido + sessao.tamanho_parte, file.size);
+      const inicio = recebido;
+      try {
+        const status = await this.putUploadPart(sessao.token, file.slice(inicio, fim), inicio, file.size, (enviados) => {
+          options.onProgress?.(Math.round(((inicio + enviados) * 100) / file.size));
+        });
+        recebido = status.recebido;
+        falhas = 0;
+      } catch (error) {
+        if (++falhas > 3) {
+          throw error;
+        }
+        // Conexão caiu no meio da parte: perguntar ao servidor de onde continuar
+        const status = await this.request<any>(`/uploads/${sessao.token}/`);
+        recebido = status.recebido;
+      }
+    }
+
+    return this.request<any>(`/uploads/${sessao.token}/concluir/`, { method: 'POST' });
+  }
+
+  private putUploadPart(
+    token: string,
+    parte: Blob,
+    inicio: number,
+    total: number,
+    onUploadProgress: (enviados: number) => void
+  ): Promise<any> {
+    // XMLHttpRequest porque o fetch não expõe o progresso do envio
+    return new Promise((resolve, reject) => {
+      const xhr = new XMLHttpRequest();
+      xhr.open('PUT', `${this.baseURL}/uploads/${token}/parte/`);
+      xhr.setRequestHeader('Authorization', `Bearer ${TokenManager.getAccessToken() ?? ''}`);
+      xhr.setRequestHeader('Content-Type', 'application/octet-stream');
+      xhr.setRequestHeader('Content-Range', `bytes ${inicio}-${inicio + parte.size - 1}/${total}`);
+      xhr.upload.onprogress = (event) => onUploadProgress(event.loaded);
+      xhr.onload = () => {
+        const data = xhr.responseText ? JSON.parse(xhr.responseText) : {};
+        if (xhr.status >= 200 && xhr.status < 300) {
+          resolve(data);
+        } else {
+          reject(new Error(data.message || `Erro ${xhr.status} no envio da parte`));
+        }
+      };
+      xhr.onerror = () => reject(new Error('Falha de rede no envio da parte'));
+      xhr.send(parte);
+    });
+  }
+
   async deleteImage(imageUrl: string, endpoint: 'membros' | 'eventos' | 'postagens', entityId: number): Promise<void> {
     const baseEndpoint = endpoint === 'membros' ? '/membros' : endpoint === 'eventos' ? '/eventos' : '/postagens';
     return this.request<void>(`${baseEndpoint}/${entityId}/delete-foto/`, {
@@ -518,6 +713,24 @@ class ApiClient {
     });
   }
 
+  // Stream de tempo real (SSE). EventSource não envia cabeçalhos: o token vai na URL
+  openRealtimeStream(topicos: string[]): EventSource {
+    const params = new URLSearchParams({
+      topicos: topicos.join(','),
+      token: TokenManager.getAccessToken() ?? '',
+    });
+    return new EventSource(`${this.baseURL}/tempo-real/?${params.toString()}`);
+  }
+
+  // Check-ins capturados offline: cada item leva uma chave gerada no dispositivo,
+  // então reenvios (inclusive pelo retry após 401) não duplicam presenças
+  async syncOfflineCheckins(checkins: { chave: string; evento: number; membro?: number; codigo?: string }[]): Promise<any> {
+    return this.request<any>('/eventos-presencas/sincronizar/', {
+      method: 'POST',
+      body: JSON.stringify({ checkins }),
+    });
+  }
+
   async getEventComments(eventoId?: number): Promise<any> {
     const url = eventoId ? `/eventos-comentarios/?evento=${eventoId}` : '/eventos-comentarios/';
     return this.request<any>(url);
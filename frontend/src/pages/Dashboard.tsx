@@ -1,7 +1,8 @@
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { Users, Calendar, DollarSign, TrendingUp, UserPlus, CalendarDays, Loader2 } from "lucide-react";
 import { apiClient } from '@/lib/api';
-import { useEffect, useState } from 'react';
+import { useCallback, useEffect, useState } from 'react';
+import { useTempoReal } from '@/hooks/useTempoReal';
 
 export default function Dashboard() {
   const [membros, setMembros] = useState<any[]>([]);
@@ -12,35 +13,40 @@ export default function Dashboard() {
 
 
 
-  useEffect(() => {
-    const loadData = async () => {
-      try {
-        setIsLoading(true);
-        setError(null);
-        
-        const [membrosData, eventosData, transacoesData] = await Promise.all([
-          apiClient.getMembros(),
-          apiClient.getEventos(),
-          apiClient.getTransacoes()
-        ]);
-        
-        setMembros(membrosData);
-        setEventos(eventosData);
-        setTransacoes(transacoesData);
-      } catch (err: any) {
-        console.error("Erro ao carregar dados:", err);
-        setError(err.message || "Erro ao carregar dados");
-        // Em caso de erro, definir arrays vazios para evitar tela branca
-        setMembros([]);
-        setEventos([]);
-        setTransacoes([]);
-      } finally {
-        setIsLoading(false);
-      }
-    };
+  const loadData = useCallback(async (silencioso = false) => {
+    try {
+      if (!silencioso) setIsLoading(true);
+      setError(null);
+      
+      const [membrosData, eventosData, transacoesData] = await Promise.all([
+        apiClient.getMembros(),
+        apiClient.getEventos(),
+        apiClient.getTransacoes()
+      ]);
+      
+      setMembros(membrosData);
+      setEventos(eventosData);
+      setTransacoes(transacoesData);
+    } catch (err: any) {
+      console.error("Erro ao carregar dados:", err);
+      setError(err.message || "Erro ao carregar dados");
+      // Em caso de erro, definir arrays vazios para evitar tela branca
+      setMembros([]);
+      setEventos([]);
+      setTransacoes([]);
+    } finally {
+      setIsLoading(false);
+    }
+  }, []);
 
+  useEffect(() => {
     loadData();
-  }, []);
+  }, [loadData]);
+
+  // Recarregar em segundo plano quando o servidor publicar mudanças (membros, transações, presenças)
+  useTempoReal(['dashboard'], () => {
+    loadData(true);
+  });
 
   // Calcular estatísticas
   const totalMembros = membros.length;
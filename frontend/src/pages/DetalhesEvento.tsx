@@ -10,12 +10,26 @@ import { useEventPresences, useConfirmPresence } from '@/hooks/useEventPresence'
 import { EventComments } from '@/components/events/EventComments'
 import { Skeleton } from '@/components/ui/skeleton'
 import { toast } from 'sonner'
+import { useQueryClient } from '@tanstack/react-query'
+import { useTempoReal } from '@/hooks/useTempoReal'
 
 export default function DetalhesEvento() {
   const { id } = useParams<{ id: string }>()
   const navigate = useNavigate()
   
   const { data: evento, isLoading, error } = useEvento(Number(id))
+  const queryClient = useQueryClient()
+
+  // Atualizações ao vivo de presenças e comentários deste evento
+  useTempoReal(id ? [`evento:${id}`] : [], (mensagem) => {
+    if (mensagem.tipo === 'presencas') {
+      queryClient.setQueryData(['evento', Number(id)], (atual: any) =>
+        atual ? { ...atual, confirmados_count: mensagem.confirmados_count } : atual
+      )
+    } else if (mensagem.tipo === 'comentario') {
+      queryClient.invalidateQueries({ queryKey: ['eventComments', Number(id)] })
+    }
+  })
   const { canManage, user } = usePermissions()
   const confirmPresenceMutation = useConfirmPresence()
   
@@ -12,12 +12,15 @@ import {
   TableHeader,
   TableRow,
 } from "@/components/ui/table";
-import { useTransacoes } from "@/hooks/useTransacoes";
+import { useExtrato, useTransacoes } from "@/hooks/useTransacoes";
 import { toast } from "sonner";
 
 export default function Financas() {
   // Buscar transações da API
   const { data: transacoes = [], isLoading, error } = useTransacoes();
+  // Extrato com saldo corrente calculado no servidor, carregado por páginas
+  const extrato = useExtrato({ limite: 50 });
+  const linhasExtrato = extrato.data?.pages.flatMap((pagina) => pagina.results) ?? [];
   const { canManage } = usePermissions();
   
   // Verificar se o usuário pode gerenciar finanças (criar, editar, deletar)
@@ -303,67 +306,85 @@ export default function Financas() {
         </Card>
       </div>
 
-      {/* Detailed Transactions */}
+      {/* Extrato */}
       <Card className="shadow-card">
         <CardHeader>
-          <CardTitle>Todas as Transações</CardTitle>
+          <CardTitle>Extrato</CardTitle>
           <CardDescription>
-            Histórico completo de movimentações financeiras
+            Histórico completo de movimentações com saldo após cada lançamento
           </CardDescription>
         </CardHeader>
         <CardContent>
-          {isLoading ? (
+          {extrato.isLoading ? (
             <div className="flex items-center justify-center py-8">
               <Loader2 className="h-6 w-6 animate-spin" />
-              <span className="ml-2">Carregando transações...</span>
+              <span className="ml-2">Carregando extrato...</span>
             </div>
           ) : (
-            <Table>
-              <TableHeader>
-                <TableRow>
-                  <TableHead>Data</TableHead>
-                  <TableHead>Tipo</TableHead>
-                  <TableHead>Categoria</TableHead>
-                  <TableHead>Descrição</TableHead>
-                  <TableHead>Método</TableHead>
-                  <TableHead className="text-right">Valor</TableHead>
-                </TableRow>
-              </TableHeader>
-              <TableBody>
-                {transacoes.length === 0 ? (
+            <>
+              <Table>
+                <TableHeader>
                   <TableRow>
-                    <TableCell colSpan={6} className="text-center py-8">
-                      <p className="text-muted-foreground">Nenhuma transação encontrada</p>
+                    <TableHead>Data</TableHead>
+                    <TableHead>Tipo</TableHead>
+                    <TableHead>Categoria</TableHead>
+                    <TableHead>Descrição</TableHead>
+                    <TableHead>Método</TableHead>
+                    <TableHead className="text-right">Valor</TableHead>
+                    <TableHead className="text-right">Saldo</TableHead>
+                  </TableRow>
+                </TableHeader>
+                <TableBody>
+                  {linhasExtrato.length === 0 ? (
+                    <TableRow>
+                      <TableCell colSpan={7} className="text-center py-8">
+                        <p className="text-muted-foreground">Nenhuma transação encontrada</p>
+                      </TableCell>
+                    </TableRow>
+                  ) : (
+                    linhasExtrato.map((linha) => (
+                  <TableRow key={linha.id} className="hover:bg-accent/50 transition-smooth">
+                    <TableCell>{new Date(`${linha.data}T00:00:00`).toLocaleDateString('pt-BR')}</TableCell>
+                    <TableCell>
+                      <Badge
+                        variant={linha.tipo === "entrada" ? "default" : "secondary"}
+                        className={linha.tipo === "entrada" ? 
+                          "bg-green-100 text-green-800 dark:bg-green-900 dark:text-green-200" : 
+                          "bg-red-100 text-red-800 dark:bg-red-900 dark:text-red-200"
+                        }
+                      >
+                        {linha.tipo === "entrada" ? "Entrada" : "Saída"}
+                      </Badge>
+                    </TableCell>
+                    <TableCell className="font-medium">{linha.categoria}</TableCell>
+                    <TableCell>{linha.descricao || 'Sem descrição'}</TableCell>
+                    <TableCell>{linha.metodo_pagamento || 'Não informado'}</TableCell>
+                    <TableCell className={`text-right font-medium ${
+                      linha.tipo === "entrada" ? "text-green-600" : "text-red-600"
+                    }`}>
+                      {linha.tipo === "entrada" ? "+" : "-"}R$ {parseFloat(linha.valor).toLocaleString('pt-BR')}
+                    </TableCell>
+                    <TableCell className="text-right font-medium">
+                      R$ {parseFloat(linha.saldo).toLocaleString('pt-BR')}
                     </TableCell>
                   </TableRow>
-                ) : (
-                  transacoes.map((transacao) => (
-                <TableRow key={transacao.id} className="hover:bg-accent/50 transition-smooth">
-                  <TableCell>{new Date(transacao.data).toLocaleDateString('pt-BR')}</TableCell>
-                  <TableCell>
-                    <Badge
-                      variant={transacao.tipo === "entrada" ? "default" : "secondary"}
-                      className={transacao.tipo === "entrada" ? 
-                        "bg-green-100 text-green-800 dark:bg-green-900 dark:text-green-200" : 
-                        "bg-red-100 text-red-800 dark:bg-red-900 dark:text-red-200"
-                      }
-                    >
-                      {transacao.tipo === "entrada" ? "Entrada" : "Saída"}
-                    </Badge>
-                  </TableCell>
-                  <TableCell className="font-medium">{transacao.categoria}</TableCell>
-                  <TableCell>{transacao.descricao || 'Sem descrição'}</TableCell>
-                  <TableCell>{transacao.metodo_pagamento || 'Não informado'}</TableCell>
-                  <TableCell className={`text-right font-medium ${
-                    transacao.tipo === "entrada" ? "text-green-600" : "text-red-600"
-                  }`}>
-                    {transacao.tipo === "entrada" ? "+" : "-"}R$ {parseFloat(transacao.valor.toString()).toLocaleString('pt-BR')}
-                  </TableCell>
-                </TableRow>
-                  ))
-                )}
-              </TableBody>
-            </Table>
+                    ))
+                  )}
+                </TableBody>
+              </Table>
+              {extrato.hasNextPage && (
+                <div className="flex justify-center pt-4">
+                  <Button
+                    variant="outline"
+                    onClick={() => extrato.fetchNextPage()}
+                    disabled={extrato.isFetchingNextPage}
+                  >
+                    {extrato.isFetchingNextPage && <Loader2 className="mr-2 h-4 w-4 animate-spin" />}
+                    Carregar mais
+                  </Button>
+                </div>
+              )}
+            </>
           )}
         </CardContent>
       </Card>
@@ -8,12 +8,13 @@ import { Textarea } from "@/components/ui/textarea";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
 import { ArrowLeft, Save, DollarSign, Plus, Minus, Loader2 } from "lucide-react";
 import { useToast } from "@/hooks/use-toast";
-import { useCreateTransacao } from "@/hooks/useTransacoes";
+import { useCategoriasFinanceiras, useCreateTransacao } from "@/hooks/useTransacoes";
 
 export default function NovaTransacao() {
   const navigate = useNavigate();
   const { toast } = useToast();
   const createTransacaoMutation = useCreateTransacao();
+  const { data: categoriasExistentes = [] } = useCategoriasFinanceiras();
   
   const [formData, setFormData] = useState({
     tipo: "entrada" as "entrada" | "saida",
@@ -47,6 +48,17 @@ export default function NovaTransacao() {
     "Outros"
   ];
 
+  // Categorias padrão do tipo + as já usadas (sem repetir grafias da mesma categoria)
+  const opcoesCategoria = [
+    ...(formData.tipo === "entrada" ? categoriasEntrada : categoriasSaida),
+    ...categoriasExistentes.map((categoria) => categoria.nome),
+  ].filter((nome, indice, lista) => {
+    const chave = nome.normalize("NFD").replace(/[\u0300-\u036f]/g, "").toLowerCase();
+    return lista.findIndex((outro) =>
+      outro.normalize("NFD").replace(/[\u0300-\u036f]/g, "").toLowerCase() === chave
+    ) === indice;
+  });
+
   const metodosPagamento = [
     "Dinheiro",
     "PIX",
@@ -195,7 +207,7 @@ export default function NovaTransacao() {
                     <SelectValue placeholder="Selecione a categoria" />
                   </SelectTrigger>
                   <SelectContent>
-                    {(formData.tipo === "entrada" ? categoriasEntrada : categoriasSaida).map((categoria) => (
+                    {opcoesCategoria.map((categoria) => (
                       <SelectItem key={categoria} value={categoria}>
                         {categoria}
                       </SelectItem>
@@ -38,9 +38,9 @@ export default function NovoEvento() {
     }
   };
 
-  const handleImageUpload = async (file: File): Promise<string> => {
+  const handleImageUpload = async (file: File, onProgress?: (percent: number) => void): Promise<string> => {
     try {
-      const result = await uploadImage(file, 'eventos');
+      const result = await uploadImage(file, 'eventos', undefined, onProgress);
       setFotosUrls(prev => [...prev, result.url]);
       return result.url;
     } catch (error: any) {
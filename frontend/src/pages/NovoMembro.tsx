@@ -48,9 +48,9 @@ export default function NovoMembro() {
     }
   };
 
-  const handleImageUpload = async (file: File): Promise<string> => {
+  const handleImageUpload = async (file: File, onProgress?: (percent: number) => void): Promise<string> => {
     try {
-      const result = await uploadImage(file, 'membros');
+      const result = await uploadImage(file, 'membros', undefined, onProgress);
       setFotoUrl(result.url);
       return result.url;
     } catch (error: any) {